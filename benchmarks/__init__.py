@@ -0,0 +1 @@
+"""Micro-benchmarks for pfts, run as ``python -m benchmarks.<name>``."""
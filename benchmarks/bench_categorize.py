@@ -0,0 +1,113 @@
+"""Measures rule based categorization against trying rules one by one.
+
+Run with ``python -m benchmarks.bench_categorize``. Hundreds of generated
+keyword and pattern rules are compiled, then a generated ledger is
+categorized, and a sample of rows is categorized by searching every rule's
+regex in turn, the way a plain loop would.
+"""
+
+import random
+import re
+import time
+
+from pfts.ledger import Ledger, categorize
+
+ROWS = 1_000_000
+RULES = 500
+DESCRIPTIONS = 20_000
+LOOP_ROWS = 20_000
+MERCHANTS = [f"merchant{number}" for number in range(2000)]
+
+
+def generate(seed: int) -> tuple[list[categorize.Rule], Ledger]:
+    """Generate rules, and a ledger whose descriptions some of them match.
+
+    :param seed: Seed of the generated values.
+    :type seed: int
+    :return: The rules and the ledger.
+    :rtype: tuple[list[categorize.Rule], Ledger]
+    """
+    rng = random.Random(seed)
+    rules = [
+        categorize.Rule(
+            f"category {number % 40}",
+            tuple(rng.sample(MERCHANTS, 3)),
+            (rf"^{rng.choice(MERCHANTS)} \d+",) if number % 5 == 0 else (),
+        )
+        for number in range(RULES)
+    ]
+    descriptions = [
+        f"POS {rng.choice(MERCHANTS).upper()} {rng.randrange(10000)} CITY"
+        for _ in range(DESCRIPTIONS)
+    ]
+    ledger = Ledger()
+    ledger.extend(
+        (19000 + row // 500, -100, "card", "", rng.choice(descriptions))
+        for row in range(ROWS)
+    )
+    return rules, ledger
+
+
+def rule_by_rule(rules: list[categorize.Rule], ledger: Ledger) -> int:
+    """Categorize the first LOOP_ROWS rows trying each rule's regex in turn.
+
+    :param rules: Rules to apply.
+    :type rules: list[categorize.Rule]
+    :param ledger: Ledger whose descriptions are categorized.
+    :type ledger: Ledger
+    :return: Rows matched.
+    :rtype: int
+    """
+    compiled = [
+        re.compile(
+            "|".join(
+                [rf"\b{re.escape(word)}\b" for word in rule.keywords]
+                + list(rule.patterns)
+            ),
+            re.IGNORECASE,
+        )
+        for rule in rules
+    ]
+    matched = 0
+    for row in range(LOOP_ROWS):
+        description = ledger[row].description
+        for regex in compiled:
+            if regex.search(description):
+                matched += 1
+                break
+    return matched
+
+
+def main() -> None:
+    """Time the compiled rules and the rule by rule loop."""
+    rules, ledger = generate(seed=1)
+
+    start = time.perf_counter()
+    categorizer = categorize.Categorizer(rules)
+    print(
+        f"Compile {RULES} rules: {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+    result = categorize.categorize_ledger(ledger, categorizer, dry_run=True)
+    print(
+        f"Categorize {ROWS:,} rows, {DESCRIPTIONS:,} descriptions: "
+        f"{result.seconds:.2f}s ({ROWS / result.seconds:,.0f} rows/sec), "
+        f"{len(result.changes):,} matched"
+    )
+    result = categorize.categorize_ledger(ledger, categorizer, dry_run=True)
+    print(
+        f"Again, descriptions cached: {result.seconds:.2f}s "
+        f"({ROWS / result.seconds:,.0f} rows/sec)"
+    )
+
+    start = time.perf_counter()
+    rule_by_rule(rules, ledger)
+    seconds = time.perf_counter() - start
+    print(
+        f"Rule by rule, {LOOP_ROWS:,} rows: {seconds:.2f}s "
+        f"({LOOP_ROWS / seconds:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
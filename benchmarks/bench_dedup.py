@@ -0,0 +1,112 @@
+"""Measures the duplicate index against pairwise comparison.
+
+Run with ``python -m benchmarks.bench_dedup``. A generated ledger is
+indexed, saved and loaded again, then a statement that half overlaps it
+is screened. Pairwise comparison is only timed on a small sample and
+extrapolated, since it grows with ledger rows times statement rows.
+"""
+
+import pathlib
+import random
+import tempfile
+import time
+
+from pfts.ledger import Ledger, dedup
+
+LEDGER_ROWS = 1_000_000
+STATEMENT_ROWS = 20_000
+PAIRWISE_SAMPLE = 200
+
+
+def generate(rows: int, seed: int) -> list[tuple[int, int, str, str, str]]:
+    """Generate ledger rows spread over three years and four accounts.
+
+    :param rows: Rows to generate.
+    :type rows: int
+    :param seed: Seed of the generated values.
+    :type seed: int
+    :return: Rows of day, cents, account, category, description.
+    :rtype: list[tuple[int, int, str, str, str]]
+    """
+    rng = random.Random(seed)
+    return [
+        (
+            19000 + rng.randrange(1100),
+            rng.randrange(-50000, 10000),
+            f"account {rng.randrange(4)}",
+            "",
+            f"MERCHANT {rng.randrange(5000)}",
+        )
+        for _ in range(rows)
+    ]
+
+
+def pairwise(
+    ledger_rows: list[tuple[int, int, str, str, str]],
+    statement: list[tuple[int, int, str, str, str]],
+) -> int:
+    """Count duplicates by comparing every statement row to every row.
+
+    :param ledger_rows: Rows already in the ledger.
+    :type ledger_rows: list[tuple[int, int, str, str, str]]
+    :param statement: Rows to check.
+    :type statement: list[tuple[int, int, str, str, str]]
+    :return: Statement rows found in the ledger.
+    :rtype: int
+    """
+    found = 0
+    for day, cents, account, _, description in statement:
+        for other in ledger_rows:
+            if (
+                abs(other[0] - day) <= dedup.DEFAULT_WINDOW
+                and other[1] == cents
+                and other[2] == account
+                and dedup.normalize_description(other[4])
+                == dedup.normalize_description(description)
+            ):
+                found += 1
+                break
+    return found
+
+
+def main() -> None:
+    """Time building, loading and screening against the index."""
+    rows = generate(LEDGER_ROWS, seed=1)
+    ledger = Ledger()
+    ledger.extend(rows)
+    half = STATEMENT_ROWS // 2
+    statement = rows[-half:] + generate(half, seed=2)
+
+    start = time.perf_counter()
+    index = dedup.DedupIndex(ledger)
+    index.update()
+    index.exact.compact()
+    index.fuzzy.compact()
+    print(f"Index {LEDGER_ROWS:,} rows: {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index.save(pathlib.Path(tmp_dir))
+        start = time.perf_counter()
+        index = dedup.DedupIndex.load(pathlib.Path(tmp_dir), ledger)
+        print(f"Load saved index: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    matches = index.screen(statement, set())
+    seconds = time.perf_counter() - start
+    found = sum(match is not None for match in matches)
+    print(
+        f"Screen {STATEMENT_ROWS:,} rows: {found:,} duplicates in "
+        f"{seconds:.2f}s ({STATEMENT_ROWS / seconds:,.0f} rows/sec)"
+    )
+
+    start = time.perf_counter()
+    pairwise(rows, statement[half : half + PAIRWISE_SAMPLE])
+    per_row = (time.perf_counter() - start) / PAIRWISE_SAMPLE
+    print(
+        f"Pairwise, extrapolated from {PAIRWISE_SAMPLE} rows: "
+        f"{per_row * STATEMENT_ROWS:,.0f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measures statement import throughput, and the memory of the pipeline.
+
+Run with ``python -m benchmarks.bench_import``. CSV statements of growing
+size are generated into a temporary directory. The peak memory of the
+parsing pipeline is traced without the ledger it feeds, and should stay
+flat as statements grow.
+"""
+
+import logging
+import pathlib
+import random
+import tempfile
+import time
+import tracemalloc
+
+from pfts.ledger import Ledger, importers
+
+SIZES = [100_000, 400_000]
+FILES = 4
+
+
+def write_statement(filepath: pathlib.Path, rows: int, seed: int) -> None:
+    """Write a generated CSV statement.
+
+    :param filepath: Where to write the statement.
+    :type filepath: pathlib.Path
+    :param rows: Transactions in the statement.
+    :type rows: int
+    :param seed: Seed of the generated values.
+    :type seed: int
+    """
+    rng = random.Random(seed)
+    with open(filepath, "w") as fout:
+        fout.write("Date,Description,Amount\n")
+        for _ in range(rows):
+            fout.write(
+                f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d},"
+                f"MERCHANT {rng.randrange(5000)},"
+                f"{rng.randrange(-50000, 10000) / 100:.2f}\n"
+            )
+
+
+def pipeline_peak(filepath: pathlib.Path) -> float:
+    """Peak memory of parsing a statement, in megabytes.
+
+    :param filepath: Statement to parse.
+    :type filepath: pathlib.Path
+    :return: Peak traced allocation.
+    :rtype: float
+    """
+    rows = importers.iter_rows(filepath)
+    tracemalloc.start()
+    for _ in importers.batched(rows, importers.BATCH_SIZE):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak / (1 << 20)
+
+
+def main() -> None:
+    """Print pipeline memory per size, then serial and parallel rows/sec."""
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in SIZES:
+            filepath = pathlib.Path(tmp_dir) / f"flat_{size}.csv"
+            write_statement(filepath, size, 0)
+            mb = filepath.stat().st_size / (1 << 20)
+            print(
+                f"{size:>9,} rows ({mb:5.1f} MB): "
+                f"pipeline peak {pipeline_peak(filepath):5.2f} MB"
+            )
+
+        statements = []
+        for idx in range(FILES):
+            filepath = pathlib.Path(tmp_dir) / f"statement_{idx}.csv"
+            write_statement(filepath, SIZES[0], idx)
+            statements.append(filepath)
+
+        for workers in (1, FILES):
+            start = time.perf_counter()
+            stats = importers.import_files(
+                Ledger(), statements, workers=workers
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{workers} worker(s): {stats.rows:,} rows in {elapsed:.2f}s "
+                f"({stats.rows / elapsed:,.0f} rows/sec)"
+            )
+
+
+if __name__ == "__main__":
+    main()
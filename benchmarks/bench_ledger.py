@@ -0,0 +1,90 @@
+"""Measures memory per transaction, and filter and aggregation speed.
+
+Run with ``python -m benchmarks.bench_ledger``. A ledger of generated
+transactions is compared against the same rows kept as a list of
+Transaction tuples.
+"""
+
+import datetime
+import random
+import time
+import tracemalloc
+
+from pfts.ledger import Ledger, Transaction, from_days, to_days
+
+ROWS = 1_000_000
+ACCOUNTS = ["checking", "savings", "credit"]
+CATEGORIES = ["groceries", "rent", "dining", "travel", "utilities", ""]
+MERCHANTS = [f"MERCHANT {idx}" for idx in range(2_000)]
+
+
+def generate_rows(count: int) -> list[tuple[int, int, str, str, str]]:
+    """Create random rows over five years.
+
+    :param count: Number of rows.
+    :type count: int
+    :return: Rows of day, cents, account, category, description.
+    :rtype: list[tuple[int, int, str, str, str]]
+    """
+    rng = random.Random(42)
+    start = to_days(datetime.date(2020, 1, 1))
+    return [
+        (
+            start + rng.randrange(5 * 365),
+            rng.randrange(-50_000, 10_000),
+            rng.choice(ACCOUNTS),
+            rng.choice(CATEGORIES),
+            rng.choice(MERCHANTS),
+        )
+        for _ in range(count)
+    ]
+
+
+def timed(label: str, func) -> None:
+    """Print how long a call takes.
+
+    :param label: What is being timed.
+    :type label: str
+    :param func: Callable to time.
+    :type func: Callable
+    """
+    start = time.perf_counter()
+    func()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    """Print memory per row, then filter and aggregation timings."""
+    rows = generate_rows(ROWS)
+
+    tracemalloc.start()
+    ledger = Ledger()
+    ledger.extend(rows)
+    ledger_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    objects = [Transaction(from_days(r[0]), *r[1:]) for r in rows]
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+
+    print(f"{ROWS:,} transactions")
+    print(f"{'ledger bytes/row':<28} {ledger_bytes / ROWS:8.1f}")
+    print(f"{'tuple list bytes/row':<28} {object_bytes / ROWS:8.1f}")
+
+    since = datetime.date(2022, 1, 1)
+    until = datetime.date(2022, 12, 31)
+    mask = ledger.select(since, until, categories=["groceries", "dining"])
+
+    timed(
+        "select date + category",
+        lambda: ledger.select(since, until, categories=["groceries"]),
+    )
+    timed("total of selection", lambda: ledger.total(mask))
+    timed("group by category", lambda: ledger.group_totals("category"))
+    timed("group by month", lambda: ledger.group_totals("month"))
+
+
+if __name__ == "__main__":
+    main()
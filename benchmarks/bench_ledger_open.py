@@ -0,0 +1,93 @@
+"""Measures opening a saved ledger, and saving rows appended to it.
+
+Run with ``python -m benchmarks.bench_ledger_open``. A ledger of generated
+transactions is saved, then opened by mapping its files. Saving a few
+appended rows is compared against rewriting every file.
+"""
+
+import datetime
+import pathlib
+import random
+import tempfile
+import time
+
+from pfts.ledger import Ledger, to_days
+
+ROWS = 3_000_000
+APPENDED = 1_000
+ACCOUNTS = ["checking", "savings", "credit"]
+CATEGORIES = ["groceries", "rent", "dining", "travel", "utilities", ""]
+DESCRIPTIONS = [f"MERCHANT {idx} STORE {idx % 97}" for idx in range(50_000)]
+
+
+def generate(count: int, seed: int) -> Ledger:
+    """Create a ledger of random rows over five years.
+
+    :param count: Number of rows.
+    :type count: int
+    :param seed: Seed of the generated values.
+    :type seed: int
+    :return: The ledger.
+    :rtype: Ledger
+    """
+    rng = random.Random(seed)
+    start = to_days(datetime.date(2020, 1, 1))
+    ledger = Ledger()
+    ledger.extend(
+        (
+            start + rng.randrange(5 * 365),
+            rng.randrange(-50_000, 10_000),
+            rng.choice(ACCOUNTS),
+            rng.choice(CATEGORIES),
+            rng.choice(DESCRIPTIONS),
+        )
+        for _ in range(count)
+    )
+    return ledger
+
+
+def best_of(repeats: int, func) -> float:
+    """Fastest of several calls, in milliseconds.
+
+    :param repeats: Calls to make.
+    :type repeats: int
+    :param func: Callable to time.
+    :type func: Callable
+    :return: Milliseconds taken by the fastest call.
+    :rtype: float
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    """Time opening, querying and saving a generated ledger."""
+    ledger = generate(ROWS, seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mapped_dir = pathlib.Path(tmp) / "mapped"
+        ledger.save(mapped_dir)
+
+        opened = best_of(20, lambda: Ledger.load(mapped_dir))
+        print(f"Open {ROWS:,} mapped rows: {opened:.2f}ms")
+        book = Ledger.load(mapped_dir)
+        first = best_of(1, lambda: book[ROWS // 2])
+        print(f"First row lookup: {first:.3f}ms")
+        total = best_of(1, book.total)
+        print(f"First total, paging in the amounts: {total:.1f}ms")
+
+        book.extend(
+            (19000, -100, "cash", "", f"ATM {row}") for row in range(APPENDED)
+        )
+        appended = best_of(1, lambda: book.save(mapped_dir))
+        print(f"Save {APPENDED:,} appended rows: {appended:.1f}ms")
+        rewritten = best_of(1, lambda: book.save(mapped_dir, rewrite=True))
+        print(f"Rewrite every file: {rewritten:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measures loan payoff sweeps and debt strategies against monthly loops.
+
+Run with ``python -m benchmarks.bench_loans``. A grid of rates by extra
+payments is swept from the closed form, cold and then from the memo, and
+against a loop paying each scenario off month by month. Debt payoff
+strategies are timed the same way.
+"""
+
+import itertools
+import random
+import time
+
+from pfts import loans
+
+PRINCIPAL = 300_000
+MONTHS = 360
+RATES = [0.02 + 0.0001 * step for step in range(100)]
+EXTRAS = [10.0 * step for step in range(100)]
+
+
+def monthly_loop(principal: float, annual_rate: float, payment: float) -> int:
+    """Pay off a loan month by month, the way a straightforward loop would.
+
+    :param principal: Amount borrowed.
+    :type principal: float
+    :param annual_rate: Annual interest rate.
+    :type annual_rate: float
+    :param payment: Monthly payment.
+    :type payment: float
+    :return: Months to pay off the loan.
+    :rtype: int
+    """
+    balance, months = principal, 0
+    while balance >= loans.PAID_OFF:
+        balance = balance * (1 + annual_rate / 12)
+        balance -= min(payment, balance)
+        months += 1
+    return months
+
+
+def main() -> None:
+    """Time the sweeps and the debt strategies."""
+    scenarios = len(RATES) * len(EXTRAS)
+    for label in ("cold", "memoized"):
+        start = time.perf_counter()
+        loans.sweep(PRINCIPAL, MONTHS, RATES, EXTRAS)
+        seconds = time.perf_counter() - start
+        print(
+            f"Sweep of {scenarios:,} scenarios, {label}: "
+            f"{seconds * 1000:.1f}ms ({scenarios / seconds:,.0f}/sec)"
+        )
+
+    start = time.perf_counter()
+    for rate, extra in itertools.product(RATES, EXTRAS):
+        payment = loans.monthly_payment(PRINCIPAL, rate, MONTHS)
+        monthly_loop(PRINCIPAL, rate, payment + extra)
+    print(f"Monthly loops: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    loans.schedule(PRINCIPAL, 0.05, 1700)
+    print(f"Full schedule: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    rng = random.Random(1)
+    debts = []
+    for number in range(20):
+        balance = rng.uniform(500, 50_000)
+        rate = rng.uniform(0.02, 0.3)
+        # Minimums cover the interest and 1% of the balance.
+        minimum = balance * (rate / 12 + 0.01)
+        debts.append(loans.Debt(f"debt {number}", balance, rate, minimum))
+    budget = sum(debt.minimum for debt in debts) + 1000
+    start = time.perf_counter()
+    results = loans.compare_strategies(debts, budget)
+    print(
+        f"Strategies for {len(debts)} debts over {results[0].months} months: "
+        f"{(time.perf_counter() - start) * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Measures the cost of log_context when DEBUG logging is disabled.
+
+Run with ``python -m benchmarks.bench_log_context``. A decorated call is
+compared against the undecorated function, and against a bare wrapper that
+only passes its arguments on, which is the least any decorator costs.
+Exits with status 1 if a decorated call is more than ``--max-overhead``
+percent slower than an undecorated one.
+"""
+
+import argparse
+import functools
+import logging
+import statistics
+import sys
+import timeit
+from typing import Callable
+
+from pfts.util import general
+from pfts.util import logging as pfts_log
+
+VERSION_LINE = "__version__ = '1.2.3'\n"
+NUMBER = 10_000
+ROUNDS = 41
+MAX_OVERHEAD = 20.0
+
+
+def rounds(*stmts: Callable) -> list[list[float]]:
+    """Time statements in interleaved rounds, in nanoseconds per call.
+
+    Every round times each statement once, back to back, so machine noise
+    hits the statements of a round alike and comparing them within a round
+    cancels most of it out.
+
+    :param stmts: Zero argument callables to time.
+    :type stmts: Callable
+    :return: Nanoseconds per call of each statement, per round.
+    :rtype: list[list[float]]
+    """
+    return [
+        [timeit.timeit(stmt, number=NUMBER) / NUMBER * 1e9 for stmt in stmts]
+        for _ in range(ROUNDS)
+    ]
+
+
+def bare_wrapper(func: Callable) -> Callable:
+    """Wrap a function in a decorator that does nothing else.
+
+    :param func: Function to wrap.
+    :type func: Callable
+    :return: The wrapped function.
+    :rtype: Callable
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def main(arg_list: list[str] | None = None) -> int:
+    """Compare undecorated and decorated calls on a disabled logger.
+
+    :param arg_list: Command line arguments, defaults to None (sys.argv)
+    :type arg_list: list[str] | None, optional
+    :return: Exit status, 1 if log_context costs more than allowed.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--max-overhead", type=float, default=MAX_OVERHEAD, metavar="PERCENT"
+    )
+    args = parser.parse_args(arg_list)
+
+    pfts_log.logger.setLevel(logging.WARNING)
+
+    decorated = general.split_version_line
+    undecorated = decorated.__wrapped__
+    bare = bare_wrapper(undecorated)
+
+    timings = rounds(
+        lambda: undecorated(VERSION_LINE),
+        lambda: bare(VERSION_LINE),
+        lambda: decorated(VERSION_LINE),
+    )
+    base, minimal, wrapped = map(statistics.median, zip(*timings))
+    overhead = statistics.median(
+        (traced - plain) / plain * 100 for plain, _, traced in timings
+    )
+    # What log_context adds on top of passing the call on.
+    own = statistics.median(
+        (traced - passed) / plain * 100 for plain, passed, traced in timings
+    )
+
+    print(f"undecorated:  {base:8.1f} ns/call")
+    print(f"bare wrapper: {minimal:8.1f} ns/call")
+    print(f"log_context:  {wrapped:8.1f} ns/call")
+    print(f"own overhead: {own:8.1f} %")
+    print(f"overhead:     {overhead:8.1f} % (max {args.max_overhead:.1f} %)")
+
+    if overhead > args.max_overhead:
+        print("REGRESSED: log_context costs more than allowed.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
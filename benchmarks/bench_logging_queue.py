@@ -0,0 +1,64 @@
+"""Compares logging throughput of direct handlers against the queue mode.
+
+Run with ``python -m benchmarks.bench_logging_queue``. Logs are written into
+a temporary directory so the real ``logs/app.log`` is left untouched.
+"""
+
+import contextlib
+import logging
+import os
+import tempfile
+import time
+
+from pfts.util import logging as pfts_log
+
+RECORDS = 50_000
+
+
+def records_per_second(use_queue: bool) -> tuple[float, float]:
+    """Log RECORDS info messages and time them.
+
+    :param use_queue: Whether to configure logging with the queue listener.
+    :type use_queue: bool
+    :return: Records/sec seen by the caller, and records/sec including the
+        time it takes to drain the queue.
+    :rtype: tuple[float, float]
+    """
+    bench_logger = logging.getLogger("pfts.bench")
+
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stderr(devnull):
+            pfts_log.setup_logging(logging.INFO, use_queue=use_queue)
+
+            start = time.perf_counter()
+            for idx in range(RECORDS):
+                bench_logger.info("Benchmark record %d", idx)
+            caller_done = time.perf_counter()
+
+            pfts_log.stop_logging_queue()
+            drained = time.perf_counter()
+
+    return RECORDS / (caller_done - start), RECORDS / (drained - start)
+
+
+def main() -> None:
+    """Print records/sec for both logging configurations."""
+    orig_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        os.mkdir("logs")
+        try:
+            direct, _ = records_per_second(use_queue=False)
+            queued, queued_drained = records_per_second(use_queue=True)
+        finally:
+            logging.shutdown()
+            os.chdir(orig_cwd)
+
+    print(f"direct handlers: {direct:12,.0f} records/sec")
+    print(f"queue (caller):  {queued:12,.0f} records/sec")
+    print(f"queue (drained): {queued_drained:12,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    main()
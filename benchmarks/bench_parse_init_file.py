@@ -0,0 +1,112 @@
+"""Compares version scanning of large files, readlines against mmap.
+
+Run with ``python -m benchmarks.bench_parse_init_file``. Generated modules
+of several megabytes are written into a temporary directory, with the
+``__version__`` line near the start, in the middle, and missing entirely.
+"""
+
+import logging
+import pathlib
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from pfts.util import parsing
+
+SIZES_MB = [4, 32]
+REPEATS = 5
+FILLER_LINE = "GENERATED_TABLE_ENTRY = ('some generated data', 12345)\n"
+
+
+def readlines_scan(filepath: pathlib.Path) -> int:
+    """The previous parse_init_file, which read every line into a list.
+
+    :param filepath: File to scan.
+    :type filepath: pathlib.Path
+    :return: Line index of __version__, -1 if missing.
+    :rtype: int
+    """
+    with open(filepath, "r") as fin:
+        for idx, line in enumerate(fin.readlines()):
+            if "__version__" in line:
+                return idx
+    return -1
+
+
+def write_module(
+    filepath: pathlib.Path, size_mb: int, position: float | None
+) -> None:
+    """Write a generated module with a version line somewhere in it.
+
+    :param filepath: File to write.
+    :type filepath: pathlib.Path
+    :param size_mb: Approximate size of the file.
+    :type size_mb: int
+    :param position: Fraction of the file before the version line, None
+        for no version line.
+    :type position: float | None
+    """
+    lines = size_mb * (1 << 20) // len(FILLER_LINE)
+    version_at = -1 if position is None else int(lines * position)
+
+    with open(filepath, "w") as fout:
+        for idx in range(lines):
+            if idx == version_at:
+                fout.write("__version__ = '1.2.3'\n")
+            fout.write(FILLER_LINE)
+
+
+def measure(
+    scan: Callable[[pathlib.Path], int], filepath: pathlib.Path
+) -> tuple[float, float]:
+    """Time a scan, and trace the memory it allocates.
+
+    :param scan: Scanning function.
+    :type scan: Callable[[pathlib.Path], int]
+    :param filepath: File to scan.
+    :type filepath: pathlib.Path
+    :return: Best time in milliseconds, and peak allocation in megabytes.
+    :rtype: tuple[float, float]
+    """
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        scan(filepath)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    scan(filepath)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best * 1000, peak / (1 << 20)
+
+
+def main() -> None:
+    """Print time and peak allocation of both scans per input."""
+    logging.disable(logging.WARNING)
+
+    cases = {"start": 0.01, "middle": 0.5, "missing": None}
+
+    print(f"{'input':>16} {'readlines':>22} {'mmap':>22}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in SIZES_MB:
+            for name, position in cases.items():
+                filepath = pathlib.Path(tmp_dir) / f"{name}_{size_mb}.py"
+                write_module(filepath, size_mb, position)
+
+                old_ms, old_mb = measure(readlines_scan, filepath)
+                new_ms, new_mb = measure(parsing.parse_init_file, filepath)
+
+                print(
+                    f"{size_mb:>4} MB {name:>8}  "
+                    f"{old_ms:8.2f} ms {old_mb:7.1f} MB  "
+                    f"{new_ms:8.2f} ms {new_mb:7.2f} MB"
+                )
+
+                filepath.unlink()
+
+
+if __name__ == "__main__":
+    main()
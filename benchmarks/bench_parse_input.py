@@ -0,0 +1,45 @@
+"""Compares parse calls per second with and without the parser cache.
+
+Run with ``python -m benchmarks.bench_parse_input``.
+"""
+
+import logging
+import time
+
+from pfts.util import parsing
+
+CALLS = 20_000
+ARG_VECTORS = [[], ["--dev"], ["--dev", "-v", "minor"], ["--vbump"]]
+
+
+def calls_per_second(parse) -> float:
+    """Parse CALLS argument vectors, cycling through ARG_VECTORS.
+
+    :param parse: Callable taking a list of arguments.
+    :type parse: Callable
+    :return: Parses per second.
+    :rtype: float
+    """
+    start = time.perf_counter()
+    for idx in range(CALLS):
+        parse(ARG_VECTORS[idx % len(ARG_VECTORS)])
+    return CALLS / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Print parses/sec for a fresh parser per call and a cached one."""
+    logging.getLogger(parsing.__name__).setLevel(logging.WARNING)
+
+    build = parsing.PARSER_BUILDERS["version-bump"]
+    fresh = calls_per_second(lambda args: build().parse_args(args))
+    cached = calls_per_second(
+        lambda args: parsing.parse_input(args, "version-bump")
+    )
+
+    print(f"fresh parser:  {fresh:10,.0f} parses/sec")
+    print(f"cached parser: {cached:10,.0f} parses/sec")
+    print(f"speedup:       {cached / fresh:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measures the budget report over a multi-year ledger.
+
+Run with ``python -m benchmarks.bench_report``. A ledger of generated
+transactions over five years is built in memory, then the budget report
+is timed against a plain per-row loop doing the same grouping.
+"""
+
+import random
+import time
+
+from pfts.ledger import Ledger, from_days, reports
+
+ROWS = 3_000_000
+CATEGORIES = [f"category {number}" for number in range(30)]
+FIRST_DAY = 19000  # 2022-01-08
+DAYS = 5 * 365
+
+
+def build_ledger(rows: int) -> Ledger:
+    """Generate a ledger.
+
+    :param rows: Transactions to generate.
+    :type rows: int
+    :return: The ledger.
+    :rtype: Ledger
+    """
+    rng = random.Random(1)
+    ledger = Ledger()
+    ledger.extend(
+        (
+            FIRST_DAY + rng.randrange(DAYS),
+            rng.randrange(-50000, 10000),
+            "checking",
+            rng.choice(CATEGORIES),
+            "",
+        )
+        for _ in range(rows)
+    )
+    return ledger
+
+
+def per_row_totals(ledger: Ledger) -> dict[tuple[str, str], int]:
+    """Group the way a loop over decoded rows would.
+
+    :param ledger: Ledger to aggregate.
+    :type ledger: Ledger
+    :return: Total in cents by category and month.
+    :rtype: dict[tuple[str, str], int]
+    """
+    totals: dict[tuple[str, str], int] = {}
+    for row in ledger.rows():
+        key = (row.category, row.date.strftime("%Y-%m"))
+        totals[key] = totals.get(key, 0) + row.amount
+    return totals
+
+
+def main() -> None:
+    """Time the report and the per-row loop."""
+    ledger = build_ledger(ROWS)
+    budget = {name: 100_000 for name in CATEGORIES[:20]}
+
+    start = time.perf_counter()
+    lines = reports.budget_report(ledger, budget)
+    seconds = time.perf_counter() - start
+    print(
+        f"Budget report, {ROWS:,} rows into {len(lines)} lines: "
+        f"{seconds:.2f}s ({ROWS / seconds:,.0f} rows/sec)"
+    )
+
+    start = time.perf_counter()
+    reports.budget_report(
+        ledger, budget, since=from_days(FIRST_DAY + DAYS - 365)
+    )
+    print(f"Last year only: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    per_row_totals(ledger)
+    print(f"Per-row loop: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Measures queries served from the rollups against full column scans.
+
+Run with ``python -m benchmarks.bench_rollups``. A generated ledger is
+rolled up once, then balances and period totals are timed from the
+rollups and from the columns, along with appending a batch of rows and
+editing an old one.
+"""
+
+import datetime
+import random
+import time
+
+from pfts.ledger import Ledger, rollups
+
+ROWS = 1_000_000
+APPEND = 10_000
+ACCOUNTS = [f"account {number}" for number in range(4)]
+CATEGORIES = [f"category {number}" for number in range(30)]
+
+
+def generate(rows: int, seed: int) -> Ledger:
+    """Generate a ledger over five years.
+
+    :param rows: Transactions to generate.
+    :type rows: int
+    :param seed: Seed of the generated values.
+    :type seed: int
+    :return: The ledger.
+    :rtype: Ledger
+    """
+    rng = random.Random(seed)
+    ledger = Ledger()
+    ledger.extend(
+        (
+            19000 + rng.randrange(5 * 365),
+            rng.randrange(-50000, 10000),
+            rng.choice(ACCOUNTS),
+            rng.choice(CATEGORIES),
+            "",
+        )
+        for _ in range(rows)
+    )
+    return ledger
+
+
+def timed(label: str, function, *args, **kwargs) -> None:
+    """Print how long a call takes.
+
+    :param label: What is being timed.
+    :type label: str
+    :param function: Function to call.
+    :type function: Callable
+    """
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    print(f"{label}: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+
+def main() -> None:
+    """Time the rollups and the column scans."""
+    ledger = generate(ROWS, seed=1)
+    totals = rollups.Rollups(ledger)
+    timed(f"Roll up {ROWS:,} rows", totals.update)
+    totals.totals()
+
+    since = datetime.date(2024, 1, 1)
+    until = datetime.date(2024, 3, 31)
+    timed(
+        "Quarter total, columns",
+        lambda: ledger.total(ledger.select(since, until)),
+    )
+    timed("Quarter total, rollups", totals.totals, since, until)
+    timed(
+        "Account balance, columns",
+        lambda: ledger.total(ledger.select(accounts=[ACCOUNTS[0]])),
+    )
+    timed("Account balance, rollups", totals.balance, ACCOUNTS[0])
+    timed("Totals by month, columns", ledger.group_totals, "month")
+    timed("Totals by month, rollups", totals.group_totals, "month")
+
+    ledger.merge(generate(APPEND, seed=2))
+    timed(f"Append {APPEND:,} rows", totals.update)
+    timed("Query after append", totals.totals)
+
+    old = ledger.edit(5, day=19010, cents=1)
+    timed("Edit an old row", totals.apply_edit, 5, old)
+    timed("Query after edit", totals.totals)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compares request latency of ``pfts serve`` with fresh pfts processes.
+
+Run with ``python -m benchmarks.bench_serve``. Requires Unix sockets.
+"""
+
+import os
+import statistics
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+
+from pfts.util.server import PftsClient
+
+REQUESTS = 500
+FRESH_PROCESSES = 20
+COMMAND = ["--dev"]
+
+RUN_PFTS = "from pfts.util.entrypoints import run_pfts; run_pfts({args!r})"
+
+
+def summarise(name: str, latencies: list[float]) -> None:
+    """Print latency statistics in milliseconds.
+
+    :param name: Label for the measurements.
+    :type name: str
+    :param latencies: Seconds taken by each request.
+    :type latencies: list[float]
+    """
+    ms = sorted(latency * 1_000 for latency in latencies)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(
+        f"{name:<16} median {statistics.median(ms):8.3f} ms  "
+        f"p99 {p99:8.3f} ms  ({1_000 / statistics.mean(ms):8.1f} cmds/sec)"
+    )
+
+
+def main() -> None:
+    """Time the same command through a warm server and fresh processes."""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=package_root)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.mkdir(os.path.join(tmp_dir, "logs"))
+        socket_path = os.path.join(tmp_dir, "pfts.sock")
+
+        fresh = []
+        for _ in range(FRESH_PROCESSES):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-c", RUN_PFTS.format(args=COMMAND)],
+                cwd=tmp_dir,
+                env=env,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )  # nosec B603
+            fresh.append(time.perf_counter() - start)
+
+        server_args = ["serve", "--socket", socket_path]
+        server = subprocess.Popen(
+            [sys.executable, "-c", RUN_PFTS.format(args=server_args)],
+            cwd=tmp_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )  # nosec B603
+        try:
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+
+            warm = []
+            with PftsClient(socket_path) as client:
+                for _ in range(REQUESTS):
+                    start = time.perf_counter()
+                    client.run(COMMAND)
+                    warm.append(time.perf_counter() - start)
+
+            PftsClient(socket_path).shutdown()
+            server.wait(timeout=10)
+        finally:
+            server.kill()
+
+    summarise("fresh process", fresh)
+    summarise("pfts serve", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Measures the SQLite backed ledger against the in-memory columnar one.
+
+Run with ``python -m benchmarks.bench_sqlite``. Generated transactions are
+imported into both, then the same totals, balances and group totals are
+timed on each, and the SQLite ledger is queried from several threads
+sharing its connection pool.
+"""
+
+import datetime
+import pathlib
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pfts.ledger import Ledger, sqlstore, to_days
+
+ROWS = 1_000_000
+REPEATS = 20
+THREADS = 4
+ACCOUNTS = ["checking", "savings", "credit"]
+CATEGORIES = ["groceries", "rent", "dining", "travel", "utilities", ""]
+MERCHANTS = [f"MERCHANT {idx}" for idx in range(2_000)]
+SINCE = datetime.date(2023, 1, 1)
+UNTIL = datetime.date(2023, 3, 31)
+
+
+def generate_rows(count: int) -> list[tuple[int, int, str, str, str]]:
+    """Create random rows over five years.
+
+    :param count: Number of rows.
+    :type count: int
+    :return: Rows of day, cents, account, category, description.
+    :rtype: list[tuple[int, int, str, str, str]]
+    """
+    rng = random.Random(42)
+    start = to_days(datetime.date(2020, 1, 1))
+    return [
+        (
+            start + rng.randrange(5 * 365),
+            rng.randrange(-50_000, 10_000),
+            rng.choice(ACCOUNTS),
+            rng.choice(CATEGORIES),
+            rng.choice(MERCHANTS),
+        )
+        for _ in range(count)
+    ]
+
+
+def latency(func) -> float:
+    """Median time of a call over REPEATS calls, in milliseconds.
+
+    :param func: Callable to time.
+    :type func: Callable
+    :return: Median milliseconds.
+    :rtype: float
+    """
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    """Time imports and queries on both ledgers."""
+    rows = generate_rows(ROWS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = Ledger()
+        start = time.perf_counter()
+        ledger.extend(rows)
+        seconds = time.perf_counter() - start
+        print(f"In-memory import: {ROWS / seconds:,.0f} rows/sec")
+
+        path = pathlib.Path(tmp) / sqlstore.SQLITE_FILE
+        with sqlstore.SqliteLedger(path) as database:
+            start = time.perf_counter()
+            database.extend(rows)
+            seconds = time.perf_counter() - start
+            print(f"SQLite import, indexed: {ROWS / seconds:,.0f} rows/sec")
+
+        path.unlink()
+        with sqlstore.SqliteLedger(path, THREADS) as database:
+            start = time.perf_counter()
+            database.sync(ledger)
+            seconds = time.perf_counter() - start
+            print(
+                f"SQLite copy of the ledger, indexed after: "
+                f"{ROWS / seconds:,.0f} rows/sec"
+            )
+
+            queries = {
+                "Quarter total of an account": (
+                    lambda: ledger.total(
+                        ledger.select(SINCE, UNTIL, ["credit"])
+                    ),
+                    lambda: database.totals(SINCE, UNTIL, ["credit"]),
+                ),
+                "Balance of an account": (
+                    lambda: ledger.total(ledger.select(accounts=["savings"])),
+                    lambda: database.balance("savings"),
+                ),
+                "Category totals of a quarter": (
+                    lambda: ledger.group_totals(
+                        "category", ledger.select(SINCE, UNTIL)
+                    ),
+                    lambda: database.group_totals("category", SINCE, UNTIL),
+                ),
+            }
+            for label, (in_memory, sql) in queries.items():
+                print(
+                    f"{label}: in-memory {latency(in_memory):.2f}ms, "
+                    f"SQLite {latency(sql):.2f}ms"
+                )
+
+            def query(_: int) -> tuple[int, int]:
+                return database.totals(SINCE, UNTIL, ["credit"])
+
+            for threads in (1, THREADS):
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    start = time.perf_counter()
+                    list(executor.map(query, range(REPEATS * 10)))
+                    seconds = time.perf_counter() - start
+                print(
+                    f"Pooled queries on {threads} threads: "
+                    f"{REPEATS * 10 / seconds:,.0f} queries/sec"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Tracks the import cost of every pfts console script.
+
+Each entry point is started in a fresh interpreter under
+``python -X importtime``. Only modules that a bare ``python -c pass`` does
+not load count, so the interpreter's own site imports are left out. Their
+import time is divided by the bare interpreter's, measured in the same run,
+which cancels out the speed of the machine, and compared against the
+ratios in ``startup_baseline.json``.
+
+Run with ``python -m benchmarks.bench_startup``; exits with status 1 if any
+entry point's ratio is above its baseline by more than the relative
+tolerance. Use ``--update`` to record a new baseline.
+"""
+
+import argparse
+import json
+import pathlib
+import subprocess  # nosec B404
+import sys
+
+BASELINE_FILE = pathlib.Path(__file__).parent / "startup_baseline.json"
+
+# Console script name → (entry point function, whether it parses arguments).
+# Commands that parse arguments are asked for --help so they stop right
+# after startup, the others are only imported since calling them does work.
+ENTRY_POINTS = {
+    "generate-docs": ("generate_documentation", False),
+    "run-testing": ("run_testing", True),
+    "local-ci": ("run_local_ci", False),
+    "version-bump": ("version_bump", True),
+    "pfts": ("run_pfts", True),
+}
+
+IMPORT_TEMPLATE = "from pfts.util.entrypoints import {func}"
+
+HELP_TEMPLATE = (
+    "from pfts.util import entrypoints\n"
+    "try:\n"
+    "    entrypoints.{func}(['--help'])\n"
+    "except SystemExit:\n"
+    "    pass"
+)
+
+
+def import_times_us(statement: str, runs: int) -> dict[str, int]:
+    """Best self import time, in microseconds, of each module loaded.
+
+    :param statement: Python source executed with -X importtime.
+    :type statement: str
+    :param runs: How many fresh interpreters to sample.
+    :type runs: int
+    :return: Smallest self import time of each module across the runs.
+    :rtype: dict[str, int]
+    """
+    best: dict[str, int] = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            capture_output=True,
+            text=True,
+            check=True,
+        )  # nosec B603
+
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, module = line.split(":", 1)[1].split("|")
+            name = module.strip()
+            best[name] = min(best.get(name, int(self_us)), int(self_us))
+
+    return best
+
+
+def main(arg_list: list | None = None) -> int:
+    """Measure every entry point and compare it with the baseline.
+
+    :param arg_list: CLI arguments, defaults to sys.argv[1:]
+    :type arg_list: list | None, optional
+    :return: 1 if an entry point regressed, otherwise 0.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(arg_list)
+
+    baseline = {}
+    if BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text())
+
+    bare = import_times_us("pass", args.runs)
+    bare_us = max(sum(bare.values()), 1)
+    print(f"{'python -c pass':<15} {bare_us:>8} us")
+
+    results = {}
+    regressed = False
+
+    for name, (func, parses_args) in ENTRY_POINTS.items():
+        template = HELP_TEMPLATE if parses_args else IMPORT_TEMPLATE
+        statement = template.format(func=func)
+
+        times = import_times_us(statement, args.runs)
+        own_us = sum(us for module, us in times.items() if module not in bare)
+        results[name] = round(own_us / bare_us, 2)
+        reference = baseline.get(name)
+
+        status = ""
+        if reference and not args.update:
+            limit = reference * (1 + args.tolerance)
+            if results[name] > limit:
+                status = f"REGRESSED (baseline {reference}x)"
+                regressed = True
+            else:
+                status = f"ok (baseline {reference}x)"
+
+        print(f"{name:<15} {own_us:>8} us {results[name]:>6}x  {status}")
+
+    if args.update:
+        BASELINE_FILE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""Contains the transaction ledger of pfts."""
+
+from pfts.ledger.store import (
+    DEFAULT_LEDGER_DIR,
+    Ledger,
+    LedgerConflictError,
+    StringPool,
+    Transaction,
+    format_cents,
+    from_days,
+    to_days,
+)
+
+__all__ = [
+    "DEFAULT_LEDGER_DIR",
+    "Ledger",
+    "LedgerConflictError",
+    "StringPool",
+    "Transaction",
+    "format_cents",
+    "from_days",
+    "to_days",
+]
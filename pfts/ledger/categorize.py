@@ -0,0 +1,461 @@
+"""Contains the rule based categorization of ledger transactions.
+
+Rules are read from a JSON list, each naming a category and the keywords
+and regular expressions of descriptions that belong to it. The first rule
+in the file that matches a description wins. Rather than trying every
+rule on every row, all rules are compiled together:
+
+- Keywords go into an Aho-Corasick automaton, flattened into one
+  transition dict per state, which finds every keyword of a description
+  in a single pass over its characters.
+- Patterns are merged into one regex, an alternation of lookaheads tried
+  in rule order, so a single ``match`` call finds the first matching
+  pattern. The regex engine tries patterns one after the other, so the
+  literal text patterns start with goes into a second automaton, and the
+  regex only runs on descriptions holding one of them.
+
+Keywords match normalized descriptions, and patterns the descriptions as
+they are, so patterns can match punctuation such as ``*`` and ``#``. The
+category of each description is kept in an LRU cache. The ledger is
+categorized in batches of its description column: each distinct
+description code of a batch is looked up once, then the new category
+codes are mapped over the whole batch.
+"""
+
+import collections
+import functools
+import itertools
+import json
+import logging
+import operator
+import pathlib
+import re
+import time
+from array import array
+from typing import Iterable, NamedTuple
+
+from pfts.ledger.dedup import normalize_description
+from pfts.ledger.store import Ledger
+from pfts.util.logging import log_context
+
+logger = logging.getLogger(__name__)
+
+RULES_FILE = "rules.json"
+DEFAULT_CACHE_SIZE = 65536
+BATCH_ROWS = 65536
+# Rule number of states that match no keyword, above any real rule.
+NO_MATCH = 1 << 62
+# Backreferences and conditionals by group number, which merging patterns
+# into one regex would renumber. Escaped backslashes are skipped first.
+_GROUP_NUMBER_RE = re.compile(r"\\\\|(\\[1-9]|\(\?\(\d)")
+
+
+class RulesError(Exception):
+    """Raised when a rules file cannot be read or compiled."""
+
+
+def check_pattern(pattern: str) -> None:
+    """Make sure a pattern can be merged with others.
+
+    :param pattern: Regular expression of a rule.
+    :type pattern: str
+    :raises RulesError: If it is not a valid regex, names its groups or
+        refers to a group by number.
+    """
+    try:
+        groups = re.compile(pattern).groupindex
+    except re.error as e:
+        raise RulesError(f"Pattern {pattern!r}: {e}") from e
+    if groups:
+        raise RulesError(f"Pattern {pattern!r} has named groups.")
+    if any(match.group(1) for match in _GROUP_NUMBER_RE.finditer(pattern)):
+        raise RulesError(
+            f"Pattern {pattern!r} refers to a group by number, which is "
+            "not supported."
+        )
+
+
+class Rule(NamedTuple):
+    """Descriptions matching any keyword or pattern belong to the category.
+
+    Keywords match whole words of the normalized description, lower case
+    and single spaced, e.g. "whole foods". Patterns are regular
+    expressions searched for in the description as it appears on the
+    statement, ignoring case. They may not refer to groups by number.
+    """
+
+    category: str
+    keywords: tuple[str, ...] = ()
+    patterns: tuple[str, ...] = ()
+
+
+class CategorizeResult(NamedTuple):
+    """What categorizing a ledger changed."""
+
+    rows: int
+    descriptions: int
+    # Row index and values before the change, as returned by Ledger.raw.
+    changes: list[tuple[int, tuple[int, int, int, int, int]]]
+    # New category → rows changed to it, most first.
+    counts: dict[str, int]
+    seconds: float
+
+
+def load_rules(filepath: pathlib.Path) -> list[Rule]:
+    """Read categorization rules from a JSON list.
+
+    Each entry is an object with a "category", and lists of "keywords"
+    and "patterns", e.g.
+    ``{"category": "groceries", "keywords": ["whole foods"]}``.
+
+    :param filepath: Rules file.
+    :type filepath: pathlib.Path
+    :raises RulesError: If the file is missing, not a list of rules, or a
+        pattern cannot be merged with the others, see check_pattern.
+    :return: Rules in file order.
+    :rtype: list[Rule]
+    """
+    try:
+        content = json.loads(filepath.read_text(encoding="utf8"))
+    except (OSError, ValueError) as e:
+        raise RulesError(f"Cannot read rules {filepath}: {e}") from e
+
+    if not isinstance(content, list):
+        raise RulesError(f"Rules {filepath} must be a JSON list.")
+
+    rules = []
+    for number, entry in enumerate(content, start=1):
+        if not isinstance(entry, dict) or not isinstance(
+            entry.get("category"), str
+        ):
+            raise RulesError(f"Rule {number} needs a category.")
+        lists = [entry.get(name, []) for name in ("keywords", "patterns")]
+        if not all(
+            isinstance(values, list)
+            and all(isinstance(value, str) for value in values)
+            for values in lists
+        ):
+            raise RulesError(
+                f"Keywords and patterns of rule {number} must be lists of "
+                "strings."
+            )
+        for pattern in lists[1]:
+            check_pattern(pattern)
+        rules.append(Rule(entry["category"], *map(tuple, lists)))
+
+    return rules
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton finding the first rule with a keyword."""
+
+    def __init__(self, keywords: Iterable[tuple[str, int]]) -> None:
+        """Build the automaton.
+
+        :param keywords: Pairs of keyword and the number of its rule.
+        :type keywords: Iterable[tuple[str, int]]
+        """
+        children: list[dict[str, int]] = [{}]
+        self.rules = [NO_MATCH]
+        for keyword, rule in keywords:
+            state = 0
+            for char in keyword:
+                child = children[state].get(char)
+                if child is None:
+                    child = children[state][char] = len(children)
+                    children.append({})
+                    self.rules.append(NO_MATCH)
+                state = child
+            self.rules[state] = min(self.rules[state], rule)
+
+        # Breadth first, each state inherits the transitions and matches
+        # of its failure state, the longest proper suffix in the trie, so
+        # matching never has to follow failure links.
+        self.transitions = [dict(children[0])] + [{}] * (len(children) - 1)
+        fail = [0] * len(children)
+        queue = collections.deque(children[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in children[state].items():
+                if state:
+                    fail[child] = self.transitions[fail[state]].get(char, 0)
+                self.rules[child] = min(
+                    self.rules[child], self.rules[fail[child]]
+                )
+                queue.append(child)
+            self.transitions[state] = (
+                self.transitions[fail[state]] | children[state]
+            )
+
+    def first_rule(self, text: str) -> int:
+        """Lowest rule number of the keywords found in a text.
+
+        :param text: Text to search.
+        :type text: str
+        :return: The rule number, NO_MATCH if there is no keyword.
+        :rtype: int
+        """
+        transitions = self.transitions
+        rules = self.rules
+        state = 0
+        found = NO_MATCH
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if rules[state] < found:
+                found = rules[state]
+        return found
+
+
+def literal_prefix(pattern: str) -> str:
+    """Plain text every match of a pattern starts with, lower case.
+
+    Only ASCII letters, digits and spaces count, whose lower case matches
+    the way the regex ignores case, so the prefix may be shorter than the
+    pattern's.
+
+    :param pattern: Regular expression.
+    :type pattern: str
+    :return: The prefix, empty when the pattern has none or alternatives.
+    :rtype: str
+    """
+    if "|" in pattern:
+        return ""
+
+    text = pattern.removeprefix("^")
+    length = 0
+    while length < len(text) and (
+        text[length].isascii()
+        and (text[length].isalnum() or text[length] == " ")
+    ):
+        length += 1
+    # A quantifier after the prefix makes its last character optional.
+    if text[length : length + 1] in ("*", "?", "{"):
+        length -= 1
+    return text[: max(length, 0)].lower()
+
+
+def merge_patterns(patterns: Iterable[str]) -> re.Pattern | None:
+    """Merge patterns into one regex that matches at the first of them.
+
+    Each pattern becomes a lookahead in a group named after its position,
+    and the lookaheads are tried in order at the start of the text, so the
+    last group of a match names the first pattern found anywhere in it.
+
+    :param patterns: Patterns, in order.
+    :type patterns: Iterable[str]
+    :raises RulesError: If a pattern cannot be merged, see check_pattern.
+    :return: The merged regex, None without patterns.
+    :rtype: re.Pattern | None
+    """
+    alternatives = []
+    for number, pattern in enumerate(patterns):
+        check_pattern(pattern)
+        # Patterns anchored at the start need not be tried further along.
+        skip = "" if pattern.startswith("^") else ".*?"
+        alternatives.append(f"(?={skip}(?P<p{number}>{pattern}))")
+
+    if not alternatives:
+        return None
+    try:
+        return re.compile("|".join(alternatives), re.IGNORECASE | re.DOTALL)
+    except re.error as e:
+        raise RulesError(f"Patterns cannot be combined: {e}") from e
+
+
+class Categorizer:
+    """Finds the category of descriptions with every rule at once."""
+
+    def __init__(
+        self, rules: list[Rule], cache_size: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        """Compile the rules.
+
+        :param rules: Rules, the first one matching a description wins.
+        :type rules: list[Rule]
+        :param cache_size: Descriptions whose category is kept, defaults
+            to DEFAULT_CACHE_SIZE
+        :type cache_size: int, optional
+        :raises RulesError: If a pattern cannot be merged, see
+            check_pattern.
+        """
+        self.rules = rules
+        self.keywords = KeywordAutomaton(
+            (f" {normalize_description(keyword)} ", number)
+            for number, rule in enumerate(rules)
+            for keyword in rule.keywords
+            if normalize_description(keyword)
+        )
+        # Rule number of each pattern, in rule order.
+        self.pattern_rules = [
+            number for number, rule in enumerate(rules) for _ in rule.patterns
+        ]
+        self.patterns = merge_patterns(
+            pattern for rule in rules for pattern in rule.patterns
+        )
+        # The merged regex only runs when a pattern of a rule before the
+        # first keyword match can match: its literal prefix is in the
+        # description, or it has none.
+        prefixes = [
+            (literal_prefix(pattern), number)
+            for number, rule in enumerate(rules)
+            for pattern in rule.patterns
+        ]
+        self.prefixes = KeywordAutomaton(
+            (prefix, number) for prefix, number in prefixes if prefix
+        )
+        self.unfiltered = min(
+            (number for prefix, number in prefixes if not prefix),
+            default=NO_MATCH,
+        )
+        self.match = functools.lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, description: str) -> str | None:
+        """Category of a description, as it appears on a statement.
+
+        :param description: Description to categorize.
+        :type description: str
+        :return: Category of the first matching rule, None if none match.
+        :rtype: str | None
+        """
+        found = self.keywords.first_rule(
+            f" {normalize_description(description)} "
+        )
+        if self.patterns is not None and found > min(
+            self.unfiltered, self.prefixes.first_rule(description.lower())
+        ):
+            matched = self.patterns.match(description)
+            if matched and matched.lastgroup:
+                rule = self.pattern_rules[int(matched.lastgroup[1:])]
+                found = min(found, rule)
+
+        if found == NO_MATCH:
+            return None
+        return self.rules[found].category
+
+    def categorize(self, description: str) -> str | None:
+        """Category of a description, as it appears on a statement.
+
+        :param description: Description to categorize.
+        :type description: str
+        :return: Category of the first matching rule, None if none match.
+        :rtype: str | None
+        """
+        return self.match(description)
+
+
+@log_context
+def categorize_ledger(
+    ledger: Ledger,
+    categorizer: Categorizer,
+    recategorize: bool = False,
+    dry_run: bool = False,
+    batch_rows: int = BATCH_ROWS,
+) -> CategorizeResult:
+    """Set the category of ledger rows whose description matches a rule.
+
+    Rows no rule matches keep their category.
+
+    :param ledger: Ledger to categorize.
+    :type ledger: Ledger
+    :param categorizer: Compiled rules.
+    :type categorizer: Categorizer
+    :param recategorize: Whether rows that already have a category are
+        categorized again, defaults to False (only uncategorized rows)
+    :type recategorize: bool, optional
+    :param dry_run: Whether to leave the ledger unchanged and only report
+        what would change, defaults to False. New category names then get
+        provisional codes after the pool's, and are not added to it.
+    :type dry_run: bool, optional
+    :param batch_rows: Rows categorized together, defaults to BATCH_ROWS
+    :type batch_rows: int, optional
+    :return: Rows scanned, distinct descriptions matched, and the changes.
+    :rtype: CategorizeResult
+    """
+    start = time.perf_counter()
+    descriptions = ledger.pools["description"]
+    categories = ledger.pools["category"]
+    columns = ledger.columns
+    # Description code → category code, for descriptions a rule matches.
+    lookup: dict[int, int] = {}
+    # Dry runs only: codes of new category names, after the pool's codes.
+    provisional: dict[str, int] = {}
+    seen: set[int] = set()
+    changes: list[tuple[int, tuple[int, int, int, int, int]]] = []
+    counts: collections.Counter[int] = collections.Counter()
+
+    for first in range(0, len(ledger), batch_rows):
+        last = min(first + batch_rows, len(ledger))
+        codes = columns["description"][first:last]
+        old = columns["category"][first:last]
+
+        for code in set(codes) - seen:
+            category = categorizer.categorize(descriptions[code])
+            if category is None:
+                continue
+            if not dry_run:
+                lookup[code] = categories.intern(category)
+            elif category in categories:
+                lookup[code] = categories.codes[category]
+            else:
+                lookup[code] = provisional.setdefault(
+                    category, len(categories) + len(provisional)
+                )
+        seen.update(codes)
+
+        if recategorize:
+            new = array("i", map(lookup.get, codes, old))
+        else:
+            # Uncategorized is category code 0, so old + new * (not old)
+            # only gives a new category to uncategorized rows.
+            matched = map(lookup.get, codes, itertools.repeat(0))
+            new = array(
+                "i",
+                map(
+                    operator.add,
+                    old,
+                    map(operator.mul, matched, map(operator.not_, old)),
+                ),
+            )
+        changed = bytes(map(operator.ne, old, new))
+        if not any(changed):
+            continue
+
+        # Values of the changed rows before the change, as Ledger.raw
+        # returns them.
+        before = zip(
+            *(
+                itertools.compress(values, changed)
+                for values in (
+                    columns["date"][first:last],
+                    columns["amount"][first:last],
+                    columns["account"][first:last],
+                    old,
+                    codes,
+                )
+            )
+        )
+        changes.extend(
+            zip(itertools.compress(range(first, last), changed), before)
+        )
+        counts.update(itertools.compress(new, changed))
+        if not dry_run:
+            ledger.assign("category", first, new)
+
+    names = {code: name for name, code in provisional.items()}
+    result = CategorizeResult(
+        len(ledger),
+        len(lookup),
+        changes,
+        {
+            names[code] if code in names else categories[code]: count
+            for code, count in counts.most_common()
+        },
+        time.perf_counter() - start,
+    )
+    logger.info(
+        f"Categorized {len(changes)} of {result.rows} rows, "
+        f"{result.descriptions} descriptions matched, in "
+        f"{result.seconds:.2f}s "
+        f"({result.rows / max(result.seconds, 1e-9):,.0f} rows/sec)"
+    )
+    return result
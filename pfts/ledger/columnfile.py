@@ -0,0 +1,184 @@
+"""Contains the memory-mapped files a ledger is saved in.
+
+Every column is a file of fixed-width values behind a 16 byte header, and
+every string pool is a dictionary of two files: the UTF-8 bytes of all its
+strings back to back, and the offset each string ends at.
+
+Files are opened with ``mmap`` and read through ``memoryview`` casts, so
+opening costs a few system calls whatever their size, and the operating
+system only reads in the pages a query touches. Saving appends after the
+values the metadata counts, so values past that count, left by a save
+that was interrupted, are never read and get overwritten by the next one.
+"""
+
+import itertools
+import mmap
+import os
+import pathlib
+import struct
+import sys
+from array import array
+from typing import Iterable
+
+from pfts.util import files
+
+MAGIC = b"PFTSCOL\x00"
+FORMAT_VERSION = 1
+# Magic, format version, typecode, byte order, item size, padding.
+HEADER = struct.Struct("<8sHccB3x")
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+# File suffixes: column values, string end offsets and string bytes.
+SUFFIXES = (".col", ".off", ".str")
+
+
+class ColumnFileError(Exception):
+    """A ledger file is missing, damaged, or was written elsewhere."""
+
+
+def header(typecode: str) -> bytes:
+    """Header of a file holding values of one array typecode.
+
+    :param typecode: Array typecode of the values.
+    :type typecode: str
+    :return: The 16 header bytes.
+    :rtype: bytes
+    """
+    return HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        typecode.encode("ascii"),
+        BYTE_ORDER,
+        array(typecode).itemsize,
+    )
+
+
+def map_values(
+    filepath: pathlib.Path, typecode: str, count: int
+) -> memoryview:
+    """Map the first values of a file, without reading any of them.
+
+    :param filepath: File written by write_values.
+    :type filepath: pathlib.Path
+    :param typecode: Array typecode the values must have.
+    :type typecode: str
+    :param count: Values to map, later ones are ignored.
+    :type count: int
+    :raises ColumnFileError: If the file is missing, holds other values or
+        fewer of them.
+    :return: Read-only view of the values.
+    :rtype: memoryview
+    """
+    try:
+        with open(filepath, "rb") as fin:
+            mapped = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise ColumnFileError(f"Cannot map {filepath}: {e}") from e
+
+    if mapped[: HEADER.size] != header(typecode):
+        mapped.close()
+        raise ColumnFileError(
+            f"{filepath} does not hold {typecode!r} values of this platform"
+        )
+
+    end = HEADER.size + count * array(typecode).itemsize
+    if len(mapped) < end:
+        mapped.close()
+        raise ColumnFileError(f"{filepath} holds fewer than {count} values")
+
+    # The view keeps the map open, and the map outlives the file object.
+    view = memoryview(mapped)[HEADER.size : end]
+    return view.cast(typecode)  # type: ignore[call-overload]
+
+
+def write_values(
+    filepath: pathlib.Path, typecode: str, values: array | memoryview | bytes
+) -> None:
+    """Write a new file of values, replacing any file there atomically.
+
+    :param filepath: File to write.
+    :type filepath: pathlib.Path
+    :param typecode: Array typecode of the values.
+    :type typecode: str
+    :param values: The values.
+    :type values: array | memoryview | bytes
+    """
+    with files.atomic_write_bytes(filepath) as fout:
+        fout.write(header(typecode))
+        fout.write(values)
+
+
+def append_values(
+    filepath: pathlib.Path,
+    typecode: str,
+    count: int,
+    values: array | bytes,
+) -> None:
+    """Write values after the first count values of a file, and flush them.
+
+    Existing values are never touched, so a crash only ever leaves extra
+    values that nothing counts.
+
+    :param filepath: File written by write_values.
+    :type filepath: pathlib.Path
+    :param typecode: Array typecode of the values.
+    :type typecode: str
+    :param count: Values to keep, the new ones go after them.
+    :type count: int
+    :param values: Values to append.
+    :type values: array | bytes
+    """
+    with open(filepath, "r+b") as fout:
+        fout.seek(HEADER.size + count * array(typecode).itemsize)
+        fout.write(values)
+        fout.flush()
+        os.fsync(fout.fileno())
+
+
+def encode_strings(values: Iterable[str], start: int) -> tuple[array, bytes]:
+    """Encode strings for a string dictionary.
+
+    :param values: Strings to encode.
+    :type values: Iterable[str]
+    :param start: Offset the first string starts at.
+    :type start: int
+    :return: End offset of each string, and their bytes.
+    :rtype: tuple[array, bytes]
+    """
+    encoded = [value.encode("utf8") for value in values]
+    ends = array("q", itertools.accumulate(map(len, encoded), initial=start))
+    return ends[1:], b"".join(encoded)
+
+
+class StoredStrings:
+    """Strings of a mapped string dictionary, decoded when asked for."""
+
+    def __init__(self, ends: memoryview, data: memoryview) -> None:
+        """Wrap the mapped files of a dictionary.
+
+        :param ends: End offset of each string.
+        :type ends: memoryview
+        :param data: UTF-8 bytes of the strings.
+        :type data: memoryview
+        """
+        self.ends = ends
+        self.data = data
+
+    def __getitem__(self, code: int) -> str:
+        start = self.ends[code - 1] if code > 0 else 0
+        return str(self.data[start : self.ends[code]], "utf8")
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def decode(self) -> list[str]:
+        """Decode every string, in a single pass over the bytes.
+
+        :return: The strings, in code order.
+        :rtype: list[str]
+        """
+        data = self.data.tobytes()
+        starts = itertools.chain((0,), self.ends)
+        return [
+            data[start:end].decode("utf8")
+            for start, end in zip(starts, self.ends)
+        ]
@@ -0,0 +1,508 @@
+"""Contains the duplicate transaction index used when importing statements.
+
+Overlapping statements repeat transactions already in the ledger. Rather
+than comparing every pair of rows, two hashed indexes map keys to ledger
+rows:
+
+- The exact index keys rows on account, date, amount and normalized
+  description.
+- The fuzzy index keys rows on account, amount and date bucket. It catches
+  the same transaction posted a day later, or described differently by
+  another export, and is only consulted when no exact match exists.
+
+Every candidate found through a hash is compared against the ledger row
+itself, so hash collisions never cause a false match. Each index is a pair
+of arrays sorted by key and searched with bisect, which is also how it is
+written to disk, so loading it is a plain read.
+"""
+
+import bisect
+import difflib
+import functools
+import itertools
+import logging
+import operator
+import pathlib
+import re
+import sys
+from array import array
+from typing import Iterable, Iterator, NamedTuple, Sequence
+
+from pfts.ledger.store import Ledger
+from pfts.util import files
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "dedup.idx"
+FORMAT_VERSION = 2
+# Days between two postings of the same transaction that still match.
+DEFAULT_WINDOW = 3
+# Lowest description similarity, from 0 to 1, of a fuzzy match.
+DEFAULT_SIMILARITY = 0.5
+# New rows wait in a dict until more than this many would, then are
+# sorted into the arrays.
+PENDING_LIMIT = 100_000
+
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+
+class Match(NamedTuple):
+    """Ledger row a statement row duplicates."""
+
+    row: int
+    fuzzy: bool
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_description(text: str) -> str:
+    """Reduce a description to lower case words.
+
+    :param text: Description from a statement or the ledger.
+    :type text: str
+    :return: Words of the description, lower case and single spaced.
+    :rtype: str
+    """
+    return " ".join(_NON_ALNUM_RE.sub(" ", text.casefold()).split())
+
+
+def similarity(first: str, second: str) -> float:
+    """How alike two normalized descriptions are.
+
+    :param first: Normalized description.
+    :type first: str
+    :param second: Normalized description.
+    :type second: str
+    :return: 1.0 for equal descriptions, down to 0.0.
+    :rtype: float
+    """
+    matcher = difflib.SequenceMatcher(None, first, second)
+    return matcher.ratio()
+
+
+class HashIndex:
+    """Multimap of int keys to ledger rows, sorted for bisect lookups."""
+
+    def __init__(
+        self, keys: array | None = None, rows: array | None = None
+    ) -> None:
+        """Create the index.
+
+        :param keys: Keys sorted ascending, defaults to None (empty)
+        :type keys: array | None, optional
+        :param rows: Row of each key, defaults to None (empty)
+        :type rows: array | None, optional
+        """
+        self.keys: array[int] = array("q") if keys is None else keys
+        self.rows: array[int] = array("q") if rows is None else rows
+        self.pending: dict[int, list[int]] = {}
+        self.pending_count = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) + self.pending_count
+
+    def find(self, key: int) -> Iterator[int]:
+        """Rows stored under a key.
+
+        :param key: Key to look up.
+        :type key: int
+        :return: The rows, oldest first.
+        :rtype: Iterator[int]
+        """
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_right(self.keys, key, start)
+
+        return itertools.chain(self.rows[start:end], self.pending.get(key, ()))
+
+    def add(self, keys: Iterable[int], first_row: int) -> None:
+        """Store keys for consecutive rows.
+
+        :param keys: Key of each row.
+        :type keys: Iterable[int]
+        :param first_row: Row of the first key.
+        :type first_row: int
+        """
+        new_keys = array("q", keys)
+        new_rows = range(first_row, first_row + len(new_keys))
+
+        if self.pending_count + len(new_keys) > PENDING_LIMIT:
+            self.compact(new_keys, new_rows)
+            return
+
+        for key, row in zip(new_keys, new_rows):
+            self.pending.setdefault(key, []).append(row)
+        self.pending_count += len(new_keys)
+
+    def compact(
+        self, new_keys: Iterable[int] = (), new_rows: Iterable[int] = ()
+    ) -> None:
+        """Sort the pending rows, and any new ones, into the arrays.
+
+        :param new_keys: Keys to add without going through pending,
+            defaults to ()
+        :type new_keys: Iterable[int], optional
+        :param new_rows: Row of each new key, defaults to ()
+        :type new_rows: Iterable[int], optional
+        """
+        keys, rows = self.keys, self.rows
+        before = len(keys)
+        for key, key_rows in self.pending.items():
+            keys.extend(itertools.repeat(key, len(key_rows)))
+            rows.extend(key_rows)
+        keys.extend(new_keys)
+        rows.extend(new_rows)
+
+        if len(keys) == before:
+            return
+
+        # The old keys are one sorted run, which timsort merges in one pass.
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = array("q", map(keys.__getitem__, order))
+        self.rows = array("q", map(rows.__getitem__, order))
+        self.pending.clear()
+        self.pending_count = 0
+
+
+class DedupIndex:
+    """Finds the ledger rows that statement rows duplicate."""
+
+    def __init__(
+        self,
+        ledger: Ledger,
+        window: int = DEFAULT_WINDOW,
+        min_similarity: float = DEFAULT_SIMILARITY,
+    ) -> None:
+        """Create an empty index over a ledger.
+
+        Call update to index the rows the ledger already holds.
+
+        :param ledger: Ledger to index.
+        :type ledger: Ledger
+        :param window: Days apart that still match, defaults to
+            DEFAULT_WINDOW
+        :type window: int, optional
+        :param min_similarity: Lowest description similarity of a fuzzy
+            match, defaults to DEFAULT_SIMILARITY
+        :type min_similarity: float, optional
+        :raises ValueError: If the window is shorter than a day.
+        """
+        if window < 1:
+            raise ValueError("The date window must be at least one day.")
+
+        self.ledger = ledger
+        self.window = window
+        self.min_similarity = min_similarity
+        self.exact = HashIndex()
+        self.fuzzy = HashIndex()
+        self.indexed = 0
+        self.edits = ledger.edits
+        # Per description code: its normalized text, and the first code
+        # sharing that text, which stands in for the text in exact keys.
+        self.texts: list[str] = []
+        self.canonical: list[int] = []
+        self.text_codes: dict[str, int] = {}
+
+    def _sync_descriptions(self) -> None:
+        """Normalize the descriptions added to the ledger since last time."""
+        pool = self.ledger.pools["description"]
+
+        for code in range(len(self.texts), len(pool)):
+            text = normalize_description(pool[code])
+            self.texts.append(text)
+            self.canonical.append(self.text_codes.setdefault(text, code))
+
+    def update(self) -> int:
+        """Index the rows appended to the ledger since the last update.
+
+        :return: Rows indexed.
+        :rtype: int
+        """
+        start, end = self.indexed, len(self.ledger)
+        if start == end:
+            return 0
+
+        self._add_rows(start, end)
+        self.indexed = end
+        return end - start
+
+    def reindex(self, row: int) -> None:
+        """Index an edited row under its new values.
+
+        Its old keys stay, but lead nowhere, since every candidate is
+        compared against the ledger row as it is now.
+
+        :param row: Row index of the edited transaction.
+        :type row: int
+        """
+        if row < self.indexed:
+            self._add_rows(row, row + 1)
+        self.edits = self.ledger.edits
+
+    def acknowledge_edits(self) -> None:
+        """Trust the ledger's edits so far, for edits no key depends on.
+
+        Categories are not part of any key, so recategorized rows need no
+        reindexing.
+        """
+        self.edits = self.ledger.edits
+
+    def _add_rows(self, start: int, end: int) -> None:
+        """Add keys for a range of ledger rows.
+
+        :param start: First row to index.
+        :type start: int
+        :param end: Row after the last one to index.
+        :type end: int
+        """
+        self._sync_descriptions()
+        columns = self.ledger.columns
+        dates = columns["date"][start:end]
+        amounts = columns["amount"][start:end]
+        accounts = columns["account"][start:end]
+        descriptions = columns["description"][start:end]
+
+        # Keys are hashes of int tuples, which unlike str hashes are the
+        # same in every process, so they can be saved.
+        self.exact.add(
+            map(
+                hash,
+                zip(
+                    accounts,
+                    dates,
+                    amounts,
+                    map(self.canonical.__getitem__, descriptions),
+                ),
+            ),
+            start,
+        )
+        buckets = map(operator.floordiv, dates, itertools.repeat(self.window))
+        self.fuzzy.add(map(hash, zip(accounts, amounts, buckets)), start)
+
+    def screen(
+        self,
+        rows: Sequence[tuple[int, int, str, str, str]],
+        consumed: set[int],
+    ) -> list[Match | None]:
+        """Match statement rows against the indexed ledger rows.
+
+        Each ledger row matches at most one statement row, so a statement
+        that really holds the same transaction twice keeps both copies
+        unless the ledger has both. Exact matches are taken first, then
+        the remaining rows are matched fuzzily.
+
+        :param rows: Rows of day, cents, account, category, description.
+        :type rows: Sequence[tuple[int, int, str, str, str]]
+        :param consumed: Ledger rows already matched by this statement,
+            updated with the new matches.
+        :type consumed: set[int]
+        :return: Per row, the ledger row it duplicates, or None if new.
+        :rtype: list[Match | None]
+        """
+        self._sync_descriptions()
+        account_codes = self.ledger.pools["account"].codes
+        matches: list[Match | None] = [None] * len(rows)
+        leftover = []
+
+        for position, (day, cents, account, _, description) in enumerate(rows):
+            account_code = account_codes.get(account)
+            if account_code is None:
+                continue
+
+            text = normalize_description(description)
+            row = self._find_exact(account_code, day, cents, text, consumed)
+            if row is None:
+                leftover.append((position, account_code, day, cents, text))
+                continue
+
+            consumed.add(row)
+            matches[position] = Match(row, False)
+
+        for position, account_code, day, cents, text in leftover:
+            row = self._find_fuzzy(account_code, day, cents, text, consumed)
+            if row is not None:
+                consumed.add(row)
+                matches[position] = Match(row, True)
+
+        return matches
+
+    def _find_exact(
+        self,
+        account_code: int,
+        day: int,
+        cents: int,
+        text: str,
+        consumed: set[int],
+    ) -> int | None:
+        """First unmatched ledger row equal to a statement row.
+
+        :param account_code: Account code of the statement row.
+        :type account_code: int
+        :param day: Date of the statement row.
+        :type day: int
+        :param cents: Amount of the statement row.
+        :type cents: int
+        :param text: Normalized description of the statement row.
+        :type text: str
+        :param consumed: Ledger rows already matched.
+        :type consumed: set[int]
+        :return: The ledger row, None if there is none.
+        :rtype: int | None
+        """
+        text_code = self.text_codes.get(text)
+        if text_code is None:
+            return None
+
+        columns = self.ledger.columns
+        key = hash((account_code, day, cents, text_code))
+        for row in self.exact.find(key):
+            if (
+                row not in consumed
+                and columns["date"][row] == day
+                and columns["amount"][row] == cents
+                and columns["account"][row] == account_code
+                and self.canonical[columns["description"][row]] == text_code
+            ):
+                return row
+
+        return None
+
+    def _find_fuzzy(
+        self,
+        account_code: int,
+        day: int,
+        cents: int,
+        text: str,
+        consumed: set[int],
+    ) -> int | None:
+        """Unmatched ledger row most like a statement row.
+
+        Candidates share the account and amount, are at most window days
+        apart and have descriptions at least min_similarity alike. The most
+        similar one wins, the closest in date on a tie.
+
+        :param account_code: Account code of the statement row.
+        :type account_code: int
+        :param day: Date of the statement row.
+        :type day: int
+        :param cents: Amount of the statement row.
+        :type cents: int
+        :param text: Normalized description of the statement row.
+        :type text: str
+        :param consumed: Ledger rows already matched.
+        :type consumed: set[int]
+        :return: The ledger row, None if there is none.
+        :rtype: int | None
+        """
+        columns = self.ledger.columns
+        bucket = day // self.window
+        best = None
+        best_score = (self.min_similarity, -self.window - 1)
+
+        # Rows within the window can only sit in this or a neighbour bucket.
+        for near in (bucket - 1, bucket, bucket + 1):
+            for row in self.fuzzy.find(hash((account_code, cents, near))):
+                distance = abs(columns["date"][row] - day)
+                if (
+                    row in consumed
+                    or distance > self.window
+                    or columns["amount"][row] != cents
+                    or columns["account"][row] != account_code
+                ):
+                    continue
+
+                score = (
+                    similarity(text, self.texts[columns["description"][row]]),
+                    -distance,
+                )
+                if score > best_score:
+                    best, best_score = row, score
+
+        return best
+
+    def save(self, directory: pathlib.Path) -> None:
+        """Write the index next to the ledger it indexes.
+
+        :param directory: Ledger folder.
+        :type directory: pathlib.Path
+        """
+        self.exact.compact()
+        self.fuzzy.compact()
+
+        header = array(
+            "q",
+            [
+                FORMAT_VERSION,
+                sys.hash_info.width,
+                self.window,
+                self.indexed,
+                self.edits,
+                len(self.exact.keys),
+                len(self.fuzzy.keys),
+            ],
+        )
+        with files.atomic_write_bytes(directory / INDEX_FILE) as fout:
+            for values in (
+                header,
+                self.exact.keys,
+                self.exact.rows,
+                self.fuzzy.keys,
+                self.fuzzy.rows,
+            ):
+                values.tofile(fout)
+
+    @classmethod
+    def load(
+        cls,
+        directory: pathlib.Path,
+        ledger: Ledger,
+        window: int = DEFAULT_WINDOW,
+        min_similarity: float = DEFAULT_SIMILARITY,
+    ) -> "DedupIndex":
+        """Read the saved index of a ledger, and index any newer rows.
+
+        The index is rebuilt from the ledger when there is none, or when it
+        was saved with another window, on another platform, or for a
+        ledger with more rows, or other edits, than this one.
+
+        :param directory: Ledger folder.
+        :type directory: pathlib.Path
+        :param ledger: The ledger loaded from that folder.
+        :type ledger: Ledger
+        :param window: Days apart that still match, defaults to
+            DEFAULT_WINDOW
+        :type window: int, optional
+        :param min_similarity: Lowest description similarity of a fuzzy
+            match, defaults to DEFAULT_SIMILARITY
+        :type min_similarity: float, optional
+        :return: Index covering every row of the ledger.
+        :rtype: DedupIndex
+        """
+        index = cls(ledger, window, min_similarity)
+        index_path = directory / INDEX_FILE
+
+        if index_path.exists():
+            with open(index_path, "rb") as fin:
+                header = array("q")
+                header.fromfile(fin, 7)
+                version, width, saved_window, rows, edits = header[:5]
+
+                if (version, width, saved_window, edits) != (
+                    FORMAT_VERSION,
+                    sys.hash_info.width,
+                    window,
+                    ledger.edits,
+                ) or rows > len(ledger):
+                    logger.info(f"Rebuilding the outdated index {index_path}")
+                else:
+                    arrays = []
+                    for length in (header[5], header[5], header[6], header[6]):
+                        values = array("q")
+                        values.fromfile(fin, length)
+                        arrays.append(values)
+                    index.exact = HashIndex(arrays[0], arrays[1])
+                    index.fuzzy = HashIndex(arrays[2], arrays[3])
+                    index.indexed = rows
+
+        indexed = index.update()
+        if indexed:
+            logger.info(f"Indexed {indexed} ledger rows for deduplication")
+        return index
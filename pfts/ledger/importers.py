@@ -0,0 +1,630 @@
+"""Contains the streaming importer for CSV and OFX/QFX bank statements.
+
+Importing is a pipeline of generators: the statement is read in chunks,
+parsed into raw records one at a time, normalized into ledger rows, and
+appended to the ledger in batches. Only one batch is ever held in memory,
+however large the statement is.
+
+With several workers, each statement is parsed in its own process into a
+columnar Ledger, which is then merged into the target ledger.
+
+Given a DedupIndex, rows already in the ledger, e.g. from an overlapping
+statement imported before, are skipped.
+"""
+
+import concurrent.futures
+import csv
+import datetime
+import functools
+import itertools
+import logging
+import operator
+import pathlib
+import re
+import time
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    TextIO,
+    TypeVar,
+)
+
+from pfts.ledger.store import UNCATEGORIZED, Ledger, to_days
+
+if TYPE_CHECKING:
+    from pfts.ledger.dedup import DedupIndex
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+FORMATS = ("csv", "ofx")
+CHUNK_SIZE = 1 << 16
+BATCH_SIZE = 10_000
+
+# Accepted CSV headers for each field, compared in lower case.
+CSV_HEADERS = {
+    "date": ("date", "transaction date", "posted date", "posting date"),
+    "description": ("description", "payee", "name", "memo", "details"),
+    "amount": ("amount", "transaction amount"),
+    "debit": ("debit", "withdrawal", "withdrawals"),
+    "credit": ("credit", "deposit", "deposits"),
+    "category": ("category",),
+    "account": ("account", "account name"),
+}
+DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%d.%m.%Y")
+
+_OFX_TAG_RE = re.compile(r"<(\w+)>([^<\r\n]*)")
+# Statement starts, account ids and whole transactions, in file order. An
+# account id only matches once it is complete, not cut off by a chunk.
+_OFX_ELEMENT_RE = re.compile(
+    r"(?P<statement><(?:CC)?STMTRS>)"
+    r"|<ACCTID>(?P<account>[^<\r\n]+)(?=[<\r\n])"
+    r"|<STMTTRN>(?P<transaction>.*?)</STMTTRN>",
+    re.DOTALL,
+)
+# Characters kept between chunks when no transaction has started, enough
+# for a partial <ACCTID> element.
+_OFX_TAIL = 64
+
+
+class StatementError(Exception):
+    """Raised when a statement cannot be imported."""
+
+
+class RawRecord(NamedTuple):
+    """A transaction as written in the statement, before normalization."""
+
+    date: str
+    amount: str
+    description: str
+    category: str
+    account: str
+
+
+class ImportStats(NamedTuple):
+    """How an import went."""
+
+    files: int
+    rows: int
+    seconds: float
+    duplicates: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows imported per second of wall time."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Group items into lists of at most size items.
+
+    :param items: Items to group.
+    :type items: Iterable[T]
+    :param size: Items per batch.
+    :type size: int
+    :return: Batches, in order.
+    :rtype: Iterator[list[T]]
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_day(text: str) -> int:
+    """Parse a statement date into days since the epoch.
+
+    Statements repeat the same dates many times, so results are cached.
+
+    :param text: ISO, US (MM/DD/YYYY) or OFX (YYYYMMDD...) date.
+    :type text: str
+    :raises ValueError: If the date is in none of the known formats.
+    :return: Days since the epoch.
+    :rtype: int
+    """
+    text = text.strip()
+    if len(text) >= 8 and text[:8].isdigit():
+        # OFX dates may carry a time and a timezone after the date.
+        date = datetime.date(int(text[:4]), int(text[4:6]), int(text[6:8]))
+        return to_days(date)
+
+    try:
+        return to_days(datetime.date.fromisoformat(text))
+    except ValueError:
+        pass
+
+    for date_format in DATE_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+        return to_days(parsed.date())
+
+    raise ValueError(f"Unknown date format: {text!r}")
+
+
+def parse_cents(text: str) -> int:
+    """Parse a statement amount into cents, without going through floats.
+
+    :param text: e.g. "-12.34", "$1,234.5", "(12.34)" or "12.34-".
+    :type text: str
+    :raises ValueError: If the text is not an amount.
+    :return: Amount in cents.
+    :rtype: int
+    """
+    whole, _, frac = text.partition(".")
+    if len(frac) == 2 and frac.isdigit() and whole.lstrip("-").isdigit():
+        # Fast path for the common "-1234.56" form.
+        return int(whole + frac)
+
+    text = text.strip().replace(",", "").replace("$", "").replace(" ", "")
+    negative = False
+    if text.startswith("(") and text.endswith(")"):
+        text, negative = text[1:-1], True
+    elif text.endswith("-"):
+        text, negative = text[:-1], True
+    if text.startswith(("-", "+")):
+        negative = negative != (text[0] == "-")
+        text = text[1:]
+
+    whole, _, frac = text.partition(".")
+    if not (whole or frac) or not (whole + frac).isdigit() or len(frac) > 2:
+        raise ValueError(f"Not an amount: {text!r}")
+
+    cents = int(whole or "0") * 100 + int(frac.ljust(2, "0"))
+    return -cents if negative else cents
+
+
+def detect_format(filepath: pathlib.Path) -> str:
+    """Guess the format of a statement from its name and first bytes.
+
+    :param filepath: Statement to inspect.
+    :type filepath: pathlib.Path
+    :return: One of FORMATS.
+    :rtype: str
+    """
+    if filepath.suffix.lower() in (".ofx", ".qfx"):
+        return "ofx"
+
+    with open(filepath, "rb") as fin:
+        head = fin.read(1024).upper()
+    if b"OFXHEADER" in head or b"<OFX>" in head:
+        return "ofx"
+
+    return "csv"
+
+
+def _csv_rows(filepath: pathlib.Path, fin: TextIO) -> Iterator[list[str]]:
+    """Stream the rows of a CSV file.
+
+    :param filepath: CSV statement, for error messages.
+    :type filepath: pathlib.Path
+    :param fin: The statement, opened with newline="".
+    :type fin: TextIO
+    :raises StatementError: If the file is not valid CSV.
+    :return: Rows of fields.
+    :rtype: Iterator[list[str]]
+    """
+    reader = csv.reader(fin)
+    try:
+        yield from reader
+    except csv.Error as e:
+        raise StatementError(f"{filepath} line {reader.line_num}: {e}") from e
+
+
+def read_csv(filepath: pathlib.Path) -> Iterator[RawRecord]:
+    """Stream the records of a CSV export.
+
+    Columns are found by their header, see CSV_HEADERS. Exports with
+    separate debit and credit columns are supported. Bytes that are not
+    UTF-8, e.g. of exports in a Windows code page, are replaced.
+
+    :param filepath: CSV statement.
+    :type filepath: pathlib.Path
+    :raises StatementError: If the date, description or amount column is
+        missing, or the file is not valid CSV.
+    :return: Raw records, in file order.
+    :rtype: Iterator[RawRecord]
+    """
+    with open(
+        filepath,
+        newline="",
+        encoding="utf-8-sig",
+        errors="replace",
+        buffering=CHUNK_SIZE,
+    ) as fin:
+        reader = _csv_rows(filepath, fin)
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        columns: dict[str, int | None] = {}
+        for key, names in CSV_HEADERS.items():
+            columns[key] = next(
+                (header.index(name) for name in names if name in header), None
+            )
+
+        has_amount = columns["amount"] is not None or (
+            columns["debit"] is not None and columns["credit"] is not None
+        )
+        if columns["date"] is None or columns["description"] is None:
+            raise StatementError(f"{filepath}: no date or description column.")
+        if not has_amount:
+            raise StatementError(f"{filepath}: no amount column.")
+
+        # Fields in CSV_HEADERS order. Missing columns read the empty string
+        # appended to every row.
+        fields = operator.itemgetter(
+            *(-1 if index is None else index for index in columns.values())
+        )
+        width = len(header)
+        split_amount = columns["amount"] is None
+
+        for row in reader:
+            if not any(row):
+                continue
+
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
+            row.append("")
+            date, description, amount, debit, credit, category, account = (
+                fields(row)
+            )
+
+            if split_amount:
+                # Debits are listed as positive numbers.
+                debit = debit.strip().lstrip("-")
+                amount = f"-{debit}" if debit else credit
+
+            yield RawRecord(date, amount, description, category, account)
+
+
+def read_ofx(filepath: pathlib.Path) -> Iterator[RawRecord]:
+    """Stream the records of an OFX or QFX statement.
+
+    Handles both SGML (OFX 1.x, where only aggregates are closed) and XML
+    statements. The file is read in chunks, and each transaction is
+    parsed as soon as its closing tag has been read. A file may hold
+    several bank or credit card statements; each transaction is booked
+    to the account of the statement it is in.
+
+    :param filepath: OFX or QFX statement.
+    :type filepath: pathlib.Path
+    :return: Raw records, in file order.
+    :rtype: Iterator[RawRecord]
+    """
+    account = ""
+    buffer = ""
+
+    with open(filepath, encoding="utf8", errors="replace") as fin:
+        while True:
+            chunk = fin.read(CHUNK_SIZE)
+            buffer += chunk
+
+            end = 0
+            for match in _OFX_ELEMENT_RE.finditer(buffer):
+                end = match.end()
+                if match["statement"]:
+                    account = ""
+                    continue
+                if match["account"]:
+                    account = account or match["account"].strip()
+                    continue
+
+                tags = {
+                    key: value.strip()
+                    for key, value in _OFX_TAG_RE.findall(match["transaction"])
+                }
+                yield RawRecord(
+                    tags.get("DTPOSTED", ""),
+                    tags.get("TRNAMT", ""),
+                    tags.get("NAME") or tags.get("MEMO", ""),
+                    "",
+                    account,
+                )
+
+            if not chunk:
+                return
+
+            # Keep only the transaction that is still being read.
+            start = buffer.find("<STMTTRN>", end)
+            if start == -1:
+                start = max(end, len(buffer) - _OFX_TAIL)
+            buffer = buffer[start:]
+
+
+READERS = {"csv": read_csv, "ofx": read_ofx}
+
+
+def normalize(
+    records: Iterable[RawRecord], account: str | None
+) -> Iterator[tuple[int, int, str, str, str]]:
+    """Turn raw records into ledger rows.
+
+    :param records: Raw records of a statement.
+    :type records: Iterable[RawRecord]
+    :param account: Account for records that do not name one, None if
+        every record must name its own.
+    :type account: str | None
+    :raises StatementError: If a date or amount cannot be parsed, or a
+        record names no account and there is no default.
+    :return: Rows of day, cents, account, category, description.
+    :rtype: Iterator[tuple[int, int, str, str, str]]
+    """
+    for line, record in enumerate(records, start=1):
+        try:
+            day = parse_day(record.date)
+            cents = parse_cents(record.amount)
+        except ValueError as e:
+            raise StatementError(f"Record {line}: {e}") from e
+
+        record_account = record.account.strip() or account
+        if not record_account:
+            raise StatementError(
+                f"Record {line} names no account, pass --account so its "
+                "duplicates can be found in other statements."
+            )
+
+        yield (
+            day,
+            cents,
+            record_account,
+            record.category.strip() or UNCATEGORIZED,
+            " ".join(record.description.split()),
+        )
+
+
+def iter_rows(
+    filepath: pathlib.Path,
+    account: str | None = None,
+    file_format: str | None = None,
+    require_account: bool = False,
+) -> Iterator[tuple[int, int, str, str, str]]:
+    """Stream the normalized rows of a statement.
+
+    :param filepath: Statement to read.
+    :type filepath: pathlib.Path
+    :param account: Account for records that do not name one, defaults to
+        the statement's file name
+    :type account: str | None, optional
+    :param file_format: One of FORMATS, defaults to detecting it
+    :type file_format: str | None, optional
+    :param require_account: Whether records must name their account when
+        account is None, instead of using the file name. Duplicates are
+        keyed on the account, and overlapping statements of one account
+        have different file names, defaults to False
+    :type require_account: bool, optional
+    :return: Rows of day, cents, account, category, description.
+    :rtype: Iterator[tuple[int, int, str, str, str]]
+    """
+    file_format = file_format or detect_format(filepath)
+    records = READERS[file_format](filepath)
+
+    if account is None and not require_account:
+        account = filepath.stem
+    return normalize(records, account)
+
+
+def import_file(
+    ledger: Ledger,
+    filepath: pathlib.Path,
+    account: str | None = None,
+    file_format: str | None = None,
+    index: "DedupIndex | None" = None,
+) -> int:
+    """Append every transaction of a statement to a ledger, in batches.
+
+    :param ledger: Ledger to append to.
+    :type ledger: Ledger
+    :param filepath: Statement to import.
+    :type filepath: pathlib.Path
+    :param account: Account for records that do not name one, defaults to
+        the statement's file name, or to none with an index
+    :type account: str | None, optional
+    :param file_format: One of FORMATS, defaults to detecting it
+    :type file_format: str | None, optional
+    :param index: Index of the ledger, to skip rows already in it,
+        defaults to None (keep every row)
+    :type index: DedupIndex | None, optional
+    :raises StatementError: If the statement cannot be parsed, or with an
+        index, a record names no account and account is None.
+    :return: Rows imported.
+    :rtype: int
+    """
+    rows = iter_rows(filepath, account, file_format, index is not None)
+    return append_rows(ledger, rows, index)[0]
+
+
+def append_rows(
+    ledger: Ledger,
+    rows: Iterable[tuple[int, int, str, str, str]],
+    index: "DedupIndex | None" = None,
+) -> tuple[int, int]:
+    """Append the rows of one statement to a ledger, in batches.
+
+    :param ledger: Ledger to append to.
+    :type ledger: Ledger
+    :param rows: Rows of day, cents, account, category, description.
+    :type rows: Iterable[tuple[int, int, str, str, str]]
+    :param index: Index of the ledger, to skip rows already in it,
+        defaults to None (keep every row)
+    :type index: DedupIndex | None, optional
+    :return: Rows appended, and rows skipped as duplicates.
+    :rtype: tuple[int, int]
+    """
+    imported = duplicates = 0
+    # The statement's own rows count as matched, so a transaction the
+    # statement lists twice is kept twice.
+    consumed: set[int] = set()
+
+    for batch in batched(rows, BATCH_SIZE):
+        if index is not None:
+            matches = index.screen(batch, consumed)
+            new = [row for row, match in zip(batch, matches) if match is None]
+            duplicates += len(batch) - len(new)
+            batch = new
+
+        start = len(ledger)
+        ledger.extend(batch)
+        imported += len(batch)
+
+        if index is not None:
+            consumed.update(range(start, len(ledger)))
+            index.update()
+
+    return imported, duplicates
+
+
+def merge_partial(
+    ledger: Ledger, partial: Ledger, index: "DedupIndex | None" = None
+) -> tuple[int, int]:
+    """Merge a statement parsed by parse_to_ledger into a ledger.
+
+    :param ledger: Ledger to merge into.
+    :type ledger: Ledger
+    :param partial: Ledger holding only the statement.
+    :type partial: Ledger
+    :param index: Index of the ledger, to skip rows already in it,
+        defaults to None (keep every row)
+    :type index: DedupIndex | None, optional
+    :return: Rows merged, and rows skipped as duplicates.
+    :rtype: tuple[int, int]
+    """
+    if index is None:
+        ledger.merge(partial)
+        return len(partial), 0
+
+    columns = partial.columns
+    rows = list(
+        zip(
+            columns["date"],
+            columns["amount"],
+            map(partial.pools["account"].__getitem__, columns["account"]),
+            map(partial.pools["category"].__getitem__, columns["category"]),
+            map(
+                partial.pools["description"].__getitem__,
+                columns["description"],
+            ),
+        )
+    )
+    matches = index.screen(rows, set())
+    mask = bytes(match is None for match in matches)
+
+    ledger.merge(partial, mask)
+    index.update()
+
+    imported = sum(mask)
+    return imported, len(partial) - imported
+
+
+def parse_to_ledger(
+    filepath: pathlib.Path,
+    account: str | None = None,
+    file_format: str | None = None,
+    require_account: bool = False,
+) -> Ledger:
+    """Parse a statement into a ledger of its own, for worker processes.
+
+    :param filepath: Statement to parse.
+    :type filepath: pathlib.Path
+    :param account: Account for records that do not name one, defaults to
+        the statement's file name
+    :type account: str | None, optional
+    :param file_format: One of FORMATS, defaults to detecting it
+    :type file_format: str | None, optional
+    :param require_account: Whether records must name their account when
+        account is None, see iter_rows, defaults to False
+    :type require_account: bool, optional
+    :return: Ledger holding only this statement.
+    :rtype: Ledger
+    """
+    partial = Ledger()
+    rows = iter_rows(filepath, account, file_format, require_account)
+    append_rows(partial, rows)
+    return partial
+
+
+def _log_file(filepath: pathlib.Path, rows: int, duplicates: int) -> None:
+    """Log how the import of one statement went.
+
+    :param filepath: The statement.
+    :type filepath: pathlib.Path
+    :param rows: Rows imported.
+    :type rows: int
+    :param duplicates: Rows skipped as duplicates.
+    :type duplicates: int
+    """
+    logger.info(
+        f"Imported {rows} rows from {filepath}, skipped {duplicates} "
+        "duplicates"
+    )
+
+
+def import_files(
+    ledger: Ledger,
+    filepaths: list[pathlib.Path],
+    account: str | None = None,
+    file_format: str | None = None,
+    workers: int = 1,
+    index: "DedupIndex | None" = None,
+) -> ImportStats:
+    """Import several statements, in parallel when workers > 1.
+
+    Statements are appended in the order given, whatever the order their
+    workers finish in. With an index, each statement is checked against
+    the ledger including the statements imported before it.
+
+    :param ledger: Ledger to append to.
+    :type ledger: Ledger
+    :param filepaths: Statements to import.
+    :type filepaths: list[pathlib.Path]
+    :param account: Account for records that do not name one, defaults to
+        each statement's file name. With an index it is required, unless
+        every record names its account, since the index matches rows of
+        the same account.
+    :type account: str | None, optional
+    :param file_format: One of FORMATS, defaults to detecting it per file
+    :type file_format: str | None, optional
+    :param workers: Processes parsing statements, defaults to 1
+    :type workers: int, optional
+    :param index: Index of the ledger, to skip rows already in it,
+        defaults to None (keep every row)
+    :type index: DedupIndex | None, optional
+    :raises StatementError: If a statement cannot be parsed, or with an
+        index, a record names no account and account is None.
+    :return: Files and rows imported, and how long it took.
+    :rtype: ImportStats
+    """
+    start = time.perf_counter()
+    imported = duplicates = 0
+
+    if workers <= 1 or len(filepaths) <= 1:
+        for filepath in filepaths:
+            rows = iter_rows(filepath, account, file_format, index is not None)
+            added, skipped = append_rows(ledger, rows, index)
+            imported, duplicates = imported + added, duplicates + skipped
+            _log_file(filepath, added, skipped)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            partials = pool.map(
+                parse_to_ledger,
+                filepaths,
+                itertools.repeat(account),
+                itertools.repeat(file_format),
+                itertools.repeat(index is not None),
+            )
+            for filepath, partial in zip(filepaths, partials):
+                added, skipped = merge_partial(ledger, partial, index)
+                imported, duplicates = imported + added, duplicates + skipped
+                _log_file(filepath, added, skipped)
+
+    stats = ImportStats(
+        len(filepaths), imported, time.perf_counter() - start, duplicates
+    )
+    logger.info(
+        f"Imported {stats.rows} rows from {stats.files} files in "
+        f"{stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/sec), "
+        f"skipped {stats.duplicates} duplicates"
+    )
+    return stats
@@ -0,0 +1,269 @@
+"""Contains the budget versus actual report over the ledger.
+
+Actual spending is aggregated in one pass per report: every selected row
+gets a dense group id, category code times months in the report plus the
+month offset, built with ``map`` over whole columns. The amounts are then
+summed into a flat list indexed by group id, the stdlib counterpart of a
+weighted ``bincount``.
+"""
+
+import datetime
+import itertools
+import json
+import logging
+import operator
+import pathlib
+from array import array
+from typing import Iterable, NamedTuple
+
+from pfts.ledger.importers import parse_cents
+from pfts.ledger.store import Ledger, format_cents
+
+logger = logging.getLogger(__name__)
+
+BUDGET_FILE = "budget.json"
+REPORT_FORMATS = ("table", "json")
+UNCATEGORIZED_LABEL = "uncategorized"
+
+
+class BudgetError(Exception):
+    """Raised when a budget file cannot be read."""
+
+
+class BudgetLine(NamedTuple):
+    """Budget and actual spending of one category in one month."""
+
+    month: str
+    category: str
+    budget: int | None
+    actual: int
+
+    @property
+    def remaining(self) -> int | None:
+        """Budget left, negative when overspent, None without a budget."""
+        return None if self.budget is None else self.budget - self.actual
+
+
+def month_key(date: datetime.date) -> int:
+    """Month of a date, as year * 12 + month - 1 like Ledger.month_keys.
+
+    :param date: Any day of the month.
+    :type date: datetime.date
+    :return: The month key.
+    :rtype: int
+    """
+    return date.year * 12 + date.month - 1
+
+
+def format_month(key: int) -> str:
+    """Format a month key as "YYYY-MM".
+
+    :param key: Month key.
+    :type key: int
+    :return: The month.
+    :rtype: str
+    """
+    return f"{key // 12}-{key % 12 + 1:02d}"
+
+
+def load_budget(filepath: pathlib.Path) -> dict[str, int]:
+    """Read monthly budgets per category from a JSON object.
+
+    Amounts may be numbers or strings like "1,200.00".
+
+    :param filepath: Budget file.
+    :type filepath: pathlib.Path
+    :raises BudgetError: If the file is missing or not a budget.
+    :return: Monthly budget in cents by category.
+    :rtype: dict[str, int]
+    """
+    try:
+        content = json.loads(filepath.read_text(encoding="utf8"))
+    except (OSError, ValueError) as e:
+        raise BudgetError(f"Cannot read budget {filepath}: {e}") from e
+
+    if not isinstance(content, dict):
+        raise BudgetError(f"Budget {filepath} must be a JSON object.")
+
+    budget = {}
+    for category, amount in content.items():
+        try:
+            budget[category] = parse_cents(str(amount))
+        except ValueError as e:
+            raise BudgetError(f"Budget for {category!r}: {e}") from e
+
+    return budget
+
+
+def category_month_totals(
+    ledger: Ledger, mask: bytes | None = None
+) -> dict[tuple[int, int], int]:
+    """Sum the selected amounts per category and month.
+
+    :param ledger: Ledger to aggregate.
+    :type ledger: Ledger
+    :param mask: Row mask from Ledger.select, defaults to None (every row)
+    :type mask: bytes | None, optional
+    :return: Total in cents by category code and month key, for every
+        group with at least one row.
+    :rtype: dict[tuple[int, int], int]
+    """
+    months = list(ledger.month_keys(mask))
+    if not months:
+        return {}
+
+    first = min(months)
+    span = max(months) - first + 1
+
+    groups = array(
+        "q",
+        map(
+            operator.add,
+            map(
+                operator.mul,
+                ledger.column("category", mask),
+                itertools.repeat(span),
+            ),
+            map(operator.sub, months, itertools.repeat(first)),
+        ),
+    )
+    totals = [0] * (len(ledger.pools["category"]) * span)
+    for group, cents in zip(groups, ledger.column("amount", mask)):
+        totals[group] += cents
+
+    # Only groups holding rows, a group can sum to zero.
+    return {
+        (group // span, first + group % span): totals[group]
+        for group in sorted(set(groups))
+    }
+
+
+def budget_report(
+    ledger: Ledger,
+    budget: dict[str, int],
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+    accounts: Iterable[str] | None = None,
+    categories: Iterable[str] | None = None,
+) -> list[BudgetLine]:
+    """Compare the monthly budgets to what was spent each month.
+
+    Every month from since to until, or else the months holding selected
+    transactions, lists each budgeted category, plus any other category
+    with transactions that month. Spending is positive, so refunds and
+    income in a category lower its actual amount.
+
+    :param ledger: Ledger to report on.
+    :type ledger: Ledger
+    :param budget: Monthly budget in cents by category.
+    :type budget: dict[str, int]
+    :param since: First date to include, defaults to None
+    :type since: datetime.date | None, optional
+    :param until: Last date to include, defaults to None
+    :type until: datetime.date | None, optional
+    :param accounts: Accounts to include, defaults to None (all)
+    :type accounts: Iterable[str] | None, optional
+    :param categories: Categories to include, defaults to None (all)
+    :type categories: Iterable[str] | None, optional
+    :return: One line per month and category, by month.
+    :rtype: list[BudgetLine]
+    """
+    if categories is not None:
+        categories = set(categories)
+        budget = {
+            name: cents for name, cents in budget.items() if name in categories
+        }
+
+    mask = ledger.select(since, until, accounts, categories)
+    totals = category_month_totals(ledger, mask)
+
+    if totals:
+        months = [month for _, month in totals]
+        first, last = min(months), max(months)
+    elif since is None or until is None:
+        return []
+    if since is not None:
+        first = month_key(since)
+    if until is not None:
+        last = month_key(until)
+
+    pool = ledger.pools["category"]
+    budget_codes = [pool.codes.get(name) for name in budget]
+    unbudgeted = sorted(
+        {code for code, _ in totals if pool[code] not in budget},
+        key=pool.__getitem__,
+    )
+
+    lines = []
+    for month in range(first, last + 1):
+        label = format_month(month)
+        for name, code in zip(budget, budget_codes):
+            actual = -totals.get((code, month), 0) if code is not None else 0
+            lines.append(BudgetLine(label, name, budget[name], actual))
+        for code in unbudgeted:
+            if (code, month) in totals:
+                name = pool[code] or UNCATEGORIZED_LABEL
+                lines.append(
+                    BudgetLine(label, name, None, -totals[code, month])
+                )
+
+    return lines
+
+
+def format_table(lines: list[BudgetLine]) -> str:
+    """Render a budget report as an aligned text table.
+
+    :param lines: Lines of the report.
+    :type lines: list[BudgetLine]
+    :return: The table, one row per line.
+    :rtype: str
+    """
+    header = ("Month", "Category", "Budget", "Actual", "Remaining")
+    rows = [
+        (
+            line.month,
+            line.category,
+            "-" if line.budget is None else format_cents(line.budget),
+            format_cents(line.actual),
+            "-" if line.remaining is None else format_cents(line.remaining),
+        )
+        for line in lines
+    ]
+    widths = [
+        max(len(row[column]) for row in [header, *rows])
+        for column in range(len(header))
+    ]
+
+    return "\n".join(
+        f"{month:<{widths[0]}}  {category:<{widths[1]}}  "
+        f"{budget:>{widths[2]}}  {actual:>{widths[3]}}  "
+        f"{remaining:>{widths[4]}}"
+        for month, category, budget, actual, remaining in [header, *rows]
+    )
+
+
+def format_json(lines: list[BudgetLine]) -> str:
+    """Render a budget report as JSON, amounts as decimal strings.
+
+    :param lines: Lines of the report.
+    :type lines: list[BudgetLine]
+    :return: JSON list with one object per line.
+    :rtype: str
+    """
+    return json.dumps(
+        [
+            {
+                "month": line.month,
+                "category": line.category,
+                "budget": None
+                if line.budget is None
+                else format_cents(line.budget),
+                "actual": format_cents(line.actual),
+                "remaining": None
+                if line.remaining is None
+                else format_cents(line.remaining),
+            }
+            for line in lines
+        ],
+        indent=2,
+    )
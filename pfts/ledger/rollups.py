@@ -0,0 +1,469 @@
+"""Contains the materialized aggregates kept alongside the ledger.
+
+Rows are rolled up into one Series per account and category. A series
+holds the net amount and transaction count of each day with transactions,
+plus their running sums. Any total over a date range is then the
+difference of two running sums found by bisect, so balances and period
+totals take logarithmic time, whatever the number of rows.
+
+Appending rows only touches the end of a series. Editing an older row
+updates the days it moved from and to, and marks the running sums stale
+from the earliest of those days; they are recomputed from there on the
+next query.
+"""
+
+import bisect
+import datetime
+import itertools
+import logging
+import pathlib
+from array import array
+from typing import Iterable
+
+from pfts.ledger.store import GROUP_KEYS, Ledger, from_days, to_days
+from pfts.util import files
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_FILE = "rollups.bin"
+FORMAT_VERSION = 1
+# Edits to more than one row in this many are applied by rolling up every
+# row again instead.
+REBUILD_SHARE = 8
+
+
+def month_bounds(key: int) -> tuple[int, int]:
+    """First and last day of a month.
+
+    :param key: Month, as year * 12 + month - 1.
+    :type key: int
+    :return: Days since the epoch of its first and last day.
+    :rtype: tuple[int, int]
+    """
+    first = datetime.date(key // 12, key % 12 + 1, 1)
+    following = datetime.date((key + 1) // 12, (key + 1) % 12 + 1, 1)
+    return to_days(first), to_days(following) - 1
+
+
+class Series:
+    """Net amount and count per day, with running sums, of one group."""
+
+    __slots__ = ("days", "totals", "counts", "cumulative", "running", "valid")
+
+    def __init__(
+        self,
+        days: array | None = None,
+        totals: array | None = None,
+        counts: array | None = None,
+    ) -> None:
+        """Create the series.
+
+        :param days: Days with transactions, ascending, defaults to None
+        :type days: array | None, optional
+        :param totals: Net cents of each day, defaults to None
+        :type totals: array | None, optional
+        :param counts: Transactions on each day, defaults to None
+        :type counts: array | None, optional
+        """
+        self.days: array[int] = array("q") if days is None else days
+        self.totals: array[int] = array("q") if totals is None else totals
+        self.counts: array[int] = array("q") if counts is None else counts
+        # Sums of totals and counts over the days before each index.
+        self.cumulative: array[int] = array("q", [0])
+        self.running: array[int] = array("q", [0])
+        # Days before this index have up to date running sums.
+        self.valid = 0
+
+    def add(self, day: int, cents: int, count: int = 1) -> None:
+        """Add transactions to a day, or remove them with a negative count.
+
+        :param day: Days since the epoch.
+        :type day: int
+        :param cents: Net amount to add.
+        :type cents: int
+        :param count: Transactions to add, defaults to 1
+        :type count: int, optional
+        """
+        days = self.days
+        if days and days[-1] == day:
+            index = len(days) - 1
+        elif not days or days[-1] < day:
+            index = len(days)
+            days.append(day)
+            self.totals.append(0)
+            self.counts.append(0)
+        else:
+            index = bisect.bisect_left(days, day)
+            if days[index] != day:
+                days.insert(index, day)
+                self.totals.insert(index, 0)
+                self.counts.insert(index, 0)
+
+        self.totals[index] += cents
+        self.counts[index] += count
+        self.valid = min(self.valid, index)
+
+    def _refresh(self) -> None:
+        """Recompute the running sums from the first stale day on."""
+        start = self.valid
+        if start == len(self.days):
+            return
+
+        for sums, values in (
+            (self.cumulative, self.totals),
+            (self.running, self.counts),
+        ):
+            del sums[start + 1 :]
+            sums.extend(
+                itertools.islice(
+                    itertools.accumulate(values[start:], initial=sums[start]),
+                    1,
+                    None,
+                )
+            )
+        self.valid = len(self.days)
+
+    def range_total(
+        self, first: int | None = None, last: int | None = None
+    ) -> tuple[int, int]:
+        """Net amount and count of the transactions between two days.
+
+        :param first: First day to include, defaults to None (no bound)
+        :type first: int | None, optional
+        :param last: Last day to include, defaults to None (no bound)
+        :type last: int | None, optional
+        :return: Cents and transaction count.
+        :rtype: tuple[int, int]
+        """
+        self._refresh()
+        start = 0 if first is None else bisect.bisect_left(self.days, first)
+        end = (
+            len(self.days)
+            if last is None
+            else bisect.bisect_right(self.days, last)
+        )
+        if end <= start:
+            return 0, 0
+
+        return (
+            self.cumulative[end] - self.cumulative[start],
+            self.running[end] - self.running[start],
+        )
+
+
+class Rollups:
+    """Running totals of a ledger per account, category and day."""
+
+    def __init__(self, ledger: Ledger) -> None:
+        """Create empty rollups of a ledger.
+
+        Call update to roll up the rows the ledger already holds.
+
+        :param ledger: Ledger to aggregate.
+        :type ledger: Ledger
+        """
+        self.ledger = ledger
+        self.series: dict[tuple[int, int], Series] = {}
+        self.indexed = 0
+        self.edits = ledger.edits
+        # Whether there are changes the saved rollups lack.
+        self.dirty = False
+
+    def _series(self, account: int, category: int) -> Series:
+        key = (account, category)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = Series()
+        return series
+
+    def update(self) -> int:
+        """Roll up the rows appended to the ledger since the last update.
+
+        :return: Rows rolled up.
+        :rtype: int
+        """
+        start, end = self.indexed, len(self.ledger)
+        columns = self.ledger.columns
+
+        for day, cents, account, category in zip(
+            columns["date"][start:],
+            columns["amount"][start:],
+            columns["account"][start:],
+            columns["category"][start:],
+        ):
+            self._series(account, category).add(day, cents)
+
+        self.indexed = end
+        self.dirty = self.dirty or end > start
+        return end - start
+
+    def apply_edit(
+        self, index: int, old: tuple[int, int, int, int, int]
+    ) -> None:
+        """Move an edited row from the days and groups it used to count in.
+
+        :param index: Row index of the edited transaction.
+        :type index: int
+        :param old: Values of the row before the edit, from Ledger.edit.
+        :type old: tuple[int, int, int, int, int]
+        """
+        if index < self.indexed:
+            day, cents, account, category, _ = old
+            self._series(account, category).add(day, -cents, -1)
+
+            day, cents, account, category, _ = self.ledger.raw(index)
+            self._series(account, category).add(day, cents)
+
+        self.edits = self.ledger.edits
+        self.dirty = True
+
+    def apply_edits(
+        self, edits: list[tuple[int, tuple[int, int, int, int, int]]]
+    ) -> None:
+        """Apply many edits, rolling up every row again when that is faster.
+
+        :param edits: Row index and values before the edit of each row.
+        :type edits: list[tuple[int, tuple[int, int, int, int, int]]]
+        """
+        if len(edits) * REBUILD_SHARE < self.indexed:
+            for index, old in edits:
+                self.apply_edit(index, old)
+            return
+
+        logger.info(f"Rolling up the ledger again for {len(edits)} edits")
+        self.series = {}
+        self.indexed = 0
+        self.update()
+        self.edits = self.ledger.edits
+        self.dirty = True
+
+    def _selected(
+        self,
+        accounts: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> Iterable[tuple[tuple[int, int], Series]]:
+        """Series of the selected accounts and categories.
+
+        :param accounts: Accounts to include, defaults to None (all)
+        :type accounts: Iterable[str] | None, optional
+        :param categories: Categories to include, defaults to None (all)
+        :type categories: Iterable[str] | None, optional
+        :return: Pairs of account and category code, and their series.
+        :rtype: Iterable[tuple[tuple[int, int], Series]]
+        """
+        account_codes = category_codes = None
+        if accounts is not None:
+            account_codes = self.ledger.codes_of("account", accounts)
+        if categories is not None:
+            category_codes = self.ledger.codes_of("category", categories)
+
+        return (
+            (key, series)
+            for key, series in self.series.items()
+            if (account_codes is None or key[0] in account_codes)
+            and (category_codes is None or key[1] in category_codes)
+        )
+
+    def totals(
+        self,
+        since: datetime.date | None = None,
+        until: datetime.date | None = None,
+        accounts: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> tuple[int, int]:
+        """Net amount and count of the selected transactions.
+
+        Selects the same rows as Ledger.select with the same arguments.
+
+        :param since: First date to include, defaults to None
+        :type since: datetime.date | None, optional
+        :param until: Last date to include, defaults to None
+        :type until: datetime.date | None, optional
+        :param accounts: Accounts to include, defaults to None (all)
+        :type accounts: Iterable[str] | None, optional
+        :param categories: Categories to include, defaults to None (all)
+        :type categories: Iterable[str] | None, optional
+        :return: Cents and transaction count.
+        :rtype: tuple[int, int]
+        """
+        first = None if since is None else to_days(since)
+        last = None if until is None else to_days(until)
+
+        cents = count = 0
+        for _, series in self._selected(accounts, categories):
+            total, rows = series.range_total(first, last)
+            cents, count = cents + total, count + rows
+        return cents, count
+
+    def balance(self, account: str, as_of: datetime.date | None = None) -> int:
+        """Running balance of an account, from its first transaction on.
+
+        :param account: Account name.
+        :type account: str
+        :param as_of: Last date to include, defaults to None (all)
+        :type as_of: datetime.date | None, optional
+        :return: Balance in cents.
+        :rtype: int
+        """
+        return self.totals(until=as_of, accounts=[account])[0]
+
+    def group_totals(
+        self,
+        by: str,
+        since: datetime.date | None = None,
+        until: datetime.date | None = None,
+        accounts: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> dict[str, int]:
+        """Net amount of the selected transactions per group.
+
+        Matches Ledger.group_totals over the rows Ledger.select picks.
+
+        :param by: One of GROUP_KEYS.
+        :type by: str
+        :param since: First date to include, defaults to None
+        :type since: datetime.date | None, optional
+        :param until: Last date to include, defaults to None
+        :type until: datetime.date | None, optional
+        :param accounts: Accounts to include, defaults to None (all)
+        :type accounts: Iterable[str] | None, optional
+        :param categories: Categories to include, defaults to None (all)
+        :type categories: Iterable[str] | None, optional
+        :raises ValueError: If by is not one of GROUP_KEYS.
+        :return: Total in cents by group name, months as "YYYY-MM".
+        :rtype: dict[str, int]
+        """
+        if by not in GROUP_KEYS:
+            raise ValueError(f"Cannot group by {by!r}")
+
+        first = None if since is None else to_days(since)
+        last = None if until is None else to_days(until)
+        selected = list(self._selected(accounts, categories))
+
+        totals: dict[int, int] = {}
+        if by == "month":
+            months = self._month_range(selected, first, last)
+            for month in months:
+                start, end = month_bounds(month)
+                start = start if first is None else max(start, first)
+                end = end if last is None else min(end, last)
+                for _, series in selected:
+                    cents, count = series.range_total(start, end)
+                    if count:
+                        totals[month] = totals.get(month, 0) + cents
+
+            return {
+                f"{key // 12}-{key % 12 + 1:02d}": totals[key]
+                for key in sorted(totals)
+            }
+
+        position = GROUP_KEYS.index(by)
+        for key, series in selected:
+            cents, count = series.range_total(first, last)
+            if count:
+                group = key[position]
+                totals[group] = totals.get(group, 0) + cents
+
+        pool = self.ledger.pools[by]
+        return {pool[code]: totals[code] for code in sorted(totals)}
+
+    @staticmethod
+    def _month_range(
+        selected: list[tuple[tuple[int, int], Series]],
+        first: int | None,
+        last: int | None,
+    ) -> range:
+        """Months between the first and last selected days.
+
+        :param selected: Series to look at.
+        :type selected: list[tuple[tuple[int, int], Series]]
+        :param first: First day to include, or None.
+        :type first: int | None
+        :param last: Last day to include, or None.
+        :type last: int | None
+        :return: Month keys, ascending.
+        :rtype: range
+        """
+        days = [
+            day
+            for _, series in selected
+            if series.days
+            for day in (series.days[0], series.days[-1])
+        ]
+        if not days:
+            return range(0)
+
+        low = min(days) if first is None else max(min(days), first)
+        high = max(days) if last is None else min(max(days), last)
+        if high < low:
+            return range(0)
+
+        start, end = from_days(low), from_days(high)
+        return range(
+            start.year * 12 + start.month - 1, end.year * 12 + end.month
+        )
+
+    def save(self, directory: pathlib.Path) -> None:
+        """Write the rollups next to the ledger they summarize.
+
+        :param directory: Ledger folder.
+        :type directory: pathlib.Path
+        """
+        header = array(
+            "q", [FORMAT_VERSION, self.indexed, self.edits, len(self.series)]
+        )
+        with files.atomic_write_bytes(directory / ROLLUPS_FILE) as fout:
+            header.tofile(fout)
+            for (account, category), series in self.series.items():
+                array("q", [account, category, len(series.days)]).tofile(fout)
+                series.days.tofile(fout)
+                series.totals.tofile(fout)
+                series.counts.tofile(fout)
+
+        self.dirty = False
+
+    @classmethod
+    def load(cls, directory: pathlib.Path, ledger: Ledger) -> "Rollups":
+        """Read the saved rollups of a ledger, and roll up any newer rows.
+
+        The rollups are rebuilt from the ledger when there are none, or
+        when the ledger was edited, or shrank, since they were saved.
+
+        :param directory: Ledger folder.
+        :type directory: pathlib.Path
+        :param ledger: The ledger loaded from that folder.
+        :type ledger: Ledger
+        :return: Rollups covering every row of the ledger.
+        :rtype: Rollups
+        """
+        rollups = cls(ledger)
+        rollups_path = directory / ROLLUPS_FILE
+
+        if rollups_path.exists():
+            with open(rollups_path, "rb") as fin:
+                header = array("q")
+                header.fromfile(fin, 4)
+                version, rows, edits, count = header
+
+                if (version, edits) != (
+                    FORMAT_VERSION,
+                    ledger.edits,
+                ) or rows > len(ledger):
+                    logger.info(f"Rebuilding the outdated {rollups_path}")
+                else:
+                    for _ in range(count):
+                        key = array("q")
+                        key.fromfile(fin, 3)
+                        account, category, length = key
+                        columns = []
+                        for _ in range(3):
+                            values = array("q")
+                            values.fromfile(fin, length)
+                            columns.append(values)
+                        rollups.series[account, category] = Series(*columns)
+                    rollups.indexed = rows
+
+        rolled = rollups.update()
+        if rolled:
+            logger.info(f"Rolled up {rolled} ledger rows")
+        return rollups
@@ -0,0 +1,486 @@
+"""Contains the SQLite backed ledger, for ad-hoc SQL over transactions.
+
+Transactions are rows of a ``transactions`` table: ``id`` is the row of the
+columnar ledger, ``date`` is ISO text so SQLite's date functions work on
+it, ``amount`` is integer cents, and the strings are stored inline. Indexes
+on (account, date, amount) and (category, date, amount) cover balances and
+period totals, which are then answered from the index alone.
+
+The database runs in WAL mode, so readers never block the writer or each
+other. Writes go through a single connection, streaming rows into
+``executemany`` inside one transaction. Reads borrow a read-only
+connection from a small pool, so several threads can query at once. Every
+statement is constant SQL with parameters, which sqlite3 prepares once per
+connection and keeps in its statement cache.
+"""
+
+import contextlib
+import datetime
+import itertools
+import logging
+import pathlib
+import queue
+import sqlite3
+import threading
+from typing import Iterable, Iterator
+
+from pfts.ledger.store import GROUP_KEYS, Ledger, from_days
+from pfts.util.logging import log_context
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FILE = "ledger.sqlite"
+DEFAULT_READERS = 4
+# Prepared statements kept per connection.
+STATEMENT_CACHE = 256
+# Page cache of the write connection in KiB, large enough to keep the
+# index pages being filled by a bulk insert in memory.
+WRITE_CACHE_KIB = 65536
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS transactions ("
+    "id INTEGER PRIMARY KEY, date TEXT NOT NULL, amount INTEGER NOT NULL, "
+    "account TEXT NOT NULL, category TEXT NOT NULL, "
+    "description TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta "
+    "(key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS by_account "
+    "ON transactions (account, date, amount)",
+    "CREATE INDEX IF NOT EXISTS by_category "
+    "ON transactions (category, date, amount)",
+)
+DROP_INDEXES = (
+    "DROP INDEX IF EXISTS by_account",
+    "DROP INDEX IF EXISTS by_category",
+)
+INSERT = "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)"
+NEXT_ID = "SELECT coalesce(max(id) + 1, 0) FROM transactions"
+SET_META = "INSERT OR REPLACE INTO meta VALUES (?, ?)"
+GROUP_EXPRESSIONS = {
+    "account": "account",
+    "category": "category",
+    "month": "substr(date, 1, 7)",
+}
+
+
+def connect(path: pathlib.Path, read_only: bool = False) -> sqlite3.Connection:
+    """Open a connection to a ledger database, shareable between threads.
+
+    :param path: Database file.
+    :type path: pathlib.Path
+    :param read_only: Refuse writes on this connection, defaults to False
+    :type read_only: bool, optional
+    :return: The connection, in autocommit mode.
+    :rtype: sqlite3.Connection
+    """
+    connection = sqlite3.connect(
+        path,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE,
+    )
+    if read_only:
+        connection.execute("PRAGMA query_only = ON")
+    return connection
+
+
+def where(
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+    accounts: Iterable[str] | None = None,
+    categories: Iterable[str] | None = None,
+) -> tuple[str, list]:
+    """WHERE clause selecting the same rows as Ledger.select.
+
+    :param since: First date to include, defaults to None
+    :type since: datetime.date | None, optional
+    :param until: Last date to include, defaults to None
+    :type until: datetime.date | None, optional
+    :param accounts: Accounts to include, defaults to None (all)
+    :type accounts: Iterable[str] | None, optional
+    :param categories: Categories to include, defaults to None (all)
+    :type categories: Iterable[str] | None, optional
+    :return: The clause, empty when nothing is filtered, and its parameters.
+    :rtype: tuple[str, list]
+    """
+    clauses = []
+    params: list = []
+
+    for name, values in (("account", accounts), ("category", categories)):
+        if values is not None:
+            values = list(dict.fromkeys(values))
+            clauses.append(f"{name} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if since is not None:
+        clauses.append("date >= ?")
+        params.append(since.isoformat())
+    if until is not None:
+        clauses.append("date <= ?")
+        params.append(until.isoformat())
+
+    if not clauses:
+        return "", params
+    return f" WHERE {' AND '.join(clauses)}", params
+
+
+def ledger_rows(
+    ledger: Ledger, start: int = 0
+) -> Iterator[tuple[int, str, int, str, str, str]]:
+    """Rows of a columnar ledger, as inserted into the transactions table.
+
+    Each distinct date is only formatted once, and strings are looked up
+    by code in the pools.
+
+    :param ledger: Ledger to read.
+    :type ledger: Ledger
+    :param start: First row to read, defaults to 0
+    :type start: int, optional
+    :return: Id, ISO date, cents, account, category and description.
+    :rtype: Iterator[tuple[int, str, int, str, str, str]]
+    """
+    columns = ledger.columns
+    dates = columns["date"][start:]
+    texts = {day: from_days(day).isoformat() for day in set(dates)}
+
+    return zip(
+        itertools.count(start),
+        map(texts.__getitem__, dates),
+        columns["amount"][start:],
+        *(
+            map(ledger.pools[name].values.__getitem__, columns[name][start:])
+            for name in ("account", "category", "description")
+        ),
+    )
+
+
+def _synced(connection: sqlite3.Connection) -> tuple[int, int]:
+    """Rows and edits of the columnar ledger the database last copied.
+
+    :param connection: Connection to read them with.
+    :type connection: sqlite3.Connection
+    :return: Rows and edits, both 0 if it never copied one.
+    :rtype: tuple[int, int]
+    """
+    meta = dict(connection.execute("SELECT key, value FROM meta"))
+    return meta.get("rows", 0), meta.get("edits", 0)
+
+
+class ConnectionPool:
+    """Read-only connections to one database, shared between threads.
+
+    Connections are opened when first needed, up to size of them. A thread
+    asking for one while all are busy waits for one to be returned.
+    """
+
+    def __init__(
+        self, path: pathlib.Path, size: int = DEFAULT_READERS
+    ) -> None:
+        """Create the pool, without opening any connection yet.
+
+        :param path: Database file.
+        :type path: pathlib.Path
+        :param size: Most connections open at once, defaults to
+            DEFAULT_READERS
+        :type size: int, optional
+        :raises ValueError: If size is not positive.
+        """
+        if size < 1:
+            raise ValueError("A connection pool needs at least 1 connection")
+
+        self.path = path
+        self.size = size
+        self.opened = 0
+        self.idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a with block.
+
+        :return: A read-only connection.
+        :rtype: Iterator[sqlite3.Connection]
+        """
+        try:
+            connection = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                opening = self.opened < self.size
+                if opening:
+                    self.opened += 1
+            if opening:
+                connection = connect(self.path, read_only=True)
+            else:
+                connection = self.idle.get()
+
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self.idle.put(connection)
+
+    def close(self) -> None:
+        """Close the idle connections, call once none are borrowed."""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self.lock:
+                self.opened -= 1
+
+
+class SqliteLedger:
+    """Transactions stored in a SQLite database."""
+
+    def __init__(
+        self, path: pathlib.Path, readers: int = DEFAULT_READERS
+    ) -> None:
+        """Open the database, creating it and its tables if needed.
+
+        :param path: Database file.
+        :type path: pathlib.Path
+        :param readers: Read connections shared between threads, defaults
+            to DEFAULT_READERS
+        :type readers: int, optional
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.writer = connect(path)
+        self.writer.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode this still survives a crash of the process, only a
+        # power loss can drop the last commits.
+        self.writer.execute("PRAGMA synchronous = NORMAL")
+        self.writer.execute(f"PRAGMA cache_size = -{WRITE_CACHE_KIB}")
+        for statement in SCHEMA + INDEXES:
+            self.writer.execute(statement)
+        self.write_lock = threading.Lock()
+        self.pool = ConnectionPool(path, readers)
+
+    def close(self) -> None:
+        """Close every connection."""
+        self.pool.close()
+        self.writer.close()
+
+    def __enter__(self) -> "SqliteLedger":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write inside one transaction, committed when the block ends.
+
+        :return: The write connection.
+        :rtype: Iterator[sqlite3.Connection]
+        """
+        with self.write_lock:
+            self.writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.writer
+            except BaseException:
+                self.writer.execute("ROLLBACK")
+                raise
+            self.writer.execute("COMMIT")
+
+    def __len__(self) -> int:
+        # Ids are dense, and max(id) is a single primary key lookup.
+        return self.query(NEXT_ID)[1][0][0]
+
+    def extend(self, rows: Iterable[tuple[int, int, str, str, str]]) -> int:
+        """Add a batch of transactions, in a single transaction.
+
+        The next sync copies the whole columnar ledger again, replacing
+        these rows, since they are not in it.
+
+        :param rows: Tuples of day, cents, account, category, description.
+        :type rows: Iterable[tuple[int, int, str, str, str]]
+        :return: Transactions added.
+        :rtype: int
+        """
+        with self.transaction() as connection:
+            start = connection.execute(NEXT_ID).fetchone()[0]
+            connection.executemany(
+                INSERT,
+                (
+                    (row, from_days(day).isoformat(), *values)
+                    for row, (day, *values) in zip(
+                        itertools.count(start), rows
+                    )
+                ),
+            )
+            return connection.execute(NEXT_ID).fetchone()[0] - start
+
+    def synced(self) -> tuple[int, int]:
+        """Rows and edits of the columnar ledger the database last copied.
+
+        :return: Rows and edits, both 0 if it never copied one.
+        :rtype: tuple[int, int]
+        """
+        with self.pool.connection() as connection:
+            return _synced(connection)
+
+    @log_context
+    def sync(self, ledger: Ledger) -> int:
+        """Copy the rows of a columnar ledger the database lacks.
+
+        Everything is copied again when the ledger was edited, or shrank,
+        since the last copy, or rows were added with extend. The indexes
+        are then dropped and created after the copy, which is faster than
+        keeping them up to date row by row. What was copied is read inside
+        the write transaction, so concurrent syncs never copy a row twice.
+
+        :param ledger: Ledger to copy.
+        :type ledger: Ledger
+        :return: Rows copied.
+        :rtype: int
+        """
+        with self.transaction() as connection:
+            rows, edits = _synced(connection)
+            stored = connection.execute(NEXT_ID).fetchone()[0]
+            rebuild = (
+                edits != ledger.edits or rows > len(ledger) or stored != rows
+            )
+            start = 0 if rebuild else rows
+            if not rebuild and start == len(ledger):
+                return 0
+
+            if rebuild:
+                logger.info(f"Copying every row of the ledger to {self.path}")
+                connection.execute("DELETE FROM transactions")
+                for statement in DROP_INDEXES:
+                    connection.execute(statement)
+            connection.executemany(INSERT, ledger_rows(ledger, start))
+            if rebuild:
+                for statement in INDEXES:
+                    connection.execute(statement)
+            connection.executemany(
+                SET_META, [("rows", len(ledger)), ("edits", ledger.edits)]
+            )
+
+        logger.info(f"Copied {len(ledger) - start} rows to {self.path}")
+        return len(ledger) - start
+
+    def query(self, sql: str, params: Iterable = ()) -> tuple[list, list]:
+        """Run a read-only query on a pooled connection.
+
+        :param sql: SQL query, with ? placeholders.
+        :type sql: str
+        :param params: Values of the placeholders, defaults to ()
+        :type params: Iterable, optional
+        :raises sqlite3.Error: If the query is invalid, or writes.
+        :return: Column names, and every result row.
+        :rtype: tuple[list, list]
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.execute(sql, tuple(params))
+            names = [column[0] for column in cursor.description or ()]
+            return names, cursor.fetchall()
+
+    def totals(
+        self,
+        since: datetime.date | None = None,
+        until: datetime.date | None = None,
+        accounts: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> tuple[int, int]:
+        """Net amount and count of the selected transactions.
+
+        Selects the same rows as Ledger.select with the same arguments.
+
+        :param since: First date to include, defaults to None
+        :type since: datetime.date | None, optional
+        :param until: Last date to include, defaults to None
+        :type until: datetime.date | None, optional
+        :param accounts: Accounts to include, defaults to None (all)
+        :type accounts: Iterable[str] | None, optional
+        :param categories: Categories to include, defaults to None (all)
+        :type categories: Iterable[str] | None, optional
+        :return: Total in cents, and the number of transactions.
+        :rtype: tuple[int, int]
+        """
+        clause, params = where(since, until, accounts, categories)
+        _, rows = self.query(
+            f"SELECT coalesce(sum(amount), 0), count(*) "
+            f"FROM transactions{clause}",
+            params,
+        )
+        return rows[0]
+
+    def balance(self, account: str, as_of: datetime.date | None = None) -> int:
+        """Running balance of an account, from its first transaction on.
+
+        :param account: Account name.
+        :type account: str
+        :param as_of: Last date to include, defaults to None (all)
+        :type as_of: datetime.date | None, optional
+        :return: Balance in cents.
+        :rtype: int
+        """
+        return self.totals(until=as_of, accounts=[account])[0]
+
+    def group_totals(
+        self,
+        by: str,
+        since: datetime.date | None = None,
+        until: datetime.date | None = None,
+        accounts: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> dict[str, int]:
+        """Net amount of the selected transactions per group.
+
+        Matches Ledger.group_totals over the rows Ledger.select picks.
+
+        :param by: One of GROUP_KEYS.
+        :type by: str
+        :param since: First date to include, defaults to None
+        :type since: datetime.date | None, optional
+        :param until: Last date to include, defaults to None
+        :type until: datetime.date | None, optional
+        :param accounts: Accounts to include, defaults to None (all)
+        :type accounts: Iterable[str] | None, optional
+        :param categories: Categories to include, defaults to None (all)
+        :type categories: Iterable[str] | None, optional
+        :raises ValueError: If by is not one of GROUP_KEYS.
+        :return: Total in cents by group name, months as "YYYY-MM".
+        :rtype: dict[str, int]
+        """
+        if by not in GROUP_KEYS:
+            raise ValueError(f"Cannot group by {by!r}")
+
+        key = GROUP_EXPRESSIONS[by]
+        clause, params = where(since, until, accounts, categories)
+        _, rows = self.query(
+            f"SELECT {key}, sum(amount) FROM transactions{clause} "
+            f"GROUP BY {key} ORDER BY {key}",
+            params,
+        )
+        return dict(rows)
+
+
+def format_table(names: list, rows: list) -> str:
+    """Render query results as an aligned text table.
+
+    :param names: Column names.
+    :type names: list
+    :param rows: Result rows.
+    :type rows: list
+    :return: The table, with a header line.
+    :rtype: str
+    """
+    texts = [names] + [
+        ["NULL" if value is None else str(value) for value in row]
+        for row in rows
+    ]
+    widths = [
+        max(len(row[column]) for row in texts) for column in range(len(names))
+    ]
+    return "\n".join(
+        "  ".join(
+            f"{value:<{width}}" for value, width in zip(row, widths)
+        ).rstrip()
+        for row in texts
+    )
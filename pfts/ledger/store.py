@@ -0,0 +1,802 @@
+"""Contains the columnar, array backed transaction store.
+
+Every column is a typed ``array``: dates are int64 days since 1970-01-01,
+amounts are int64 cents, and accounts, categories and descriptions are
+int32 codes into a StringPool. A transaction therefore takes 28 bytes of
+column space, plus its share of the distinct strings.
+
+A saved ledger is opened by mapping its files, see columnfile, so columns
+start out as read-only memoryviews. They are copied into arrays the first
+time the ledger is changed.
+
+Filters build a byte mask with one entry per row, and aggregations consume
+the columns through ``map``, ``itertools.compress`` and ``sum``, so the
+per-row work stays inside C loops rather than Python bytecode.
+"""
+
+import datetime
+import itertools
+import json
+import logging
+import operator
+import pathlib
+import sys
+from array import array
+from typing import Iterable, Iterator, NamedTuple, cast
+
+from pfts.ledger import columnfile
+from pfts.ledger.columnfile import StoredStrings
+from pfts.util import files
+
+logger = logging.getLogger(__name__)
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# Column name → array typecode.
+COLUMNS = {
+    "date": "q",
+    "amount": "q",
+    "account": "i",
+    "category": "i",
+    "description": "i",
+}
+# Columns holding codes into the string pool of the same name.
+STRING_COLUMNS = ("account", "category", "description")
+GROUP_KEYS = ("account", "category", "month")
+
+UNCATEGORIZED = ""
+DEFAULT_LEDGER_DIR = pathlib.Path.home() / ".pfts" / "ledger"
+META_FILE = "meta.json"
+# Version of the metadata, ledgers saved before it had none.
+FORMAT_VERSION = 2
+
+
+class LedgerConflictError(Exception):
+    """The ledger folder was saved by someone else since it was loaded."""
+
+
+def to_days(date: datetime.date) -> int:
+    """Days since 1970-01-01, the representation of the date column.
+
+    :param date: Date to convert.
+    :type date: datetime.date
+    :return: Days since the epoch, negative before 1970.
+    :rtype: int
+    """
+    return date.toordinal() - EPOCH_ORDINAL
+
+
+def from_days(days: int) -> datetime.date:
+    """Turn a value of the date column back into a date.
+
+    :param days: Days since the epoch.
+    :type days: int
+    :return: The date.
+    :rtype: datetime.date
+    """
+    return datetime.date.fromordinal(days + EPOCH_ORDINAL)
+
+
+def format_cents(cents: int) -> str:
+    """Format fixed-point cents as a decimal amount.
+
+    :param cents: Amount in cents, e.g. -123456.
+    :type cents: int
+    :return: Decimal amount, e.g. "-1234.56".
+    :rtype: str
+    """
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+class Transaction(NamedTuple):
+    """A single row of the ledger, decoded for display."""
+
+    date: datetime.date
+    amount: int
+    account: str
+    category: str
+    description: str
+
+
+class StringPool:
+    """Interns strings, handing out a stable int code for each.
+
+    A pool opened from a saved ledger decodes single strings straight from
+    the mapped dictionary, and only decodes every string once the list of
+    values, or the lookup by string, is needed.
+    """
+
+    def __init__(
+        self, values: Iterable[str] = (), stored: StoredStrings | None = None
+    ) -> None:
+        """Create the pool.
+
+        :param values: Strings to intern in order, defaults to ()
+        :type values: Iterable[str], optional
+        :param stored: Saved strings the pool starts with, defaults to None
+        :type stored: StoredStrings | None, optional
+        """
+        self.stored = stored
+        self._values: list[str] | None = None if stored is not None else []
+        self._codes: dict[str, int] | None = None
+        for value in values:
+            self.intern(value)
+
+    @property
+    def values(self) -> list[str]:
+        """Every string, in code order."""
+        if self._values is None:
+            self._values = self.stored.decode() if self.stored else []
+        return self._values
+
+    @property
+    def codes(self) -> dict[str, int]:
+        """Code of every string."""
+        if self._codes is None:
+            values = self.values
+            self._codes = dict(zip(values, range(len(values))))
+        return self._codes
+
+    def intern(self, value: str) -> int:
+        """Code of a string, adding it to the pool if it is new.
+
+        :param value: String to intern.
+        :type value: str
+        :return: Code of the string.
+        :rtype: int
+        """
+        codes = self.codes
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        if self._values is None and self.stored is not None:
+            return self.stored[code]
+        return self.values[code]
+
+    def __len__(self) -> int:
+        if self._values is None and self.stored is not None:
+            return len(self.stored)
+        return len(self.values)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self.codes
+
+
+class Ledger:
+    """Transactions stored column by column."""
+
+    def __init__(self) -> None:
+        """Create an empty ledger."""
+        self.columns: dict[str, array[int] | memoryview] = {
+            name: array(typecode) for name, typecode in COLUMNS.items()
+        }
+        self.pools = {name: StringPool() for name in STRING_COLUMNS}
+        # Category code 0 is always "uncategorized".
+        self.pools["category"].intern(UNCATEGORIZED)
+        # Rows edited in place so far, which tells derived data built from
+        # the rows whether it can still trust them.
+        self.edits = 0
+        # Metadata of the files last loaded or saved, and their folder.
+        self.saved: dict | None = None
+        self.saved_dir: pathlib.Path | None = None
+        # Columns and pools changed in place since, which need new files.
+        self.rewrite: set[str] = set()
+        self.rewrite_pools: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+
+    def writable(self) -> "dict[str, array[int]]":
+        """The columns, copied out of the mapped files if they still are.
+
+        :return: Every column as an array.
+        :rtype: dict[str, array[int]]
+        """
+        for name, column in self.columns.items():
+            if isinstance(column, memoryview):
+                values = array(COLUMNS[name])
+                values.frombytes(column.cast("B"))
+                self.columns[name] = values
+        return cast("dict[str, array[int]]", self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the column arrays."""
+        return sum(
+            len(column) * column.itemsize for column in self.columns.values()
+        )
+
+    def append(
+        self,
+        day: int,
+        cents: int,
+        account: str,
+        category: str,
+        description: str,
+    ) -> int:
+        """Add one transaction.
+
+        :param day: Date, as days since the epoch.
+        :type day: int
+        :param cents: Amount in cents, negative for money spent.
+        :type cents: int
+        :param account: Account the transaction belongs to.
+        :type account: str
+        :param category: Category, UNCATEGORIZED if unknown.
+        :type category: str
+        :param description: Description from the statement.
+        :type description: str
+        :return: Row index of the new transaction.
+        :rtype: int
+        """
+        return self.extend([(day, cents, account, category, description)])
+
+    def extend(self, rows: Iterable[tuple[int, int, str, str, str]]) -> int:
+        """Add a batch of transactions.
+
+        The whole batch is converted before any of it is added, so a bad
+        row leaves the ledger as it was.
+
+        :param rows: Tuples of day, cents, account, category, description.
+        :type rows: Iterable[tuple[int, int, str, str, str]]
+        :raises TypeError: If a day or amount is not an integer, or an
+            account, category or description not a string.
+        :raises OverflowError: If a day or amount does not fit its column.
+        :return: Row index of the last transaction added, -1 if none were.
+        :rtype: int
+        """
+        days, cents = array(COLUMNS["date"]), array(COLUMNS["amount"])
+        strings = []
+        for day, amount, account, category, description in rows:
+            days.append(day)
+            cents.append(amount)
+            strings.append((account, category, description))
+
+        for row in strings:
+            if not all(isinstance(value, str) for value in row):
+                raise TypeError(f"Row has a value that is not a string: {row}")
+
+        columns = self.writable()
+        columns["date"].extend(days)
+        columns["amount"].extend(cents)
+        for name, values in zip(STRING_COLUMNS, zip(*strings)):
+            intern = self.pools[name].intern
+            columns[name].extend(map(intern, values))
+
+        return len(self) - 1
+
+    def merge(self, other: "Ledger", mask: bytes | None = None) -> None:
+        """Append the transactions of another ledger.
+
+        The other ledger's codes are translated to this ledger's pools once
+        per distinct string, then whole columns are remapped at a time.
+
+        :param other: Ledger whose transactions are appended.
+        :type other: Ledger
+        :param mask: Row mask of the other ledger's rows to append,
+            defaults to None (every row)
+        :type mask: bytes | None, optional
+        """
+        for name, column in self.writable().items():
+            values = other.column(name, mask)
+            if name in self.pools:
+                intern = self.pools[name].intern
+                remap = [intern(value) for value in other.pools[name].values]
+                column.extend(map(remap.__getitem__, values))
+            else:
+                column.extend(values)
+
+    def raw(self, index: int) -> tuple[int, int, int, int, int]:
+        """Column values of one row, with strings as their codes.
+
+        :param index: Row index.
+        :type index: int
+        :return: Day, cents, and account, category and description codes.
+        :rtype: tuple[int, int, int, int, int]
+        """
+        date, cents, account, category, description = (
+            column[index] for column in self.columns.values()
+        )
+        return date, cents, account, category, description
+
+    def edit(
+        self,
+        index: int,
+        day: int | None = None,
+        cents: int | None = None,
+        account: str | None = None,
+        category: str | None = None,
+        description: str | None = None,
+    ) -> tuple[int, int, int, int, int]:
+        """Change fields of a transaction already in the ledger.
+
+        :param index: Row index of the transaction.
+        :type index: int
+        :param day: New date, as days since the epoch, defaults to None
+        :type day: int | None, optional
+        :param cents: New amount in cents, defaults to None
+        :type cents: int | None, optional
+        :param account: New account, defaults to None
+        :type account: str | None, optional
+        :param category: New category, defaults to None
+        :type category: str | None, optional
+        :param description: New description, defaults to None
+        :type description: str | None, optional
+        :raises IndexError: If there is no such row.
+        :return: The row's values before the edit, as returned by raw.
+        :rtype: tuple[int, int, int, int, int]
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"No transaction at row {index}")
+
+        old = self.raw(index)
+        changes: dict[str, int | None] = {"date": day, "amount": cents}
+        for name, text in (
+            ("account", account),
+            ("category", category),
+            ("description", description),
+        ):
+            if text is not None:
+                changes[name] = self.pools[name].intern(text)
+
+        columns = self.writable()
+        for name, code in changes.items():
+            if code is not None:
+                columns[name][index] = code
+                self.rewrite.add(name)
+
+        self.edits += 1
+        return old
+
+    def assign(self, name: str, start: int, values: array) -> int:
+        """Overwrite a run of rows of one column, e.g. after categorizing.
+
+        :param name: Column to overwrite, string columns take codes.
+        :type name: str
+        :param start: First row to overwrite.
+        :type start: int
+        :param values: New values, one per row from start.
+        :type values: array
+        :raises IndexError: If the rows run past the end of the ledger.
+        :return: Rows whose value changed, each counted as an edit.
+        :rtype: int
+        """
+        column = self.writable()[name]
+        end = start + len(values)
+        if not 0 <= start <= end <= len(self):
+            raise IndexError(f"No transactions at rows {start} to {end - 1}")
+
+        changed = sum(map(operator.ne, column[start:end], values))
+        column[start:end] = values
+        if changed:
+            self.rewrite.add(name)
+        self.edits += changed
+        return changed
+
+    def __getitem__(self, index: int) -> Transaction:
+        return self.decode(self.raw(index))
+
+    def decode(self, raw: tuple[int, int, int, int, int]) -> Transaction:
+        """Turn column values, as returned by raw, into a Transaction.
+
+        :param raw: Day, cents, and account, category and description codes.
+        :type raw: tuple[int, int, int, int, int]
+        :return: The transaction.
+        :rtype: Transaction
+        """
+        date, cents, account, category, description = raw
+        return Transaction(
+            from_days(date),
+            cents,
+            self.pools["account"][account],
+            self.pools["category"][category],
+            self.pools["description"][description],
+        )
+
+    def rows(self, mask: bytes | None = None) -> Iterator[Transaction]:
+        """Decode the selected transactions.
+
+        :param mask: Row mask from select, defaults to None (every row)
+        :type mask: bytes | None, optional
+        :return: The selected transactions, in ledger order.
+        :rtype: Iterator[Transaction]
+        """
+        indices: Iterable[int] = range(len(self))
+        if mask is not None:
+            indices = itertools.compress(indices, mask)
+
+        return map(self.__getitem__, indices)
+
+    def select(
+        self,
+        since: datetime.date | None = None,
+        until: datetime.date | None = None,
+        accounts: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> bytes | None:
+        """Build a row mask matching every given condition.
+
+        :param since: First date to include, defaults to None
+        :type since: datetime.date | None, optional
+        :param until: Last date to include, defaults to None
+        :type until: datetime.date | None, optional
+        :param accounts: Accounts to include, defaults to None (all)
+        :type accounts: Iterable[str] | None, optional
+        :param categories: Categories to include, defaults to None (all)
+        :type categories: Iterable[str] | None, optional
+        :return: One byte per row, 1 for selected rows. None when nothing is
+            filtered, which aggregations treat as every row.
+        :rtype: bytes | None
+        """
+        masks = []
+        dates = self.columns["date"]
+
+        if since is not None:
+            bound = itertools.repeat(to_days(since))
+            masks.append(bytes(map(operator.ge, dates, bound)))
+        if until is not None:
+            bound = itertools.repeat(to_days(until))
+            masks.append(bytes(map(operator.le, dates, bound)))
+        for name, values in (("account", accounts), ("category", categories)):
+            if values is not None:
+                masks.append(self.membership_mask(name, values))
+
+        if not masks:
+            return None
+
+        # Masks only hold 0 and 1, so AND-ing them as big ints is exact,
+        # and runs over whole machine words at a time.
+        combined = int.from_bytes(masks[0], "little")
+        for other in masks[1:]:
+            combined &= int.from_bytes(other, "little")
+        return combined.to_bytes(len(self), "little")
+
+    def membership_mask(self, name: str, values: Iterable[str]) -> bytes:
+        """Mask of the rows whose string column holds one of the values.
+
+        :param name: String column, one of STRING_COLUMNS.
+        :type name: str
+        :param values: Strings to match.
+        :type values: Iterable[str]
+        :return: One byte per row, 1 for matching rows.
+        :rtype: bytes
+        """
+        codes = self.codes_of(name, values)
+        column = self.columns[name]
+
+        if len(self.pools[name]) > 256 or sys.byteorder != "little":
+            return bytes(map(codes.__contains__, column))
+
+        # Every code fits in the low byte of its little endian int32, so
+        # translating the raw column bytes and keeping every low byte
+        # matches all rows in a single C pass.
+        table = bytes(code in codes for code in range(256))
+        return column.tobytes().translate(table)[:: column.itemsize]
+
+    def codes_of(self, name: str, values: Iterable[str]) -> set[int]:
+        """Codes of the given strings, skipping strings never seen.
+
+        :param name: String column, one of STRING_COLUMNS.
+        :type name: str
+        :param values: Strings to look up.
+        :type values: Iterable[str]
+        :return: Their codes.
+        :rtype: set[int]
+        """
+        pool = self.pools[name]
+        return {pool.codes[value] for value in values if value in pool}
+
+    def column(self, name: str, mask: bytes | None = None) -> Iterable[int]:
+        """Values of a column, limited to the selected rows.
+
+        :param name: Column name, one of COLUMNS.
+        :type name: str
+        :param mask: Row mask from select, defaults to None (every row)
+        :type mask: bytes | None, optional
+        :return: The raw column values.
+        :rtype: Iterable[int]
+        """
+        column = self.columns[name]
+        if mask is None:
+            return column
+
+        return itertools.compress(column, mask)
+
+    def total(self, mask: bytes | None = None) -> int:
+        """Sum of the amounts of the selected rows.
+
+        :param mask: Row mask from select, defaults to None (every row)
+        :type mask: bytes | None, optional
+        :return: Total in cents.
+        :rtype: int
+        """
+        return sum(self.column("amount", mask))
+
+    def month_keys(self, mask: bytes | None = None) -> Iterator[int]:
+        """Month of each selected row, as year * 12 + month - 1.
+
+        Each distinct date is only converted once.
+
+        :param mask: Row mask from select, defaults to None (every row)
+        :type mask: bytes | None, optional
+        :return: Month key per selected row.
+        :rtype: Iterator[int]
+        """
+        dates = self.column("date", mask)
+        if mask is not None:
+            dates = list(dates)
+
+        months = {}
+        for day in set(dates):
+            date = from_days(day)
+            months[day] = date.year * 12 + date.month - 1
+
+        return map(months.__getitem__, dates)
+
+    def group_totals(
+        self, by: str, mask: bytes | None = None
+    ) -> dict[str, int]:
+        """Sum the amounts of the selected rows per group.
+
+        :param by: One of GROUP_KEYS.
+        :type by: str
+        :param mask: Row mask from select, defaults to None (every row)
+        :type mask: bytes | None, optional
+        :raises ValueError: If by is not one of GROUP_KEYS.
+        :return: Total in cents by group name, months as "YYYY-MM".
+        :rtype: dict[str, int]
+        """
+        if by not in GROUP_KEYS:
+            raise ValueError(f"Cannot group by {by!r}")
+
+        keys = (
+            self.month_keys(mask) if by == "month" else self.column(by, mask)
+        )
+        totals: dict[int, int] = {}
+        for key, cents in zip(keys, self.column("amount", mask)):
+            totals[key] = totals.get(key, 0) + cents
+
+        if by == "month":
+            return {
+                f"{key // 12}-{key % 12 + 1:02d}": totals[key]
+                for key in sorted(totals)
+            }
+
+        pool = self.pools[by]
+        return {pool[code]: totals[code] for code in sorted(totals)}
+
+    def compact(self) -> int:
+        """Drop strings no row uses any more, renumbering the rest.
+
+        Codes change, so this counts as an edit, and the next save writes
+        every file anew.
+
+        :return: Strings dropped.
+        :rtype: int
+        """
+        columns = self.writable()
+        dropped = 0
+        for name in STRING_COLUMNS:
+            pool = self.pools[name]
+            used = set(columns[name])
+            # Category code 0 stays "uncategorized".
+            if name == "category":
+                used.add(0)
+            if len(used) == len(pool):
+                continue
+
+            kept = sorted(used)
+            remap = [0] * len(pool)
+            for code, old in enumerate(kept):
+                remap[old] = code
+            columns[name] = array(
+                COLUMNS[name], map(remap.__getitem__, columns[name])
+            )
+            self.pools[name] = StringPool(map(pool.__getitem__, kept))
+            self.rewrite.add(name)
+            self.rewrite_pools.add(name)
+            dropped += len(pool) - len(kept)
+
+        if dropped:
+            self.edits += 1
+        logger.info(f"Compacting dropped {dropped} unused strings")
+        return dropped
+
+    def save(self, directory: pathlib.Path, rewrite: bool = False) -> None:
+        """Write the ledger to a folder, appending to the files it came from.
+
+        Rows and strings added since the ledger was loaded from, or saved
+        to, the same folder are appended to its files. Columns edited in
+        place are written to new files instead, as is everything when the
+        folder holds another ledger. Only then is the metadata replaced, so
+        an interrupted save leaves the previous ledger intact; the values
+        it appended are past the counts in the metadata, and ignored.
+
+        Saving over a folder that another process saved to since this
+        ledger was loaded from it fails, rather than losing its rows. Hold
+        files.file_lock on the folder from load to save to avoid that.
+
+        :param directory: Folder to write the ledger to.
+        :type directory: pathlib.Path
+        :param rewrite: Write every file anew, dropping values left by
+            interrupted saves, defaults to False
+        :type rewrite: bool, optional
+        :raises LedgerConflictError: If the folder was saved to since the
+            ledger was loaded from it.
+        """
+        on_disk = read_meta(directory)
+        saved = self.saved
+        if rewrite or saved is None or self.saved_dir != directory:
+            saved = None
+        elif on_disk != saved:
+            logger.error(f"{directory} was saved by another process")
+            raise LedgerConflictError(
+                f"{directory} changed since it was loaded, not overwriting "
+                "the transactions saved there"
+            )
+        previous = on_disk if on_disk and "format" in on_disk else None
+
+        # Files written anew get the next generation number, so they never
+        # replace files another process may still have mapped.
+        def generation(kind: str, name: str, rewritten: bool) -> int:
+            if saved is not None and not rewritten:
+                source, step = saved, 0
+            elif previous is not None:
+                source, step = previous, 1
+            else:
+                return 0
+            entry = source[kind][name]
+            return (entry if kind == "columns" else entry["generation"]) + step
+
+        meta: dict = {
+            "format": FORMAT_VERSION,
+            "rows": len(self),
+            "edits": self.edits,
+            "columns": {},
+            "pools": {},
+        }
+        for name, column in self.columns.items():
+            rewritten = saved is None or name in self.rewrite
+            number = meta["columns"][name] = generation(
+                "columns", name, rewritten
+            )
+            filepath = directory / f"{name}-{number}.col"
+            if rewritten:
+                columnfile.write_values(filepath, COLUMNS[name], column)
+            elif saved is not None and len(self) > saved["rows"]:
+                columnfile.append_values(
+                    filepath,
+                    COLUMNS[name],
+                    saved["rows"],
+                    column[saved["rows"] :],
+                )
+
+        for name, pool in self.pools.items():
+            stored = None
+            if saved is not None and name not in self.rewrite_pools:
+                stored = saved["pools"][name]
+            number = generation("pools", name, stored is None)
+            offsets = directory / f"{name}-{number}.off"
+            strings = directory / f"{name}-{number}.str"
+            count = stored["count"] if stored else 0
+            size = stored["bytes"] if stored else 0
+
+            # Pools only ever grow, and one never grown stays undecoded.
+            added = pool.values[count:] if len(pool) > count else []
+            ends, data = columnfile.encode_strings(added, size)
+            if stored is None:
+                columnfile.write_values(offsets, "q", ends)
+                columnfile.write_values(strings, "B", data)
+            elif ends:
+                columnfile.append_values(offsets, "q", count, ends)
+                columnfile.append_values(strings, "B", size, data)
+            if ends:
+                count, size = len(pool), ends[-1]
+            meta["pools"][name] = {
+                "generation": number,
+                "count": count,
+                "bytes": size,
+            }
+
+        with files.atomic_write(directory / META_FILE) as fout:
+            json.dump(meta, fout)
+
+        if saved is None or self.rewrite or self.rewrite_pools:
+            remove_unused_files(directory, meta)
+        self.saved, self.saved_dir = meta, directory
+        self.rewrite.clear()
+        self.rewrite_pools.clear()
+
+    @classmethod
+    def load(cls, directory: pathlib.Path) -> "Ledger":
+        """Open a ledger written by save.
+
+        The files are mapped rather than read, so opening takes the same
+        few milliseconds however many rows there are.
+
+        :param directory: Folder the ledger was saved to.
+        :type directory: pathlib.Path
+        :raises columnfile.ColumnFileError: If a file of the ledger is
+            missing or damaged, or the ledger predates the mapped format.
+        :return: The ledger, empty if the folder holds none.
+        :rtype: Ledger
+        """
+        ledger = cls()
+
+        meta = read_meta(directory)
+        if meta is None:
+            logger.info(f"No ledger at {directory}, starting empty.")
+            return ledger
+        if "format" not in meta:
+            raise columnfile.ColumnFileError(
+                f"{directory} holds a ledger saved before the mapped format, "
+                "which is no longer read."
+            )
+
+        rows = meta["rows"]
+        for name, number in meta["columns"].items():
+            ledger.columns[name] = columnfile.map_values(
+                directory / f"{name}-{number}.col", COLUMNS[name], rows
+            )
+        for name, stored in meta["pools"].items():
+            stem = directory / f"{name}-{stored['generation']}"
+            ends = columnfile.map_values(
+                stem.with_suffix(".off"), "q", stored["count"]
+            )
+            data = columnfile.map_values(
+                stem.with_suffix(".str"), "B", stored["bytes"]
+            )
+            ledger.pools[name] = StringPool(stored=StoredStrings(ends, data))
+        ledger.edits = meta["edits"]
+        ledger.saved, ledger.saved_dir = meta, directory
+
+        return ledger
+
+
+def read_meta(directory: pathlib.Path) -> dict | None:
+    """Metadata of the ledger saved in a folder.
+
+    :param directory: Ledger folder.
+    :type directory: pathlib.Path
+    :return: The metadata, None if the folder holds no ledger.
+    :rtype: dict | None
+    """
+    try:
+        return json.loads((directory / META_FILE).read_text(encoding="utf8"))
+    except FileNotFoundError:
+        return None
+
+
+def remove_unused_files(directory: pathlib.Path, meta: dict) -> None:
+    """Delete ledger files the metadata no longer names.
+
+    Files another process still has mapped may not be deleted on every
+    platform, those are left for the next save.
+
+    :param directory: Ledger folder.
+    :type directory: pathlib.Path
+    :param meta: Metadata just saved.
+    :type meta: dict
+    """
+    used = {f"{name}-{number}.col" for name, number in meta["columns"].items()}
+    for name, stored in meta["pools"].items():
+        used.update(
+            f"{name}-{stored['generation']}{suffix}"
+            for suffix in columnfile.SUFFIXES[1:]
+        )
+
+    for filepath in directory.iterdir():
+        if (
+            filepath.suffix in columnfile.SUFFIXES
+            and filepath.name not in used
+        ):
+            try:
+                filepath.unlink()
+            except OSError as e:
+                logger.warning(f"Cannot remove unused {filepath}: {e}")
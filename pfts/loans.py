@@ -0,0 +1,526 @@
+"""Contains the loan calculator: payments, payoffs and amortization schedules.
+
+Rates are annual fractions compounded monthly, e.g. 0.05 for 5%, and
+amounts are in currency units. Payments and payoff totals come from the
+closed-form annuity formulas, so they cost the same whatever the term,
+and are memoized per parameter tuple for sweeps over many scenarios.
+Month by month schedules are only generated when asked for.
+
+Several debts are paid off by putting whatever the budget leaves after
+the minimum payments on one debt at a time: the highest rate first
+(avalanche) or the smallest balance first (snowball). Between two debts
+being paid off every payment stays the same, so the balances jump ahead
+to the next payoff with the same formulas instead of month by month.
+"""
+
+import functools
+import itertools
+import json
+import logging
+import math
+import operator
+import time
+from array import array
+from typing import Iterable, NamedTuple
+
+from pfts.util.logging import log_context
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("avalanche", "snowball")
+# Balances below half a cent are paid off.
+PAID_OFF = 0.005
+# Slack for months to payoff that land on a whole month.
+MONTH_TOLERANCE = 1e-9
+
+
+class Payoff(NamedTuple):
+    """Cost of paying off a loan with a fixed monthly payment."""
+
+    months: int
+    total_paid: float
+    interest: float
+    last_payment: float
+
+
+class Schedule(NamedTuple):
+    """Amortization schedule, one entry per month of each array."""
+
+    payment: array
+    interest: array
+    principal: array
+    balance: array
+
+
+class Debt(NamedTuple):
+    """One of several debts paid off together."""
+
+    name: str
+    balance: float
+    annual_rate: float
+    minimum: float
+
+
+class StrategyResult(NamedTuple):
+    """Outcome of paying off several debts in one order."""
+
+    strategy: str
+    months: int
+    interest: float
+    # Debt name → month it was paid off in, in payoff order.
+    paid_off: dict[str, int]
+
+
+@functools.lru_cache(maxsize=65536)
+def monthly_payment(
+    principal: float, annual_rate: float, months: int
+) -> float:
+    """Fixed payment that pays off a loan over its term.
+
+    :param principal: Amount borrowed.
+    :type principal: float
+    :param annual_rate: Annual interest rate, e.g. 0.05.
+    :type annual_rate: float
+    :param months: Term of the loan.
+    :type months: int
+    :raises ValueError: If the term is not positive.
+    :return: Monthly payment.
+    :rtype: float
+    """
+    if months < 1:
+        raise ValueError(f"A loan needs a term of at least a month: {months}")
+
+    rate = annual_rate / 12
+    if rate == 0:
+        return principal / months
+    return principal * rate / -math.expm1(-months * math.log1p(rate))
+
+
+def balance_after(
+    principal: float, rate: float, payment: float, months: float
+) -> float:
+    """Balance left after paying a fixed amount for some months.
+
+    :param principal: Balance at the start.
+    :type principal: float
+    :param rate: Monthly interest rate.
+    :type rate: float
+    :param payment: Monthly payment.
+    :type payment: float
+    :param months: Months paid.
+    :type months: float
+    :return: Remaining balance, negative once overpaid.
+    :rtype: float
+    """
+    if rate == 0:
+        return principal - payment * months
+    steady = payment / rate
+    return (principal - steady) * (1 + rate) ** months + steady
+
+
+def months_to_payoff(principal: float, rate: float, payment: float) -> float:
+    """Fractional months until a fixed payment pays off a balance.
+
+    :param principal: Balance at the start.
+    :type principal: float
+    :param rate: Monthly interest rate.
+    :type rate: float
+    :param payment: Monthly payment.
+    :type payment: float
+    :return: Months, or infinity if the payment does not cover the interest.
+    :rtype: float
+    """
+    if principal <= PAID_OFF:
+        return 0.0
+    if payment <= principal * rate or payment <= 0:
+        return math.inf
+    if rate == 0:
+        return principal / payment
+    return -math.log1p(-principal * rate / payment) / math.log1p(rate)
+
+
+@functools.lru_cache(maxsize=65536)
+def payoff(principal: float, annual_rate: float, payment: float) -> Payoff:
+    """Months and interest to pay off a loan, in closed form.
+
+    :param principal: Balance at the start.
+    :type principal: float
+    :param annual_rate: Annual interest rate, e.g. 0.05.
+    :type annual_rate: float
+    :param payment: Monthly payment, including any extra.
+    :type payment: float
+    :raises ValueError: If the payment does not cover the interest.
+    :return: Months, total paid and interest, and the smaller last payment.
+    :rtype: Payoff
+    """
+    rate = annual_rate / 12
+    months = months_to_payoff(principal, rate, payment)
+    if math.isinf(months):
+        raise ValueError(
+            f"A payment of {payment:.2f} does not cover the interest on "
+            f"{principal:.2f} at {annual_rate:.2%}"
+        )
+    if months == 0:
+        return Payoff(0, 0.0, 0.0, 0.0)
+
+    full = math.ceil(months - MONTH_TOLERANCE) - 1
+    last = balance_after(principal, rate, payment, full) * (1 + rate)
+    total = payment * full + last
+    return Payoff(full + 1, total, total - principal, last)
+
+
+def payoff_with_extra(
+    principal: float, annual_rate: float, months: int, extra: float = 0.0
+) -> Payoff:
+    """Pay off a loan over its term, adding an extra amount every month.
+
+    :param principal: Amount borrowed.
+    :type principal: float
+    :param annual_rate: Annual interest rate, e.g. 0.05.
+    :type annual_rate: float
+    :param months: Term of the loan.
+    :type months: int
+    :param extra: Paid on top of the monthly payment, defaults to 0.0
+    :type extra: float, optional
+    :return: Months, total paid and interest.
+    :rtype: Payoff
+    """
+    payment = monthly_payment(principal, annual_rate, months)
+    return payoff(principal, annual_rate, payment + extra)
+
+
+@log_context
+def sweep(
+    principal: float,
+    months: int,
+    rates: Iterable[float],
+    extras: Iterable[float],
+) -> dict[tuple[float, float], Payoff]:
+    """Pay off a loan for every combination of rate and extra payment.
+
+    :param principal: Amount borrowed.
+    :type principal: float
+    :param months: Term of the loan.
+    :type months: int
+    :param rates: Annual interest rates.
+    :type rates: Iterable[float]
+    :param extras: Extra monthly payments.
+    :type extras: Iterable[float]
+    :return: (rate, extra) → payoff.
+    :rtype: dict[tuple[float, float], Payoff]
+    """
+    start = time.perf_counter()
+    results = {
+        (rate, extra): payoff_with_extra(principal, rate, months, extra)
+        for rate, extra in itertools.product(rates, list(extras))
+    }
+    seconds = time.perf_counter() - start
+    logger.info(
+        f"Swept {len(results)} scenarios in {seconds * 1000:.2f}ms "
+        f"({payoff.cache_info()})"
+    )
+    return results
+
+
+def schedule(principal: float, annual_rate: float, payment: float) -> Schedule:
+    """Month by month amortization schedule of a fixed payment.
+
+    Balances are computed for every month at once from the closed form,
+    rather than by carrying the balance from one month to the next.
+
+    :param principal: Amount borrowed.
+    :type principal: float
+    :param annual_rate: Annual interest rate, e.g. 0.05.
+    :type annual_rate: float
+    :param payment: Monthly payment, including any extra.
+    :type payment: float
+    :raises ValueError: If the payment does not cover the interest.
+    :return: Payment, interest, principal and balance of each month.
+    :rtype: Schedule
+    """
+    rate = annual_rate / 12
+    total = payoff(principal, annual_rate, payment)
+    full = total.months - 1
+
+    if rate == 0:
+        balances = array(
+            "d",
+            map(
+                operator.sub,
+                itertools.repeat(principal),
+                map(
+                    operator.mul, range(1, full + 1), itertools.repeat(payment)
+                ),
+            ),
+        )
+    else:
+        steady = payment / rate
+        growth = itertools.accumulate(
+            itertools.repeat(1 + rate, full), operator.mul
+        )
+        balances = array(
+            "d",
+            map(
+                operator.add,
+                map(
+                    operator.mul,
+                    growth,
+                    itertools.repeat(principal - steady),
+                ),
+                itertools.repeat(steady),
+            ),
+        )
+
+    openings = itertools.chain([principal], balances)
+    interest = array("d", map(operator.mul, openings, itertools.repeat(rate)))
+    payments = array("d", itertools.repeat(payment, full))
+    if total.months:
+        payments.append(total.last_payment)
+        balances.append(0.0)
+    principal_paid = array("d", map(operator.sub, payments, interest))
+    return Schedule(payments, interest, principal_paid, balances)
+
+
+def pay_off_debts(
+    debts: list[Debt], budget: float, strategy: str = "avalanche"
+) -> StrategyResult:
+    """Pay off several debts with a monthly budget, one target at a time.
+
+    Every debt gets its minimum payment, and what is left of the budget
+    goes to the first debt in the strategy's order that is not paid off.
+
+    :param debts: Debts to pay off.
+    :type debts: list[Debt]
+    :param budget: Paid towards the debts every month.
+    :type budget: float
+    :param strategy: "avalanche" or "snowball", defaults to "avalanche"
+    :type strategy: str, optional
+    :raises ValueError: If the budget cannot pay off the debts.
+    :return: Months and interest until debt free, and the payoff order.
+    :rtype: StrategyResult
+    """
+    if strategy == "avalanche":
+        order = sorted(debts, key=lambda debt: -debt.annual_rate)
+    elif strategy == "snowball":
+        order = sorted(debts, key=lambda debt: debt.balance)
+    else:
+        raise ValueError(f"Unknown payoff strategy: {strategy}")
+    if len({debt.name for debt in debts}) < len(debts):
+        raise ValueError("Each debt needs its own name.")
+    if budget < sum(debt.minimum for debt in debts):
+        raise ValueError("The budget does not cover the minimum payments.")
+
+    rates = [debt.annual_rate / 12 for debt in order]
+    balances = [debt.balance for debt in order]
+    paid_off = {debt.name: 0 for debt in order if debt.balance < PAID_OFF}
+    month = 0
+    interest = 0.0
+
+    while len(paid_off) < len(order):
+        active = [
+            i for i, debt in enumerate(order) if debt.name not in paid_off
+        ]
+        payments = {i: order[i].minimum for i in active}
+        payments[active[0]] += budget - sum(payments.values())
+
+        # Whole months before the next debt is paid off, at these payments.
+        first = min(
+            months_to_payoff(balances[i], rates[i], payments[i])
+            for i in active
+        )
+        if math.isinf(first):
+            raise ValueError("The budget does not cover the interest.")
+        skip = math.ceil(first - MONTH_TOLERANCE) - 1
+        if skip > 0:
+            for i in active:
+                after = balance_after(balances[i], rates[i], payments[i], skip)
+                interest += payments[i] * skip - (balances[i] - after)
+                balances[i] = after
+            month += skip
+
+        # The month a debt is paid off, its leftover goes to the next one.
+        month += 1
+        left = budget
+        for i in active:
+            interest += balances[i] * rates[i]
+            balances[i] *= 1 + rates[i]
+            paid = min(order[i].minimum, balances[i])
+            balances[i] -= paid
+            left -= paid
+        for i in active:
+            paid = min(left, balances[i])
+            balances[i] -= paid
+            left -= paid
+            if balances[i] < PAID_OFF:
+                paid_off[order[i].name] = month
+
+    return StrategyResult(strategy, month, interest, paid_off)
+
+
+def compare_strategies(
+    debts: list[Debt], budget: float
+) -> list[StrategyResult]:
+    """Pay off several debts with each of the STRATEGIES.
+
+    :param debts: Debts to pay off.
+    :type debts: list[Debt]
+    :param budget: Paid towards the debts every month.
+    :type budget: float
+    :return: Outcome of each strategy, cheapest first.
+    :rtype: list[StrategyResult]
+    """
+    results = [pay_off_debts(debts, budget, name) for name in STRATEGIES]
+    return sorted(results, key=lambda result: result.interest)
+
+
+def format_duration(months: int) -> str:
+    """Format a number of months as years and months, e.g. "4y 2m".
+
+    :param months: Months.
+    :type months: int
+    :return: Years and months.
+    :rtype: str
+    """
+    years, months = divmod(months, 12)
+    return f"{years}y {months}m" if years else f"{months}m"
+
+
+def format_payoff(
+    payment: float, base: Payoff, extra: float, result: Payoff
+) -> str:
+    """Summarize a loan payoff, and what an extra payment saves.
+
+    :param payment: Monthly payment over the term.
+    :type payment: float
+    :param base: Payoff without extra payments.
+    :type base: Payoff
+    :param extra: Extra monthly payment.
+    :type extra: float
+    :param result: Payoff with the extra payment.
+    :type result: Payoff
+    :return: A few lines of summary.
+    :rtype: str
+    """
+    lines = [
+        f"Monthly payment: {payment:,.2f}",
+        f"Paid off in {format_duration(base.months)}, interest "
+        f"{base.interest:,.2f}, total {base.total_paid:,.2f}",
+    ]
+    if extra:
+        lines.append(
+            f"With {extra:,.2f} extra: paid off in "
+            f"{format_duration(result.months)}, interest "
+            f"{result.interest:,.2f}, saving "
+            f"{base.interest - result.interest:,.2f} and "
+            f"{format_duration(base.months - result.months)}"
+        )
+    return "\n".join(lines)
+
+
+def format_schedule(plan: Schedule) -> str:
+    """Render an amortization schedule as an aligned text table.
+
+    :param plan: Schedule to render.
+    :type plan: Schedule
+    :return: One row per month.
+    :rtype: str
+    """
+    header = ("Month", "Payment", "Interest", "Principal", "Balance")
+    rows = [
+        (str(month), *(f"{value:,.2f}" for value in values))
+        for month, values in enumerate(zip(*plan), start=1)
+    ]
+    widths = [
+        max(len(row[column]) for row in [header, *rows])
+        for column in range(len(header))
+    ]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+        for row in [header, *rows]
+    )
+
+
+def format_schedule_json(plan: Schedule) -> str:
+    """Render an amortization schedule as JSON, amounts rounded to cents.
+
+    :param plan: Schedule to render.
+    :type plan: Schedule
+    :return: JSON list with one object per month.
+    :rtype: str
+    """
+    return json.dumps(
+        [
+            {"month": month}
+            | {
+                field: round(value, 2)
+                for field, value in zip(Schedule._fields, values)
+            }
+            for month, values in enumerate(zip(*plan), start=1)
+        ],
+        indent=2,
+    )
+
+
+def format_sweep(
+    results: dict[tuple[float, float], Payoff], metric: str = "interest"
+) -> str:
+    """Render a sweep as a grid of rates by extra payments.
+
+    :param results: (rate, extra) → payoff, from sweep.
+    :type results: dict[tuple[float, float], Payoff]
+    :param metric: "interest" or "months", defaults to "interest"
+    :type metric: str, optional
+    :return: One row per rate, one column per extra payment.
+    :rtype: str
+    """
+    rates = sorted({rate for rate, _ in results})
+    extras = sorted({extra for _, extra in results})
+    header = ("Rate", *(f"+{extra:,.2f}" for extra in extras))
+
+    def cell(result: Payoff) -> str:
+        if metric == "months":
+            return str(result.months)
+        return f"{result.interest:,.0f}"
+
+    rows = [
+        (
+            f"{rate:.2%}",
+            *(cell(results[rate, extra]) for extra in extras),
+        )
+        for rate in rates
+    ]
+    widths = [
+        max(len(row[column]) for row in [header, *rows])
+        for column in range(len(header))
+    ]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+        for row in [header, *rows]
+    )
+
+
+def format_strategies(results: list[StrategyResult]) -> str:
+    """Summarize how each strategy pays off the debts.
+
+    :param results: Outcomes from compare_strategies, cheapest first.
+    :type results: list[StrategyResult]
+    :return: One line per strategy, and what the cheapest saves.
+    :rtype: str
+    """
+    lines = [
+        f"{result.strategy.capitalize()}: debt free in "
+        f"{format_duration(result.months)}, interest "
+        f"{result.interest:,.2f}, order "
+        + ", ".join(
+            f"{name} ({format_duration(month)})"
+            for name, month in result.paid_off.items()
+        )
+        for result in results
+    ]
+    best, worst = results[0], results[-1]
+    if worst.interest - best.interest >= PAID_OFF:
+        lines.append(
+            f"{best.strategy.capitalize()} saves "
+            f"{worst.interest - best.interest:,.2f} in interest"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,328 @@
+"""Contains the Monte Carlo projection of savings and retirement balances.
+
+Each simulated path starts from the same balance, then every year grows
+by a random return, receives a contribution while working, and pays out a
+withdrawal once retired. Contributions and withdrawals are given in
+today's money and grow with inflation; results are reported in today's
+money too.
+
+Paths are simulated in batches, one year at a time across the whole
+batch. Annual growth factors are drawn by indexing a table of 65536
+lognormal quantiles with random 16 bit integers from ``randbytes``, and
+balances are updated with ``map`` over the batch, so no per-path Python
+code runs. Batches can be spread over a process pool. Paths are split
+into chunks of CHUNK_PATHS, and each chunk seeds its own generator from
+the projection's seed and its chunk number. Batches hold whole chunks,
+so a seed gives the same result whatever the number of workers or the
+batch size.
+"""
+
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import math
+import operator
+import random
+import statistics
+import sys
+import time
+from array import array
+from typing import NamedTuple
+
+from pfts.util.logging import log_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50_000
+PERCENTILES = (10, 25, 50, 75, 90)
+# Years between the reported checkpoints, the final year is always one.
+CHECKPOINT_STEP = 10
+# Random bits per growth draw, the table holds 2 ** TABLE_BITS quantiles.
+TABLE_BITS = 16
+# Paths sharing one generator, batch sizes are rounded to a multiple.
+CHUNK_PATHS = 1024
+
+
+class ProjectionParams(NamedTuple):
+    """What to project, amounts per year in today's money."""
+
+    years: int
+    initial: float
+    contribution: float = 0.0
+    withdrawal: float = 0.0
+    # Years of contributions before withdrawals start.
+    retire_after: int = 0
+    mean_return: float = 0.07
+    volatility: float = 0.15
+    inflation: float = 0.025
+
+
+class BatchResult(NamedTuple):
+    """Balances of one batch of paths, in today's money."""
+
+    checkpoints: dict[int, array]
+    depleted: int
+    seconds: float
+
+
+class ProjectionResult(NamedTuple):
+    """Percentiles of the projected balances, in today's money."""
+
+    paths: int
+    seed: int
+    # Year → balance at each of PERCENTILES.
+    percentiles: dict[int, list[float]]
+    # Share of paths whose money lasted, 1.0 without withdrawals.
+    success_rate: float
+    seconds: float
+
+
+@functools.lru_cache(maxsize=16)
+def growth_table(mean_return: float, volatility: float) -> tuple[float, ...]:
+    """Annual growth factors at evenly spaced quantiles.
+
+    Returns are lognormal with the given arithmetic mean and standard
+    deviation. Drawing a uniformly random entry samples the distribution,
+    with its tails cut off past about 4.3 standard deviations.
+
+    :param mean_return: Mean annual return, e.g. 0.07.
+    :type mean_return: float
+    :param volatility: Standard deviation of the annual return.
+    :type volatility: float
+    :return: 2 ** TABLE_BITS growth factors, ascending.
+    :rtype: tuple[float, ...]
+    """
+    sigma = math.sqrt(math.log1p((volatility / (1 + mean_return)) ** 2))
+    mu = math.log1p(mean_return) - sigma**2 / 2
+    size = 1 << TABLE_BITS
+
+    if sigma == 0:
+        return (math.exp(mu),) * size
+
+    normal = statistics.NormalDist(mu, sigma)
+    return tuple(
+        math.exp(normal.inv_cdf((index + 0.5) / size)) for index in range(size)
+    )
+
+
+def checkpoint_years(years: int) -> list[int]:
+    """Years whose balances are reported.
+
+    :param years: Length of the projection.
+    :type years: int
+    :return: Every CHECKPOINT_STEP years, and the final year.
+    :rtype: list[int]
+    """
+    checkpoints = list(range(CHECKPOINT_STEP, years, CHECKPOINT_STEP))
+    return checkpoints + [years]
+
+
+def chunk_seed(seed: int, chunk: int) -> int:
+    """Seed of one chunk's generator, independent of the other chunks.
+
+    :param seed: Seed of the projection.
+    :type seed: int
+    :param chunk: Chunk number.
+    :type chunk: int
+    :return: 128 bit seed.
+    :rtype: int
+    """
+    digest = hashlib.blake2b(f"{seed}:{chunk}".encode(), digest_size=16)
+    return int.from_bytes(digest.digest(), "little")
+
+
+@log_context
+def simulate_batch(
+    params: ProjectionParams, paths: int, seed: int, first_chunk: int = 0
+) -> BatchResult:
+    """Simulate one batch of paths, the kernel of the projection.
+
+    :param params: What to project.
+    :type params: ProjectionParams
+    :param paths: Paths in the batch, whole chunks except for the last.
+    :type paths: int
+    :param seed: Seed of the projection.
+    :type seed: int
+    :param first_chunk: Number of the batch's first chunk, defaults to 0
+    :type first_chunk: int, optional
+    :return: Balances at the checkpoint years, and depleted paths.
+    :rtype: BatchResult
+    """
+    start = time.perf_counter()
+    chunks = [
+        (
+            random.Random(chunk_seed(seed, first_chunk + number)),
+            2 * min(CHUNK_PATHS, paths - offset),
+        )
+        for number, offset in enumerate(range(0, paths, CHUNK_PATHS))
+    ]
+    table = growth_table(params.mean_return, params.volatility)
+    checkpoints = set(checkpoint_years(params.years))
+
+    wealth = [float(params.initial)] * paths
+    results = {}
+    for year in range(1, params.years + 1):
+        draws = array(
+            "H", b"".join(rng.randbytes(size) for rng, size in chunks)
+        )
+        if sys.byteorder == "big":
+            draws.byteswap()
+        grown = map(operator.mul, wealth, map(table.__getitem__, draws))
+
+        # A path that runs out stays out: growth keeps a negative balance
+        # negative and withdrawals only take more. Balances are left
+        # negative and only clamped to zero where they are reported.
+        prices = (1 + params.inflation) ** year
+        if year <= params.retire_after:
+            amount = params.contribution * prices
+        else:
+            amount = -params.withdrawal * prices
+        wealth = list(map(operator.add, grown, itertools.repeat(amount)))
+
+        if year in checkpoints:
+            real = map(operator.mul, wealth, itertools.repeat(1 / prices))
+            results[year] = array("d", map(max, real, itertools.repeat(0.0)))
+
+    depleted = sum(map((0.0).__ge__, wealth)) if params.withdrawal else 0
+    return BatchResult(results, depleted, time.perf_counter() - start)
+
+
+def percentile_values(values: list[float]) -> list[float]:
+    """Nearest-rank PERCENTILES of a sorted list.
+
+    :param values: Sorted values.
+    :type values: list[float]
+    :return: Value at each of PERCENTILES.
+    :rtype: list[float]
+    """
+    last = len(values) - 1
+    return [values[round(last * share / 100)] for share in PERCENTILES]
+
+
+def project(
+    params: ProjectionParams,
+    paths: int,
+    seed: int | None = None,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ProjectionResult:
+    """Run the Monte Carlo projection.
+
+    :param params: What to project.
+    :type params: ProjectionParams
+    :param paths: Paths to simulate.
+    :type paths: int
+    :param seed: Seed for reproducible results, defaults to None (random)
+    :type seed: int | None, optional
+    :param workers: Processes simulating batches, defaults to 1
+    :type workers: int, optional
+    :param batch_size: Paths per batch, rounded up to a multiple of
+        CHUNK_PATHS, defaults to DEFAULT_BATCH_SIZE
+    :type batch_size: int, optional
+    :raises ValueError: If there are no paths or years to simulate.
+    :return: Percentiles per checkpoint year, and the success rate.
+    :rtype: ProjectionResult
+    """
+    if paths < 1 or params.years < 1:
+        raise ValueError("Need at least one path and one year to project.")
+
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+
+    start = time.perf_counter()
+    batch_size = -(-batch_size // CHUNK_PATHS) * CHUNK_PATHS
+    sizes = [batch_size] * (paths // batch_size)
+    if paths % batch_size:
+        sizes.append(paths % batch_size)
+    per_batch = batch_size // CHUNK_PATHS
+    first_chunks = range(0, len(sizes) * per_batch, per_batch)
+    arguments = (itertools.repeat(params), sizes, itertools.repeat(seed))
+
+    if workers <= 1 or len(sizes) <= 1:
+        batches = list(map(simulate_batch, *arguments, first_chunks))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            batches = list(pool.map(simulate_batch, *arguments, first_chunks))
+
+    kernel = sum(batch.seconds for batch in batches)
+    logger.debug(
+        f"Simulation kernel ran {len(batches)} batches in {kernel:.2f}s"
+    )
+
+    percentiles = {}
+    for year in checkpoint_years(params.years):
+        values = sorted(
+            itertools.chain.from_iterable(
+                batch.checkpoints[year] for batch in batches
+            )
+        )
+        percentiles[year] = percentile_values(values)
+
+    depleted = sum(batch.depleted for batch in batches)
+    result = ProjectionResult(
+        paths,
+        seed,
+        percentiles,
+        1 - depleted / paths,
+        time.perf_counter() - start,
+    )
+    logger.info(
+        f"Projected {paths} paths over {params.years} years in "
+        f"{result.seconds:.2f}s ({paths / result.seconds:,.0f} paths/sec, "
+        f"kernel {kernel:.2f}s)"
+    )
+    return result
+
+
+def format_table(result: ProjectionResult) -> str:
+    """Render a projection as an aligned text table, whole currency units.
+
+    :param result: Projection to render.
+    :type result: ProjectionResult
+    :return: One row per checkpoint year, and the success rate.
+    :rtype: str
+    """
+    header = ("Year", *(f"P{share}" for share in PERCENTILES))
+    rows = [
+        (str(year), *(f"{value:,.0f}" for value in values))
+        for year, values in result.percentiles.items()
+    ]
+    widths = [
+        max(len(row[column]) for row in [header, *rows])
+        for column in range(len(header))
+    ]
+
+    lines = [
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+        for row in [header, *rows]
+    ]
+    lines.append(
+        f"Money lasted in {result.success_rate:.1%} of {result.paths:,} "
+        f"paths (seed {result.seed})"
+    )
+    return "\n".join(lines)
+
+
+def format_json(result: ProjectionResult) -> str:
+    """Render a projection as JSON.
+
+    :param result: Projection to render.
+    :type result: ProjectionResult
+    :return: JSON object with the percentiles by year.
+    :rtype: str
+    """
+    return json.dumps(
+        {
+            "paths": result.paths,
+            "seed": result.seed,
+            "success_rate": result.success_rate,
+            "percentiles": {
+                str(year): dict(zip(map(str, PERCENTILES), values))
+                for year, values in result.percentiles.items()
+            },
+        },
+        indent=2,
+    )
@@ -0,0 +1,431 @@
+"""Contains the scheduler that runs the local CI checks."""
+
+import concurrent.futures
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import pathlib
+import subprocess  # nosec B404
+import sys
+import threading
+import time
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class CIStep:
+    """A single command line run as part of the local CI pipeline."""
+
+    def __init__(
+        self,
+        name: str,
+        args: list[str],
+        exclusive: bool = False,
+        inputs: list[str] | None = None,
+        package: str | None = None,
+    ) -> None:
+        """Describe a CI step.
+
+        :param name: Human-readable name of the step.
+        :type name: str
+        :param args: Command line to run.
+        :type args: list[str]
+        :param exclusive: Run alone before every other step, for steps that
+            rewrite files the others read, defaults to False
+        :type exclusive: bool, optional
+        :param inputs: Files and folders the step reads, relative to the
+            working directory. Steps without inputs are never cached,
+            defaults to None
+        :type inputs: list[str] | None, optional
+        :param package: Distribution providing the tool, whose version is
+            part of the cache key, defaults to None
+        :type package: str | None, optional
+        """
+        self.name = name
+        self.args = args
+        self.exclusive = exclusive
+        self.inputs = inputs or []
+        self.package = package
+
+    def __repr__(self) -> str:
+        return f"CIStep({self.name!r}, {self.args!r})"
+
+
+class StepResult:
+    """Outcome of running a CIStep."""
+
+    def __init__(
+        self,
+        step: CIStep,
+        returncode: int | None,
+        duration: float,
+        output: str,
+        cached: bool = False,
+    ) -> None:
+        """Record how a step went.
+
+        :param step: The step that ran.
+        :type step: CIStep
+        :param returncode: Exit status, None if the step never finished.
+        :type returncode: int | None
+        :param duration: Wall time in seconds.
+        :type duration: float
+        :param output: Combined stdout and stderr of the step.
+        :type output: str
+        :param cached: Whether the pass was taken from the cache instead of
+            running the step, defaults to False
+        :type cached: bool, optional
+        """
+        self.step = step
+        self.returncode = returncode
+        self.duration = duration
+        self.output = output
+        self.cached = cached
+
+    @property
+    def passed(self) -> bool:
+        """Whether the step exited with status 0."""
+        return self.returncode == 0
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the step was stopped, or skipped, by fail-fast."""
+        return self.returncode is None
+
+    def __repr__(self) -> str:
+        return (
+            f"StepResult({self.step.name!r}, returncode={self.returncode}, "
+            f"duration={self.duration:.2f})"
+        )
+
+
+# Source folders bandit scans. They are also its cache inputs, so a change
+# the scan would see always runs it again.
+SECURITY_PATHS = ["pfts", "benchmarks", "docs/source"]
+
+DEFAULT_STEPS = [
+    # Format / Lint. Rewrites files, so it has to finish before the rest.
+    CIStep(
+        "format checks",
+        ["ruff", "format"],
+        exclusive=True,
+        inputs=[
+            "pfts",
+            "tests",
+            "benchmarks",
+            "docs/source",
+            "pyproject.toml",
+        ],
+        package="ruff",
+    ),
+    # Type Checking
+    CIStep(
+        "type checks",
+        ["mypy"],
+        inputs=["pfts", "pyproject.toml"],
+        package="mypy",
+    ),
+    # Testing
+    CIStep(
+        "tests",
+        ["pytest"],
+        inputs=["pfts", "tests", "pyproject.toml"],
+        package="pytest",
+    ),
+    # Security Check
+    CIStep(
+        "security checks",
+        ["bandit", "-c", "pyproject.toml", "-r", *SECURITY_PATHS],
+        inputs=[*SECURITY_PATHS, "pyproject.toml"],
+        package="bandit",
+    ),
+]
+
+CACHE_DIR = pathlib.Path(".pfts_cache") / "ci"
+
+# Folders never hashed as step inputs.
+IGNORED_DIRS = {"__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache"}
+
+
+class CICache:
+    """Remembers which steps passed for a given set of inputs.
+
+    A step's key hashes its command line, the tool's version, the Python
+    version, and the path and content of every input file. A step is only
+    skipped when its current key matches the key of its last pass, so any
+    edit, added or removed input file, or tool upgrade runs it again.
+    Failures are never cached.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path = CACHE_DIR) -> None:
+        """Open the cache.
+
+        :param cache_dir: Folder holding one entry per step,
+            defaults to CACHE_DIR
+        :type cache_dir: pathlib.Path, optional
+        """
+        self.cache_dir = cache_dir
+
+    def key_for(self, step: CIStep) -> str | None:
+        """Hash everything the step's result depends on.
+
+        :param step: Step to hash.
+        :type step: CIStep
+        :return: Hex digest, or None if the step declares no inputs.
+        :rtype: str | None
+        """
+        if not step.inputs:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(step.args).encode("utf8"))
+        digest.update(sys.version.encode("utf8"))
+        digest.update(tool_version(step.package).encode("utf8"))
+
+        for path in iter_input_files(step.inputs):
+            digest.update(path.as_posix().encode("utf8") + b"\0")
+            digest.update(path.read_bytes())
+            digest.update(b"\0")
+
+        return digest.hexdigest()
+
+    def is_fresh(self, step: CIStep, key: str | None) -> bool:
+        """Whether the step last passed with exactly this key.
+
+        :param step: Step to look up.
+        :type step: CIStep
+        :param key: Current key of the step.
+        :type key: str | None
+        :return: True if the step can be skipped.
+        :rtype: bool
+        """
+        entry = self._entry_path(step)
+        if key is None or not entry.exists():
+            return False
+
+        return entry.read_text(encoding="utf8").strip() == key
+
+    def store(self, step: CIStep, key: str | None) -> None:
+        """Record that the step passed with the given key.
+
+        :param step: Step that passed.
+        :type step: CIStep
+        :param key: Key the step passed with.
+        :type key: str | None
+        """
+        if key is None:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entry_path(step).write_text(key + "\n", encoding="utf8")
+
+    def invalidate(self, step: CIStep) -> None:
+        """Forget the last pass of a step.
+
+        :param step: Step to forget.
+        :type step: CIStep
+        """
+        self._entry_path(step).unlink(missing_ok=True)
+
+    def _entry_path(self, step: CIStep) -> pathlib.Path:
+        slug = "".join(c if c.isalnum() else "_" for c in step.name)
+        return self.cache_dir / f"{slug}.key"
+
+
+def tool_version(package: str | None) -> str:
+    """Installed version of a tool's distribution.
+
+    :param package: Distribution name, e.g. "ruff".
+    :type package: str | None
+    :return: Version string, or "unknown" if it cannot be found.
+    :rtype: str
+    """
+    if package is None:
+        return "unknown"
+
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def iter_input_files(inputs: list[str]) -> Iterator[pathlib.Path]:
+    """Every file under the given inputs, in a stable order.
+
+    Missing inputs are skipped, so that creating one changes the hash.
+
+    :param inputs: Files and folders to walk.
+    :type inputs: list[str]
+    :return: Files in sorted order.
+    :rtype: Iterator[pathlib.Path]
+    """
+    for entry in sorted(inputs):
+        path = pathlib.Path(entry)
+        if path.is_file():
+            yield path
+        elif path.is_dir():
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+                for name in sorted(files):
+                    if not name.endswith(".pyc"):
+                        yield pathlib.Path(root) / name
+
+
+class CIRunner:
+    """Runs CI steps concurrently, capturing each step's output."""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        fail_fast: bool = False,
+        cache: CICache | None = None,
+    ):
+        """Configure the runner.
+
+        :param workers: Steps allowed to run at once, defaults to one per CPU
+        :type workers: int | None, optional
+        :param fail_fast: Stop every other step once one fails,
+            defaults to False
+        :type fail_fast: bool, optional
+        :param cache: Skip steps whose inputs have not changed since they
+            last passed, defaults to None (always run every step)
+        :type cache: CICache | None, optional
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.fail_fast = fail_fast
+        self.cache = cache
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._running: dict[str, subprocess.Popen] = {}
+        # Steps whose process cancel terminated.
+        self._terminated: set[str] = set()
+
+    def run(self, steps: list[CIStep]) -> list[StepResult]:
+        """Run the steps, exclusive ones first and one at a time.
+
+        :param steps: Steps to run.
+        :type steps: list[CIStep]
+        :return: One result per step, in the order the steps were given.
+        :rtype: list[StepResult]
+        """
+        self._cancelled.clear()
+        self._terminated.clear()
+        results: dict[str, StepResult] = {}
+
+        for step in steps:
+            if step.exclusive:
+                results[step.name] = self._run_step(step)
+
+        shared = [step for step in steps if not step.exclusive]
+        with concurrent.futures.ThreadPoolExecutor(self.workers) as pool:
+            futures = {pool.submit(self._run_step, step) for step in shared}
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results[result.step.name] = result
+
+        return [results[step.name] for step in steps]
+
+    def _run_step(self, step: CIStep) -> StepResult:
+        """Run a single step, unless it is cached or has been cancelled.
+
+        :param step: Step to run.
+        :type step: CIStep
+        :return: The step's result.
+        :rtype: StepResult
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_for(step)
+            if self.cache.is_fresh(step, key):
+                return StepResult(
+                    step, 0, 0.0, "Inputs unchanged since last pass.", True
+                )
+
+        result = self._execute(step)
+
+        if self.cache is not None and result.passed:
+            # Steps that rewrite their inputs are cached in their new state.
+            if step.exclusive:
+                key = self.cache.key_for(step)
+            self.cache.store(step, key)
+
+        return result
+
+    def _execute(self, step: CIStep) -> StepResult:
+        """Run a step's command unless fail-fast has cancelled the run.
+
+        :param step: Step to run.
+        :type step: CIStep
+        :return: The step's result.
+        :rtype: StepResult
+        """
+        start = time.perf_counter()
+
+        try:
+            with self._lock:
+                if self._cancelled.is_set():
+                    return StepResult(step, None, 0.0, "Skipped by fail-fast.")
+
+                logger.debug(f"Running {step.name} now!")
+                process = subprocess.Popen(
+                    step.args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                )  # nosec B603
+                self._running[step.name] = process
+
+            output, _ = process.communicate()
+            returncode: int | None = process.returncode
+        except OSError as e:
+            output, returncode = f"Could not start {step.args[0]}: {e}", -1
+        finally:
+            with self._lock:
+                self._running.pop(step.name, None)
+
+        duration = time.perf_counter() - start
+
+        # A step that failed on its own while another one cancelled the run
+        # still counts as failed.
+        if step.name in self._terminated and returncode != 0:
+            returncode = None
+        elif returncode != 0 and self.fail_fast:
+            self.cancel()
+
+        return StepResult(step, returncode, duration, output)
+
+    def cancel(self) -> None:
+        """Stop every running step, and skip the steps not yet started."""
+        with self._lock:
+            self._cancelled.set()
+            for name, process in self._running.items():
+                if process.poll() is None:
+                    process.terminate()
+                    self._terminated.add(name)
+
+
+def report_results(results: list[StepResult]) -> bool:
+    """Log how each step went, including the output of failed steps.
+
+    :param results: Results of a CI run.
+    :type results: list[StepResult]
+    :return: True if every step passed.
+    :rtype: bool
+    """
+    for result in results:
+        name = result.step.name
+        if result.cached:
+            logger.debug(f"{name} were successful! (cached)")
+        elif result.passed:
+            logger.debug(f"{name} were successful! ({result.duration:.2f}s)")
+        elif result.cancelled:
+            logger.debug(f"{name} were cancelled. ({result.duration:.2f}s)")
+        else:
+            logger.debug(
+                f"{name} failed! ({result.duration:.2f}s)\n{result.output}"
+            )
+
+    return all(result.passed for result in results)
@@ -0,0 +1,123 @@
+"""Contains the in-process Sphinx documentation build."""
+
+import logging
+import pathlib
+import shutil
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def update_api_stubs(
+    package_dir: pathlib.Path, source_dir: pathlib.Path
+) -> list[pathlib.Path]:
+    """Regenerate the sphinx-apidoc stubs, only rewriting ones that changed.
+
+    Stubs only list a package's modules, so they change when modules are
+    added or removed. Untouched stubs keep their modification time, which
+    keeps Sphinx from re-reading them on an incremental build.
+
+    :param package_dir: Package to document.
+    :type package_dir: pathlib.Path
+    :param source_dir: Sphinx source folder holding the stubs.
+    :type source_dir: pathlib.Path
+    :return: Stubs that were created or rewritten.
+    :rtype: list[pathlib.Path]
+    """
+    from sphinx.ext.apidoc import main as apidoc_main
+
+    changed = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        apidoc_main(["--force", "-q", "-o", tmp_dir, str(package_dir)])
+
+        for generated in sorted(pathlib.Path(tmp_dir).glob("*.rst")):
+            target = source_dir / generated.name
+            content = generated.read_text(encoding="utf8")
+
+            if (
+                not target.exists()
+                or target.read_text(encoding="utf8") != content
+            ):
+                target.write_text(content, encoding="utf8")
+                changed.append(target)
+
+    return changed
+
+
+def build_html(
+    source_dir: pathlib.Path,
+    build_dir: pathlib.Path,
+    jobs: str = "auto",
+    clean: bool = False,
+) -> int:
+    """Build the HTML documentation with Sphinx, in this process.
+
+    Uses the same build/html and build/doctrees layout as ``make html``.
+    Unless clean is set, Sphinx reuses its saved environment and only
+    re-reads documents, or documented modules, that changed.
+
+    :param source_dir: Sphinx source folder.
+    :type source_dir: pathlib.Path
+    :param build_dir: Folder for the build output.
+    :type build_dir: pathlib.Path
+    :param jobs: Parallel reader processes, or "auto", defaults to "auto"
+    :type jobs: str, optional
+    :param clean: Remove every previous build first, defaults to False
+    :type clean: bool, optional
+    :return: Sphinx's return code.
+    :rtype: int
+    """
+    from sphinx.cmd.build import build_main
+
+    if clean:
+        logger.info("Removing all existing docs under build.")
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    build_args = [
+        "-b",
+        "html",
+        "-j",
+        jobs,
+        "-d",
+        str(build_dir / "doctrees"),
+        "--quiet",
+        str(source_dir),
+        str(build_dir / "html"),
+    ]
+
+    return build_main(build_args)
+
+
+def generate(
+    docs_dir: pathlib.Path,
+    package_dir: pathlib.Path,
+    jobs: str = "auto",
+    clean: bool = False,
+) -> tuple[int, float]:
+    """Refresh the API stubs and build the HTML documentation.
+
+    :param docs_dir: Folder holding the source and build folders.
+    :type docs_dir: pathlib.Path
+    :param package_dir: Package to document.
+    :type package_dir: pathlib.Path
+    :param jobs: Parallel reader processes, or "auto", defaults to "auto"
+    :type jobs: str, optional
+    :param clean: Do a full, cold build, defaults to False
+    :type clean: bool, optional
+    :return: Sphinx's return code and the build time in seconds.
+    :rtype: tuple[int, float]
+    """
+    source_dir = docs_dir / "source"
+    start = time.perf_counter()
+
+    changed = update_api_stubs(package_dir, source_dir)
+    for stub in changed:
+        logger.info(f"Updated API stub: {stub.name}")
+
+    rtncode = build_html(source_dir, docs_dir / "build", jobs, clean)
+    duration = time.perf_counter() - start
+
+    logger.info(f"Documentation built in {duration:.2f}s")
+    return rtncode, duration
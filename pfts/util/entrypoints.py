@@ -1,72 +1,82 @@
 """
 Describes the different entry points for this tool.
+
+Every console script imports this module, so each entry point imports what
+it needs when it runs rather than at module level. This keeps the cold start
+of one command from paying for the dependencies of the others.
 """
 
+import functools
 import logging
-import os
-import pathlib
-import subprocess  # nosec B404
-import webbrowser
+from typing import TYPE_CHECKING, Callable
 
-from pfts.util import general
-from pfts.util.logging import process_logging, setup_logging
-from pfts.util.parsing import parse_input
+if TYPE_CHECKING:
+    import argparse
+    import pathlib
 
 logger = logging.getLogger(__name__)
 
 
-def generate_documentation() -> None:
-    """Generate documentation for the current codebase and opens it."""
-    setup_logging()
-    logger = logging.getLogger(__name__)
-
-    orig_cwd = pathlib.Path().cwd()
+def generate_documentation(arg_list: list | None = None) -> None:
+    """Generate documentation for the current codebase and opens it.
 
-    # Ensure that we are in docs folder for Sphinx
-    docs_folder = orig_cwd / "docs"
-    os.chdir(docs_folder)
-    make_location = str(pathlib.Path("./make.bat").resolve())
+    Builds incrementally by default, only rewriting API stubs that changed
+    and letting Sphinx re-read only changed documents. --clean does a full
+    rebuild.
 
-    gen_args = ["sphinx-apidoc", "-o", "./source", "../pfts"]
+    :param arg_list: CLI Interface, defaults to None
+    :type arg_list: list | None
+    """
+    import pathlib
+    import webbrowser
 
-    # Create the .rst files for Sphinx
-    generation_process_rtncode = subprocess.call(
-        gen_args,
-        stdout=subprocess.DEVNULL,
-    )  # nosec B603
+    from pfts.util import docs
+    from pfts.util.logging import process_logging, setup_logging
+    from pfts.util.parsing import parse_input
 
-    process_logging(logger, generation_process_rtncode, "Sphinx-API")
+    args = parse_input(arg_list, "generate-docs")
 
-    make_clean_args = [make_location, "clean"]
-    make_run_args = [make_location, "html"]
+    setup_logging()
+    logger = logging.getLogger(__name__)
 
-    logger.info("Removing all existing docs under build.")
-    # Remove any previous documents just in case
-    subprocess.call(make_clean_args, stdout=subprocess.DEVNULL)  # nosec B603
+    orig_cwd = pathlib.Path().cwd()
+    docs_folder = orig_cwd / "docs"
 
-    make_rtncode = subprocess.call(make_run_args, stdout=subprocess.DEVNULL)  # nosec B603
+    sphinx_rtncode, _ = docs.generate(
+        docs_folder, orig_cwd / "pfts", jobs=args.jobs, clean=args.clean
+    )
 
-    process_logging(logger, make_rtncode, "Make Process")
+    process_logging(logger, sphinx_rtncode, "Sphinx Build")
 
-    doc_file_str = str(pathlib.Path("./build/html/index.html").resolve())
+    doc_file_str = str(docs_folder / "build" / "html" / "index.html")
     logger.info(f"Documentation created at: {doc_file_str}")
-    webbrowser.open(doc_file_str, 1)
 
-    os.chdir(orig_cwd)
+    if not args.no_open:
+        webbrowser.open(doc_file_str, 1)
 
 
 def run_testing(arg_list: list | None = None) -> None:
     """Run the entire test suite, and potentially generate a coverage file.
 
+    Tests can be sharded across processes with --workers, and limited to
+    the tests affected by changed files with --impact.
+
     :param arg_list: CLI Interface, defaults to None
     :type arg_list: list | None
     """
+    import pathlib
+    import subprocess  # nosec B404
+    import webbrowser
+
+    from pfts.util import testrun
+    from pfts.util.logging import setup_logging
+    from pfts.util.parsing import parse_input
 
-    args = parse_input(arg_list)
+    args = parse_input(arg_list, "run-testing")
 
-    coverage_args = ["coverage", "run", "-m", "pytest"]
-    # Not generating logs since pytest will take over the logging.
-    subprocess.call(coverage_args)  # nosec B603
+    # pytest runs in its own processes, this only reports which tests ran.
+    setup_logging(logging.INFO)
+    testrun.run_tests(workers=args.workers, impact=args.impact)
 
     if not args.disablecov:
         report_gen_args = ["coverage", "html", "-d", "coverage_report"]
@@ -78,52 +88,38 @@ def run_testing(arg_list: list | None = None) -> None:
         webbrowser.open(coverage_filepath, 1)
 
 
-def run_local_ci() -> bool:
+def run_local_ci(arg_list: list | None = None) -> bool:
     """Runs a local version of the CI pipeline.
 
-    Useful when remembered.
+    Useful when remembered. Formatting runs first, then the remaining
+    checks run concurrently. Checks whose inputs have not changed since
+    they last passed are skipped unless --no-cache is given.
+
+    :param arg_list: CLI Interface, defaults to None
+    :type arg_list: list | None
     :return: Return True on succesful execution, otherwise returns False.
     :rtype: bool
     """
+    from pfts.util import ci
+    from pfts.util.logging import setup_logging
+    from pfts.util.parsing import parse_input
 
-    setup_logging(logging.DEBUG)
+    args = parse_input(arg_list, "local-ci")
 
-    # Format / Lint
-    ruff_args = ["ruff", "format"]
-
-    # Type Checking
-    mypy_args = ["mypy"]
-
-    # Testing
-    test_args = ["pytest"]
-
-    # Security Check
-    bandit_args = ["bandit", "-c", "pyproject.toml", "-r", "."]
-
-    list_of_args = [
-        (ruff_args, "format checks"),
-        (mypy_args, "type checks"),
-        (test_args, "tests"),
-        (bandit_args, "security checks"),
-    ]
+    setup_logging(logging.DEBUG)
 
-    ret_val = True
+    cache = None if args.no_cache else ci.CICache()
+    runner = ci.CIRunner(
+        workers=args.workers, fail_fast=args.fail_fast, cache=cache
+    )
 
     try:
-        for arg_set, print_statement in list_of_args:
-            logger.debug(f"Running {print_statement} now!")
-            status = subprocess.call(
-                arg_set, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )  # nosec B603
-            if status == 0:
-                logger.debug(f"{print_statement} were successful!")
-            else:
-                logger.debug(f"{print_statement} failed!")
-                ret_val = False
+        results = runner.run(ci.DEFAULT_STEPS)
     except Exception as e:
         logger.exception(e)
-        ret_val = False
-        return ret_val
+        return False
+
+    ret_val = ci.report_results(results)
 
     if ret_val:
         logger.info("All CI checks have passed!")
@@ -139,15 +135,613 @@ def run_pfts(arg_list: list | None = None) -> None:
     :param arg_list: List of args to use, defaults to None
     :type arg_list: list | None, optional
     """
+    from pfts.util.logging import setup_logging
+    from pfts.util.parsing import parse_input
 
     # Avoids list gotcha
     # None will result in sys.argv[1:]
-    args = parse_input(arg_list)
+    args = parse_input(arg_list, "pfts")
+
+    if args.profile:
+        from pfts.util import profiling
+
+        profiling.enable_profiling(dump_at_exit=args.profile)
 
     log_level = logging.DEBUG if args.dev else logging.WARNING
     setup_logging(log_level)
     logger.info(f"Successfully loaded in the following args: {args}")
 
+    output = run_pfts_command(args)
+    if output:
+        print(output)
+
+
+def run_pfts_command(args: "argparse.Namespace") -> str | None:
+    """Dispatch parsed pfts arguments to the handler of their subcommand.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Text the command wants shown to the user, if any.
+    :rtype: str | None
+    """
+    handler = PFTS_COMMANDS.get(args.command)
+    if handler is None:
+        return None
+
+    return handler(args)
+
+
+def run_served_command(arg_list: list[str]) -> str | None:
+    """Parse and run one command line received by ``pfts serve``.
+
+    Logging and profiling stay as the server configured them, so --dev and
+    --profile on individual requests have no effect.
+
+    :param arg_list: Arguments, as they would be passed to the pfts script.
+    :type arg_list: list[str]
+    :raises ValueError: If the request tries to start another server.
+    :return: Text the command wants shown to the user, if any.
+    :rtype: str | None
+    """
+    from pfts.util.parsing import parse_input
+
+    args = parse_input(arg_list, "pfts")
+    if args.command == "serve":
+        raise ValueError("Cannot start a server from within a server.")
+
+    return run_pfts_command(args)
+
+
+def serve(args: "argparse.Namespace") -> str | None:
+    """Keep pfts warm, answering commands from a Unix socket or stdin.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Summary of how many requests were answered.
+    :rtype: str | None
+    """
+    import sys
+
+    from pfts.util import server
+
+    if args.socket:
+        try:
+            handled = server.serve_unix_socket(args.socket, run_served_command)
+        except OSError as e:
+            logger.error(f"Could not serve on {args.socket}: {e}")
+            return f"Serve failed: {e}"
+    else:
+        handled = server.serve_stream(
+            sys.stdin, sys.stdout, run_served_command
+        )
+
+    return f"Answered {handled} requests."
+
+
+def ledger_summary(args: "argparse.Namespace") -> str | None:
+    """Count and total the selected transactions of the ledger.
+
+    Answered from the rollups, which are brought up to date first.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Summary of the selected transactions.
+    :rtype: str | None
+    """
+    from pfts import ledger
+    from pfts.ledger import rollups
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+    totals = rollups.Rollups.load(ledger_dir, book)
+    filters = (args.since, args.until, args.account, args.category)
+    cents, selected = totals.totals(*filters)
+
+    lines = [
+        f"Transactions: {selected} of {len(book)}",
+        f"Total: {ledger.format_cents(cents)}",
+        f"Column memory: {book.nbytes} bytes",
+    ]
+    if args.by:
+        groups = {
+            name or "uncategorized": ledger.format_cents(cents)
+            for name, cents in totals.group_totals(args.by, *filters).items()
+        }
+        width = max((len(name) for name in groups), default=0)
+        lines.append("")
+        lines.extend(
+            f"{name:<{width}}  {total:>14}" for name, total in groups.items()
+        )
+
+    if totals.dirty and len(book):
+        totals.save(ledger_dir)
+
+    return "\n".join(lines)
+
+
+def balance(args: "argparse.Namespace") -> str | None:
+    """Show the running balance of accounts, from the rollups.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Balance per account, and their sum.
+    :rtype: str | None
+    """
+    from pfts import ledger
+    from pfts.ledger import rollups
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+    totals = rollups.Rollups.load(ledger_dir, book)
+
+    accounts = args.account or book.pools["account"].values
+    balances = {
+        account: totals.balance(account, args.as_of) for account in accounts
+    }
+    width = max(map(len, [*balances, "Total"]))
+    lines = [
+        f"{account:<{width}}  {ledger.format_cents(cents):>14}"
+        for account, cents in balances.items()
+    ]
+    lines.append(
+        f"{'Total':<{width}}  "
+        f"{ledger.format_cents(sum(balances.values())):>14}"
+    )
+
+    if totals.dirty and len(book):
+        totals.save(ledger_dir)
+
+    return "\n".join(lines)
+
+
+def _locks_ledger(
+    handler: Callable[["argparse.Namespace"], str | None],
+) -> Callable[["argparse.Namespace"], str | None]:
+    """Run a command that changes the ledger under a lock on its folder.
+
+    The lock is held from loading the ledger to saving it, so concurrent
+    commands wait for each other instead of saving over each other.
+
+    :param handler: Command handler taking the parsed arguments.
+    :type handler: Callable[[argparse.Namespace], str | None]
+    :return: The handler, run under the lock.
+    :rtype: Callable[[argparse.Namespace], str | None]
+    """
+
+    @functools.wraps(handler)
+    def locked(args: "argparse.Namespace") -> str | None:
+        from pfts import ledger
+        from pfts.util import files
+
+        with files.file_lock(args.ledger or ledger.DEFAULT_LEDGER_DIR):
+            return handler(args)
+
+    return locked
+
+
+@_locks_ledger
+def edit_transaction(args: "argparse.Namespace") -> str | None:
+    """Edit one transaction, updating the rollups and duplicate index.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: The transaction before and after the edit.
+    :rtype: str | None
+    """
+    from pfts import ledger
+    from pfts.ledger import dedup, importers, rollups
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+    totals = rollups.Rollups.load(ledger_dir, book)
+    index = dedup.DedupIndex.load(ledger_dir, book)
+
+    try:
+        cents = None
+        if args.amount is not None:
+            cents = importers.parse_cents(args.amount)
+        old = book.edit(
+            args.row,
+            None if args.date is None else ledger.to_days(args.date),
+            cents,
+            args.account,
+            args.category,
+            args.description,
+        )
+    except (IndexError, ValueError) as e:
+        logger.error(f"Edit failed, the ledger was not changed: {e}")
+        return f"Edit failed: {e}"
+
+    totals.apply_edit(args.row, old)
+    index.reindex(args.row)
+
+    book.save(ledger_dir)
+    totals.save(ledger_dir)
+    index.save(ledger_dir)
+
+    return f"Row {args.row}: {book.decode(old)} -> {book[args.row]}"
+
+
+def _dedup_options(args: "argparse.Namespace") -> dict:
+    """Keyword arguments for DedupIndex from the parsed arguments.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: The window and min_similarity options that were given.
+    :rtype: dict
+    """
+    options = {"window": args.window, "min_similarity": args.similarity}
+    return {
+        name: value for name, value in options.items() if value is not None
+    }
+
+
+@_locks_ledger
+def import_statements(args: "argparse.Namespace") -> str | None:
+    """Import bank statements into the ledger, skipping known transactions.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: How many rows were imported and skipped, and how fast.
+    :rtype: str | None
+    """
+    from pfts import ledger
+    from pfts.ledger import dedup, importers, rollups
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+    totals = rollups.Rollups.load(ledger_dir, book)
+    index = None
+    if not args.keep_duplicates:
+        index = dedup.DedupIndex.load(ledger_dir, book, **_dedup_options(args))
+
+    try:
+        stats = importers.import_files(
+            book,
+            args.statements,
+            args.account,
+            args.format,
+            args.workers,
+            index,
+        )
+    except (importers.StatementError, OSError) as e:
+        logger.error(f"Import failed, the ledger was not changed: {e}")
+        return f"Import failed: {e}"
+
+    totals.update()
+    book.save(ledger_dir)
+    totals.save(ledger_dir)
+    if index is not None:
+        index.save(ledger_dir)
+
+    return (
+        f"Imported {stats.rows} transactions from {stats.files} files, "
+        f"skipped {stats.duplicates} duplicates "
+        f"({stats.rows_per_second:,.0f} rows/sec)."
+    )
+
+
+def dedup_check(args: "argparse.Namespace") -> str | None:
+    """Refresh the duplicate index, and report which statement rows it knows.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Size of the index, and the duplicates found per statement.
+    :rtype: str | None
+    """
+    import time
+
+    from pfts import ledger
+    from pfts.ledger import dedup, importers
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+
+    start = time.perf_counter()
+    if args.rebuild:
+        index = dedup.DedupIndex(book, **_dedup_options(args))
+        index.update()
+    else:
+        index = dedup.DedupIndex.load(ledger_dir, book, **_dedup_options(args))
+    seconds = time.perf_counter() - start
+
+    lines = [f"Index covers {index.indexed} transactions ({seconds:.2f}s)."]
+    for filepath in args.statements:
+        rows = exact = fuzzy = 0
+        consumed: set[int] = set()
+        try:
+            for batch in importers.batched(
+                importers.iter_rows(
+                    filepath, args.account, args.format, require_account=True
+                ),
+                importers.BATCH_SIZE,
+            ):
+                matches = index.screen(batch, consumed)
+                rows += len(batch)
+                for row, match in zip(batch, matches):
+                    if match is None:
+                        continue
+                    if match.fuzzy:
+                        fuzzy += 1
+                        logger.info(f"{row} matches {book[match.row]}")
+                    else:
+                        exact += 1
+        except (importers.StatementError, OSError) as e:
+            logger.error(f"Could not check {filepath}: {e}")
+            lines.append(f"{filepath}: check failed: {e}")
+            continue
+
+        lines.append(
+            f"{filepath}: {exact + fuzzy} of {rows} transactions already in "
+            f"the ledger ({exact} exact, {fuzzy} fuzzy)."
+        )
+
+    if len(book):
+        index.save(ledger_dir)
+
+    return "\n".join(lines)
+
+
+def report(args: "argparse.Namespace") -> str | None:
+    """Render one of the ledger reports.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: The report, as a table or JSON.
+    :rtype: str | None
+    """
+    import time
+
+    from pfts import ledger
+    from pfts.ledger import reports
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+
+    try:
+        budget = reports.load_budget(
+            args.budget or ledger_dir / reports.BUDGET_FILE
+        )
+    except reports.BudgetError as e:
+        logger.error(e)
+        return f"Report failed: {e}"
+
+    start = time.perf_counter()
+    lines = reports.budget_report(
+        book, budget, args.since, args.until, args.account, args.category
+    )
+    logger.info(
+        f"Budget report over {len(book)} transactions took "
+        f"{time.perf_counter() - start:.3f}s"
+    )
+
+    if args.format == "json":
+        return reports.format_json(lines)
+    return reports.format_table(lines)
+
+
+@_locks_ledger
+def categorize(args: "argparse.Namespace") -> str | None:
+    """Categorize transactions with rules, updating the rollups.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Rows categorized, their speed, and counts per category.
+    :rtype: str | None
+    """
+    from pfts import ledger
+    from pfts.ledger import categorize as categorizing
+    from pfts.ledger import dedup, rollups
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+
+    try:
+        rules = categorizing.load_rules(
+            args.rules or ledger_dir / categorizing.RULES_FILE
+        )
+        categorizer = categorizing.Categorizer(rules)
+    except categorizing.RulesError as e:
+        logger.error(e)
+        return f"Categorize failed: {e}"
+
+    totals = rollups.Rollups.load(ledger_dir, book)
+    index = dedup.DedupIndex.load(ledger_dir, book)
+    result = categorizing.categorize_ledger(
+        book, categorizer, args.all, args.dry_run
+    )
+
+    if result.changes and not args.dry_run:
+        totals.apply_edits(result.changes)
+        index.acknowledge_edits()
+        book.save(ledger_dir)
+        totals.save(ledger_dir)
+        index.save(ledger_dir)
+
+    rate = result.rows / max(result.seconds, 1e-9)
+    lines = [
+        f"{'Would categorize' if args.dry_run else 'Categorized'} "
+        f"{len(result.changes)} of {result.rows} transactions with "
+        f"{len(rules)} rules in {result.seconds:.3f}s ({rate:,.0f} rows/sec)"
+    ]
+    width = max((len(category) for category in result.counts), default=0)
+    lines.extend(
+        f"{category:<{width}}  {count:>8}"
+        for category, count in result.counts.items()
+    )
+    return "\n".join(lines)
+
+
+def _folder_size(directory: "pathlib.Path") -> int:
+    """Bytes taken by the files of a folder.
+
+    :param directory: Folder to measure.
+    :type directory: pathlib.Path
+    :return: Sum of the file sizes, 0 if the folder does not exist.
+    :rtype: int
+    """
+    return sum(
+        filepath.stat().st_size
+        for filepath in directory.glob("*")
+        if filepath.is_file()
+    )
+
+
+@_locks_ledger
+def compact(args: "argparse.Namespace") -> str | None:
+    """Compact the ledger files, rebuilding the data derived from them.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Strings dropped, and the folder size before and after.
+    :rtype: str | None
+    """
+    from pfts import ledger
+    from pfts.ledger import dedup, rollups
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+    if book.saved is None:
+        return f"Compact failed: No ledger at {ledger_dir}"
+
+    before = _folder_size(ledger_dir)
+    dropped = book.compact()
+    book.save(ledger_dir, rewrite=True)
+    if dropped:
+        # Codes changed, so derived data is rebuilt rather than left stale.
+        if (ledger_dir / rollups.ROLLUPS_FILE).exists():
+            rollups.Rollups.load(ledger_dir, book).save(ledger_dir)
+        if (ledger_dir / dedup.INDEX_FILE).exists():
+            dedup.DedupIndex.load(ledger_dir, book).save(ledger_dir)
+
+    return (
+        f"Compacted {len(book)} transactions, dropped {dropped} unused "
+        f"strings: {before:,} -> {_folder_size(ledger_dir):,} bytes."
+    )
+
+
+def sql(args: "argparse.Namespace") -> str | None:
+    """Query a SQLite copy of the ledger, copying new rows to it first.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: The result rows, as a table or JSON.
+    :rtype: str | None
+    """
+    import json
+    import sqlite3
+
+    from pfts import ledger
+    from pfts.ledger import sqlstore
+
+    ledger_dir = args.ledger or ledger.DEFAULT_LEDGER_DIR
+    book = ledger.Ledger.load(ledger_dir)
+
+    with sqlstore.SqliteLedger(ledger_dir / sqlstore.SQLITE_FILE) as database:
+        database.sync(book)
+        try:
+            names, rows = database.query(args.query)
+        except sqlite3.Error as e:
+            logger.error(f"Query failed: {e}")
+            return f"SQL failed: {e}"
+
+    if args.format == "json":
+        return json.dumps([dict(zip(names, row)) for row in rows], indent=2)
+    return sqlstore.format_table(names, rows)
+
+
+def loan(args: "argparse.Namespace") -> str | None:
+    """Calculate loan payoffs, sweeps of them, or debt payoff strategies.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: The payoff summary, schedule, grid or comparison.
+    :rtype: str | None
+    """
+    from pfts import loans
+
+    try:
+        if args.loan == "compare":
+            debts = [loans.Debt(*spec) for spec in args.debt]
+            return loans.format_strategies(
+                loans.compare_strategies(debts, args.budget)
+            )
+
+        months = args.months or 12 * (args.years or 30)
+        if args.loan == "sweep":
+            results = loans.sweep(
+                args.principal, months, args.rate, args.extra
+            )
+            return loans.format_sweep(results, args.metric)
+
+        payment = loans.monthly_payment(args.principal, args.rate, months)
+        base = loans.payoff(args.principal, args.rate, payment)
+        result = loans.payoff(args.principal, args.rate, payment + args.extra)
+        if not args.schedule:
+            return loans.format_payoff(payment, base, args.extra, result)
+        plan = loans.schedule(args.principal, args.rate, payment + args.extra)
+    except ValueError as e:
+        logger.error(e)
+        return f"Loan failed: {e}"
+
+    if args.format == "json":
+        return loans.format_schedule_json(plan)
+    return loans.format_schedule(plan)
+
+
+def project(args: "argparse.Namespace") -> str | None:
+    """Project savings with Monte Carlo simulated market returns.
+
+    :param args: Arguments parsed by the pfts parser.
+    :type args: argparse.Namespace
+    :return: Percentiles of the projected balances, as a table or JSON.
+    :rtype: str | None
+    """
+    from pfts import projection
+
+    retire_after = (
+        args.years if args.retire_after is None else args.retire_after
+    )
+    params = projection.ProjectionParams(
+        args.years,
+        args.initial,
+        args.contribution,
+        args.withdrawal,
+        retire_after,
+        args.mean_return,
+        args.volatility,
+        args.inflation,
+    )
+
+    try:
+        result = projection.project(
+            params, args.paths, args.seed, args.workers, args.batch_size
+        )
+    except ValueError as e:
+        logger.error(e)
+        return f"Projection failed: {e}"
+
+    if args.format == "json":
+        return projection.format_json(result)
+    return projection.format_table(result)
+
+
+# pfts subcommand → handler taking the parsed arguments.
+PFTS_COMMANDS: dict[str, Callable[["argparse.Namespace"], str | None]] = {
+    "serve": serve,
+    "ledger": ledger_summary,
+    "balance": balance,
+    "edit": edit_transaction,
+    "import": import_statements,
+    "dedup": dedup_check,
+    "report": report,
+    "categorize": categorize,
+    "compact": compact,
+    "sql": sql,
+    "loan": loan,
+    "project": project,
+}
+
 
 def version_bump(arg_list: list | None = None) -> None:
     """Quality of life function to bump the version numbering.
@@ -155,14 +749,26 @@ def version_bump(arg_list: list | None = None) -> None:
     :param arg_list: CLI Iterface, defaults to None
     :type arg_list: list | None
     """
+    from pfts.util import general
+    from pfts.util.logging import setup_logging
+    from pfts.util.parsing import parse_input
 
     # Avoids list gotcha
     # None will result in sys.argv[1:]
-    args = parse_input(arg_list)
+    args = parse_input(arg_list, "version-bump")
 
     log_level = logging.DEBUG if args.dev else logging.WARNING
     setup_logging(log_level)
     logger.info(f"Successfully loaded in the following args: {args}")
 
-    new_version = general.bump_version(args.vbump)
+    from pfts.util.versioning import VersionSyncError
+
+    try:
+        new_version = general.bump_version(
+            args.vbump, pre=args.pre, build=args.build
+        )
+    except VersionSyncError as e:
+        logger.error(f"Version was not bumped, no file was changed: {e}")
+        return
+
     logger.info(f"New version is: {new_version}")
@@ -0,0 +1,250 @@
+"""Contains helpers for safely rewriting files on disk.
+
+Rewrites go to a temporary file in the same folder, which is flushed to
+disk and then swapped in with ``os.replace``. Readers therefore see either
+the old or the new file, never a half written one, even if the process
+dies mid-write. ``file_lock`` serializes writers across processes.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+from typing import IO, BinaryIO, Iterable, Iterator, TextIO
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+# os.umask can only be read by setting it, which is not thread safe, so
+# it is read once while the module is imported.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextlib.contextmanager
+def file_lock(filepath: pathlib.Path) -> Iterator[None]:
+    """Hold an exclusive, interprocess lock on a file.
+
+    The lock lives in a separate file in the temporary folder, so the
+    locked file itself can be missing or be replaced while it is held.
+
+    :param filepath: File to lock.
+    :type filepath: pathlib.Path
+    """
+    digest = hashlib.sha256(str(filepath.resolve()).encode("utf8"))
+    lock_path = pathlib.Path(tempfile.gettempdir()) / (
+        f"pfts-{digest.hexdigest()[:16]}.lock"
+    )
+
+    with open(lock_path, "a+b") as handle:
+        if sys.platform == "win32":
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def atomic_write(filepath: pathlib.Path) -> Iterator[TextIO]:
+    """Write a file through a temporary file that replaces it on success.
+
+    Line endings are written exactly as given. If the block raises, the
+    temporary file is removed and the original file is left untouched.
+
+    :param filepath: File to replace.
+    :type filepath: pathlib.Path
+    :return: Text stream to write the new content to.
+    :rtype: Iterator[TextIO]
+    """
+    fd, tmp_path = _create_temp(filepath)
+
+    try:
+        with open(fd, "w", encoding="utf8", newline="") as fout:
+            yield fout
+            _sync(fout, filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    _fsync_dir(filepath.parent)
+
+
+@contextlib.contextmanager
+def atomic_write_bytes(filepath: pathlib.Path) -> Iterator[BinaryIO]:
+    """Binary counterpart of atomic_write.
+
+    :param filepath: File to replace.
+    :type filepath: pathlib.Path
+    :return: Binary stream to write the new content to.
+    :rtype: Iterator[BinaryIO]
+    """
+    fd, tmp_path = _create_temp(filepath)
+
+    try:
+        with open(fd, "wb") as fout:
+            yield fout
+            _sync(fout, filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    _fsync_dir(filepath.parent)
+
+
+def write_temp(filepath: pathlib.Path, lines: Iterable[str]) -> pathlib.Path:
+    """Stream lines into a temporary file next to the file they will replace.
+
+    Use replace_all to move the temporary file into place.
+
+    :param filepath: File the temporary file will replace.
+    :type filepath: pathlib.Path
+    :param lines: New content of the file.
+    :type lines: Iterable[str]
+    :return: The temporary file, already flushed to disk.
+    :rtype: pathlib.Path
+    """
+    fd, tmp_path = _create_temp(filepath)
+
+    try:
+        with open(fd, "w", encoding="utf8", newline="") as fout:
+            fout.writelines(lines)
+            _sync(fout, filepath, tmp_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return tmp_path
+
+
+def replace_all(staged: list[tuple[pathlib.Path, pathlib.Path]]) -> None:
+    """Move temporary files over their targets, all or nothing.
+
+    Every target is backed up before it is replaced. If any replacement
+    fails, the targets already replaced are restored, targets that did not
+    exist are removed again, and the remaining temporary files are deleted.
+
+    :param staged: Pairs of temporary file and the file it replaces.
+    :type staged: list[tuple[pathlib.Path, pathlib.Path]]
+    """
+    done: list[tuple[pathlib.Path, pathlib.Path | None]] = []
+
+    try:
+        for tmp_path, filepath in staged:
+            backup = None
+            if filepath.exists():
+                fd, backup = _create_temp(filepath, ".bak")
+                os.close(fd)
+                shutil.copy2(filepath, backup)
+            done.append((filepath, backup))
+            os.replace(tmp_path, filepath)
+    except BaseException:
+        logger.error("Replacing files failed, restoring the originals.")
+        for filepath, backup in reversed(done):
+            if backup is not None:
+                os.replace(backup, filepath)
+            else:
+                filepath.unlink(missing_ok=True)
+        for tmp_path, _ in staged:
+            tmp_path.unlink(missing_ok=True)
+        raise
+
+    for filepath, backup in done:
+        if backup is not None:
+            backup.unlink()
+    for parent in {filepath.parent for _, filepath in staged}:
+        _fsync_dir(parent)
+
+
+def _create_temp(
+    filepath: pathlib.Path, suffix: str = ".tmp"
+) -> tuple[int, pathlib.Path]:
+    """Create a hidden temporary file in the same folder as a file.
+
+    Being on the same filesystem is what makes os.replace atomic.
+
+    :param filepath: File the temporary file belongs to.
+    :type filepath: pathlib.Path
+    :param suffix: Suffix of the temporary file, defaults to ".tmp"
+    :type suffix: str, optional
+    :return: Open descriptor and path of the temporary file.
+    :rtype: tuple[int, pathlib.Path]
+    """
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{filepath.name}.", suffix=suffix, dir=filepath.parent
+    )
+
+    return fd, pathlib.Path(tmp_name)
+
+
+def _sync(fout: IO, filepath: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    """Flush a temporary file to disk and give it the original's mode.
+
+    New files get the mode ``open`` would have given them, instead of the
+    0600 of temporary files.
+
+    :param fout: Open stream of the temporary file.
+    :type fout: IO
+    :param filepath: File the temporary file will replace.
+    :type filepath: pathlib.Path
+    :param tmp_path: Path of the temporary file.
+    :type tmp_path: pathlib.Path
+    """
+    fout.flush()
+    os.fsync(fout.fileno())
+
+    if filepath.exists():
+        shutil.copymode(filepath, tmp_path)
+    else:
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+
+
+def _fsync_dir(dirpath: pathlib.Path) -> None:
+    """Flush a folder's entries, so a rename survives a crash.
+
+    :param dirpath: Folder to flush.
+    :type dirpath: pathlib.Path
+    """
+    if sys.platform == "win32":
+        # Windows cannot open folders as files, NTFS journals renames.
+        return
+
+    fd = os.open(dirpath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def iter_lines(filepath: pathlib.Path) -> Iterator[str]:
+    """Stream the lines of a text file, keeping their line endings.
+
+    :param filepath: File to read.
+    :type filepath: pathlib.Path
+    :return: Lines of the file, nothing if it does not exist.
+    :rtype: Iterator[str]
+    """
+    try:
+        fin = open(filepath, "r", encoding="utf8", newline="")
+    except FileNotFoundError:
+        logger.error(f"Could not find file at {filepath.resolve()}!")
+        return
+
+    with fin:
+        yield from fin
@@ -4,7 +4,7 @@ import logging.config
 import pathlib
 
 import pfts
-from pfts.util import parsing
+from pfts.util import files, versioning
 from pfts.util.logging import log_context
 
 logger = logging.getLogger(__name__)
@@ -22,58 +22,47 @@ def return_true() -> bool:
 
 
 @log_context
-def bump_version(part: str, testing_mode: bool = False) -> str:
-    """Increments either the major, minor, or patch version of the pfts module.
+def bump_version(
+    part: str,
+    testing_mode: bool = False,
+    pre: str | None = None,
+    build: str | None = None,
+) -> str:
+    """Increments the version of the pfts module, in every file holding it.
+
+    The files in versioning.DEFAULT_TARGETS are rewritten together: either
+    all of them get the new version, or none do. In testing mode only the
+    mock init file is bumped.
 
     :param part: Which part of the version to increment.
     :type part: str
     :param testing_mode: Whether to run in debug mode or not, defaults to False
     :type testing_mode: bool, optional
+    :param pre: Pre-release segment of the new version, defaults to None
+    :type pre: str | None, optional
+    :param build: Build metadata of the new version, defaults to None
+    :type build: str | None, optional
     :return: If debugging, return new version info. Otherwise return nothing.
     :rtype: str|None
     """
     part = part.lower()
-    if part not in ["major", "minor", "patch"]:
+    if part not in versioning.VERSION_PARTS:
         version = pfts.__version__
         logger.error(f"Unknown part: {part}. Version is still: {version}")
         return version
 
-    real_init = pathlib.Path("pfts") / "__init__.py"
     mock_init = pathlib.Path("tests/data/mock_init.txt")
 
-    version_file = real_init if not testing_mode else mock_init
-
-    # Will only change __version__ information of the file.
-    # Everything else will stay the same in the same order.
-    # Parsing file is to ensure that __version__ can be anywhere in the file
-    version_index = parsing.parse_init_file(version_file)
-
-    # If something went wrong with the parsing, default the version
-    if version_index == -1:
-        file_information = []
-        version_info = "__version__ = '0.0.0'"
+    if testing_mode:
+        targets = [
+            versioning.VersionTarget(mock_init, versioning.PythonLocator())
+        ]
     else:
-        with open(version_file, "r") as fin:
-            file_information = fin.readlines()
-
-            # ___version__ = 'x.x.x' <- Line format
-            version_info = file_information[version_index]
-
-    v_dict = split_version_line(version_info)
-    v_dict[part] += 1
-
-    new_version = f"{v_dict['major']}.{v_dict['minor']}.{v_dict['patch']}"
+        targets = versioning.DEFAULT_TARGETS
 
-    new_line = f"__version__ = '{new_version}'\n"
+    _, new_version = versioning.VersionSync(targets).bump(part, pre, build)
 
-    logger.info(
-        f"Old version: {version_info.strip()}; "
-        f"New_Version: {new_version.strip()}"
-    )
-
-    insert_into_file(version_file, new_line, file_information, version_index)
-
-    return new_version
+    return str(new_version)
 
 
 @log_context
@@ -82,17 +71,21 @@ def split_version_line(version: str) -> dict[str, int]:
 
     __version__ = 'X.Y.Z' → {major: X, minor: Y, patch: Z}
 
+    Pre-release and build segments are ignored, versioning.Version.parse
+    keeps them.
+
     :param version: Line containing the version definition.
     :type version: str
     :return: Version dictionary split by major, minor and patch parts.
     :rtype: dict[str, int]
     """
-    major, minor, patch = [
-        int(x)
-        for x in version.split("=")[1].strip().strip('"').strip("'").split(".")
-    ]
+    parsed = versioning.Version.parse(version.split("=")[1])
 
-    v_dict = {"major": major, "minor": minor, "patch": patch}
+    v_dict = {
+        "major": parsed.major,
+        "minor": parsed.minor,
+        "patch": parsed.patch,
+    }
 
     return v_dict
 
@@ -106,6 +99,9 @@ def insert_into_file(
 ) -> None:
     """Take a line and insert it into a file.
 
+    The file is replaced atomically, under a file lock, so a crash never
+    leaves it truncated.
+
     :param filepath: Location of the file to work with.
     :type filepath: pathlib.Path
     :param insert_portion: The line being inserted.
@@ -121,5 +117,5 @@ def insert_into_file(
     else:
         rest_of_file[insert_index] = insert_portion
 
-    with open(filepath, "w") as fout:
+    with files.file_lock(filepath), files.atomic_write(filepath) as fout:
         fout.writelines(rest_of_file)
@@ -1,13 +1,25 @@
 """Contains functions in relation to logging."""
 
+import atexit
+import copy
 import functools
+import json
 import logging.config
+import logging.handlers
 import pathlib
-from typing import Callable
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+from pfts.util import profiling
 
 logger = logging.getLogger(__name__)
 
-CUSTOM_LOG_CONFIG = {
+# Listener serving the root handlers when setup_logging uses a queue.
+_queue_listener: logging.handlers.QueueListener | None = None
+
+CUSTOM_LOG_CONFIG: dict[str, Any] = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
@@ -18,6 +30,9 @@ CUSTOM_LOG_CONFIG = {
         "log_stream": {
             "format": "%(levelname)s - %(name)s - %(lineno)d - %(message)s"
         },
+        "log_json": {
+            "()": "pfts.util.logging.JsonLinesFormatter",
+        },
     },
     "handlers": {
         "debug_file_handler": {
@@ -45,12 +60,311 @@ CUSTOM_LOG_CONFIG = {
     },
 }
 
+# Replaces debug_file_handler when setup_logging is asked for JSON logs.
+JSON_FILE_HANDLER = {
+    "class": "pfts.util.logging.BatchedJsonLinesHandler",
+    "level": logging.DEBUG,
+    "formatter": "log_json",
+    "filename": "./logs/app.jsonl",
+    "maxBytes": 100_485_760,
+    "backupCount": 3,
+    "encoding": "utf8",
+    "capacity": 512,
+    "flush_interval": 1.0,
+}
+
+LOG_FORMATS = ("text", "json")
+
+# Limits on log_context tracing, applied by setup_logging.
+# "default" applies to every traced function without its own entry, and
+# "functions" is keyed by qualified name, e.g.
+# "pfts.util.general.split_version_line": {"sample_every": 100}
+# Each entry may set sample_every (trace 1 in N calls), and rate plus burst
+# (token bucket of traces per second). None means no limits.
+TRACE_LIMITS: dict[str, Any] = {
+    "default": None,
+    "functions": {},
+}
+
+# Active limiters by qualified function name, filled by setup_logging.
+_trace_limiters: dict[str, "TraceLimiter"] = {}
+_default_trace_limit: dict[str, Any] | None = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as a single compact JSON object.
+
+    Records emitted by log_context also carry the traced function, its call
+    signature and, on return, how long the call took in nanoseconds.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialise the record to one line of JSON.
+
+        :param record: Record to format.
+        :type record: logging.LogRecord
+        :return: JSON object without a trailing newline.
+        :rtype: str
+        """
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "line": record.lineno,
+            "function": getattr(record, "pfts_function", record.funcName),
+            "msg": record.getMessage(),
+        }
+
+        signature = getattr(record, "pfts_signature", None)
+        if signature is not None:
+            entry["signature"] = str(signature)
+
+        duration_ns = getattr(record, "pfts_duration_ns", None)
+        if duration_ns is not None:
+            entry["duration_ns"] = duration_ns
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+class BatchedJsonLinesHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that writes formatted records in batches.
+
+    Records are buffered and written with a single write call once capacity
+    records are waiting, or at most flush_interval seconds after the first
+    of them arrived: a timer thread, started with each batch, writes it out
+    even if no other record follows. Anything left over is written when the
+    handler is flushed or closed.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        capacity: int = 512,
+        flush_interval: float = 1.0,
+        **kwargs,
+    ) -> None:
+        """Create the handler.
+
+        :param filename: File to write JSON lines to.
+        :type filename: str
+        :param capacity: Records to buffer before writing, defaults to 512
+        :type capacity: int, optional
+        :param flush_interval: Seconds between writes, defaults to 1.0
+        :type flush_interval: float, optional
+        """
+        super().__init__(filename, **kwargs)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._timer: threading.Timer | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Format the record and add it to the current batch.
+
+        :param record: Record to buffer.
+        :type record: logging.LogRecord
+        """
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+
+        if (
+            len(self.buffer) >= self.capacity
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Write every buffered record, rotating the file first if needed."""
+        with self.lock:  # type: ignore[union-attr]
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.buffer:
+                return
+
+            data = "\n".join(self.buffer) + "\n"
+            self.buffer.clear()
+
+            if self.stream is None:
+                self.stream = self._open()
+            if (
+                self.maxBytes > 0
+                and self.stream.tell() + len(data) >= self.maxBytes
+            ):
+                self.doRollover()
+
+            self.stream.write(data)
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Write out any remaining records before closing the file."""
+        try:
+            self.flush()
+        finally:
+            super().close()
+
+
+class TraceLimiter:
+    """Decides which calls of a log_context function get traced.
+
+    Combines 1 in N sampling with a token bucket. Suppressed calls are
+    counted, and reported in a single summary record once tracing resumes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sample_every: int = 1,
+        rate: float | None = None,
+        burst: float | None = None,
+    ) -> None:
+        """Create the limiter.
+
+        :param name: Qualified name of the traced function.
+        :type name: str
+        :param sample_every: Trace one call in every N, defaults to 1
+        :type sample_every: int, optional
+        :param rate: Traces allowed per second, defaults to None (unlimited)
+        :type rate: float | None, optional
+        :param burst: Bucket size, defaults to max(rate, 1)
+        :type burst: float | None, optional
+        :raises ValueError: If sample_every or rate are not positive.
+        """
+        if sample_every < 1:
+            raise ValueError(f"sample_every must be >= 1, got {sample_every}")
+        if rate is not None and rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+
+        self.name = name
+        self.sample_every = sample_every
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1, 1)
+        self.tokens = self.burst
+        self.calls = 0
+        self.suppressed = 0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Count a call and say whether it should be traced.
+
+        :return: True if the call should be traced.
+        :rtype: bool
+        """
+        with self._lock:
+            self.calls += 1
+            allowed = (self.calls - 1) % self.sample_every == 0
+
+            if allowed and self.rate is not None:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst,
+                    self.tokens + (now - self._last_refill) * self.rate,
+                )
+                self._last_refill = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                else:
+                    allowed = False
+
+            if not allowed:
+                self.suppressed += 1
+                return False
+
+        self.flush_summary()
+        return True
+
+    def flush_summary(self) -> None:
+        """Log how many calls were suppressed since the last summary."""
+        with self._lock:
+            suppressed, self.suppressed = self.suppressed, 0
+
+        if suppressed:
+            logger.debug(
+                "Suppressed tracing of %d calls to %s",
+                suppressed,
+                self.name,
+                extra={"pfts_function": self.name},
+            )
+
+
+def configure_trace_limits(trace_limits: dict[str, Any]) -> None:
+    """Replace the active log_context trace limits.
+
+    :param trace_limits: Limits laid out like TRACE_LIMITS.
+    :type trace_limits: dict[str, Any]
+    """
+    global _default_trace_limit
+
+    flush_trace_summaries()
+    _trace_limiters.clear()
+
+    _default_trace_limit = trace_limits.get("default")
+    for name, limits in trace_limits.get("functions", {}).items():
+        _trace_limiters[name] = TraceLimiter(name, **limits)
+
+
+def flush_trace_summaries() -> None:
+    """Emit the pending suppressed call summary of every limiter."""
+    for limiter in list(_trace_limiters.values()):
+        limiter.flush_summary()
+
+
+def _get_trace_limiter(name: str) -> TraceLimiter | None:
+    """Find the limiter for a function, creating it from the default.
+
+    :param name: Qualified name of the traced function.
+    :type name: str
+    :return: The limiter, or None if the function is not limited.
+    :rtype: TraceLimiter | None
+    """
+    limiter = _trace_limiters.get(name)
+    if limiter is None and _default_trace_limit is not None:
+        limiter = _trace_limiters.setdefault(
+            name, TraceLimiter(name, **_default_trace_limit)
+        )
+
+    return limiter
+
+
+class _LazySignature:
+    """Defers building a call signature until a log record is formatted."""
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, args: tuple, kwargs: dict) -> None:
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        args_repr = [repr(a) for a in self.args]
+        kwargs_repr = [f"{k}={v!r}" for k, v in self.kwargs.items()]
+        return ", ".join(args_repr + kwargs_repr)
+
 
 # Context: https://ankitbko.github.io/blog/2021/04/logging-in-python/
 def log_context(_func: Callable) -> Callable:
     """Creates a standard logging format.
 
     Will denote function signature, and if it raises an error.
+    Debug tracing is skipped entirely when the logger is not enabled for
+    DEBUG, and argument formatting is deferred until a record is emitted.
+    While the shared profiler is active, every call's wall and CPU time is
+    recorded against the function in the profiling registry. Tracing can be
+    sampled or rate limited per function through TRACE_LIMITS.
 
     :param func: Function to be logged.
     :type func: Callable
@@ -59,47 +373,179 @@ def log_context(_func: Callable) -> Callable:
     """
 
     def decorator_log(func):
+        name = func.__name__
+        is_enabled_for = logger.isEnabledFor
+        debug = logging.DEBUG
+        qualified_name = f"{func.__module__}.{func.__qualname__}"
+        profiler = profiling.PROFILER
+        stats = profiler.stats_for(qualified_name)
+
         # Allows the wrapped function to maintain its properties.
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            args_repr = [repr(a) for a in args]
-            kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]
-            signature = ", ".join(args_repr + kwargs_repr)
-            logger.debug(
-                f"Function {func.__name__} called with args {signature}"
-            )
+            tracing = is_enabled_for(debug)
+
+            if tracing and (_trace_limiters or _default_trace_limit):
+                limiter = _get_trace_limiter(qualified_name)
+                if limiter is not None:
+                    tracing = limiter.allow()
+
+            if not tracing and not profiler.active:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    logger.exception(
+                        "Exception raised in %s. Exception: %s", name, e
+                    )
+                    raise e
+
+            if tracing:
+                signature = _LazySignature(args, kwargs)
+                logger.debug(
+                    "Function %s called with args %s",
+                    name,
+                    signature,
+                    extra={"pfts_function": name, "pfts_signature": signature},
+                )
+
+            returned_val = None
+            cpu_start = time.process_time_ns()
+            start = time.perf_counter_ns()
             try:
                 returned_val = func(*args, **kwargs)
                 return returned_val
             except Exception as e:
                 logger.exception(
-                    f"Exception raised in {func.__name__}. Exception: {str(e)}"
+                    "Exception raised in %s. Exception: %s", name, e
                 )
-                returned_val = None
                 raise e
             finally:
-                logger.debug(
-                    f"Function {func.__name__} returned: {returned_val}"
-                )
+                duration_ns = time.perf_counter_ns() - start
+                if profiler.active:
+                    stats.add(duration_ns, time.process_time_ns() - cpu_start)
+
+                if tracing:
+                    logger.debug(
+                        "Function %s returned: %s",
+                        name,
+                        returned_val,
+                        extra={
+                            "pfts_function": name,
+                            "pfts_duration_ns": duration_ns,
+                        },
+                    )
 
         return wrapper
 
     return decorator_log(_func)
 
 
-def setup_logging(log_level=0) -> None:
+def setup_logging(
+    log_level=0,
+    use_queue: bool = False,
+    log_format: str = "text",
+    trace_limits: dict[str, Any] | None = None,
+) -> None:
     """Setup logging configuration, reading in from log cfg file if possible.
 
     :param log_level: Specify the level logs that are required, defaults to 0
     :type log_level: int, optional
+    :param use_queue: Move file and console output onto a background thread,
+        defaults to False
+    :type use_queue: bool, optional
+    :param log_format: "text" for logs/app.log, or "json" for batched JSON
+        lines in logs/app.jsonl, defaults to "text"
+    :type log_format: str, optional
+    :param trace_limits: Sampling and rate limits for log_context tracing,
+        defaults to TRACE_LIMITS
+    :type trace_limits: dict[str, Any] | None, optional
+    :raises ValueError: If log_format is not one of LOG_FORMATS.
     """
+    if log_format not in LOG_FORMATS:
+        raise ValueError(
+            f"Unknown log format: {log_format}. Expected one of {LOG_FORMATS}"
+        )
+
     generate_log_location()
 
-    logging.config.dictConfig(CUSTOM_LOG_CONFIG)
+    # Listener threads hold on to the old handlers, which dictConfig closes.
+    stop_logging_queue()
+
+    log_config = CUSTOM_LOG_CONFIG
+    if log_format == "json":
+        log_config = copy.deepcopy(CUSTOM_LOG_CONFIG)
+        log_config["handlers"]["debug_file_handler"] = JSON_FILE_HANDLER
+
+    logging.config.dictConfig(log_config)
+
+    if use_queue:
+        start_logging_queue()
+
+    configure_trace_limits(
+        trace_limits if trace_limits is not None else TRACE_LIMITS
+    )
+
     logger.setLevel(log_level)
     logger.info("Successfully loaded in logging configs.")
 
 
+def start_logging_queue() -> logging.handlers.QueueListener:
+    """Swap the root handlers for a QueueHandler served by a QueueListener.
+
+    Callers only pay for putting a record on the queue, while the configured
+    handlers do their disk and console I/O on the listener's thread.
+
+    :return: The listener now serving the root handlers.
+    :rtype: logging.handlers.QueueListener
+    """
+    global _queue_listener
+
+    stop_logging_queue()
+
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
+
+    return _queue_listener
+
+
+def stop_logging_queue() -> None:
+    """Drain the logging queue, flush its handlers, and stop the listener.
+
+    The root logger gets its handlers back in place of the QueueHandler,
+    so records logged afterwards are still written. Does nothing if the
+    queue is not running.
+    """
+    global _queue_listener
+
+    if _queue_listener is None:
+        return
+
+    listener, _queue_listener = _queue_listener, None
+    listener.stop()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if (
+            isinstance(handler, logging.handlers.QueueHandler)
+            and handler.queue is listener.queue
+        ):
+            root.removeHandler(handler)
+
+    for handler in listener.handlers:
+        handler.flush()
+        root.addHandler(handler)
+
+
 def generate_log_location(log_path: pathlib.Path | None = None) -> None:
     """If logs folder doesn't exist, then create it."""
 
@@ -135,3 +581,9 @@ def process_logging(logger: logging.Logger, retcode: int, name: str) -> bool:
         rtn_status = True
 
     return rtn_status
+
+
+# Runs before logging's own shutdown hook, so queued records are not lost.
+atexit.register(stop_logging_queue)
+# Registered last so it runs first, while the queue is still being served.
+atexit.register(flush_trace_summaries)
@@ -3,60 +3,822 @@ Contains functions that will handle different forms of parsing.
 """
 
 import argparse
+import datetime
+import functools
 import logging
+import math
+import mmap
+import os
 import pathlib
 import sys
+from typing import BinaryIO, Callable, Iterable
 
 from pfts.util.logging import log_context
+from pfts.util.profiling import PROFILE_FORMATS
 
 logger = logging.getLogger(__name__)
 
+VERSION_TOKEN = b"__version__"
+# Newlines are counted in slices of this size, to bound the memory used.
+COUNT_CHUNK_SIZE = 1 << 20
 
-def parse_input(arg_list: list | None = None) -> argparse.Namespace:
-    """Parses inputs from command line, and creates a namespace for them.
 
-    :param arg_list: CMD-styled inputs of strings, defaults to sys.argv[1:]
-    :type arg_list: list
+def add_dev_argument(parser: argparse.ArgumentParser) -> None:
+    """Enable dev mode for more robust logging.
 
-    :return: Namespace that contains all parsed inputs for the given arguements
-    :rtype: argparse.Namespace
+    :param parser: Parser to add the argument to.
+    :type parser: argparse.ArgumentParser
     """
-    if arg_list is None:
-        arg_list = sys.argv[1:]
-
-    parser = argparse.ArgumentParser(
-        description="Parse inputs from Command Line."
-    )
-
-    # Enable dev mode for more robust logging
     parser.add_argument(
         "--dev", action="store_true", help="Enables developer mode."
     )
+
+
+def add_vbump_argument(parser: argparse.ArgumentParser) -> None:
+    """Select which part of the version to bump.
+
+    :param parser: Parser to add the argument to.
+    :type parser: argparse.ArgumentParser
+    """
     parser.add_argument(
         "-v",
         "--vbump",
         nargs="?",  # 0/1 arguements
         const="patch",  # The default if there are 0 args
-        help="Increase any portion of the version.",
+        help="Increase any portion of the version: major, minor, patch or "
+        "pre.",
     )
 
+
+def add_disablecov_argument(parser: argparse.ArgumentParser) -> None:
+    """Allow coverage reports to be skipped.
+
+    :param parser: Parser to add the argument to.
+    :type parser: argparse.ArgumentParser
+    """
     parser.add_argument(
         "--disablecov",
         action="store_true",
         help="Disables coverage report generation.",
     )
 
-    args = parser.parse_args(arg_list)
 
-    logger.info(f"Args read in from CLI are: {args}")
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """Allow log_context timings to be dumped on exit.
+
+    :param parser: Parser to add the argument to.
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument(
+        "--profile",
+        nargs="?",  # 0/1 arguements
+        const="table",  # The default if there are 0 args
+        choices=PROFILE_FORMATS,
+        help="Time log_context functions and dump the results on exit.",
+    )
+
+
+def add_ledger_argument(parser: argparse.ArgumentParser) -> None:
+    """Select the ledger a command works on.
+
+    :param parser: Parser to add the argument to.
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument(
+        "--ledger",
+        type=pathlib.Path,
+        help="Ledger folder, defaults to ~/.pfts/ledger.",
+    )
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Allow a command to only look at some of the transactions.
+
+    :param parser: Parser to add the arguments to.
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument(
+        "--since",
+        type=datetime.date.fromisoformat,
+        help="First date to include, as YYYY-MM-DD.",
+    )
+    parser.add_argument(
+        "--until",
+        type=datetime.date.fromisoformat,
+        help="Last date to include, as YYYY-MM-DD.",
+    )
+    parser.add_argument(
+        "--account",
+        action="append",
+        help="Only include this account. Can be repeated.",
+    )
+    parser.add_argument(
+        "--category",
+        action="append",
+        help="Only include this category. Can be repeated.",
+    )
+
+
+def positive_int(text: str) -> int:
+    """Argument type for counts that must be at least 1.
+
+    :param text: Argument as given.
+    :type text: str
+    :raises argparse.ArgumentTypeError: If it is not a positive integer.
+    :return: The count.
+    :rtype: int
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{text!r} is not a positive integer")
+    return value
+
+
+def non_negative_int(text: str) -> int:
+    """Argument type for counts that may be 0.
+
+    :param text: Argument as given.
+    :type text: str
+    :raises argparse.ArgumentTypeError: If it is not an integer of 0 or more.
+    :return: The count.
+    :rtype: int
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise argparse.ArgumentTypeError(
+            f"{text!r} is not a non-negative integer"
+        )
+    return value
+
+
+def non_negative_float(text: str) -> float:
+    """Argument type for amounts that may be 0 but not below.
+
+    :param text: Argument as given.
+    :type text: str
+    :raises argparse.ArgumentTypeError: If it is not a number of 0 or more.
+    :return: The amount.
+    :rtype: float
+    """
+    try:
+        value = float(text)
+    except ValueError:
+        value = math.nan
+    if not value >= 0:
+        raise argparse.ArgumentTypeError(
+            f"{text!r} is not a non-negative number"
+        )
+    return value
+
+
+def add_dedup_arguments(parser: argparse.ArgumentParser) -> None:
+    """Tune how transactions already in the ledger are recognized.
+
+    :param parser: Parser to add the arguments to.
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument(
+        "--window",
+        type=positive_int,
+        help="Days apart two postings of a transaction may be, defaults to 3.",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        help="How alike, from 0 to 1, the descriptions of a transaction "
+        "posted on different days must be, defaults to 0.5.",
+    )
+
+
+def float_range(text: str) -> list[float]:
+    """Argument type for an inclusive range of numbers, e.g. "0.03:0.06:0.01".
+
+    A single number is a range of one.
+
+    :param text: Argument as given, START:STOP:STEP or a number.
+    :type text: str
+    :raises argparse.ArgumentTypeError: If it is not a valid range.
+    :return: Numbers from START to STOP, STEP apart.
+    :rtype: list[float]
+    """
+    try:
+        parts = [float(part) for part in text.split(":")]
+    except ValueError:
+        parts = []
+    if len(parts) == 1:
+        return parts
+    if len(parts) != 3 or parts[2] <= 0 or parts[1] < parts[0]:
+        raise argparse.ArgumentTypeError(
+            f"{text!r} is not a number or a START:STOP:STEP range"
+        )
+
+    start, stop, step = parts
+    count = int((stop - start) / step + 1e-9) + 1
+    return [round(start + step * index, 12) for index in range(count)]
+
+
+def debt_spec(text: str) -> tuple[str, float, float, float]:
+    """Argument type for a debt, as NAME:BALANCE:RATE:MINIMUM.
+
+    :param text: Argument as given, e.g. "card:4500:0.24:90".
+    :type text: str
+    :raises argparse.ArgumentTypeError: If it is not a valid debt.
+    :return: Name, balance, annual rate and minimum payment.
+    :rtype: tuple[str, float, float, float]
+    """
+    name, _, numbers = text.partition(":")
+    try:
+        balance, rate, minimum = (float(part) for part in numbers.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"{text!r} is not a NAME:BALANCE:RATE:MINIMUM debt"
+        ) from None
+    return name, balance, rate, minimum
+
+
+def add_loan_arguments(parser: argparse.ArgumentParser) -> None:
+    """Describe a single loan.
+
+    :param parser: Parser to add the arguments to.
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument(
+        "--principal", type=float, required=True, help="Amount borrowed."
+    )
+    parser.add_argument(
+        "--years",
+        type=positive_int,
+        help="Term of the loan in years, defaults to 30.",
+    )
+    parser.add_argument(
+        "--months",
+        type=positive_int,
+        help="Term of the loan in months, instead of --years.",
+    )
+
+
+def build_shared_parser() -> argparse.ArgumentParser:
+    """Parser accepting every flag, for callers that do not name a command.
+
+    :return: Parser with the flags of every tool.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        description="Parse inputs from Command Line."
+    )
+    add_dev_argument(parser)
+    add_vbump_argument(parser)
+    add_disablecov_argument(parser)
+    add_profile_argument(parser)
+
+    return parser
+
+
+def build_pfts_parser() -> argparse.ArgumentParser:
+    """Parser for the general pfts command line.
+
+    :return: Parser for the pfts console script.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="pfts", description="Patten's Financial Tool Suite."
+    )
+    add_dev_argument(parser)
+    add_profile_argument(parser)
+
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep pfts running and answer commands."
+    )
+    serve_parser.add_argument(
+        "--socket",
+        help="Unix socket to listen on. Reads commands from stdin if unset.",
+    )
+
+    ledger_parser = subparsers.add_parser(
+        "ledger", help="Summarize the transactions in the ledger."
+    )
+    add_ledger_argument(ledger_parser)
+    add_filter_arguments(ledger_parser)
+    ledger_parser.add_argument(
+        "--by",
+        choices=["account", "category", "month"],
+        help="Also total the transactions per group.",
+    )
+
+    balance_parser = subparsers.add_parser(
+        "balance", help="Show the running balance of accounts."
+    )
+    add_ledger_argument(balance_parser)
+    balance_parser.add_argument(
+        "--account",
+        action="append",
+        help="Only show this account. Can be repeated.",
+    )
+    balance_parser.add_argument(
+        "--as-of",
+        type=datetime.date.fromisoformat,
+        help="Balance at the end of this day, as YYYY-MM-DD.",
+    )
+
+    edit_parser = subparsers.add_parser(
+        "edit", help="Change a transaction already in the ledger."
+    )
+    add_ledger_argument(edit_parser)
+    edit_parser.add_argument(
+        "row", type=int, help="Row of the transaction, counted from 0."
+    )
+    edit_parser.add_argument(
+        "--date",
+        type=datetime.date.fromisoformat,
+        help="New date, as YYYY-MM-DD.",
+    )
+    edit_parser.add_argument("--amount", help="New amount, e.g. -12.34.")
+    edit_parser.add_argument("--account", help="New account.")
+    edit_parser.add_argument("--category", help="New category.")
+    edit_parser.add_argument("--description", help="New description.")
+
+    import_parser = subparsers.add_parser(
+        "import", help="Import CSV or OFX/QFX bank statements."
+    )
+    add_ledger_argument(import_parser)
+    import_parser.add_argument(
+        "statements", nargs="+", type=pathlib.Path, help="Files to import."
+    )
+    import_parser.add_argument(
+        "--account",
+        help="Account for transactions whose statement does not name one. "
+        "Duplicates are only found within an account, so it is required "
+        "for such statements unless --keep-duplicates is given, which "
+        "defaults it to the statement's file name.",
+    )
+    import_parser.add_argument(
+        "--format",
+        choices=["csv", "ofx"],
+        help="Statement format, detected per file if unset.",
+    )
+    import_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes parsing statements in parallel.",
+    )
+    add_dedup_arguments(import_parser)
+    import_parser.add_argument(
+        "--keep-duplicates",
+        action="store_true",
+        help="Import transactions already in the ledger again.",
+    )
+
+    dedup_parser = subparsers.add_parser(
+        "dedup",
+        help="Refresh the duplicate index, and check statements against it.",
+    )
+    add_ledger_argument(dedup_parser)
+    dedup_parser.add_argument(
+        "statements",
+        nargs="*",
+        type=pathlib.Path,
+        help="Statements to check, without importing them.",
+    )
+    dedup_parser.add_argument(
+        "--account",
+        help="Account for transactions whose statement does not name one. "
+        "Required for such statements.",
+    )
+    dedup_parser.add_argument(
+        "--format",
+        choices=["csv", "ofx"],
+        help="Statement format, detected per file if unset.",
+    )
+    add_dedup_arguments(dedup_parser)
+    dedup_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Index the whole ledger again instead of loading the index.",
+    )
+
+    report_parser = subparsers.add_parser(
+        "report", help="Report on the transactions in the ledger."
+    )
+    reports = report_parser.add_subparsers(
+        dest="report", metavar="report", required=True
+    )
+    budget_parser = reports.add_parser(
+        "budget", help="Compare monthly category budgets to actual spend."
+    )
+    add_ledger_argument(budget_parser)
+    add_filter_arguments(budget_parser)
+    budget_parser.add_argument(
+        "--budget",
+        type=pathlib.Path,
+        help="JSON object of monthly budget by category, defaults to "
+        "budget.json in the ledger folder.",
+    )
+    budget_parser.add_argument(
+        "--format",
+        choices=["table", "json"],
+        default="table",
+        help="Output format.",
+    )
+
+    categorize_parser = subparsers.add_parser(
+        "categorize",
+        help="Categorize transactions whose description matches a rule.",
+    )
+    add_ledger_argument(categorize_parser)
+    categorize_parser.add_argument(
+        "--rules",
+        type=pathlib.Path,
+        help="JSON list of rules, defaults to rules.json in the ledger "
+        "folder.",
+    )
+    categorize_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Categorize transactions that already have a category too.",
+    )
+    categorize_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would change without changing the ledger.",
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact",
+        help="Rewrite the ledger files, dropping strings no row uses.",
+    )
+    add_ledger_argument(compact_parser)
+
+    sql_parser = subparsers.add_parser(
+        "sql",
+        help="Run a read-only SQL query over a SQLite copy of the ledger.",
+    )
+    add_ledger_argument(sql_parser)
+    sql_parser.add_argument(
+        "query",
+        help="SQL query over the transactions table, e.g. "
+        '"SELECT account, sum(amount) FROM transactions GROUP BY account".',
+    )
+    sql_parser.add_argument(
+        "--format",
+        choices=["table", "json"],
+        default="table",
+        help="Output format.",
+    )
+
+    loan_parser = subparsers.add_parser(
+        "loan", help="Calculate loan payments, payoffs and schedules."
+    )
+    loans = loan_parser.add_subparsers(
+        dest="loan", metavar="loan", required=True
+    )
+    payoff_parser = loans.add_parser(
+        "payoff",
+        help="Payment and interest of a loan, and what paying extra saves.",
+    )
+    add_loan_arguments(payoff_parser)
+    payoff_parser.add_argument(
+        "--rate",
+        type=float,
+        required=True,
+        help="Annual interest rate, e.g. 0.05.",
+    )
+    payoff_parser.add_argument(
+        "--extra",
+        type=float,
+        default=0.0,
+        help="Paid on top of the monthly payment.",
+    )
+    payoff_parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help="Show the payments month by month.",
+    )
+    payoff_parser.add_argument(
+        "--format",
+        choices=["table", "json"],
+        default="table",
+        help="Output format of the schedule.",
+    )
+
+    sweep_parser = loans.add_parser(
+        "sweep",
+        help="Compare payoffs over a grid of rates and extra payments.",
+    )
+    add_loan_arguments(sweep_parser)
+    sweep_parser.add_argument(
+        "--rate",
+        type=float_range,
+        required=True,
+        help="Annual interest rate, or a START:STOP:STEP range of them.",
+    )
+    sweep_parser.add_argument(
+        "--extra",
+        type=float_range,
+        default=[0.0],
+        help="Extra monthly payment, or a START:STOP:STEP range of them.",
+    )
+    sweep_parser.add_argument(
+        "--metric",
+        choices=["interest", "months"],
+        default="interest",
+        help="What each cell of the grid shows.",
+    )
+
+    compare_parser = loans.add_parser(
+        "compare",
+        help="Compare paying off several debts avalanche and snowball style.",
+    )
+    compare_parser.add_argument(
+        "--debt",
+        type=debt_spec,
+        action="append",
+        required=True,
+        help="Debt as NAME:BALANCE:RATE:MINIMUM, e.g. card:4500:0.24:90. "
+        "Can be repeated.",
+    )
+    compare_parser.add_argument(
+        "--budget",
+        type=float,
+        required=True,
+        help="Paid towards the debts every month.",
+    )
+
+    project_parser = subparsers.add_parser(
+        "project",
+        help="Project savings with Monte Carlo simulated market returns.",
+        description="Amounts are per year in today's money; contributions "
+        "and withdrawals grow with inflation.",
+    )
+    project_parser.add_argument(
+        "--years",
+        type=positive_int,
+        default=40,
+        help="Years to project.",
+    )
+    project_parser.add_argument(
+        "--paths",
+        type=positive_int,
+        default=100_000,
+        help="Simulated paths.",
+    )
+    project_parser.add_argument(
+        "--initial", type=float, default=0.0, help="Starting balance."
+    )
+    project_parser.add_argument(
+        "--contribution",
+        type=float,
+        default=0.0,
+        help="Saved each year until retirement.",
+    )
+    project_parser.add_argument(
+        "--withdrawal",
+        type=float,
+        default=0.0,
+        help="Spent each year after retirement.",
+    )
+    project_parser.add_argument(
+        "--retire-after",
+        type=non_negative_int,
+        help="Years until retirement, defaults to the whole projection.",
+    )
+    project_parser.add_argument(
+        "--return",
+        dest="mean_return",
+        type=float,
+        default=0.07,
+        help="Mean annual return.",
+    )
+    project_parser.add_argument(
+        "--volatility",
+        type=non_negative_float,
+        default=0.15,
+        help="Standard deviation of the annual return.",
+    )
+    project_parser.add_argument(
+        "--inflation", type=float, default=0.025, help="Annual inflation."
+    )
+    project_parser.add_argument(
+        "--seed", type=int, help="Seed for a reproducible projection."
+    )
+    project_parser.add_argument(
+        "-j",
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="Processes simulating batches of paths.",
+    )
+    project_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=50_000,
+        help="Paths simulated together, rounded up to a multiple of 1024.",
+    )
+    project_parser.add_argument(
+        "--format",
+        choices=["table", "json"],
+        default="table",
+        help="Output format.",
+    )
+
+    return parser
+
+
+def build_generate_docs_parser() -> argparse.ArgumentParser:
+    """Parser for the generate-docs console script.
+
+    :return: Parser for the generate-docs console script.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="generate-docs", description="Build the pfts documentation."
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Remove the previous build and rebuild everything.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default="auto",
+        help="Parallel Sphinx reader processes, or 'auto'.",
+    )
+    parser.add_argument(
+        "--no-open",
+        action="store_true",
+        help="Do not open the documentation in a browser.",
+    )
+
+    return parser
+
+
+def build_run_testing_parser() -> argparse.ArgumentParser:
+    """Parser for the run-testing console script.
+
+    :return: Parser for the run-testing console script.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="run-testing", description="Run the pfts test suite."
+    )
+    add_disablecov_argument(parser)
+    parser.add_argument(
+        "-n",
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes to shard the tests across.",
+    )
+    parser.add_argument(
+        "--impact",
+        action="store_true",
+        help="Only run tests affected by files changed since the last run.",
+    )
+
+    return parser
+
+
+def build_local_ci_parser() -> argparse.ArgumentParser:
+    """Parser for the local-ci console script.
+
+    :return: Parser for the local-ci console script.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="local-ci", description="Run the CI checks locally."
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Checks to run at once. Defaults to one per CPU.",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop the remaining checks as soon as one fails.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Run every check, even if its inputs have not changed.",
+    )
+
+    return parser
+
+
+def build_version_bump_parser() -> argparse.ArgumentParser:
+    """Parser for the version-bump console script.
+
+    :return: Parser for the version-bump console script.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="version-bump", description="Bump the pfts version."
+    )
+    add_dev_argument(parser)
+    add_vbump_argument(parser)
+    parser.add_argument(
+        "--pre",
+        help="Pre-release segment of the new version, e.g. rc.1.",
+    )
+    parser.add_argument(
+        "--build", help="Build metadata of the new version, e.g. build.5."
+    )
+
+    return parser
+
+
+# Command name → function building its parser. None is the shared parser.
+PARSER_BUILDERS: dict[str | None, Callable[[], argparse.ArgumentParser]] = {
+    None: build_shared_parser,
+    "pfts": build_pfts_parser,
+    "generate-docs": build_generate_docs_parser,
+    "run-testing": build_run_testing_parser,
+    "local-ci": build_local_ci_parser,
+    "version-bump": build_version_bump_parser,
+}
+
+
+@functools.cache
+def get_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """Build the parser for a command once, and reuse it afterwards.
+
+    :param command: Console script name, defaults to None (shared parser)
+    :type command: str | None, optional
+    :raises ValueError: If the command has no registered parser.
+    :return: Cached parser for the command.
+    :rtype: argparse.ArgumentParser
+    """
+    if command not in PARSER_BUILDERS:
+        raise ValueError(
+            f"Unknown command: {command}. "
+            f"Expected one of {[c for c in PARSER_BUILDERS if c]}"
+        )
+
+    return PARSER_BUILDERS[command]()
+
+
+def parse_input(
+    arg_list: list | None = None, command: str | None = None
+) -> argparse.Namespace:
+    """Parses inputs from command line, and creates a namespace for them.
+
+    :param arg_list: CMD-styled inputs of strings, defaults to sys.argv[1:]
+    :type arg_list: list
+    :param command: Console script whose flags to accept, defaults to None,
+        which accepts the flags of every tool.
+    :type command: str | None, optional
+
+    :return: Namespace that contains all parsed inputs for the given arguements
+    :rtype: argparse.Namespace
+    """
+    if arg_list is None:
+        arg_list = sys.argv[1:]
+
+    args = get_parser(command).parse_args(arg_list)
+
+    logger.info("Args read in from CLI are: %s", args)
 
     return args
 
 
+def parse_many(
+    arg_lists: Iterable[list], command: str | None = None
+) -> list[argparse.Namespace]:
+    """Parse many argument vectors in-process with a single cached parser.
+
+    :param arg_lists: CMD-styled inputs, one list of strings per invocation.
+    :type arg_lists: Iterable[list]
+    :param command: Console script whose flags to accept, defaults to None
+    :type command: str | None, optional
+    :return: One namespace per argument vector, in order.
+    :rtype: list[argparse.Namespace]
+    """
+    parser = get_parser(command)
+    return [parser.parse_args(arg_list) for arg_list in arg_lists]
+
+
 @log_context
 def parse_init_file(filepath: pathlib.Path) -> int:
     """Parse version information out from the given the __init__ file.
 
+    The file is memory mapped and searched for the __version__ token, and
+    the line index is found by counting the newlines before it. Only the
+    part of the file up to the token is read, and it is never decoded or
+    split into lines, so large files stay cheap to scan.
+
     :param filepath: The file that contains version information.
     :type filepath: pathlib.Path
     :return: Line index of version location. -1 if logging information missing.
@@ -66,11 +828,8 @@ def parse_init_file(filepath: pathlib.Path) -> int:
     index = -1
 
     try:
-        with open(filepath, "r") as fin:
-            for idx, line in enumerate(fin.readlines()):
-                if "__version__" in line:
-                    index = idx
-                    break
+        with open(filepath, "rb") as fin:
+            index = _find_line_index(fin, VERSION_TOKEN)
     except FileNotFoundError:
         logging.error(f"Could not find version file at {filepath.resolve()}!")
 
@@ -78,3 +837,36 @@ def parse_init_file(filepath: pathlib.Path) -> int:
         logger.warning("No version information found. Defaulting to 0.0.0")
 
     return index
+
+
+def _find_line_index(fin: BinaryIO, token: bytes) -> int:
+    """Find the index of the first line containing a token.
+
+    Lines end at a LF, a CR or a CRLF, the same line breaks text mode
+    splits on.
+
+    :param fin: File opened in binary mode.
+    :type fin: BinaryIO
+    :param token: Bytes to look for.
+    :type token: bytes
+    :return: Line index of the token, -1 if it is not in the file.
+    :rtype: int
+    """
+    if os.fstat(fin.fileno()).st_size == 0:
+        # Empty files cannot be memory mapped.
+        return -1
+
+    with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        position = buffer.find(token)
+        if position == -1:
+            return -1
+
+        breaks = 0
+        for start in range(0, position, COUNT_CHUNK_SIZE):
+            size = min(COUNT_CHUNK_SIZE, position - start)
+            # One byte more, so a CRLF split between two chunks counts once.
+            chunk = buffer[start : start + size + 1]
+            breaks += chunk.count(b"\n", 0, size)
+            if carriages := chunk.count(b"\r", 0, size):
+                breaks += carriages - chunk.count(b"\r\n")
+        return breaks
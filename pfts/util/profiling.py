@@ -0,0 +1,229 @@
+"""Contains an in-process registry of per-function call timings."""
+
+import atexit
+import json
+import random
+import sys
+from typing import TextIO
+
+# Upper bound on stored wall times per function, used for percentiles.
+MAX_SAMPLES = 4096
+
+PERCENTILES = (50, 90, 99)
+
+PROFILE_FORMATS = ("table", "json")
+
+
+class FunctionStats:
+    """Aggregated wall and CPU timings for a single function."""
+
+    __slots__ = (
+        "name",
+        "count",
+        "total_wall_ns",
+        "total_cpu_ns",
+        "min_wall_ns",
+        "max_wall_ns",
+        "samples",
+    )
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget every recorded call."""
+        self.count = 0
+        self.total_wall_ns = 0
+        self.total_cpu_ns = 0
+        self.min_wall_ns = 0
+        self.max_wall_ns = 0
+        self.samples: list[int] = []
+
+    def add(self, wall_ns: int, cpu_ns: int) -> None:
+        """Record a single call.
+
+        Percentile samples are kept with reservoir sampling, so memory stays
+        bounded no matter how often the function is called.
+
+        :param wall_ns: Wall clock time of the call in nanoseconds.
+        :type wall_ns: int
+        :param cpu_ns: Process CPU time of the call in nanoseconds.
+        :type cpu_ns: int
+        """
+        self.count += 1
+        self.total_wall_ns += wall_ns
+        self.total_cpu_ns += cpu_ns
+
+        if self.count == 1 or wall_ns < self.min_wall_ns:
+            self.min_wall_ns = wall_ns
+        if wall_ns > self.max_wall_ns:
+            self.max_wall_ns = wall_ns
+
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(wall_ns)
+        else:
+            slot = random.randrange(self.count)  # nosec B311
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = wall_ns
+
+    def percentile(self, pct: float) -> int:
+        """Nearest-rank percentile of the sampled wall times.
+
+        :param pct: Percentile between 0 and 100.
+        :type pct: float
+        :return: Wall time in nanoseconds, 0 if nothing was recorded.
+        :rtype: int
+        """
+        if not self.samples:
+            return 0
+
+        ordered = sorted(self.samples)
+        rank = max(0, int(round(pct / 100 * len(ordered))) - 1)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def to_dict(self) -> dict[str, int | float | str]:
+        """Summarise the statistics as a JSON friendly dictionary.
+
+        :return: Counts, totals, extremes and percentiles in nanoseconds.
+        :rtype: dict[str, int | float | str]
+        """
+        summary: dict[str, int | float | str] = {
+            "function": self.name,
+            "count": self.count,
+            "total_wall_ns": self.total_wall_ns,
+            "total_cpu_ns": self.total_cpu_ns,
+            "mean_wall_ns": (
+                self.total_wall_ns / self.count if self.count else 0
+            ),
+            "min_wall_ns": self.min_wall_ns,
+            "max_wall_ns": self.max_wall_ns,
+        }
+        for pct in PERCENTILES:
+            summary[f"p{pct}_wall_ns"] = self.percentile(pct)
+
+        return summary
+
+
+class Profiler:
+    """Registry of FunctionStats, filled in by log_context while active."""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.stats: dict[str, FunctionStats] = {}
+
+    def stats_for(self, name: str) -> FunctionStats:
+        """Get, or create, the statistics for the given function name.
+
+        :param name: Qualified function name.
+        :type name: str
+        :return: Statistics object owned by this registry.
+        :rtype: FunctionStats
+        """
+        if name not in self.stats:
+            self.stats[name] = FunctionStats(name)
+        return self.stats[name]
+
+    def enable(self) -> None:
+        """Start recording calls."""
+        self.active = True
+
+    def disable(self) -> None:
+        """Stop recording calls, keeping what was already recorded."""
+        self.active = False
+
+    def reset(self) -> None:
+        """Clear all recorded calls."""
+        for stats in self.stats.values():
+            stats.clear()
+
+    def snapshot(self) -> list[dict[str, int | float | str]]:
+        """Summaries of every function called at least once.
+
+        :return: Summaries ordered by total wall time, largest first.
+        :rtype: list[dict[str, int | float | str]]
+        """
+        called = [s for s in self.stats.values() if s.count]
+        called.sort(key=lambda s: s.total_wall_ns, reverse=True)
+        return [s.to_dict() for s in called]
+
+    def to_json(self) -> str:
+        """Dump the snapshot as a JSON document.
+
+        :return: JSON array of function summaries.
+        :rtype: str
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def format_table(self) -> str:
+        """Dump the snapshot as a fixed width table, times in microseconds.
+
+        :return: Human-readable table.
+        :rtype: str
+        """
+        header = (
+            f"{'function':<48} {'calls':>9} {'total':>12} {'cpu':>12} "
+            f"{'min':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+        )
+        lines = [header, "-" * len(header)]
+
+        for row in self.snapshot():
+            times = [
+                int(row[key]) / 1_000
+                for key in (
+                    "total_wall_ns",
+                    "total_cpu_ns",
+                    "min_wall_ns",
+                    "p50_wall_ns",
+                    "p90_wall_ns",
+                    "p99_wall_ns",
+                    "max_wall_ns",
+                )
+            ]
+            lines.append(
+                f"{str(row['function']):<48} {row['count']:>9} "
+                f"{times[0]:>12.1f} {times[1]:>12.1f} "
+                + " ".join(f"{t:>9.1f}" for t in times[2:])
+            )
+
+        return "\n".join(lines)
+
+    def dump(self, fmt: str = "table", stream: TextIO | None = None) -> None:
+        """Write the current statistics to a stream.
+
+        :param fmt: Either "table" or "json", defaults to "table"
+        :type fmt: str, optional
+        :param stream: Where to write, defaults to sys.stderr
+        :type stream: TextIO | None, optional
+        :raises ValueError: If fmt is not a known format.
+        """
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(
+                f"Unknown profile format: {fmt}. "
+                f"Expected one of {PROFILE_FORMATS}"
+            )
+
+        if stream is None:
+            stream = sys.stderr
+
+        output = self.to_json() if fmt == "json" else self.format_table()
+        stream.write(output + "\n")
+        stream.flush()
+
+
+PROFILER = Profiler()
+
+
+def enable_profiling(dump_at_exit: str | None = None) -> Profiler:
+    """Turn on the shared profiler, optionally dumping it at process exit.
+
+    :param dump_at_exit: Format to dump in at exit, defaults to None (no dump)
+    :type dump_at_exit: str | None, optional
+    :return: The shared profiler.
+    :rtype: Profiler
+    """
+    PROFILER.enable()
+    if dump_at_exit is not None:
+        atexit.register(PROFILER.dump, dump_at_exit)
+
+    return PROFILER
@@ -0,0 +1,232 @@
+"""Contains the long-lived command server behind ``pfts serve``.
+
+Requests are single lines holding a shell-quoted pfts command line, e.g.
+``report budget --format json``. Every request gets a single line of JSON
+back, ``{"ok": true, "output": "..."}`` on success or
+``{"ok": false, "error": "..."}`` on failure. A request of exactly
+``shutdown`` stops the server.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import os
+import shlex
+import socket
+import stat
+from typing import Callable, TextIO
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_COMMAND = "shutdown"
+# Stands in for bytes of a request that are not valid UTF-8.
+REPLACEMENT_CHARACTER = "\ufffd"
+
+# Runs one parsed command line, returning the text it would have printed.
+CommandRunner = Callable[[list[str]], str | None]
+
+
+def execute_request(line: str, run_command: CommandRunner) -> dict:
+    """Run a single request line and build its response.
+
+    Anything the command prints, including argparse usage errors, is
+    captured and returned instead of being written to the server's streams.
+
+    :param line: Shell-quoted pfts command line.
+    :type line: str
+    :param run_command: Callable that runs the parsed command line.
+    :type run_command: CommandRunner
+    :return: Response with "ok", and either "output" or "error".
+    :rtype: dict
+    """
+    captured = io.StringIO()
+
+    try:
+        argv = shlex.split(line)
+        with (
+            contextlib.redirect_stdout(captured),
+            contextlib.redirect_stderr(captured),
+        ):
+            output = run_command(argv)
+    except SystemExit as e:
+        # argparse exits on --help and on bad arguments.
+        if e.code in (0, None):
+            return {"ok": True, "output": captured.getvalue()}
+        return {"ok": False, "error": captured.getvalue().strip()}
+    except Exception as e:
+        logger.exception("Request failed: %s", line)
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    return {"ok": True, "output": captured.getvalue() + (output or "")}
+
+
+def _answer_lines(
+    stream_in: TextIO, stream_out: TextIO, run_command: CommandRunner
+) -> tuple[int, bool]:
+    """Answer requests until shutdown or end of input.
+
+    :param stream_in: Where requests are read from.
+    :type stream_in: TextIO
+    :param stream_out: Where responses are written to.
+    :type stream_out: TextIO
+    :param run_command: Callable that runs the parsed command line.
+    :type run_command: CommandRunner
+    :return: Requests answered, and whether shutdown was requested.
+    :rtype: tuple[int, bool]
+    """
+    handled = 0
+
+    for line in stream_in:
+        line = line.strip()
+        if not line:
+            continue
+        if line == SHUTDOWN_COMMAND:
+            return handled, True
+
+        if REPLACEMENT_CHARACTER in line:
+            response = {"ok": False, "error": "Request is not valid UTF-8."}
+        else:
+            response = execute_request(line, run_command)
+        stream_out.write(json.dumps(response) + "\n")
+        stream_out.flush()
+        handled += 1
+
+    return handled, False
+
+
+def serve_stream(
+    stream_in: TextIO, stream_out: TextIO, run_command: CommandRunner
+) -> int:
+    """Answer requests read line by line until shutdown or end of input.
+
+    :param stream_in: Where requests are read from.
+    :type stream_in: TextIO
+    :param stream_out: Where responses are written to.
+    :type stream_out: TextIO
+    :param run_command: Callable that runs the parsed command line.
+    :type run_command: CommandRunner
+    :return: Number of requests answered.
+    :rtype: int
+    """
+    handled, _ = _answer_lines(stream_in, stream_out, run_command)
+
+    logger.info("Command server answered %d requests.", handled)
+    return handled
+
+
+def serve_unix_socket(socket_path: str, run_command: CommandRunner) -> int:
+    """Answer requests on a Unix socket until a client asks for shutdown.
+
+    Connections are served one at a time, and requests run on the calling
+    thread, so commands never overlap and do not need to be thread safe.
+    A client that disconnects before its answer is dropped, and the server
+    moves on to the next connection.
+
+    :param socket_path: Filesystem path of the Unix socket.
+    :type socket_path: str
+    :param run_command: Callable that runs the parsed command line.
+    :type run_command: CommandRunner
+    :raises OSError: If the platform does not support Unix sockets.
+    :raises FileExistsError: If something other than a socket, e.g. a
+        left over socket of an earlier server, is at socket_path.
+    :return: Number of requests answered.
+    :rtype: int
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform.")
+
+    # Only a socket left by an earlier server is replaced, never a file
+    # that was passed by mistake.
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(
+                f"{socket_path} exists and is not a socket, not replacing it."
+            )
+        os.unlink(socket_path)
+
+    handled = 0
+    shutdown = False
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen()
+        logger.info("Command server listening on %s", socket_path)
+
+        try:
+            while not shutdown:
+                conn, _ = server.accept()
+                try:
+                    # Separate streams, as writing to a read-write text
+                    # stream drops the requests it has buffered.
+                    with (
+                        conn,
+                        conn.makefile(
+                            "r", encoding="utf8", errors="replace"
+                        ) as stream_in,
+                        conn.makefile("w", encoding="utf8") as stream_out,
+                    ):
+                        answered, shutdown = _answer_lines(
+                            stream_in, stream_out, run_command
+                        )
+                        handled += answered
+                except OSError as e:
+                    logger.warning("Dropped a client connection: %s", e)
+        finally:
+            os.unlink(socket_path)
+
+    logger.info("Command server answered %d requests.", handled)
+    return handled
+
+
+class PftsClient:
+    """Sends commands to a running ``pfts serve --socket`` process."""
+
+    def __init__(self, socket_path: str, timeout: float = 30.0) -> None:
+        """Connect to the server.
+
+        :param socket_path: Filesystem path of the server's Unix socket.
+        :type socket_path: str
+        :param timeout: Seconds to wait for a response, defaults to 30.0
+        :type timeout: float, optional
+        """
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socket_path)
+        self._reader = self._sock.makefile("rb")
+
+    def run(self, args: list[str]) -> dict:
+        """Run a pfts command line on the server.
+
+        :param args: Arguments, as they would be passed to the pfts script.
+        :type args: list[str]
+        :raises ConnectionError: If the server closed the connection.
+        :return: The server's response.
+        :rtype: dict
+        """
+        self._sock.sendall(shlex.join(args).encode("utf8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("pfts server closed the connection.")
+
+        return json.loads(line)
+
+    def shutdown(self) -> None:
+        """Ask the server to stop, then close the connection."""
+        self._sock.sendall(SHUTDOWN_COMMAND.encode("utf8") + b"\n")
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection, leaving the server running."""
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self) -> "PftsClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
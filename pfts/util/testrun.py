@@ -0,0 +1,345 @@
+"""Contains test sharding and coverage based test-impact selection.
+
+Coverage records which test ran each line (``dynamic_context`` in
+pyproject.toml). After every passing run that data is saved as an
+ImpactMap, keyed by source file, together with a hash of every source and
+test file. The next impact run only selects the tests that covered a
+changed source file, plus every test in a changed test module. Failing
+runs are not recorded, so the tests they ran are selected again.
+"""
+
+import hashlib
+import json
+import logging
+import pathlib
+import subprocess  # nosec B404
+import sys
+
+from pfts.util import ci
+
+logger = logging.getLogger(__name__)
+
+IMPACT_FILE = ci.CACHE_DIR.parent / "test_impact.json"
+COVERAGE_FILE = ".coverage"
+
+SOURCE_DIR = "pfts"
+TEST_DIR = "tests"
+# Changes to these run the whole suite, since they can affect any test.
+GLOBAL_INPUTS = ["pyproject.toml"]
+
+
+def collect_tests() -> list[str]:
+    """Ask pytest for the node id of every test, without running them.
+
+    :raises RuntimeError: If pytest cannot collect the tests.
+    :return: Node ids, e.g. "tests/test_util_general.py::test_return_true".
+    :rtype: list[str]
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q"],
+        capture_output=True,
+        text=True,
+    )  # nosec B603
+    if result.returncode != 0:
+        raise RuntimeError(f"Test collection failed:\n{result.stdout}")
+
+    return [line for line in result.stdout.splitlines() if "::" in line]
+
+
+def shard_tests(node_ids: list[str], shards: int) -> list[list[str]]:
+    """Split tests into shards of similar size, keeping each file together.
+
+    Tests in one file commonly share on-disk fixtures, so a file is never
+    split across processes. Files are handed out largest first to the
+    currently smallest shard.
+
+    :param node_ids: Tests to split.
+    :type node_ids: list[str]
+    :param shards: Number of shards wanted.
+    :type shards: int
+    :return: Non-empty shards of node ids.
+    :rtype: list[list[str]]
+    """
+    by_file: dict[str, list[str]] = {}
+    for node_id in node_ids:
+        by_file.setdefault(node_id.split("::")[0], []).append(node_id)
+
+    buckets: list[list[str]] = [[] for _ in range(max(1, shards))]
+    for tests in sorted(by_file.values(), key=len, reverse=True):
+        min(buckets, key=len).extend(tests)
+
+    return [bucket for bucket in buckets if bucket]
+
+
+def build_shard_steps(shards: list[list[str]]) -> list[ci.CIStep]:
+    """Create one coverage-measured pytest run per shard.
+
+    :param shards: Node ids for each shard.
+    :type shards: list[list[str]]
+    :return: Steps that write parallel coverage data files.
+    :rtype: list[ci.CIStep]
+    """
+    return [
+        ci.CIStep(
+            f"test shard {idx}",
+            ["coverage", "run", "--parallel-mode", "-m", "pytest", *shard],
+        )
+        for idx, shard in enumerate(shards)
+    ]
+
+
+def combine_coverage() -> int:
+    """Merge the parallel coverage data files of every shard.
+
+    :return: Return code of ``coverage combine``.
+    :rtype: int
+    """
+    return subprocess.call(["coverage", "combine"], stdout=subprocess.DEVNULL)  # nosec B603
+
+
+def context_to_node_id(context: str) -> str | None:
+    """Turn a coverage test_function context into a pytest node id.
+
+    "tests.test_util_general.test_return_true" becomes
+    "tests/test_util_general.py::test_return_true".
+
+    :param context: Dotted module and function name.
+    :type context: str
+    :return: Node id, or None if no matching test file exists.
+    :rtype: str | None
+    """
+    parts = context.split(".")
+    for split in range(len(parts) - 1, 0, -1):
+        module_file = pathlib.Path(*parts[:split]).with_suffix(".py")
+        if module_file.is_file():
+            return "::".join([module_file.as_posix(), *parts[split:]])
+
+    return None
+
+
+def hash_inputs() -> dict[str, str]:
+    """Hash every source and test file, and the global inputs.
+
+    :return: sha256 digest by posix path.
+    :rtype: dict[str, str]
+    """
+    files = ci.iter_input_files([SOURCE_DIR, TEST_DIR, *GLOBAL_INPUTS])
+    return {
+        path.as_posix(): hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in files
+    }
+
+
+def base_node_id(node_id: str) -> str:
+    """Strip the parametrization from a node id.
+
+    :param node_id: e.g. "tests/test_a.py::test_b[case]".
+    :type node_id: str
+    :return: e.g. "tests/test_a.py::test_b".
+    :rtype: str
+    """
+    return node_id.split("[", 1)[0]
+
+
+class ImpactMap:
+    """Which tests cover each source file, and the file hashes it saw."""
+
+    def __init__(
+        self, tests_by_file: dict[str, set[str]], hashes: dict[str, str]
+    ) -> None:
+        """Create the map.
+
+        :param tests_by_file: Node ids of the tests covering each file.
+        :type tests_by_file: dict[str, set[str]]
+        :param hashes: File hashes at the time the map was recorded.
+        :type hashes: dict[str, str]
+        """
+        self.tests_by_file = tests_by_file
+        self.hashes = hashes
+
+    @classmethod
+    def load(cls, path: pathlib.Path = IMPACT_FILE) -> "ImpactMap | None":
+        """Read a previously saved map.
+
+        :param path: Where the map is stored, defaults to IMPACT_FILE
+        :type path: pathlib.Path, optional
+        :return: The map, or None if none was recorded or it is unreadable.
+        :rtype: ImpactMap | None
+        """
+        try:
+            raw = json.loads(path.read_text(encoding="utf8"))
+            tests_by_file = {
+                file: set(tests) for file, tests in raw["tests"].items()
+            }
+            return cls(tests_by_file, raw["hashes"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path: pathlib.Path = IMPACT_FILE) -> None:
+        """Write the map as JSON.
+
+        :param path: Where to store the map, defaults to IMPACT_FILE
+        :type path: pathlib.Path, optional
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        raw = {
+            "tests": {
+                file: sorted(tests)
+                for file, tests in sorted(self.tests_by_file.items())
+            },
+            "hashes": self.hashes,
+        }
+        path.write_text(json.dumps(raw, indent=1), encoding="utf8")
+
+    @classmethod
+    def from_coverage(
+        cls, hashes: dict[str, str], data_file: str = COVERAGE_FILE
+    ) -> "ImpactMap":
+        """Build a map from coverage data recorded with test contexts.
+
+        :param hashes: File hashes the tests ran against.
+        :type hashes: dict[str, str]
+        :param data_file: Coverage data file, defaults to COVERAGE_FILE
+        :type data_file: str, optional
+        :return: The new map.
+        :rtype: ImpactMap
+        """
+        import coverage
+
+        data = coverage.CoverageData(basename=data_file)
+        data.read()
+
+        cwd = pathlib.Path.cwd()
+        tests_by_file: dict[str, set[str]] = {}
+
+        for measured in data.measured_files():
+            try:
+                file = pathlib.Path(measured).relative_to(cwd).as_posix()
+            except ValueError:
+                continue
+
+            node_ids = tests_by_file.setdefault(file, set())
+            for contexts in data.contexts_by_lineno(measured).values():
+                for context in contexts:
+                    node_id = context_to_node_id(context) if context else None
+                    if node_id is not None:
+                        node_ids.add(node_id)
+
+        return cls(tests_by_file, hashes)
+
+    def select(
+        self, node_ids: list[str], hashes: dict[str, str]
+    ) -> list[str] | None:
+        """Pick the tests affected by files changed since the map was saved.
+
+        :param node_ids: Every test that currently exists.
+        :type node_ids: list[str]
+        :param hashes: Current file hashes.
+        :type hashes: dict[str, str]
+        :return: Tests to run, or None if every test has to run.
+        :rtype: list[str] | None
+        """
+        changed = {
+            file
+            for file in self.hashes.keys() | hashes.keys()
+            if self.hashes.get(file) != hashes.get(file)
+        }
+
+        affected: set[str] = set()
+        for file in changed:
+            path = pathlib.PurePosixPath(file)
+            if file in GLOBAL_INPUTS:
+                return None
+            if path.parts[0] == TEST_DIR:
+                if not path.name.startswith("test_"):
+                    # Shared test helpers and data can affect any test.
+                    return None
+                affected.update(
+                    base_node_id(n)
+                    for n in node_ids
+                    if n.split("::")[0] == file
+                )
+            affected.update(self.tests_by_file.get(file, set()))
+
+        return [n for n in node_ids if base_node_id(n) in affected]
+
+    def update(
+        self, ran: "ImpactMap", node_ids: list[str], hashes: dict[str, str]
+    ) -> None:
+        """Replace what is known about the tests that just ran.
+
+        :param ran: Map recorded from the tests that ran.
+        :type ran: ImpactMap
+        :param node_ids: Tests that ran.
+        :type node_ids: list[str]
+        :param hashes: File hashes the tests ran against.
+        :type hashes: dict[str, str]
+        """
+        stale = {base_node_id(n) for n in node_ids}
+        for file, tests in self.tests_by_file.items():
+            self.tests_by_file[file] = tests - stale
+        for file, tests in ran.tests_by_file.items():
+            self.tests_by_file.setdefault(file, set()).update(tests)
+
+        self.hashes = hashes
+
+
+def run_tests(workers: int = 1, impact: bool = False) -> bool:
+    """Run the test suite under coverage, and record its impact data.
+
+    Impact data is only recorded when every test passed, so that the next
+    impact run selects a failing test again even if nothing changed.
+
+    :param workers: Processes to shard the tests across, defaults to 1
+    :type workers: int, optional
+    :param impact: Only run the tests affected by changes since the last
+        recorded run, defaults to False
+    :type impact: bool, optional
+    :return: True if every test that ran passed.
+    :rtype: bool
+    """
+    hashes = hash_inputs()
+    impact_map = ImpactMap.load() if impact else None
+
+    # None runs every test.
+    node_ids: list[str] | None = None
+    if impact and impact_map is None:
+        logger.info("No test impact data recorded yet, running every test.")
+    elif impact_map is not None:
+        node_ids = impact_map.select(collect_tests(), hashes)
+        if node_ids == []:
+            logger.info("No tests are affected by the changed files.")
+            return True
+        if node_ids is not None:
+            logger.info(f"Running {len(node_ids)} tests affected by changes.")
+
+    if workers <= 1:
+        coverage_args = ["coverage", "run", "-m", "pytest", *(node_ids or [])]
+        passed = subprocess.call(coverage_args) == 0  # nosec B603
+    else:
+        shards = shard_tests(
+            node_ids if node_ids is not None else collect_tests(), workers
+        )
+        results = ci.CIRunner(workers=len(shards)).run(
+            build_shard_steps(shards)
+        )
+        for result in results:
+            logger.info(result.output)
+        combine_coverage()
+        passed = all(result.passed for result in results)
+
+    if not passed:
+        logger.warning(
+            "Tests failed, so no impact data was recorded and they run "
+            "again on the next impact run."
+        )
+        return False
+
+    ran = ImpactMap.from_coverage(hashes)
+    if impact_map is None or node_ids is None:
+        ran.save()
+    else:
+        impact_map.update(ran, node_ids, hashes)
+        impact_map.save()
+
+    return passed
@@ -0,0 +1,556 @@
+"""Contains the engine that keeps the version in sync across files.
+
+Every VersionTarget pairs a file with a VersionLocator, which knows where
+the version lives in that kind of file. The first target is the source of
+truth: its current version is read and bumped, and the new version is then
+written to every target. Each file is streamed once into a temporary file,
+and the temporary files only replace the originals once all of them were
+written, so a bump changes every file or none of them.
+"""
+
+import abc
+import concurrent.futures
+import contextlib
+import datetime
+import logging
+import pathlib
+import re
+from typing import Callable, Iterable, Iterator
+
+from pfts.util import files
+
+logger = logging.getLogger(__name__)
+
+VERSION_PARTS = ("major", "minor", "patch", "pre")
+
+# Semantic version, e.g. 1.2.3, 1.2.3-rc.1 or 1.2.3-rc.1+build.5
+VERSION_PATTERN = (
+    r"(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)"
+    r"(?:-(?P<pre>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?"
+    r"(?:\+(?P<build>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?"
+)
+_VERSION_RE = re.compile(VERSION_PATTERN)
+
+# Targets beyond this are staged on a thread pool.
+CONCURRENT_THRESHOLD = 4
+
+
+class VersionSyncError(Exception):
+    """Raised when a version cannot be synchronized across files."""
+
+
+class Version:
+    """A semantic version with optional pre-release and build segments."""
+
+    __slots__ = ("major", "minor", "patch", "pre", "build")
+
+    def __init__(
+        self,
+        major: int = 0,
+        minor: int = 0,
+        patch: int = 0,
+        pre: str | None = None,
+        build: str | None = None,
+    ) -> None:
+        """Create the version.
+
+        :param major: Major version, defaults to 0
+        :type major: int, optional
+        :param minor: Minor version, defaults to 0
+        :type minor: int, optional
+        :param patch: Patch version, defaults to 0
+        :type patch: int, optional
+        :param pre: Pre-release segment, e.g. "rc.1", defaults to None
+        :type pre: str | None, optional
+        :param build: Build metadata, e.g. "build.5", defaults to None
+        :type build: str | None, optional
+        """
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.pre = pre
+        self.build = build
+
+    @classmethod
+    def parse(cls, text: str) -> "Version":
+        """Read the first version found in a piece of text.
+
+        :param text: Text containing a version, e.g. "__version__ = '1.2.3'".
+        :type text: str
+        :raises ValueError: If the text holds no version.
+        :return: The version.
+        :rtype: Version
+        """
+        match = _VERSION_RE.search(text)
+        if match is None:
+            raise ValueError(f"No version found in: {text!r}")
+
+        return cls(
+            int(match["major"]),
+            int(match["minor"]),
+            int(match["patch"]),
+            match["pre"],
+            match["build"],
+        )
+
+    def bump(
+        self, part: str, pre: str | None = None, build: str | None = None
+    ) -> "Version":
+        """Create the next version.
+
+        Bumping major, minor or patch only increments that part, and drops
+        the pre-release and build segments. Bumping pre increments the last
+        number of the pre-release, or starts "rc.1" on the next patch.
+
+        :param part: One of VERSION_PARTS.
+        :type part: str
+        :param pre: Pre-release segment of the new version, defaults to None
+        :type pre: str | None, optional
+        :param build: Build metadata of the new version, defaults to None
+        :type build: str | None, optional
+        :raises ValueError: If part is not one of VERSION_PARTS.
+        :return: The new version.
+        :rtype: Version
+        """
+        if part not in VERSION_PARTS:
+            raise ValueError(f"Unknown part: {part}")
+
+        new = Version(self.major, self.minor, self.patch)
+
+        if part == "pre":
+            new.pre = _next_pre_release(self.pre)
+            if self.pre is None:
+                new.patch += 1
+        else:
+            setattr(new, part, getattr(self, part) + 1)
+
+        new.pre = pre if pre is not None else new.pre
+        new.build = build
+
+        return new
+
+    def __str__(self) -> str:
+        text = f"{self.major}.{self.minor}.{self.patch}"
+        if self.pre:
+            text += f"-{self.pre}"
+        if self.build:
+            text += f"+{self.build}"
+
+        return text
+
+    def __repr__(self) -> str:
+        return f"Version({str(self)!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+
+        return str(self) == str(other)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+def _next_pre_release(pre: str | None) -> str:
+    """Increment the last number of a pre-release segment.
+
+    rc.1 → rc.2, beta → beta.1 and no segment → rc.1.
+
+    :param pre: Current pre-release segment.
+    :type pre: str | None
+    :return: The next pre-release segment.
+    :rtype: str
+    """
+    if pre is None:
+        return "rc.1"
+
+    identifiers = pre.split(".")
+    if identifiers[-1].isdigit():
+        identifiers[-1] = str(int(identifiers[-1]) + 1)
+    else:
+        identifiers.append("1")
+
+    return ".".join(identifiers)
+
+
+# Called with the version a locator found, None if it holds no version,
+# returns the version to write.
+VersionCallback = Callable[[Version | None], Version]
+
+
+class VersionLocator(abc.ABC):
+    """Finds, and rewrites, the version within one kind of file.
+
+    Subclasses implement find for versions that sit on a single line, and
+    also override rewrite when they need to track more of the file.
+    """
+
+    @abc.abstractmethod
+    def find(self, line: str) -> tuple[int, int] | None:
+        """Locate the version within a line.
+
+        :param line: Line of the file.
+        :type line: str
+        :return: Start and end of the version in the line, None if absent.
+        :rtype: tuple[int, int] | None
+        """
+
+    def missing(self, new: Version) -> str | None:
+        """Text to append when the file holds no version.
+
+        :param new: Version being written.
+        :type new: Version
+        :return: Text to append, None if the version is required.
+        :rtype: str | None
+        """
+        return None
+
+    def rewrite(
+        self, lines: Iterable[str], on_found: VersionCallback
+    ) -> Iterator[str]:
+        """Stream a file's lines, replacing its first version.
+
+        :param lines: Lines of the file, with their line endings.
+        :type lines: Iterable[str]
+        :param on_found: Called with the version found, returns the new one.
+        :type on_found: VersionCallback
+        :raises VersionSyncError: If the file holds no version and the
+            locator cannot add one.
+        :return: Lines of the rewritten file.
+        :rtype: Iterator[str]
+        """
+        found = False
+        line = ""
+
+        for line in lines:
+            span = None if found else self.find(line)
+            if span is not None:
+                start, end = span
+                new = on_found(Version.parse(line[start:end]))
+                line = f"{line[:start]}{new}{line[end:]}"
+                found = True
+            yield line
+
+        if not found:
+            new = on_found(None)
+            text = self.missing(new)
+            if text is None:
+                raise VersionSyncError(f"{self!r} found no version.")
+            if line and not line.endswith("\n"):
+                yield "\n"
+            yield text
+
+
+class RegexLocator(VersionLocator):
+    """Finds the version with a regex holding a named "version" group."""
+
+    def __init__(self, pattern: str) -> None:
+        """Compile the pattern.
+
+        :param pattern: Regex matched against each line.
+        :type pattern: str
+        """
+        self.pattern = re.compile(pattern)
+
+    def find(self, line: str) -> tuple[int, int] | None:
+        match = self.pattern.search(line)
+        if match is None:
+            return None
+
+        return match.span("version")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.pattern.pattern!r})"
+
+
+class PythonLocator(RegexLocator):
+    """Finds a module level ``__version__ = "x.y.z"`` assignment."""
+
+    def __init__(self) -> None:
+        """Match the assignment, keeping the quote style of the file."""
+        super().__init__(
+            r"^__version__\s*(?::[^=]*)?=\s*['\"]"
+            rf"(?P<version>{VERSION_PATTERN})['\"]"
+        )
+
+    def missing(self, new: Version) -> str:
+        logger.warning("No version information found. Defaulting to 0.0.0")
+        return f"__version__ = '{new}'\n"
+
+
+class TomlLocator(VersionLocator):
+    """Finds a version key within a table of a TOML file."""
+
+    def __init__(self, table: str = "project", key: str = "version") -> None:
+        """Select the key.
+
+        :param table: Table holding the key, defaults to "project"
+        :type table: str, optional
+        :param key: Key holding the version, defaults to "version"
+        :type key: str, optional
+        """
+        self.table = table
+        self.key_re = re.compile(
+            rf"^\s*{re.escape(key)}\s*=\s*['\"](?P<version>[^'\"]*)['\"]"
+        )
+
+    def find(self, line: str) -> tuple[int, int] | None:
+        # Matches the key in any table, rewrite only calls it in its own.
+        match = self.key_re.match(line)
+        if match is None:
+            return None
+
+        return match.span("version")
+
+    def rewrite(
+        self, lines: Iterable[str], on_found: VersionCallback
+    ) -> Iterator[str]:
+        table = None
+        found = False
+
+        for line in lines:
+            header = re.match(r"^\s*\[+\s*([^\]]+?)\s*\]+", line)
+            if header:
+                table = header.group(1)
+            elif not found and table == self.table:
+                span = self.find(line)
+                if span is not None:
+                    start, end = span
+                    new = on_found(Version.parse(line[start:end]))
+                    line = f"{line[:start]}{new}{line[end:]}"
+                    found = True
+            yield line
+
+        if not found:
+            raise VersionSyncError(
+                f"No version key found in the [{self.table}] table."
+            )
+
+    def __repr__(self) -> str:
+        return f"TomlLocator({self.table!r})"
+
+
+class ChangelogLocator(VersionLocator):
+    """Releases the Unreleased section of a Keep a Changelog file.
+
+    A heading for the new version, dated today, is added below
+    ``## [Unreleased]``, so everything listed there becomes part of the
+    release. A link for the new version is added below the link of the
+    Unreleased section, if the file has one.
+    """
+
+    HEADING_RE = re.compile(r"^## \[Unreleased\]", re.IGNORECASE)
+    RELEASE_RE = re.compile(rf"^## \[(?P<version>{VERSION_PATTERN})\]")
+    LINK_RE = re.compile(r"^(?P<prefix>.*)\[unreleased\]:", re.IGNORECASE)
+
+    def __init__(self, tag_url: str = "") -> None:
+        """Configure the release links.
+
+        :param tag_url: Link of a release, where {version} is replaced by
+            the new version, defaults to "" (empty link)
+        :type tag_url: str, optional
+        """
+        self.tag_url = tag_url
+
+    def find(self, line: str) -> tuple[int, int] | None:
+        # The version of a released section, rewrite adds a new one instead.
+        match = self.RELEASE_RE.match(line)
+        if match is None:
+            return None
+
+        return match.span("version")
+
+    def rewrite(
+        self, lines: Iterable[str], on_found: VersionCallback
+    ) -> Iterator[str]:
+        new = None
+
+        for line in lines:
+            yield line
+            ending = line[len(line.rstrip("\r\n")) :] or "\n"
+
+            if new is None and self.HEADING_RE.match(line):
+                # The Unreleased heading does not hold a version to check.
+                new = on_found(None)
+                today = datetime.date.today().isoformat()
+                yield f"{ending}## [{new}] - {today}{ending}"
+            elif new is not None and (link := self.LINK_RE.match(line)):
+                url = self.tag_url.format(version=new)
+                yield f"{link['prefix']}[{new}]: {url}".rstrip() + ending
+
+        if new is None:
+            raise VersionSyncError("No ## [Unreleased] heading found.")
+
+    def __repr__(self) -> str:
+        return "ChangelogLocator()"
+
+
+class VersionTarget:
+    """A file holding the version, and the locator that finds it."""
+
+    def __init__(self, path: pathlib.Path, locator: VersionLocator) -> None:
+        """Pair the file with its locator.
+
+        :param path: File holding the version.
+        :type path: pathlib.Path
+        :param locator: Finds the version within the file.
+        :type locator: VersionLocator
+        """
+        self.path = path
+        self.locator = locator
+
+    def __repr__(self) -> str:
+        return f"VersionTarget({str(self.path)!r}, {self.locator!r})"
+
+
+DEFAULT_TARGETS = [
+    # Source of truth, also read by setuptools and Sphinx.
+    VersionTarget(pathlib.Path("pfts") / "__init__.py", PythonLocator()),
+    VersionTarget(
+        pathlib.Path("Changelog.MD"),
+        ChangelogLocator(
+            "https://github.com/TrintenP/pfts/releases/tag/v{version}"
+        ),
+    ),
+]
+
+
+class VersionSync:
+    """Bumps the version of every target in a single transaction."""
+
+    def __init__(
+        self, targets: list[VersionTarget], workers: int | None = None
+    ) -> None:
+        """Configure the targets.
+
+        :param targets: Files to keep in sync, the first is the source of
+            truth for the current version.
+        :type targets: list[VersionTarget]
+        :param workers: Threads staging the other targets, when there are
+            more than CONCURRENT_THRESHOLD, defaults to one per CPU
+        :type workers: int | None, optional
+        """
+        if not targets:
+            raise ValueError("At least one version target is required.")
+
+        self.targets = targets
+        self.workers = workers
+
+    def bump(
+        self, part: str, pre: str | None = None, build: str | None = None
+    ) -> tuple[Version, Version]:
+        """Bump the version and write it to every target.
+
+        Every target is locked for the whole bump, and either all of them
+        are rewritten or none are.
+
+        :param part: One of VERSION_PARTS.
+        :type part: str
+        :param pre: Pre-release segment of the new version, defaults to None
+        :type pre: str | None, optional
+        :param build: Build metadata of the new version, defaults to None
+        :type build: str | None, optional
+        :raises VersionSyncError: If a target holds no version.
+        :return: The old and the new version.
+        :rtype: tuple[Version, Version]
+        """
+        primary, *others = self.targets
+        versions: dict[str, Version] = {}
+
+        def on_primary(found: Version | None) -> Version:
+            versions["old"] = found or Version()
+            versions["new"] = versions["old"].bump(part, pre, build)
+            return versions["new"]
+
+        with contextlib.ExitStack() as stack:
+            for path in sorted({t.path.resolve() for t in self.targets}):
+                stack.enter_context(files.file_lock(path))
+
+            staged: list[tuple[pathlib.Path, pathlib.Path]] = []
+            try:
+                staged.append(self._stage(primary, on_primary))
+
+                def on_other(found: Version | None) -> Version:
+                    if found is not None and found != versions["old"]:
+                        logger.warning(
+                            f"Version {found} differs from {versions['old']}"
+                        )
+                    return versions["new"]
+
+                staged.extend(self._stage_all(others, on_other))
+            except BaseException:
+                for tmp_path, _ in staged:
+                    tmp_path.unlink(missing_ok=True)
+                raise
+
+            files.replace_all(staged)
+
+        logger.info(
+            f"Old version: {versions['old']}; New_Version: {versions['new']}"
+        )
+        return versions["old"], versions["new"]
+
+    def _stage_all(
+        self, targets: list[VersionTarget], on_found: VersionCallback
+    ) -> list[tuple[pathlib.Path, pathlib.Path]]:
+        """Stage several targets, on a thread pool when there are many.
+
+        :param targets: Targets to stage.
+        :type targets: list[VersionTarget]
+        :param on_found: Called with each version found.
+        :type on_found: VersionCallback
+        :return: Temporary file and target of each staged target.
+        :rtype: list[tuple[pathlib.Path, pathlib.Path]]
+        """
+        staged = []
+        error: BaseException | None = None
+
+        if len(targets) <= CONCURRENT_THRESHOLD:
+            for target in targets:
+                try:
+                    staged.append(self._stage(target, on_found))
+                except BaseException as e:
+                    error = e
+                    break
+        else:
+            with concurrent.futures.ThreadPoolExecutor(self.workers) as pool:
+                futures = [
+                    pool.submit(self._stage, target, on_found)
+                    for target in targets
+                ]
+            for future in futures:
+                try:
+                    staged.append(future.result())
+                except BaseException as e:
+                    error = error or e
+
+        if error is not None:
+            for tmp_path, _ in staged:
+                tmp_path.unlink(missing_ok=True)
+            raise error
+
+        return staged
+
+    def _stage(
+        self, target: VersionTarget, on_found: VersionCallback
+    ) -> tuple[pathlib.Path, pathlib.Path]:
+        """Stream a target into a temporary file holding the new version.
+
+        :param target: Target to rewrite.
+        :type target: VersionTarget
+        :param on_found: Called with the version found, returns the new one.
+        :type on_found: VersionCallback
+        :raises VersionSyncError: If the target holds no version.
+        :return: The temporary file and the target's path.
+        :rtype: tuple[pathlib.Path, pathlib.Path]
+        """
+        lines = files.iter_lines(target.path)
+
+        try:
+            rewritten = target.locator.rewrite(lines, on_found)
+            tmp_path = files.write_temp(target.path, rewritten)
+        except VersionSyncError as e:
+            raise VersionSyncError(f"{target.path}: {e}") from e
+
+        logger.debug(f"Staged version rewrite of {target.path}")
+        return tmp_path, target.path
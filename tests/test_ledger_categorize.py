@@ -0,0 +1,253 @@
+"""Tests written for the rule based categorization of pfts."""
+
+import json
+import random
+import re
+
+import pytest
+
+from pfts.ledger import Ledger, categorize, rollups
+from pfts.ledger.dedup import normalize_description
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+RULES = [
+    categorize.Rule("groceries", ("whole foods", "Trader Joe's")),
+    categorize.Rule("coffee", patterns=(r"^sq \*blue",)),
+    categorize.Rule("fuel", ("shell",), (r"\bgas\b",)),
+    categorize.Rule("shopping", ("amazon",), (r"amzn mktp",)),
+    categorize.Rule("books", patterns=(r"AMZN\*MKTP", r"#\d+ BOOKS")),
+]
+
+
+def sample_ledger() -> Ledger:
+    """Ledger with a few uncategorized card transactions."""
+    ledger = Ledger()
+    ledger.extend(
+        [
+            (19000, -5000, "card", "", "WHOLE FOODS #123"),
+            (19001, -450, "card", "", "SQ *BLUE BOTTLE"),
+            (19002, -3000, "card", "", "SHELL OIL 5551"),
+            (19003, -2000, "card", "travel", "SHELL OIL 5551"),
+            (19004, 1000, "card", "", "REFUND"),
+            (19005, -1500, "card", "", "AMZN Mktp US"),
+        ]
+    )
+    return ledger
+
+
+def first_rule_match(rules: list[categorize.Rule], description: str):
+    """Category of the first rule matching, trying one rule at a time."""
+    text = normalize_description(description)
+    for rule in rules:
+        keywords = (normalize_description(word) for word in rule.keywords)
+        if any(f" {word} " in f" {text} " for word in keywords if word):
+            return rule.category
+        if any(
+            re.search(pattern, description, re.I) for pattern in rule.patterns
+        ):
+            return rule.category
+    return None
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "description, expected",
+    [
+        ("WHOLE FOODS MKT #10", "groceries"),
+        ("TRADER JOE'S #552", "groceries"),
+        ("SQ *BLUE BOTTLE", "coffee"),
+        ("PAID AT SQ BLUE", None),
+        ("SHELLFISH SHACK", None),
+        ("CITY GAS & POWER", "fuel"),
+        ("AMZN Mktp US*2K4", "shopping"),
+        ("AMZN*Mktp US", "books"),
+        ("STORE #12 BOOKS", "books"),
+        ("STORE 12 BOOKS", None),
+        ("AMAZON SHELL", "fuel"),
+        ("", None),
+    ],
+)
+def test_categorizer(description: str, expected: str | None):
+    categorizer = categorize.Categorizer(RULES)
+
+    assert categorizer.categorize(description) == expected
+
+
+@maintain_log
+def test_categorizer_matches_rule_by_rule():
+    rng = random.Random(5)
+    words = ["pay", "shop", "fuel", "cafe", "mart", "store", "bank", "air"]
+    rules = [
+        categorize.Rule(
+            f"category {number}",
+            tuple(
+                " ".join(rng.sample(words, rng.randint(1, 2)))
+                for _ in range(rng.randint(0, 2))
+            ),
+            tuple(
+                rng.choice([rf"{word}\d+", f"^{word}", rf"{word} (one|two)"])
+                for word in rng.sample(words, rng.randint(0, 1))
+            ),
+        )
+        for number in range(100)
+    ]
+    categorizer = categorize.Categorizer(rules)
+
+    for _ in range(2000):
+        description = " ".join(
+            rng.choice(words + ["one", "two", "7", "mart7"])
+            for _ in range(rng.randint(1, 5))
+        )
+        assert categorizer.categorize(description) == first_rule_match(
+            rules, description
+        )
+
+
+@maintain_log
+def test_keyword_automaton_overlapping_keywords():
+    automaton = categorize.KeywordAutomaton(
+        [("she", 2), ("he", 1), ("hers", 0), ("his", 3)]
+    )
+
+    assert automaton.first_rule("ushers") == 0
+    assert automaton.first_rule("ushe") == 1
+    assert automaton.first_rule("this") == 3
+    assert automaton.first_rule("xyz") == categorize.NO_MATCH
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        (r"^SQ blue\d+", "sq blue"),
+        ("amzn mktp", "amzn mktp"),
+        ("colou?r", "colo"),
+        ("ab*", "a"),
+        ("a|b", ""),
+        (r"^sq \*blue", "sq "),
+        ("café", "caf"),
+        (r"\bgas", ""),
+    ],
+)
+def test_literal_prefix(pattern: str, expected: str):
+    assert categorize.literal_prefix(pattern) == expected
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "pattern", ["(", "(?P<name>a)", r"(ab)\1", r"(a)?(?(1)b|c)"]
+)
+def test_bad_patterns(pattern: str):
+    with pytest.raises(categorize.RulesError):
+        categorize.Categorizer([categorize.Rule("bad", patterns=(pattern,))])
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "content",
+    [
+        '{"a": 1}',
+        '[{"keywords": ["x"]}]',
+        '[{"category": "a", "keywords": 1}]',
+        '[{"category": "a", "patterns": ["(x)\\\\1"]}]',
+    ],
+)
+def test_load_rules_rejects_bad_files(tmp_path, content: str):
+    rules_file = tmp_path / categorize.RULES_FILE
+    rules_file.write_text(content, encoding="utf8")
+
+    with pytest.raises(categorize.RulesError):
+        categorize.load_rules(rules_file)
+
+
+@maintain_log
+def test_categorize_ledger():
+    ledger = sample_ledger()
+    categorizer = categorize.Categorizer(RULES)
+
+    dry = categorize.categorize_ledger(ledger, categorizer, dry_run=True)
+    assert ledger.edits == 0
+    assert len(ledger.pools["category"]) == 2
+
+    result = categorize.categorize_ledger(ledger, categorizer, batch_rows=4)
+
+    assert dry.changes == result.changes
+    assert dry.counts == result.counts
+    assert [row for row, _ in result.changes] == [0, 1, 2, 5]
+    assert result.counts == {
+        "groceries": 1,
+        "coffee": 1,
+        "fuel": 1,
+        "shopping": 1,
+    }
+    assert [row.category for row in ledger.rows()] == [
+        "groceries",
+        "coffee",
+        "fuel",
+        "travel",
+        "",
+        "shopping",
+    ]
+    assert ledger.edits == 4
+    assert not categorize.categorize_ledger(ledger, categorizer).changes
+
+    again = categorize.categorize_ledger(
+        ledger, categorizer, recategorize=True
+    )
+    assert [row for row, _ in again.changes] == [3]
+    assert ledger[3].category == "fuel"
+
+
+@maintain_log
+@pytest.mark.parametrize("share", [1, 8], ids=["per_row", "rebuild"])
+def test_categorize_ledger_keeps_rollups_current(monkeypatch, share: int):
+    monkeypatch.setattr(rollups, "REBUILD_SHARE", share)
+    ledger = sample_ledger()
+    totals = rollups.Rollups(ledger)
+    totals.update()
+
+    result = categorize.categorize_ledger(
+        ledger, categorize.Categorizer(RULES)
+    )
+    totals.apply_edits(result.changes)
+
+    assert totals.group_totals("category") == ledger.group_totals("category")
+    assert totals.edits == ledger.edits
+
+
+@maintain_log
+def test_categorize_command(tmp_path):
+    sample_ledger().save(tmp_path)
+    (tmp_path / categorize.RULES_FILE).write_text(
+        json.dumps([rule._asdict() for rule in RULES]), encoding="utf8"
+    )
+    command = ["categorize", "--ledger", str(tmp_path)]
+
+    dry = entrypoints.run_served_command(command + ["--dry-run"])
+    output = entrypoints.run_served_command(command)
+    summary = entrypoints.run_served_command(
+        ["ledger", "--ledger", str(tmp_path), "--category", "fuel"]
+    )
+
+    assert dry is not None
+    assert dry.startswith("Would categorize 4 of 6 transactions with 5 rules")
+    assert output is not None
+    assert output.startswith("Categorized 4 of 6 transactions")
+    assert ["shopping", "1"] in [line.split() for line in output.splitlines()]
+    assert Ledger.load(tmp_path)[5].category == "shopping"
+    assert summary is not None
+    assert summary.splitlines()[:2] == [
+        "Transactions: 1 of 6",
+        "Total: -30.00",
+    ]
+
+
+@maintain_log
+def test_categorize_command_without_rules(tmp_path):
+    output = entrypoints.run_served_command(
+        ["categorize", "--ledger", str(tmp_path)]
+    )
+
+    assert output is not None
+    assert output.startswith("Categorize failed: Cannot read rules")
@@ -0,0 +1,238 @@
+"""Tests written for the duplicate transaction index of pfts."""
+
+import datetime
+import pathlib
+
+import pytest
+
+from pfts.ledger import Ledger, dedup, importers, to_days
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+JANUARY = """Date,Description,Amount
+2024-01-05,COFFEE SHOP #12,-4.50
+2024-01-05,COFFEE SHOP #12,-4.50
+2024-01-09,PAYROLL,2500.00
+"""
+
+# Overlaps JANUARY: the coffee is already known, the payroll posted a day
+# later under another description, and the grocer is new.
+OVERLAP = """Date,Description,Amount
+2024-01-05,Coffee Shop #12,-4.50
+2024-01-10,PAYROLL ACME CORP,2500.00
+2024-01-12,GROCER,-20.00
+"""
+
+
+def day(text: str) -> int:
+    """Day number of an ISO date."""
+    return to_days(datetime.date.fromisoformat(text))
+
+
+def write(tmp_path: pathlib.Path, name: str, content: str) -> pathlib.Path:
+    """Write a statement into the test folder."""
+    filepath = tmp_path / name
+    filepath.write_text(content, encoding="utf8")
+    return filepath
+
+
+def indexed_ledger() -> tuple[Ledger, dedup.DedupIndex]:
+    """Ledger holding the January statement, and its index."""
+    ledger = Ledger()
+    ledger.extend(
+        [
+            (day("2024-01-05"), -450, "checking", "", "COFFEE SHOP #12"),
+            (day("2024-01-05"), -450, "checking", "", "COFFEE SHOP #12"),
+            (day("2024-01-09"), 250000, "checking", "", "PAYROLL"),
+        ]
+    )
+    index = dedup.DedupIndex(ledger)
+    index.update()
+    return ledger, index
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("  COFFEE   Shop #12 ", "coffee shop 12"),
+        ("AMZN_Mktp*US", "amzn mktp us"),
+        ("", ""),
+    ],
+)
+def test_normalize_description(text: str, expected: str):
+    assert dedup.normalize_description(text) == expected
+
+
+@maintain_log
+def test_hash_index_keeps_rows_across_compaction(monkeypatch):
+    monkeypatch.setattr(dedup, "PENDING_LIMIT", 4)
+    index = dedup.HashIndex()
+
+    index.add([5, 3, 5], 0)
+    assert index.pending_count == 3
+    index.add([1, 5], 3)
+
+    assert not index.pending
+    assert list(index.keys) == [1, 3, 5, 5, 5]
+    assert list(index.find(5)) == [0, 2, 4]
+    assert list(index.find(2)) == []
+
+
+@maintain_log
+def test_screen_matches_exact_rows_once():
+    _, index = indexed_ledger()
+    row = (day("2024-01-05"), -450, "checking", "", "Coffee  shop #12")
+
+    matches = index.screen([row, row, row], set())
+
+    assert matches[:2] == [dedup.Match(0, False), dedup.Match(1, False)]
+    assert matches[2] is None
+
+
+@maintain_log
+def test_screen_matches_fuzzy_rows_within_the_window():
+    _, index = indexed_ledger()
+    rows = [
+        (day("2024-01-11"), 250000, "checking", "", "PAYROLL ACME"),
+        (day("2024-01-13"), 250000, "checking", "", "PAYROLL ACME"),
+        (day("2024-01-09"), 250000, "savings", "", "PAYROLL"),
+        (day("2024-01-09"), 250001, "checking", "", "PAYROLL"),
+        (day("2024-01-09"), 250000, "checking", "", "RENT"),
+    ]
+
+    matches = index.screen(rows, set())
+
+    assert matches == [dedup.Match(2, True), None, None, None, None]
+
+
+@maintain_log
+def test_index_persists_and_catches_up(tmp_path):
+    ledger, index = indexed_ledger()
+    index.save(tmp_path)
+    ledger.append(day("2024-01-20"), -999, "checking", "", "GROCER")
+
+    loaded = dedup.DedupIndex.load(tmp_path, ledger)
+    rows = [(day("2024-01-20"), -999, "checking", "", "grocer")]
+    matches = loaded.screen(rows, set())
+
+    assert loaded.indexed == 4
+    assert list(loaded.exact.keys) == sorted(loaded.exact.keys)
+    assert matches == [dedup.Match(3, False)]
+
+
+@maintain_log
+def test_index_rebuilds_for_another_window(tmp_path):
+    ledger, index = indexed_ledger()
+    index.save(tmp_path)
+
+    loaded = dedup.DedupIndex.load(tmp_path, ledger, window=7)
+    rows = [(day("2024-01-15"), 250000, "checking", "", "PAYROLL")]
+
+    assert loaded.indexed == 3
+    assert loaded.screen(rows, set()) == [dedup.Match(2, True)]
+
+
+@maintain_log
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_files_skips_overlap(tmp_path, workers: int):
+    statements = [
+        write(tmp_path, "checking.csv", JANUARY),
+        write(tmp_path, "checking-2.csv", OVERLAP),
+    ]
+    ledger = Ledger()
+    index = dedup.DedupIndex(ledger)
+
+    stats = importers.import_files(
+        ledger, statements, account="checking", workers=workers, index=index
+    )
+
+    assert (stats.rows, stats.duplicates) == (4, 2)
+    assert [row.description for row in ledger.rows()] == [
+        "COFFEE SHOP #12",
+        "COFFEE SHOP #12",
+        "PAYROLL",
+        "GROCER",
+    ]
+
+
+@maintain_log
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_files_needs_an_account_to_dedup(tmp_path, workers: int):
+    statements = [
+        write(tmp_path, "jan.csv", JANUARY),
+        write(tmp_path, "feb.csv", OVERLAP),
+    ]
+    ledger = Ledger()
+    index = dedup.DedupIndex(ledger)
+
+    with pytest.raises(importers.StatementError, match="--account"):
+        importers.import_files(
+            ledger, statements, workers=workers, index=index
+        )
+    kept = importers.import_files(Ledger(), statements, workers=workers)
+
+    assert len(ledger) == 0
+    assert kept.rows == 6
+
+
+@maintain_log
+def test_import_command_skips_reimports(tmp_path):
+    statement = write(tmp_path, "checking.csv", JANUARY)
+    overlap = write(tmp_path, "checking-2.csv", OVERLAP)
+    ledger_dir = tmp_path / "ledger"
+    command = ["import", "--ledger", str(ledger_dir), "--account", "checking"]
+
+    entrypoints.run_served_command(command + [str(statement)])
+    again = entrypoints.run_served_command(command + [str(overlap)])
+    kept = entrypoints.run_served_command(
+        command + ["--keep-duplicates", str(statement)]
+    )
+
+    assert again is not None and "skipped 2 duplicates" in again
+    assert kept is not None and "skipped 0 duplicates" in kept
+    assert (ledger_dir / dedup.INDEX_FILE).exists()
+    assert len(Ledger.load(ledger_dir)) == 7
+
+
+@maintain_log
+def test_dedup_command_reports_matches(tmp_path):
+    statement = write(tmp_path, "checking.csv", JANUARY)
+    overlap = write(tmp_path, "checking-2.csv", OVERLAP)
+    ledger_dir = tmp_path / "ledger"
+    entrypoints.run_served_command(
+        ["import", "--ledger", str(ledger_dir), "--account", "checking"]
+        + [str(statement)]
+    )
+
+    output = entrypoints.run_served_command(
+        [
+            "dedup",
+            "--ledger",
+            str(ledger_dir),
+            "--account",
+            "checking",
+            "--rebuild",
+            str(overlap),
+        ]
+    )
+
+    assert output is not None
+    assert output.startswith("Index covers 3 transactions")
+    assert output.endswith(
+        "2 of 3 transactions already in the ledger (1 exact, 1 fuzzy)."
+    )
+
+
+@maintain_log
+def test_reindex_follows_edits(tmp_path):
+    ledger, index = indexed_ledger()
+    ledger.edit(2, cents=260000)
+    index.reindex(2)
+    index.save(tmp_path)
+
+    loaded = dedup.DedupIndex.load(tmp_path, ledger)
+    old = (day("2024-01-09"), 250000, "checking", "", "PAYROLL")
+    new = (day("2024-01-09"), 260000, "checking", "", "PAYROLL")
+
+    assert loaded.screen([old, new], set()) == [None, dedup.Match(2, False)]
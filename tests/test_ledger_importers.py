@@ -0,0 +1,259 @@
+"""Tests written for the bank statement importer of pfts."""
+
+import csv
+import datetime
+import pathlib
+
+import pytest
+
+from pfts.ledger import Ledger, Transaction, importers, to_days
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+# Starts with a byte order mark, as spreadsheet exports often do.
+CSV_STATEMENT = (
+    "\ufeff"
+    + """Date,Description,Amount,Category
+2024-01-05,  COFFEE   SHOP ,-4.50,dining
+01/06/2024,PAYROLL,"2,500.00",
+
+2024-01-07,GROCER,(12.34),groceries
+"""
+)
+
+DEBIT_CREDIT_STATEMENT = """Posted Date,Payee,Debit,Credit
+2024-02-01,RENT,1200.00,
+2024-02-02,REFUND,,15.5
+"""
+
+OFX_TRANSACTION = """<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[-5:EST]
+<TRNAMT>-4.50
+<NAME>COFFEE SHOP
+</STMTTRN>
+"""
+
+OFX_STATEMENT = (
+    "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>\n"
+    "<BANKACCTFROM><ACCTID>123456789\n</BANKACCTFROM>\n<BANKTRANLIST>\n"
+    + OFX_TRANSACTION * 3
+    + "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+)
+
+
+def write(tmp_path: pathlib.Path, name: str, content: str) -> pathlib.Path:
+    """Write a statement into the test folder."""
+    filepath = tmp_path / name
+    filepath.write_text(content, encoding="utf8")
+    return filepath
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("-12.34", -1234),
+        ("$1,234.5", 123450),
+        ("(12.34)", -1234),
+        ("12.34-", -1234),
+        ("+7", 700),
+        (".5", 50),
+    ],
+)
+def test_parse_cents(text: str, expected: int):
+    assert importers.parse_cents(text) == expected
+
+
+@maintain_log
+@pytest.mark.parametrize("text", ["", "abc", "1.234", "1.2.3"])
+def test_parse_cents_rejects_bad_amounts(text: str):
+    with pytest.raises(ValueError):
+        importers.parse_cents(text)
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "text", ["2024-01-05", "01/05/2024", "01/05/24", "20240105120000[-5:EST]"]
+)
+def test_parse_day(text: str):
+    assert importers.parse_day(text) == to_days(datetime.date(2024, 1, 5))
+
+
+@maintain_log
+def test_import_csv(tmp_path):
+    statement = write(tmp_path, "checking.csv", CSV_STATEMENT)
+    ledger = Ledger()
+
+    assert importers.import_file(ledger, statement) == 3
+    assert list(ledger.rows()) == [
+        Transaction(
+            datetime.date(2024, 1, 5),
+            -450,
+            "checking",
+            "dining",
+            "COFFEE SHOP",
+        ),
+        Transaction(
+            datetime.date(2024, 1, 6), 250000, "checking", "", "PAYROLL"
+        ),
+        Transaction(
+            datetime.date(2024, 1, 7), -1234, "checking", "groceries", "GROCER"
+        ),
+    ]
+
+
+@maintain_log
+def test_import_csv_debit_credit(tmp_path):
+    statement = write(tmp_path, "card.csv", DEBIT_CREDIT_STATEMENT)
+    ledger = Ledger()
+
+    importers.import_file(ledger, statement, account="visa")
+
+    assert [(row.amount, row.account) for row in ledger.rows()] == [
+        (-120000, "visa"),
+        (1550, "visa"),
+    ]
+
+
+@maintain_log
+def test_import_csv_missing_columns(tmp_path):
+    statement = write(tmp_path, "bad.csv", "When,What\n2024-01-01,x\n")
+
+    with pytest.raises(importers.StatementError):
+        importers.import_file(Ledger(), statement)
+
+
+@maintain_log
+def test_import_csv_in_another_encoding(tmp_path):
+    statement = tmp_path / "cp1252.csv"
+    statement.write_bytes(b"Date,Description,Amount\n2024-01-05,Caf\xe9,-4\n")
+    ledger = Ledger()
+
+    assert importers.import_file(ledger, statement, account="card") == 1
+    assert ledger[0].description == "Caf\ufffd"
+
+
+@maintain_log
+def test_import_command_rejects_malformed_csv(tmp_path):
+    field = "x" * (csv.field_size_limit() + 1)
+    statement = write(
+        tmp_path,
+        "big.csv",
+        f'Date,Description,Amount\n2024-01-05,"{field}",1\n',
+    )
+    ledger_dir = tmp_path / "ledger"
+
+    with pytest.raises(importers.StatementError, match="line 2"):
+        importers.import_file(Ledger(), statement, account="card")
+    output = entrypoints.run_served_command(
+        ["import", "--ledger", str(ledger_dir), "--account", "card"]
+        + [str(statement)]
+    )
+
+    assert output is not None
+    assert output.startswith("Import failed")
+    assert not ledger_dir.exists()
+
+
+@maintain_log
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 16])
+def test_import_ofx_across_chunks(tmp_path, monkeypatch, chunk_size: int):
+    monkeypatch.setattr(importers, "CHUNK_SIZE", chunk_size)
+    statement = write(tmp_path, "bank.qfx", OFX_STATEMENT)
+    ledger = Ledger()
+
+    assert importers.import_file(ledger, statement) == 3
+    assert set(ledger.rows()) == {
+        Transaction(
+            datetime.date(2024, 1, 5), -450, "123456789", "", "COFFEE SHOP"
+        )
+    }
+
+
+@maintain_log
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 16])
+def test_import_ofx_with_several_accounts(
+    tmp_path, monkeypatch, chunk_size: int
+):
+    monkeypatch.setattr(importers, "CHUNK_SIZE", chunk_size)
+    statement = write(
+        tmp_path,
+        "accounts.ofx",
+        "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS>\n"
+        "<STMTRS><BANKACCTFROM><ACCTID>111\n</BANKACCTFROM><BANKTRANLIST>\n"
+        + OFX_TRANSACTION
+        + "</BANKTRANLIST></STMTRS></STMTTRNRS><STMTTRNRS>\n"
+        "<STMTRS><BANKACCTFROM><ACCTID>222\n</BANKACCTFROM><BANKTRANLIST>\n"
+        + OFX_TRANSACTION
+        * 2
+        + "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>\n"
+        "<CREDITCARDMSGSRSV1><CCSTMTTRNRS><CCSTMTRS>\n"
+        "<CCACCTFROM><ACCTID>333</ACCTID></CCACCTFROM><BANKTRANLIST>\n"
+        + OFX_TRANSACTION
+        + "</BANKTRANLIST></CCSTMTRS></CCSTMTTRNRS></CREDITCARDMSGSRSV1>"
+        "</OFX>\n",
+    )
+
+    assert [record.account for record in importers.read_ofx(statement)] == [
+        "111",
+        "222",
+        "222",
+        "333",
+    ]
+
+
+@maintain_log
+def test_detect_format_from_content(tmp_path):
+    assert importers.detect_format(
+        write(tmp_path, "a.txt", OFX_STATEMENT)
+    ) == ("ofx")
+    assert importers.detect_format(
+        write(tmp_path, "b.txt", CSV_STATEMENT)
+    ) == ("csv")
+
+
+@maintain_log
+def test_import_files_in_parallel_keeps_order(tmp_path):
+    statements = [
+        write(tmp_path, "checking.csv", CSV_STATEMENT),
+        write(tmp_path, "card.csv", DEBIT_CREDIT_STATEMENT),
+        write(tmp_path, "bank.ofx", OFX_STATEMENT),
+    ]
+    serial, parallel = Ledger(), Ledger()
+
+    importers.import_files(serial, statements)
+    stats = importers.import_files(parallel, statements, workers=2)
+
+    assert stats.files == 3
+    assert stats.rows == 8
+    assert list(parallel.rows()) == list(serial.rows())
+
+
+@maintain_log
+def test_import_command(tmp_path):
+    statement = write(tmp_path, "checking.csv", CSV_STATEMENT)
+    ledger_dir = tmp_path / "ledger"
+
+    output = entrypoints.run_served_command(
+        ["import", "--ledger", str(ledger_dir), "--account", "checking"]
+        + [str(statement)]
+    )
+
+    assert output is not None
+    assert output.startswith("Imported 3 transactions from 1 files")
+    assert len(Ledger.load(ledger_dir)) == 3
+
+
+@maintain_log
+def test_import_command_failure_keeps_ledger(tmp_path):
+    statement = write(tmp_path, "bad.csv", "Date,Description,Amount\nx,y,z\n")
+    ledger_dir = tmp_path / "ledger"
+
+    output = entrypoints.run_served_command(
+        ["import", "--ledger", str(ledger_dir), str(statement)]
+    )
+
+    assert output is not None
+    assert output.startswith("Import failed")
+    assert not ledger_dir.exists()
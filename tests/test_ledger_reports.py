@@ -0,0 +1,138 @@
+"""Tests written for the ledger reports of pfts."""
+
+import datetime
+import json
+
+import pytest
+
+from pfts.ledger import Ledger, reports, to_days
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+
+def day(text: str) -> int:
+    """Day number of an ISO date."""
+    return to_days(datetime.date.fromisoformat(text))
+
+
+def sample_ledger() -> Ledger:
+    """Ledger with two months of spending in a few categories."""
+    ledger = Ledger()
+    ledger.extend(
+        [
+            (day("2024-01-03"), -4000, "checking", "groceries", "GROCER"),
+            (day("2024-01-20"), -2500, "card", "groceries", "MARKET"),
+            (day("2024-01-25"), 500, "card", "groceries", "REFUND"),
+            (day("2024-01-31"), 250000, "checking", "", "PAYROLL"),
+            (day("2024-03-02"), -12000, "card", "dining", "BISTRO"),
+            (day("2024-03-09"), -7000, "checking", "groceries", "GROCER"),
+        ]
+    )
+    return ledger
+
+
+@maintain_log
+def test_category_month_totals():
+    ledger = sample_ledger()
+    pool = ledger.pools["category"]
+    january = 2024 * 12
+
+    totals = reports.category_month_totals(ledger)
+
+    assert totals == {
+        (pool.codes[""], january): 250000,
+        (pool.codes["groceries"], january): -6000,
+        (pool.codes["groceries"], january + 2): -7000,
+        (pool.codes["dining"], january + 2): -12000,
+    }
+
+
+@maintain_log
+def test_category_month_totals_with_mask():
+    ledger = sample_ledger()
+    mask = ledger.select(accounts=["card"])
+
+    totals = reports.category_month_totals(ledger, mask)
+
+    assert sorted(totals.values()) == [-12000, -2000]
+    assert reports.category_month_totals(Ledger()) == {}
+
+
+@maintain_log
+def test_budget_report_fills_every_month():
+    budget = {"groceries": 5000, "rent": 120000}
+
+    lines = reports.budget_report(sample_ledger(), budget)
+
+    assert [line.month for line in lines] == (
+        ["2024-01"] * 3 + ["2024-02"] * 2 + ["2024-03"] * 3
+    )
+    assert lines[0] == reports.BudgetLine("2024-01", "groceries", 5000, 6000)
+    assert lines[0].remaining == -1000
+    assert lines[2] == reports.BudgetLine(
+        "2024-01", "uncategorized", None, -250000
+    )
+    assert lines[3] == reports.BudgetLine("2024-02", "groceries", 5000, 0)
+    assert lines[7] == reports.BudgetLine("2024-03", "dining", None, 12000)
+
+
+@maintain_log
+def test_budget_report_filters():
+    lines = reports.budget_report(
+        sample_ledger(),
+        {"groceries": 5000, "dining": 10000},
+        since=datetime.date(2024, 3, 1),
+        until=datetime.date(2024, 4, 30),
+        categories=["dining"],
+    )
+
+    assert lines == [
+        reports.BudgetLine("2024-03", "dining", 10000, 12000),
+        reports.BudgetLine("2024-04", "dining", 10000, 0),
+    ]
+
+
+@maintain_log
+@pytest.mark.parametrize("content", ["[1, 2]", '{"food": "abc"}', "{"])
+def test_load_budget_rejects_bad_files(tmp_path, content: str):
+    budget_file = tmp_path / "budget.json"
+    budget_file.write_text(content, encoding="utf8")
+
+    with pytest.raises(reports.BudgetError):
+        reports.load_budget(budget_file)
+
+
+@maintain_log
+def test_report_budget_command(tmp_path):
+    sample_ledger().save(tmp_path)
+    budget_file = tmp_path / reports.BUDGET_FILE
+    budget_file.write_text('{"groceries": "50", "dining": 100}')
+    command = ["report", "budget", "--ledger", str(tmp_path)]
+
+    table = entrypoints.run_served_command(command + ["--since", "2024-03-01"])
+    output = entrypoints.run_served_command(command + ["--format", "json"])
+
+    assert table is not None
+    assert table.splitlines() == [
+        "Month    Category   Budget  Actual  Remaining",
+        "2024-03  groceries   50.00   70.00     -20.00",
+        "2024-03  dining     100.00  120.00     -20.00",
+    ]
+    assert output is not None
+    assert json.loads(output)[0] == {
+        "month": "2024-01",
+        "category": "groceries",
+        "budget": "50.00",
+        "actual": "60.00",
+        "remaining": "-10.00",
+    }
+
+
+@maintain_log
+def test_report_budget_command_without_budget(tmp_path):
+    output = entrypoints.run_served_command(
+        ["report", "budget", "--ledger", str(tmp_path)]
+    )
+
+    assert output is not None
+    assert output.startswith("Report failed: Cannot read budget")
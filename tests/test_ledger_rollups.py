@@ -0,0 +1,240 @@
+"""Tests written for the materialized aggregates of pfts."""
+
+import datetime
+import random
+
+import pytest
+
+from pfts.ledger import Ledger, dedup, rollups, to_days
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+ACCOUNTS = ["checking", "card", "savings"]
+CATEGORIES = ["", "groceries", "rent", "dining"]
+
+
+def random_ledger(rows: int, seed: int = 7) -> Ledger:
+    """Ledger of random transactions over two years, in random order."""
+    rng = random.Random(seed)
+    ledger = Ledger()
+    ledger.extend(
+        (
+            19700 + rng.randrange(730),
+            rng.randrange(-20000, 5000),
+            rng.choice(ACCOUNTS),
+            rng.choice(CATEGORIES),
+            f"SHOP {rng.randrange(20)}",
+        )
+        for _ in range(rows)
+    )
+    return ledger
+
+
+FILTERS = [
+    {},
+    {"since": datetime.date(2024, 3, 15)},
+    {"until": datetime.date(2024, 2, 29), "accounts": ["card"]},
+    {
+        "since": datetime.date(2024, 1, 1),
+        "until": datetime.date(2024, 12, 31),
+        "categories": ["rent", "dining", "unknown"],
+    },
+    {"accounts": ["nobody"]},
+]
+
+
+def assert_matches_ledger(totals: rollups.Rollups, ledger: Ledger) -> None:
+    """Check the rollups against aggregations over the raw columns."""
+    for filters in FILTERS:
+        mask = ledger.select(**filters)
+        count = len(ledger) if mask is None else mask.count(1)
+
+        assert totals.totals(**filters) == (ledger.total(mask), count)
+        for by in ("account", "category", "month"):
+            assert totals.group_totals(by, **filters) == (
+                ledger.group_totals(by, mask)
+            )
+
+
+@maintain_log
+def test_series_inserts_out_of_order_days():
+    series = rollups.Series()
+    for day, cents in [(10, 5), (12, 7), (10, 1), (11, 2), (3, 100)]:
+        series.add(day, cents)
+
+    assert list(series.days) == [3, 10, 11, 12]
+    assert series.range_total() == (115, 5)
+    assert series.range_total(10, 11) == (8, 3)
+    assert series.range_total(13) == (0, 0)
+
+    series.add(11, -2, -1)
+    assert series.valid == 2
+    assert series.range_total(4, 11) == (6, 2)
+
+
+@maintain_log
+def test_rollups_match_the_ledger():
+    ledger = random_ledger(2000)
+    totals = rollups.Rollups(ledger)
+    totals.update()
+
+    assert_matches_ledger(totals, ledger)
+    assert totals.balance("card") == ledger.total(
+        ledger.select(accounts=["card"])
+    )
+
+
+@maintain_log
+def test_rollups_follow_appends_and_edits():
+    ledger = random_ledger(1000)
+    totals = rollups.Rollups(ledger)
+    totals.update()
+    totals.totals()
+
+    ledger.merge(random_ledger(200, seed=8))
+    assert totals.update() == 200
+
+    old = ledger.edit(
+        3, day=19650, cents=123, account="savings", category="rent"
+    )
+    totals.apply_edit(3, old)
+
+    assert_matches_ledger(totals, ledger)
+
+
+@maintain_log
+def test_edit_only_invalidates_later_days():
+    ledger = random_ledger(500)
+    totals = rollups.Rollups(ledger)
+    totals.update()
+    totals.totals()
+    row = ledger.raw(10)
+    series = totals.series[row[2], row[3]]
+
+    totals.apply_edit(10, ledger.edit(10, cents=row[1] + 1))
+
+    assert series.valid == list(series.days).index(row[0])
+    assert all(
+        other.valid == len(other.days)
+        for other in totals.series.values()
+        if other is not series
+    )
+
+
+@maintain_log
+def test_rollups_persist_and_catch_up(tmp_path):
+    ledger = random_ledger(300)
+    totals = rollups.Rollups(ledger)
+    totals.update()
+    totals.save(tmp_path)
+    ledger.append(19800, -999, "card", "dining", "BISTRO")
+
+    loaded = rollups.Rollups.load(tmp_path, ledger)
+
+    assert loaded.indexed == 301
+    assert loaded.dirty
+    assert_matches_ledger(loaded, ledger)
+
+
+@maintain_log
+def test_rollups_rebuild_after_unknown_edits(tmp_path):
+    ledger = random_ledger(300)
+    totals = rollups.Rollups(ledger)
+    totals.update()
+    totals.save(tmp_path)
+    ledger.edit(0, cents=10**6)
+
+    loaded = rollups.Rollups.load(tmp_path, ledger)
+
+    assert_matches_ledger(loaded, ledger)
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "key, expected",
+    [
+        (
+            2024 * 12 + 1,
+            (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)),
+        ),
+        (
+            2023 * 12 + 11,
+            (datetime.date(2023, 12, 1), datetime.date(2023, 12, 31)),
+        ),
+    ],
+)
+def test_month_bounds(key: int, expected: tuple):
+    assert rollups.month_bounds(key) == tuple(map(to_days, expected))
+
+
+@maintain_log
+def test_balance_and_edit_commands(tmp_path):
+    ledger = Ledger()
+    ledger.extend(
+        [
+            (
+                to_days(datetime.date(2024, 1, 1)),
+                100000,
+                "checking",
+                "",
+                "PAY",
+            ),
+            (
+                to_days(datetime.date(2024, 1, 9)),
+                -2500,
+                "checking",
+                "",
+                "FOOD",
+            ),
+            (to_days(datetime.date(2024, 1, 5)), -700, "card", "", "GAS"),
+        ]
+    )
+    ledger.save(tmp_path)
+    command = ["--ledger", str(tmp_path)]
+
+    before = entrypoints.run_served_command(
+        ["balance", *command, "--as-of", "2024-01-08"]
+    )
+    edited = entrypoints.run_served_command(
+        ["edit", *command, "1", "--amount", "-30.00", "--date", "2024-01-02"]
+    )
+    after = entrypoints.run_served_command(
+        ["balance", *command, "--as-of", "2024-01-08"]
+    )
+    failed = entrypoints.run_served_command(["edit", *command, "9"])
+
+    assert before is not None and before.splitlines() == [
+        "checking         1000.00",
+        "card               -7.00",
+        "Total             993.00",
+    ]
+    assert edited is not None and edited.startswith("Row 1: ")
+    assert after is not None and after.splitlines()[0] == (
+        "checking          970.00"
+    )
+    assert failed == "Edit failed: No transaction at row 9"
+    assert Ledger.load(tmp_path).edits == 1
+    assert (tmp_path / rollups.ROLLUPS_FILE).exists()
+    assert dedup.DedupIndex.load(tmp_path, Ledger.load(tmp_path)).indexed == 3
+
+
+@maintain_log
+def test_balance_command_aligns_short_account_names(tmp_path):
+    ledger = Ledger()
+    ledger.extend(
+        [
+            (to_days(datetime.date(2024, 1, 1)), 1000, "a", "", "PAY"),
+            (to_days(datetime.date(2024, 1, 2)), -250, "bc", "", "FOOD"),
+        ]
+    )
+    ledger.save(tmp_path)
+
+    output = entrypoints.run_served_command(
+        ["balance", "--ledger", str(tmp_path)]
+    )
+
+    assert output is not None and output.splitlines() == [
+        "a               10.00",
+        "bc              -2.50",
+        "Total            7.50",
+    ]
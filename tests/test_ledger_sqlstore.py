@@ -0,0 +1,220 @@
+"""Tests written for the SQLite backed ledger of pfts."""
+
+import datetime
+import json
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pfts.ledger import Ledger, sqlstore, to_days
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+ACCOUNTS = ["checking", "savings", "credit"]
+CATEGORIES = ["groceries", "rent", "dining", ""]
+
+
+def random_ledger(rows: int, seed: int = 3) -> Ledger:
+    """Ledger of random transactions over two years."""
+    rng = random.Random(seed)
+    start = to_days(datetime.date(2023, 1, 1))
+    ledger = Ledger()
+    ledger.extend(
+        (
+            start + rng.randrange(730),
+            rng.randrange(-20_000, 5_000),
+            rng.choice(ACCOUNTS),
+            rng.choice(CATEGORIES),
+            f"SHOP {rng.randrange(50)}",
+        )
+        for _ in range(rows)
+    )
+    return ledger
+
+
+@pytest.fixture
+def database(tmp_path):
+    """SQLite ledger in a temporary folder, closed after the test."""
+    with sqlstore.SqliteLedger(tmp_path / sqlstore.SQLITE_FILE) as database:
+        yield database
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"since": datetime.date(2023, 6, 1)},
+        {"until": datetime.date(2023, 3, 31), "accounts": ["credit"]},
+        {"categories": ["rent", ""], "accounts": ["checking", "savings"]},
+        {"accounts": []},
+    ],
+)
+def test_queries_match_ledger(database, filters: dict):
+    ledger = random_ledger(2000)
+    database.sync(ledger)
+    mask = ledger.select(**filters)
+
+    assert database.totals(**filters) == (
+        ledger.total(mask),
+        len(ledger) if mask is None else sum(mask),
+    )
+    for by in ("account", "category", "month"):
+        assert database.group_totals(by, **filters) == ledger.group_totals(
+            by, mask
+        )
+
+
+@maintain_log
+def test_balance(database):
+    ledger = random_ledger(500)
+    database.sync(ledger)
+    as_of = datetime.date(2023, 9, 30)
+
+    expected = ledger.total(ledger.select(until=as_of, accounts=["savings"]))
+
+    assert database.balance("savings", as_of) == expected
+    assert database.balance("missing") == 0
+
+
+@maintain_log
+def test_sync_appends_then_rebuilds_after_edits(database):
+    ledger = random_ledger(300)
+
+    assert database.sync(ledger) == 300
+    assert database.sync(ledger) == 0
+
+    ledger.append(to_days(datetime.date(2025, 1, 1)), -100, "cash", "", "ATM")
+    assert database.sync(ledger) == 1
+    assert database.query(
+        "SELECT id, date, account FROM transactions WHERE account = ?",
+        ["cash"],
+    )[1] == [(300, "2025-01-01", "cash")]
+
+    ledger.edit(0, category="fixed")
+    assert database.sync(ledger) == 301
+    assert len(database) == 301
+    assert database.totals(categories=["fixed"])[1] == 1
+
+
+@maintain_log
+def test_extend(database):
+    added = database.extend(
+        [
+            (to_days(datetime.date(2024, 1, 5)), -1250, "a", "food", "X"),
+            (to_days(datetime.date(2024, 1, 6)), 900, "a", "", "Y"),
+        ]
+    )
+    database.extend([(to_days(datetime.date(2024, 2, 1)), 5, "b", "", "Z")])
+
+    assert added == 2
+    assert len(database) == 3
+    assert database.group_totals("month") == {"2024-01": -350, "2024-02": 5}
+
+
+@maintain_log
+def test_sync_replaces_extended_rows(database):
+    ledger = random_ledger(50)
+    database.sync(ledger)
+    database.extend([(to_days(datetime.date(2025, 1, 1)), 5, "b", "", "Z")])
+    ledger.append(to_days(datetime.date(2025, 1, 2)), -100, "cash", "", "ATM")
+
+    assert database.sync(ledger) == 51
+    assert len(database) == 51
+    assert database.totals() == (ledger.total(), 51)
+
+
+@maintain_log
+def test_concurrent_syncs_copy_rows_once(tmp_path):
+    ledger = random_ledger(2000)
+    path = tmp_path / sqlstore.SQLITE_FILE
+    databases = [sqlstore.SqliteLedger(path) for _ in range(4)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            copied = list(executor.map(lambda db: db.sync(ledger), databases))
+        totals = databases[0].totals()
+    finally:
+        for database in databases:
+            database.close()
+
+    assert sorted(copied) == [0, 0, 0, 2000]
+    assert totals == (ledger.total(), 2000)
+
+
+@maintain_log
+def test_wal_mode_and_covering_indexes(database):
+    database.sync(random_ledger(100))
+
+    _, mode = database.query("PRAGMA journal_mode")
+    _, plan = database.query(
+        "EXPLAIN QUERY PLAN SELECT sum(amount) FROM transactions "
+        "WHERE account = ? AND date <= ?",
+        ["credit", "2023-06-01"],
+    )
+
+    assert mode == [("wal",)]
+    assert "COVERING INDEX by_account" in plan[0][-1]
+
+
+@maintain_log
+def test_queries_are_read_only(database):
+    database.sync(random_ledger(10))
+
+    with pytest.raises(sqlite3.OperationalError):
+        database.query("DELETE FROM transactions")
+
+    assert len(database) == 10
+
+
+@maintain_log
+def test_pool_shares_connections_between_threads(database):
+    database.sync(random_ledger(1000))
+    barrier = threading.Barrier(4)
+
+    def query(number: int) -> int:
+        with database.pool.connection() as connection:
+            barrier.wait(timeout=10)
+            return connection.execute(
+                "SELECT count(*) FROM transactions WHERE id % 4 = ?", [number]
+            ).fetchone()[0]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        counts = list(executor.map(query, range(4)))
+        totals = list(executor.map(lambda _: database.totals(), range(50)))
+
+    assert counts == [250, 250, 250, 250]
+    assert database.pool.opened == sqlstore.DEFAULT_READERS
+    assert set(totals) == {database.totals()}
+    with pytest.raises(ValueError):
+        sqlstore.ConnectionPool(database.path, 0)
+
+
+@maintain_log
+def test_sql_command(tmp_path):
+    random_ledger(200).save(tmp_path)
+    query = (
+        "SELECT account, count(*) AS n FROM transactions "
+        "GROUP BY account ORDER BY account"
+    )
+
+    table = entrypoints.run_served_command(
+        ["sql", "--ledger", str(tmp_path), query]
+    )
+    rows = entrypoints.run_served_command(
+        ["sql", "--ledger", str(tmp_path), "--format", "json", query]
+    )
+    failed = entrypoints.run_served_command(
+        ["sql", "--ledger", str(tmp_path), "DROP TABLE transactions"]
+    )
+
+    assert table is not None
+    assert table.splitlines()[0].split() == ["account", "n"]
+    assert table.splitlines()[1].split()[0] == "checking"
+    assert rows is not None
+    assert sum(row["n"] for row in json.loads(rows)) == 200
+    assert failed is not None
+    assert failed.startswith("SQL failed: attempt to write a readonly")
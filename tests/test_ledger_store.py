@@ -0,0 +1,368 @@
+"""Tests written for the columnar transaction store of pfts."""
+
+import datetime
+import json
+import threading
+from array import array
+
+import pytest
+
+from pfts.ledger import (
+    Ledger,
+    LedgerConflictError,
+    Transaction,
+    columnfile,
+    format_cents,
+    from_days,
+    rollups,
+    to_days,
+)
+from pfts.util import entrypoints
+from pfts.util.files import file_lock
+from tests.util import maintain_log
+
+ROWS = [
+    (datetime.date(2024, 1, 5), -1250, "checking", "groceries", "MARKET"),
+    (datetime.date(2024, 1, 20), 250000, "checking", "income", "PAYROLL"),
+    (datetime.date(2024, 2, 3), -4599, "credit", "groceries", "MARKET"),
+    (datetime.date(2024, 2, 14), -8000, "credit", "", "RESTAURANT"),
+]
+
+
+def make_ledger() -> Ledger:
+    """Create a small ledger holding ROWS."""
+    ledger = Ledger()
+    ledger.extend((to_days(date), *rest) for date, *rest in ROWS)
+    return ledger
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "cents, expected",
+    [(0, "0.00"), (5, "0.05"), (-123456, "-1234.56"), (100, "1.00")],
+)
+def test_format_cents(cents: int, expected: str):
+    assert format_cents(cents) == expected
+
+
+@maintain_log
+def test_days_round_trip():
+    date = datetime.date(1969, 12, 31)
+    assert to_days(date) == -1
+    assert from_days(to_days(date)) == date
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "bad_row",
+    [
+        (0, 1 << 63, "checking", "", "HUGE"),
+        (0, "12.50", "checking", "", "TEXT AMOUNT"),
+        (0, 100, None, "", "NO ACCOUNT"),
+    ],
+    ids=["overflow", "text_amount", "no_account"],
+)
+def test_extend_adds_nothing_on_a_bad_row(bad_row: tuple):
+    ledger = make_ledger()
+    good_row = (to_days(datetime.date(2024, 3, 1)), 100, "new", "", "NEW")
+
+    with pytest.raises((TypeError, OverflowError)):
+        ledger.extend([good_row, bad_row])
+
+    assert len(ledger) == len(ROWS)
+    assert {len(column) for column in ledger.columns.values()} == {len(ROWS)}
+    assert "new" not in ledger.pools["account"]
+    assert list(ledger.rows()) == [Transaction(*row) for row in ROWS]
+
+
+@maintain_log
+def test_rows_are_interned_columns():
+    ledger = make_ledger()
+
+    assert len(ledger) == 4
+    assert ledger[2] == Transaction(*ROWS[2])
+    assert list(ledger.columns["description"]) == [0, 1, 0, 2]
+    assert ledger.nbytes == 4 * 28
+
+
+@maintain_log
+def test_select_combines_conditions():
+    ledger = make_ledger()
+
+    mask = ledger.select(
+        since=datetime.date(2024, 1, 10), categories=["groceries", "income"]
+    )
+
+    assert [row.description for row in ledger.rows(mask)] == [
+        "PAYROLL",
+        "MARKET",
+    ]
+    assert ledger.total(mask) == 250000 - 4599
+
+
+@maintain_log
+def test_select_unknown_value_matches_nothing():
+    ledger = make_ledger()
+
+    assert ledger.total(ledger.select(accounts=["savings"])) == 0
+    assert ledger.select() is None
+
+
+@maintain_log
+def test_select_with_many_accounts():
+    """Pools too large for the byte translation use the generic path."""
+    ledger = Ledger()
+    ledger.extend((idx, idx, f"acct {idx}", "", "") for idx in range(300))
+
+    mask = ledger.select(accounts=["acct 3", "acct 299"])
+
+    assert [row.amount for row in ledger.rows(mask)] == [3, 299]
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "by, expected",
+    [
+        ("account", {"checking": 248750, "credit": -12599}),
+        ("category", {"": -8000, "groceries": -5849, "income": 250000}),
+        ("month", {"2024-01": 248750, "2024-02": -12599}),
+    ],
+)
+def test_group_totals(by: str, expected: dict):
+    assert make_ledger().group_totals(by) == expected
+
+
+@maintain_log
+def test_group_totals_with_mask():
+    ledger = make_ledger()
+    mask = ledger.select(accounts=["credit"])
+
+    assert ledger.group_totals("month", mask) == {"2024-02": -12599}
+
+
+@maintain_log
+def test_save_and_load(tmp_path):
+    ledger = make_ledger()
+    ledger.save(tmp_path)
+
+    loaded = Ledger.load(tmp_path)
+
+    assert list(loaded.rows()) == list(ledger.rows())
+    assert Ledger.load(tmp_path / "missing").nbytes == 0
+
+
+@maintain_log
+def test_load_maps_files(tmp_path):
+    make_ledger().save(tmp_path)
+
+    loaded = Ledger.load(tmp_path)
+
+    assert all(
+        isinstance(column, memoryview) for column in loaded.columns.values()
+    )
+    assert loaded.pools["description"][2] == "RESTAURANT"
+    assert loaded.pools["description"]._values is None
+    assert loaded.total() == 236151
+
+
+@maintain_log
+def test_save_appends_to_loaded_files(tmp_path):
+    make_ledger().save(tmp_path)
+    files = sorted(path.name for path in tmp_path.iterdir())
+
+    ledger = Ledger.load(tmp_path)
+    ledger.append(to_days(datetime.date(2024, 3, 1)), -99, "cash", "", "ATM")
+    ledger.save(tmp_path)
+    loaded = Ledger.load(tmp_path)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == files
+    assert len(loaded) == 5
+    assert loaded[4].account == "cash"
+    assert list(loaded.rows())[:4] == list(make_ledger().rows())
+
+
+@maintain_log
+def test_interrupted_save_is_ignored(tmp_path):
+    make_ledger().save(tmp_path)
+    # An append that never got to replace the metadata.
+    for filepath in tmp_path.glob("*.col"):
+        with open(filepath, "ab") as fout:
+            fout.write(b"\xff" * 64)
+
+    ledger = Ledger.load(tmp_path)
+    assert list(ledger.rows()) == list(make_ledger().rows())
+
+    ledger.append(to_days(datetime.date(2024, 3, 1)), -99, "cash", "", "ATM")
+    ledger.save(tmp_path)
+
+    assert Ledger.load(tmp_path)[4] == ledger[4]
+
+
+@maintain_log
+def test_concurrent_saves_do_not_lose_rows(tmp_path):
+    make_ledger().save(tmp_path)
+    first, second = Ledger.load(tmp_path), Ledger.load(tmp_path)
+
+    first.append(to_days(datetime.date(2024, 3, 1)), -99, "cash", "", "ATM")
+    first.save(tmp_path)
+    second.append(to_days(datetime.date(2024, 3, 2)), -5, "cash", "", "TIP")
+
+    with pytest.raises(LedgerConflictError):
+        second.save(tmp_path)
+    assert Ledger.load(tmp_path)[4].description == "ATM"
+
+
+@maintain_log
+def test_commands_wait_for_the_ledger_lock(tmp_path):
+    make_ledger().save(tmp_path)
+    outputs = []
+    command = threading.Thread(
+        target=lambda: outputs.append(
+            entrypoints.run_served_command(
+                ["edit", "0", "--ledger", str(tmp_path), "--amount", "-1"]
+            )
+        )
+    )
+
+    with file_lock(tmp_path):
+        command.start()
+        command.join(timeout=0.5)
+        assert command.is_alive()
+    command.join(timeout=10)
+
+    assert outputs and outputs[0].startswith("Row 0:")
+    assert Ledger.load(tmp_path)[0].amount == -100
+
+
+@maintain_log
+def test_edit_rewrites_only_edited_column(tmp_path):
+    make_ledger().save(tmp_path)
+    ledger = Ledger.load(tmp_path)
+
+    ledger.edit(0, cents=-1300)
+    ledger.save(tmp_path)
+    meta = json.loads((tmp_path / "meta.json").read_text(encoding="utf8"))
+
+    assert meta["columns"] == {
+        "date": 0,
+        "amount": 1,
+        "account": 0,
+        "category": 0,
+        "description": 0,
+    }
+    assert not (tmp_path / "amount-0.col").exists()
+    assert Ledger.load(tmp_path)[0].amount == -1300
+
+
+@maintain_log
+def test_load_damaged_file(tmp_path):
+    make_ledger().save(tmp_path)
+    (tmp_path / "amount-0.col").write_bytes(b"not a column")
+
+    with pytest.raises(columnfile.ColumnFileError):
+        Ledger.load(tmp_path)
+
+
+@maintain_log
+def test_load_rejects_unmapped_format(tmp_path):
+    meta = {"rows": 0, "pools": {}}
+    (tmp_path / "meta.json").write_text(json.dumps(meta), encoding="utf8")
+
+    with pytest.raises(columnfile.ColumnFileError):
+        Ledger.load(tmp_path)
+
+
+@maintain_log
+def test_compact_drops_unused_strings():
+    ledger = make_ledger()
+    rows = list(ledger.rows())
+    ledger.edit(1, category="salary", description="MARKET")
+
+    dropped = ledger.compact()
+
+    assert dropped == 2
+    assert ledger.pools["category"].values == ["", "groceries", "salary"]
+    assert "PAYROLL" not in ledger.pools["description"]
+    assert list(ledger.rows())[::2] == rows[::2]
+    assert ledger.edits == 2
+    assert ledger.compact() == 0
+
+
+@maintain_log
+def test_compact_command(tmp_path):
+    ledger = make_ledger()
+    ledger.edit(3, category="dining", description="MARKET")
+    ledger.save(tmp_path)
+    rollups.Rollups.load(tmp_path, ledger).save(tmp_path)
+    (tmp_path / "amount-0.col").write_bytes(
+        (tmp_path / "amount-0.col").read_bytes() + b"\0" * 4096
+    )
+
+    output = entrypoints.run_served_command(
+        ["compact", "--ledger", str(tmp_path)]
+    )
+    summary = entrypoints.run_served_command(
+        ["ledger", "--ledger", str(tmp_path), "--by", "category"]
+    )
+
+    assert output is not None
+    assert output.startswith("Compacted 4 transactions, dropped 1 unused")
+    assert (tmp_path / "amount-1.col").stat().st_size == 16 + 4 * 8
+    assert summary is not None
+    assert "uncategorized" not in summary
+    assert (
+        entrypoints.run_served_command(
+            ["compact", "--ledger", str(tmp_path / "missing")]
+        )
+        == f"Compact failed: No ledger at {tmp_path / 'missing'}"
+    )
+
+
+@maintain_log
+def test_edit_changes_row_in_place(tmp_path):
+    ledger = make_ledger()
+
+    old = ledger.edit(1, cents=260000, category="salary")
+    ledger.save(tmp_path)
+    loaded = Ledger.load(tmp_path)
+
+    assert ledger.decode(old) == Transaction(*ROWS[1])
+    assert loaded[1] == Transaction(
+        datetime.date(2024, 1, 20), 260000, "checking", "salary", "PAYROLL"
+    )
+    assert loaded.edits == 1
+    with pytest.raises(IndexError):
+        ledger.edit(4, cents=0)
+
+
+@maintain_log
+def test_assign_overwrites_rows():
+    ledger = make_ledger()
+    income = ledger.pools["category"].codes["income"]
+
+    changed = ledger.assign("category", 1, array("i", [income, income]))
+
+    assert changed == 1
+    assert ledger.edits == 1
+    assert [row.category for row in ledger.rows()] == [
+        "groceries",
+        "income",
+        "income",
+        "",
+    ]
+    with pytest.raises(IndexError):
+        ledger.assign("category", 3, array("i", [0, 0]))
+
+
+@maintain_log
+def test_ledger_command(tmp_path):
+    make_ledger().save(tmp_path)
+
+    output = entrypoints.run_served_command(
+        ["ledger", "--ledger", str(tmp_path), "--by", "category"]
+    )
+
+    assert output is not None
+    assert "Transactions: 4 of 4" in output
+    assert "Total: 2361.51" in output
+    assert "uncategorized" in output
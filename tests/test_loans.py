@@ -0,0 +1,163 @@
+"""Tests written for the loan calculator of pfts."""
+
+import json
+
+import pytest
+
+from pfts import loans
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+
+def simulate(principal: float, annual_rate: float, payment: float):
+    """Pay off a loan month by month, returning months and interest."""
+    balance, months, interest = principal, 0, 0.0
+    while balance >= loans.PAID_OFF:
+        interest += balance * annual_rate / 12
+        balance = balance * (1 + annual_rate / 12) - min(
+            payment, balance * (1 + annual_rate / 12)
+        )
+        months += 1
+    return months, interest
+
+
+@maintain_log
+def test_monthly_payment():
+    assert loans.monthly_payment(300000, 0.06, 360) == pytest.approx(
+        1798.65, abs=0.005
+    )
+    assert loans.monthly_payment(1200, 0, 12) == 100
+
+    with pytest.raises(ValueError):
+        loans.monthly_payment(1000, 0.05, 0)
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "principal, annual_rate, payment",
+    [(300000, 0.06, 2000), (1000, 0.12, 340), (1200, 0, 100), (50, 0.2, 80)],
+)
+def test_payoff_matches_month_by_month(principal, annual_rate, payment):
+    months, interest = simulate(principal, annual_rate, payment)
+
+    result = loans.payoff(principal, annual_rate, payment)
+
+    assert result.months == months
+    assert result.interest == pytest.approx(interest)
+    assert result.total_paid == pytest.approx(principal + interest)
+
+
+@maintain_log
+def test_payoff_with_extra():
+    base = loans.payoff_with_extra(300000, 0.06, 360)
+    extra = loans.payoff_with_extra(300000, 0.06, 360, 200)
+
+    assert base.months == 360
+    assert extra.months == 279
+    assert extra.interest < base.interest
+
+    with pytest.raises(ValueError):
+        loans.payoff(1000, 0.12, 10)
+
+
+@maintain_log
+def test_schedule():
+    payment = loans.monthly_payment(1000, 0.12, 3)
+    plan = loans.schedule(1000, 0.12, payment + 0.01)
+
+    assert len(plan.payment) == 3
+    assert plan.interest[0] == pytest.approx(10)
+    assert plan.balance[-1] == 0
+    assert sum(plan.principal) == pytest.approx(1000)
+    assert plan.payment[-1] == pytest.approx(
+        loans.payoff(1000, 0.12, payment + 0.01).last_payment
+    )
+
+
+@maintain_log
+def test_sweep_is_memoized():
+    loans.payoff.cache_clear()
+
+    results = loans.sweep(100000, 120, [0.04, 0.05], [0, 50, 100])
+    loans.sweep(100000, 120, [0.04, 0.05], [0, 50, 100])
+
+    assert len(results) == 6
+    assert results[0.05, 0] == loans.payoff_with_extra(100000, 0.05, 120)
+    assert loans.payoff.cache_info().hits >= 6
+
+
+@maintain_log
+def test_pay_off_debts():
+    debts = [
+        loans.Debt("card", 4500, 0.24, 90),
+        loans.Debt("car", 12000, 0.06, 250),
+        loans.Debt("store", 800, 0.18, 25),
+    ]
+
+    avalanche = loans.pay_off_debts(debts, 700, "avalanche")
+    snowball = loans.pay_off_debts(debts, 700, "snowball")
+
+    assert list(avalanche.paid_off) == ["card", "store", "car"]
+    assert list(snowball.paid_off) == ["store", "card", "car"]
+    assert avalanche.interest < snowball.interest
+    assert loans.compare_strategies(debts, 700) == [avalanche, snowball]
+
+
+@maintain_log
+def test_pay_off_single_debt_matches_payoff():
+    result = loans.pay_off_debts([loans.Debt("car", 12000, 0.06, 250)], 400)
+    expected = loans.payoff(12000, 0.06, 400)
+
+    assert result.months == expected.months
+    assert result.interest == pytest.approx(expected.interest)
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "debts, budget",
+    [
+        ([loans.Debt("card", 4500, 0.24, 90)], 50),
+        ([loans.Debt("card", 4500, 0.24, 90)], 90),
+        ([loans.Debt("a", 10, 0, 5), loans.Debt("a", 10, 0, 5)], 20),
+    ],
+)
+def test_pay_off_debts_rejects(debts, budget):
+    with pytest.raises(ValueError):
+        loans.pay_off_debts(debts, budget)
+
+
+@maintain_log
+def test_loan_commands():
+    payoff = entrypoints.run_served_command(
+        ["loan", "payoff", "--principal", "300000", "--rate", "0.06"]
+        + ["--extra", "200"]
+    )
+    plan = entrypoints.run_served_command(
+        ["loan", "payoff", "--principal", "1000", "--rate", "0.12"]
+        + ["--months", "3", "--schedule", "--format", "json"]
+    )
+    grid = entrypoints.run_served_command(
+        ["loan", "sweep", "--principal", "300000", "--rate", "0.04:0.06:0.01"]
+        + ["--extra", "0:200:100", "--metric", "months"]
+    )
+    compare = entrypoints.run_served_command(
+        ["loan", "compare", "--debt", "card:4500:0.24:90"]
+        + ["--debt", "car:12000:0.06:250", "--budget", "30"]
+    )
+
+    assert payoff is not None
+    assert payoff.splitlines()[0] == "Monthly payment: 1,798.65"
+    assert "saving 91,173.43 and 6y 9m" in payoff
+    assert plan is not None
+    assert json.loads(plan)[-1]["balance"] == 0
+    assert grid is not None
+    assert grid.splitlines()[0].split() == [
+        "Rate",
+        "+0.00",
+        "+100.00",
+        "+200.00",
+    ]
+    assert grid.splitlines()[3].split()[:2] == ["6.00%", "360"]
+    assert compare == (
+        "Loan failed: The budget does not cover the minimum payments."
+    )
@@ -0,0 +1,120 @@
+"""Tests written for the Monte Carlo projection of pfts."""
+
+import json
+import math
+import statistics
+
+import pytest
+
+from pfts import projection
+from pfts.util import entrypoints
+from tests.util import maintain_log
+
+
+@maintain_log
+def test_growth_table():
+    table = projection.growth_table(0.07, 0.15)
+
+    assert len(table) == 1 << projection.TABLE_BITS
+    assert list(table) == sorted(table)
+    assert statistics.fmean(table) == pytest.approx(1.07, abs=1e-3)
+    assert statistics.pstdev(table) == pytest.approx(0.15, abs=2e-3)
+
+
+@maintain_log
+def test_checkpoint_years():
+    assert projection.checkpoint_years(40) == [10, 20, 30, 40]
+    assert projection.checkpoint_years(25) == [10, 20, 25]
+    assert projection.checkpoint_years(5) == [5]
+
+
+@maintain_log
+def test_zero_volatility_matches_closed_form():
+    params = projection.ProjectionParams(
+        years=20,
+        initial=1000,
+        contribution=100,
+        retire_after=20,
+        mean_return=0.05,
+        volatility=0,
+        inflation=0,
+    )
+
+    result = projection.project(params, paths=10, seed=1)
+
+    annuity = 100 * (1.05**20 - 1) / 0.05
+    expected = 1000 * 1.05**20 + annuity
+    assert result.percentiles[20] == pytest.approx([expected] * 5)
+    assert result.success_rate == 1
+
+
+@maintain_log
+def test_results_are_in_todays_money():
+    params = projection.ProjectionParams(
+        years=10, initial=1000, mean_return=0.03, volatility=0, inflation=0.03
+    )
+
+    result = projection.project(params, paths=1, seed=1)
+
+    assert result.percentiles[10] == pytest.approx([1000] * 5)
+
+
+@maintain_log
+def test_same_seed_same_result_for_any_workers():
+    params = projection.ProjectionParams(
+        years=15, initial=100, contribution=10, withdrawal=30, retire_after=5
+    )
+
+    single = projection.project(params, 3000, seed=7, batch_size=1000)
+    pooled = projection.project(
+        params, 3000, seed=7, workers=2, batch_size=1000
+    )
+    rebatched = projection.project(params, 3000, seed=7, batch_size=2500)
+    other = projection.project(params, 3000, seed=8, batch_size=1000)
+
+    assert single.percentiles == pooled.percentiles
+    assert single.success_rate == pooled.success_rate
+    assert single.percentiles == rebatched.percentiles
+    assert single.success_rate == rebatched.success_rate
+    assert single.percentiles != other.percentiles
+
+
+@maintain_log
+def test_depleted_paths():
+    params = projection.ProjectionParams(
+        years=10, initial=100, withdrawal=30, volatility=0, inflation=0
+    )
+
+    result = projection.project(params, paths=5, seed=1)
+
+    assert result.success_rate == 0
+    assert result.percentiles[10] == [0] * 5
+    assert math.isclose(
+        projection.project(params._replace(withdrawal=1), 5).success_rate, 1
+    )
+
+
+@maintain_log
+def test_project_rejects_empty_projection():
+    with pytest.raises(ValueError):
+        projection.project(projection.ProjectionParams(0, 100), paths=10)
+
+
+@maintain_log
+def test_project_command():
+    command = ["project", "--years", "12", "--paths", "500", "--seed", "3"]
+    command += ["--initial", "1000", "--withdrawal", "50"]
+    command += ["--retire-after", "2"]
+
+    table = entrypoints.run_served_command(command)
+    output = entrypoints.run_served_command(command + ["--format", "json"])
+
+    assert table is not None
+    lines = table.splitlines()
+    assert lines[0].split() == ["Year", "P10", "P25", "P50", "P75", "P90"]
+    assert [line.split()[0] for line in lines[1:3]] == ["10", "12"]
+    assert lines[3].startswith("Money lasted in ")
+    assert lines[3].endswith("of 500 paths (seed 3)")
+    assert output is not None
+    assert json.loads(output)["seed"] == 3
+    assert list(json.loads(output)["percentiles"]) == ["10", "12"]
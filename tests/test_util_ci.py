@@ -0,0 +1,181 @@
+"""Tests written for the local CI scheduler of pfts."""
+
+import sys
+import threading
+import time
+
+from pfts.util import ci
+from tests.util import maintain_log
+
+
+def python_step(name: str, code: str, exclusive: bool = False) -> ci.CIStep:
+    """Create a step that runs a snippet of Python."""
+    return ci.CIStep(name, [sys.executable, "-c", code], exclusive)
+
+
+@maintain_log
+def test_runner_runs_steps_concurrently():
+    steps = [
+        python_step(f"sleep_{idx}", "import time; time.sleep(0.5)")
+        for idx in range(3)
+    ]
+
+    start = time.perf_counter()
+    results = ci.CIRunner(workers=3).run(steps)
+    elapsed = time.perf_counter() - start
+
+    assert all(result.passed for result in results)
+    assert elapsed < 1.2
+    assert [result.step for result in results] == steps
+
+
+@maintain_log
+def test_runner_captures_output_and_status():
+    steps = [
+        python_step("good", "print('all good')"),
+        python_step("bad", "import sys; print('broken'); sys.exit(3)"),
+    ]
+
+    good, bad = ci.CIRunner().run(steps)
+
+    assert good.passed and good.output.strip() == "all good"
+    assert bad.returncode == 3 and bad.output.strip() == "broken"
+    assert not ci.report_results([good, bad])
+
+
+@maintain_log
+def test_runner_fail_fast_cancels_others():
+    steps = [
+        python_step("slow", "import time; time.sleep(30)"),
+        python_step("bad", "import sys; sys.exit(1)"),
+    ]
+
+    start = time.perf_counter()
+    slow, bad = ci.CIRunner(workers=2, fail_fast=True).run(steps)
+
+    assert time.perf_counter() - start < 10
+    assert bad.returncode == 1
+    assert slow.cancelled
+
+
+@maintain_log
+def test_runner_reports_failures_racing_a_cancel():
+    runner = ci.CIRunner(fail_fast=True)
+    step = python_step("bad", "import sys, time; time.sleep(0.5); sys.exit(2)")
+    # Another step failing sets the flag while this one is running, but
+    # this one exits on its own before it could be terminated.
+    timer = threading.Timer(0.1, runner._cancelled.set)
+    timer.start()
+
+    (bad,) = runner.run([step])
+    timer.join()
+
+    assert bad.returncode == 2
+    assert not bad.cancelled
+
+
+@maintain_log
+def test_runner_exclusive_steps_run_first(tmp_path):
+    marker = tmp_path / "marker.txt"
+    steps = [
+        python_step("reader", f"open({str(marker)!r}).read()"),
+        python_step(
+            "writer",
+            f"import time; time.sleep(0.2); open({str(marker)!r}, 'w')",
+            exclusive=True,
+        ),
+    ]
+
+    reader, writer = ci.CIRunner().run(steps)
+
+    assert writer.passed
+    assert reader.passed
+
+
+@maintain_log
+def test_runner_missing_tool():
+    step = ci.CIStep("missing", ["pfts-tool-that-does-not-exist"])
+
+    (result,) = ci.CIRunner().run([step])
+
+    assert result.returncode == -1
+    assert not result.passed
+
+
+def counting_step(tmp_path, exit_code: int = 0) -> ci.CIStep:
+    """Step that appends to a counter file each time it actually runs."""
+    counter = tmp_path / "runs.txt"
+    code = (
+        f"open({str(counter)!r}, 'a').write('x'); "
+        f"import sys; sys.exit({exit_code})"
+    )
+    step = python_step("counted", code)
+    step.inputs = ["src", "settings.toml"]
+    return step
+
+
+def run_count(tmp_path) -> int:
+    counter = tmp_path / "runs.txt"
+    return len(counter.read_text()) if counter.exists() else 0
+
+
+@maintain_log
+def test_cache_skips_unchanged_inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "module.py").write_text("x = 1\n")
+
+    step = counting_step(tmp_path)
+    runner = ci.CIRunner(cache=ci.CICache(tmp_path / "cache"))
+
+    (first,) = runner.run([step])
+    (second,) = runner.run([step])
+
+    assert first.passed and not first.cached
+    assert second.passed and second.cached
+    assert run_count(tmp_path) == 1
+
+    # Editing, or adding, an input runs the step again.
+    (tmp_path / "src" / "module.py").write_text("x = 2\n")
+    (third,) = runner.run([step])
+    (tmp_path / "settings.toml").write_text("")
+    (fourth,) = runner.run([step])
+
+    assert not third.cached and not fourth.cached
+    assert run_count(tmp_path) == 3
+
+
+@maintain_log
+def test_cache_never_stores_failures(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    step = counting_step(tmp_path, exit_code=1)
+    runner = ci.CIRunner(cache=ci.CICache(tmp_path / "cache"))
+
+    runner.run([step])
+    (second,) = runner.run([step])
+
+    assert not second.passed and not second.cached
+    assert run_count(tmp_path) == 2
+
+
+@maintain_log
+def test_cache_key_depends_on_command(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ci.CICache(tmp_path / "cache")
+
+    step = counting_step(tmp_path)
+    other = counting_step(tmp_path)
+    other.args = other.args + ["--extra"]
+
+    assert cache.key_for(step) != cache.key_for(other)
+    assert cache.key_for(ci.CIStep("no inputs", ["true"])) is None
+
+
+@maintain_log
+def test_security_step_scans_its_inputs():
+    (step,) = [step for step in ci.DEFAULT_STEPS if step.package == "bandit"]
+    targets = step.args[step.args.index("-r") + 1 :]
+
+    assert targets == ci.SECURITY_PATHS
+    assert set(targets) <= set(step.inputs)
@@ -0,0 +1,35 @@
+"""Tests written for the documentation build of pfts."""
+
+import pathlib
+
+from pfts.util import docs
+from tests.util import maintain_log
+
+
+def make_package(root: pathlib.Path, modules: list[str]) -> pathlib.Path:
+    """Create a small package holding empty modules."""
+    package = root / "fakepkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf8")
+    for module in modules:
+        (package / f"{module}.py").write_text("", encoding="utf8")
+
+    return package
+
+
+@maintain_log
+def test_update_api_stubs_only_rewrites_changed(tmp_path):
+    package = make_package(tmp_path, ["alpha"])
+    source = tmp_path / "source"
+    source.mkdir()
+
+    first = docs.update_api_stubs(package, source)
+    assert {stub.name for stub in first} == {"fakepkg.rst", "modules.rst"}
+
+    assert docs.update_api_stubs(package, source) == []
+
+    (package / "beta.py").write_text("", encoding="utf8")
+    changed = docs.update_api_stubs(package, source)
+
+    assert [stub.name for stub in changed] == ["fakepkg.rst"]
+    assert "fakepkg.beta" in changed[0].read_text(encoding="utf8")
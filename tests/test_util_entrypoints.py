@@ -0,0 +1,60 @@
+"""Tests written for the entry points of pfts."""
+
+import subprocess  # nosec B404
+import sys
+
+import pytest
+
+# Modules that only some entry points need, and so must never be imported
+# just because a console script loaded pfts.util.entrypoints.
+DEFERRED_MODULES = [
+    "argparse",
+    "pathlib",
+    "subprocess",
+    "webbrowser",
+    "logging.config",
+    "pfts.util.general",
+    "pfts.util.logging",
+    "pfts.util.parsing",
+]
+
+
+def loaded_after(statement: str) -> set[str]:
+    """Run a statement in a fresh interpreter and list the loaded modules.
+
+    :param statement: Python statement to execute.
+    :type statement: str
+    :return: Names of every module in sys.modules afterwards.
+    :rtype: set[str]
+    """
+    script = f"import sys\n{statement}\nprint('\\n'.join(sys.modules))"
+    output = subprocess.check_output([sys.executable, "-c", script], text=True)
+    return set(output.split())
+
+
+@pytest.mark.parametrize("module", DEFERRED_MODULES)
+def test_entrypoints_import_is_lazy(module: str):
+    # Site hooks of some environments already load modules at startup.
+    loaded = loaded_after("import pfts.util.entrypoints") - loaded_after("")
+
+    assert module not in loaded
+
+
+def test_run_pfts_help_skips_unused_modules():
+    statement = (
+        "from pfts.util import entrypoints\n"
+        "try:\n"
+        "    entrypoints.run_pfts(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    loaded = loaded_after(statement)
+
+    assert "pfts.util.parsing" in loaded
+    for module in [
+        "subprocess",
+        "webbrowser",
+        "pfts.util.general",
+        "pfts.ledger",
+    ]:
+        assert module not in loaded
@@ -0,0 +1,84 @@
+"""Tests written for the file rewriting helpers of pfts."""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from pfts.util import files
+from tests.util import maintain_log
+
+
+@maintain_log
+def test_atomic_write_replaces_file(tmp_path):
+    target = tmp_path / "data.txt"
+    target.write_text("old\n", encoding="utf8")
+
+    with files.atomic_write(target) as fout:
+        fout.write("new\r\n")
+
+    assert target.read_bytes() == b"new\r\n"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+@maintain_log
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file modes")
+def test_atomic_write_new_file_honours_umask(tmp_path):
+    target = tmp_path / "data.txt"
+    existing = tmp_path / "existing.txt"
+    existing.write_text("old\n", encoding="utf8")
+    existing.chmod(0o640)
+
+    with files.atomic_write(target) as fout:
+        fout.write("new\n")
+    with files.atomic_write(existing) as fout:
+        fout.write("new\n")
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(target.stat().st_mode) == 0o666 & ~umask
+    assert stat.S_IMODE(existing.stat().st_mode) == 0o640
+
+
+@maintain_log
+def test_atomic_write_keeps_original_on_error(tmp_path):
+    target = tmp_path / "data.txt"
+    target.write_text("old\n", encoding="utf8")
+
+    with pytest.raises(RuntimeError):
+        with files.atomic_write(target) as fout:
+            fout.write("half written")
+            raise RuntimeError("crash mid-write")
+
+    assert target.read_text(encoding="utf8") == "old\n"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+@maintain_log
+def test_iter_lines_keeps_endings(tmp_path):
+    target = tmp_path / "data.txt"
+    target.write_bytes(b"a\r\nb\nc")
+
+    assert list(files.iter_lines(target)) == ["a\r\n", "b\n", "c"]
+    assert list(files.iter_lines(tmp_path / "missing.txt")) == []
+
+
+@maintain_log
+def test_replace_all_rolls_back(tmp_path):
+    first = tmp_path / "first.txt"
+    first.write_text("old first\n", encoding="utf8")
+    second = tmp_path / "second.txt"
+
+    staged = [
+        (files.write_temp(first, ["new first\n"]), first),
+        (files.write_temp(second, ["new second\n"]), second),
+    ]
+    # Losing the second temporary file makes its replacement fail.
+    staged[1][0].unlink()
+
+    with pytest.raises(FileNotFoundError):
+        files.replace_all(staged)
+
+    assert first.read_text(encoding="utf8") == "old first\n"
+    assert list(tmp_path.iterdir()) == [first]
@@ -1,5 +1,8 @@
 """Tests written for the general package of pfts."""
 
+import subprocess  # nosec B404
+import sys
+
 import pytest
 
 import pfts
@@ -120,3 +123,32 @@ def test_version_bump_missing_init_file(part, expected):
 
     version_info = general.bump_version(part, True)
     assert version_info == expected
+
+
+@maintain_log
+@maintain_mock_init
+def test_concurrent_bumps_are_not_lost():
+    """Each process bumps the patch version, none of them may be lost."""
+    with open(MOCK_INIT_FILEPATH, "r") as fin:
+        index = parsing.parse_init_file(MOCK_INIT_FILEPATH)
+        before = general.split_version_line(fin.readlines()[index])
+
+    script = (
+        "from pfts.util import general\n"
+        "for _ in range(5):\n"
+        "    general.bump_version('patch', True)"
+    )
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script])  # nosec B603
+        for _ in range(4)
+    ]
+    assert all(process.wait() == 0 for process in processes)
+
+    with open(MOCK_INIT_FILEPATH, "r") as fin:
+        lines = fin.readlines()
+
+    version_lines = [line for line in lines if "__version__" in line]
+    assert len(version_lines) == 1
+
+    after = general.split_version_line(version_lines[0])
+    assert after["patch"] == before["patch"] + 20
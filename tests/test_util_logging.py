@@ -1,7 +1,10 @@
 """Tests written for the logging of pfts."""
 
+import json
 import logging
+import logging.handlers
 import pathlib
+import time
 
 import pytest
 
@@ -151,3 +154,238 @@ def test_log_context_no_doubling(capsys):
     bad_version_info = "function bump_version returned: 1.2.5"
 
     assert bad_version_info not in captured_messages
+
+
+@maintain_log
+def test_log_context_disabled_skips_formatting(capsys):
+    """Arguments should never be formatted when DEBUG is disabled."""
+    pfts_log.setup_logging(30)
+
+    class ReprCounter:
+        calls = 0
+
+        def __repr__(self):
+            ReprCounter.calls += 1
+            return "ReprCounter()"
+
+    @pfts_log.log_context
+    def identity(value):
+        return value
+
+    identity(ReprCounter())
+
+    assert ReprCounter.calls == 0
+    assert "function identity" not in capsys.readouterr().err.lower()
+
+
+@maintain_log
+def test_log_context_disabled_still_logs_exception(capsys):
+    pfts_log.setup_logging(30)
+
+    @pfts_log.log_context
+    def raise_exception():
+        raise ValueError("bad value")
+
+    with pytest.raises(ValueError):
+        raise_exception()
+
+    captured_messages = capsys.readouterr().err.lower()
+
+    assert "function raise_exception called with args" not in captured_messages
+    assert (
+        "exception raised in raise_exception. exception: bad value"
+        in captured_messages
+    )
+
+
+@maintain_log
+def test_setup_logging_queue_mode(capsys):
+    pfts_log.setup_logging(10, use_queue=True)
+
+    root_handlers = logging.getLogger().handlers
+    assert any(
+        isinstance(handler, logging.handlers.QueueHandler)
+        for handler in root_handlers
+    )
+
+    pfts_log.stop_logging_queue()
+
+    # Everything queued before the stop must have reached the console.
+    assert "Successfully loaded in logging configs." in capsys.readouterr().err
+
+
+@maintain_log
+def test_logging_after_the_queue_stopped(capsys):
+    pfts_log.setup_logging(10, use_queue=True)
+    pfts_log.stop_logging_queue()
+
+    pfts_log.logger.warning("Logged after the queue stopped.")
+
+    assert not any(
+        isinstance(handler, logging.handlers.QueueHandler)
+        for handler in logging.getLogger().handlers
+    )
+    assert "Logged after the queue stopped." in capsys.readouterr().err
+
+
+@maintain_log
+def test_setup_logging_queue_mode_restart():
+    pfts_log.setup_logging(use_queue=True)
+    first_listener = pfts_log._queue_listener
+
+    pfts_log.setup_logging(use_queue=True)
+    second_listener = pfts_log._queue_listener
+
+    assert first_listener is not second_listener
+    assert first_listener._thread is None
+
+    pfts_log.setup_logging()
+    assert pfts_log._queue_listener is None
+
+
+def test_json_lines_formatter_log_context_records():
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    list_handler = ListHandler()
+    pfts_log.logger.addHandler(list_handler)
+    pfts_log.logger.setLevel(10)
+
+    @pfts_log.log_context
+    def normal_func(a, b=2):
+        return a + b
+
+    try:
+        normal_func(1, b=3)
+    finally:
+        pfts_log.logger.removeHandler(list_handler)
+
+    formatter = pfts_log.JsonLinesFormatter()
+    called, returned = [json.loads(formatter.format(r)) for r in records]
+
+    assert called["function"] == "normal_func"
+    assert called["signature"] == "1, b=3"
+    assert called["level"] == "DEBUG"
+    assert returned["msg"] == "Function normal_func returned: 4"
+    assert returned["duration_ns"] >= 0
+
+
+def test_batched_json_lines_handler_flushes_on_capacity(tmp_path):
+    log_file = tmp_path / "app.jsonl"
+    handler = pfts_log.BatchedJsonLinesHandler(
+        str(log_file), capacity=3, flush_interval=60
+    )
+    handler.setFormatter(pfts_log.JsonLinesFormatter())
+
+    def make_record(msg):
+        return logging.LogRecord("batch", 20, __file__, 1, msg, None, None)
+
+    handler.handle(make_record("first"))
+    handler.handle(make_record("second"))
+    assert log_file.read_text() == ""
+
+    handler.handle(make_record("third"))
+    handler.handle(make_record("fourth"))
+    lines = log_file.read_text().splitlines()
+    assert [json.loads(line)["msg"] for line in lines] == [
+        "first",
+        "second",
+        "third",
+    ]
+
+    handler.close()
+    assert json.loads(log_file.read_text().splitlines()[-1])["msg"] == (
+        "fourth"
+    )
+
+
+def test_batched_handler_flushes_after_the_interval(tmp_path):
+    log_file = tmp_path / "batched.log"
+    handler = pfts_log.BatchedJsonLinesHandler(
+        str(log_file), capacity=100, flush_interval=0.05
+    )
+    handler.setFormatter(pfts_log.JsonLinesFormatter())
+
+    handler.handle(
+        logging.LogRecord("batch", 20, __file__, 1, "alone", None, None)
+    )
+    deadline = time.monotonic() + 5
+    while not log_file.read_text() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    try:
+        assert json.loads(log_file.read_text())["msg"] == "alone"
+    finally:
+        handler.close()
+
+
+@maintain_log
+def test_setup_logging_unknown_format():
+    with pytest.raises(ValueError):
+        pfts_log.setup_logging(log_format="xml")
+
+
+@maintain_log
+def test_log_context_sampling(capsys):
+    @pfts_log.log_context
+    def sampled(value):
+        return value
+
+    name = f"{__name__}.{sampled.__qualname__}"
+    pfts_log.setup_logging(
+        10, trace_limits={"functions": {name: {"sample_every": 3}}}
+    )
+
+    try:
+        for value in range(7):
+            sampled(value)
+    finally:
+        pfts_log.setup_logging(10)
+
+    captured_messages = capsys.readouterr().err.lower()
+
+    for value in [0, 3, 6]:
+        assert f"function sampled called with args {value}\n" in (
+            captured_messages
+        )
+    for value in [1, 2, 4, 5]:
+        assert f"function sampled called with args {value}\n" not in (
+            captured_messages
+        )
+    assert f"suppressed tracing of 2 calls to {name.lower()}" in (
+        captured_messages
+    )
+
+
+@maintain_log
+def test_log_context_rate_limit_default(capsys):
+    pfts_log.setup_logging(
+        10, trace_limits={"default": {"rate": 0.001, "burst": 2}}
+    )
+
+    @pfts_log.log_context
+    def limited(value):
+        return value
+
+    try:
+        results = [limited(value) for value in range(5)]
+    finally:
+        pfts_log.setup_logging(10)
+
+    captured_messages = capsys.readouterr().err.lower()
+
+    assert results == list(range(5))
+    assert captured_messages.count("function limited called with args") == 2
+    # Reconfiguring logging flushes the pending summary.
+    assert "suppressed tracing of 3 calls to" in captured_messages
+
+
+def test_trace_limiter_invalid_settings():
+    with pytest.raises(ValueError):
+        pfts_log.TraceLimiter("bad", sample_every=0)
+
+    with pytest.raises(ValueError):
+        pfts_log.TraceLimiter("bad", rate=0)
@@ -1,5 +1,6 @@
 """Tests written for the parsing package of pfts."""
 
+import argparse
 import pathlib
 import sys
 from argparse import Namespace
@@ -7,41 +8,73 @@ from argparse import Namespace
 import pytest
 
 from pfts.util import parsing
-from tests.util import maintain_log, maintain_real_init
+from tests.util import maintain_log, maintain_mock_init, maintain_real_init
 
 
 @maintain_log
 @pytest.mark.parametrize(
     "input,expected",
     [
-        ([], Namespace(dev=False, disablecov=False, vbump=None)),
-        (["--dev"], Namespace(dev=True, disablecov=False, vbump=None)),
-        (["--disablecov"], Namespace(dev=False, disablecov=True, vbump=None)),
+        ([], Namespace(dev=False, disablecov=False, vbump=None, profile=None)),
+        (
+            ["--dev"],
+            Namespace(dev=True, disablecov=False, vbump=None, profile=None),
+        ),
+        (
+            ["--disablecov"],
+            Namespace(dev=False, disablecov=True, vbump=None, profile=None),
+        ),
         (
             ["--disablecov", "--dev"],
-            Namespace(dev=True, disablecov=True, vbump=None),
+            Namespace(dev=True, disablecov=True, vbump=None, profile=None),
+        ),
+        (
+            ["-v"],
+            Namespace(
+                dev=False, disablecov=False, vbump="patch", profile=None
+            ),
+        ),
+        (
+            ["--vbump"],
+            Namespace(
+                dev=False, disablecov=False, vbump="patch", profile=None
+            ),
         ),
-        (["-v"], Namespace(dev=False, disablecov=False, vbump="patch")),
-        (["--vbump"], Namespace(dev=False, disablecov=False, vbump="patch")),
         (
             ["-v", "major"],
-            Namespace(dev=False, disablecov=False, vbump="major"),
+            Namespace(
+                dev=False, disablecov=False, vbump="major", profile=None
+            ),
         ),
         (
             ["-v", "minor"],
-            Namespace(dev=False, disablecov=False, vbump="minor"),
+            Namespace(
+                dev=False, disablecov=False, vbump="minor", profile=None
+            ),
         ),
         (
             ["-v", "patch"],
-            Namespace(dev=False, disablecov=False, vbump="patch"),
+            Namespace(
+                dev=False, disablecov=False, vbump="patch", profile=None
+            ),
         ),
         (
             ["--dev", "-v", "major", "--disablecov"],
-            Namespace(dev=True, disablecov=True, vbump="major"),
+            Namespace(dev=True, disablecov=True, vbump="major", profile=None),
         ),
         (
             ["--dev", "--vbump", "--disablecov"],
-            Namespace(dev=True, disablecov=True, vbump="patch"),
+            Namespace(dev=True, disablecov=True, vbump="patch", profile=None),
+        ),
+        (
+            ["--profile"],
+            Namespace(
+                dev=False, disablecov=False, vbump=None, profile="table"
+            ),
+        ),
+        (
+            ["--profile", "json"],
+            Namespace(dev=False, disablecov=False, vbump=None, profile="json"),
         ),
     ],
     ids=[
@@ -56,6 +89,8 @@ from tests.util import maintain_log, maintain_real_init
         "v_patch",
         "All",
         "All_vbump_zero_arg",
+        "profile_default",
+        "profile_json",
     ],
 )
 def test_parse_input_all_valid_from_list(input: list, expected: Namespace):
@@ -70,10 +105,13 @@ def test_parse_input_from_cli(monkeypatch):
     with monkeypatch.context() as m:
         m.setattr(sys, "argv", ["pfts", "--dev", "--vbump"])
         args = parsing.parse_input()
-        assert args == Namespace(dev=True, disablecov=False, vbump="patch")
+        assert args == Namespace(
+            dev=True, disablecov=False, vbump="patch", profile=None
+        )
 
 
 @maintain_log
+@maintain_mock_init
 @pytest.mark.parametrize(
     "input, expected",
     [
@@ -85,3 +123,106 @@ def test_parse_input_from_cli(monkeypatch):
 )
 def test_parse_init_file(input: pathlib.Path, expected):
     assert parsing.parse_init_file(input) == expected
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "newline", ["\n", "\r\n", "\r"], ids=["lf", "crlf", "cr"]
+)
+def test_parse_init_file_large(tmp_path, monkeypatch, newline: str):
+    """Newlines spanning several count chunks are all counted."""
+    monkeypatch.setattr(parsing, "COUNT_CHUNK_SIZE", 64)
+    filepath = tmp_path / "generated.py"
+    lines = [f"value_{idx} = {idx}{newline}" for idx in range(500)]
+    lines.append(f"__version__ = '1.2.3'{newline}")
+    filepath.write_bytes("".join(lines).encode("utf8"))
+
+    assert parsing.parse_init_file(filepath) == 500
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "command, input, expected",
+    [
+        ("pfts", [], Namespace(dev=False, profile=None, command=None)),
+        ("pfts", ["--dev"], Namespace(dev=True, profile=None, command=None)),
+        (
+            "run-testing",
+            ["--disablecov"],
+            Namespace(disablecov=True, workers=1, impact=False),
+        ),
+        (
+            "version-bump",
+            ["--dev", "-v", "minor"],
+            Namespace(dev=True, vbump="minor", pre=None, build=None),
+        ),
+        (
+            "version-bump",
+            ["-v", "pre", "--pre", "rc.1", "--build", "5"],
+            Namespace(dev=False, vbump="pre", pre="rc.1", build="5"),
+        ),
+    ],
+    ids=["pfts_empty", "pfts_dev", "testing_cov", "bump_minor", "bump_pre"],
+)
+def test_parse_input_per_command(command, input, expected):
+    assert parsing.parse_input(input, command) == expected
+
+
+@maintain_log
+def test_parse_input_rejects_other_tools_flags():
+    with pytest.raises(SystemExit):
+        parsing.parse_input(["--disablecov"], "version-bump")
+
+
+def test_get_parser_is_cached():
+    assert parsing.get_parser("pfts") is parsing.get_parser("pfts")
+    assert parsing.get_parser("pfts") is not parsing.get_parser()
+
+
+def test_get_parser_unknown_command():
+    with pytest.raises(ValueError):
+        parsing.get_parser("not-a-command")
+
+
+def test_parse_many():
+    results = parsing.parse_many([["--dev"], [], ["-v"]], "version-bump")
+
+    assert results == [
+        Namespace(dev=True, vbump=None, pre=None, build=None),
+        Namespace(dev=False, vbump=None, pre=None, build=None),
+        Namespace(dev=False, vbump="patch", pre=None, build=None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("0.05", [0.05]),
+        ("0.03:0.05:0.01", [0.03, 0.04, 0.05]),
+        ("0:250:100", [0, 100, 200]),
+    ],
+)
+def test_float_range(text: str, expected: list[float]):
+    assert parsing.float_range(text) == expected
+
+
+@pytest.mark.parametrize("text", ["abc", "1:2", "2:1:0.5", "0:1:0"])
+def test_float_range_rejects(text: str):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parsing.float_range(text)
+
+
+def test_debt_spec():
+    assert parsing.debt_spec("card:4500:0.24:90") == ("card", 4500, 0.24, 90)
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        parsing.debt_spec("card:4500")
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "flags", [["--volatility", "-0.1"], ["--retire-after", "-1"]]
+)
+def test_project_rejects_negative_values(flags: list[str]):
+    with pytest.raises(SystemExit):
+        parsing.parse_input(["project", *flags], "pfts")
@@ -0,0 +1,94 @@
+"""Tests written for the profiling registry of pfts."""
+
+import io
+import json
+
+import pytest
+
+from pfts.util import logging as pfts_log
+from pfts.util import profiling
+from tests.util import maintain_log
+
+
+@pytest.fixture
+def active_profiler():
+    """Enables the shared profiler for a single test, then cleans up."""
+    profiling.PROFILER.reset()
+    profiling.PROFILER.enable()
+    yield profiling.PROFILER
+    profiling.PROFILER.disable()
+    profiling.PROFILER.reset()
+
+
+def test_function_stats_aggregates():
+    stats = profiling.FunctionStats("example")
+
+    for wall_ns in [30, 10, 20, 40]:
+        stats.add(wall_ns, wall_ns // 2)
+
+    summary = stats.to_dict()
+
+    assert summary["count"] == 4
+    assert summary["total_wall_ns"] == 100
+    assert summary["total_cpu_ns"] == 50
+    assert summary["min_wall_ns"] == 10
+    assert summary["max_wall_ns"] == 40
+    assert summary["p50_wall_ns"] == 20
+    assert summary["p99_wall_ns"] == 40
+
+
+def test_function_stats_samples_are_bounded():
+    stats = profiling.FunctionStats("example")
+
+    for wall_ns in range(profiling.MAX_SAMPLES * 2):
+        stats.add(wall_ns, 0)
+
+    assert stats.count == profiling.MAX_SAMPLES * 2
+    assert len(stats.samples) == profiling.MAX_SAMPLES
+
+
+@maintain_log
+def test_log_context_records_when_active(active_profiler):
+    pfts_log.setup_logging(30)
+
+    @pfts_log.log_context
+    def profiled(a):
+        return a * 2
+
+    for value in range(5):
+        profiled(value)
+
+    rows = {row["function"]: row for row in active_profiler.snapshot()}
+    row = rows[f"{__name__}.{profiled.__qualname__}"]
+
+    assert row["count"] == 5
+
+
+@maintain_log
+def test_log_context_skips_when_inactive():
+    pfts_log.setup_logging(30)
+    profiling.PROFILER.disable()
+
+    @pfts_log.log_context
+    def unprofiled():
+        return True
+
+    unprofiled()
+
+    name = f"{__name__}.{unprofiled.__qualname__}"
+    assert profiling.PROFILER.stats[name].count == 0
+
+
+def test_profiler_dump_formats(active_profiler):
+    active_profiler.stats_for("dumped").add(1_500, 1_000)
+
+    json_stream = io.StringIO()
+    active_profiler.dump("json", json_stream)
+    assert json.loads(json_stream.getvalue())[0]["function"] == "dumped"
+
+    table_stream = io.StringIO()
+    active_profiler.dump("table", table_stream)
+    assert "dumped" in table_stream.getvalue()
+
+    with pytest.raises(ValueError):
+        active_profiler.dump("xml")
@@ -0,0 +1,189 @@
+"""Tests written for the command server of pfts."""
+
+import io
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from pfts.util import server
+from pfts.util.entrypoints import run_served_command
+from tests.util import maintain_log
+
+
+def echo_command(argv: list[str]) -> str | None:
+    """Stand-in for run_served_command."""
+    if argv == ["fail"]:
+        raise RuntimeError("asked to fail")
+    if argv == ["slow"]:
+        time.sleep(0.2)
+    print("printed", end=" ")
+    return " ".join(argv)
+
+
+@maintain_log
+def test_execute_request_success():
+    response = server.execute_request("a 'b c'", echo_command)
+
+    assert response == {"ok": True, "output": "printed a b c"}
+
+
+@maintain_log
+def test_execute_request_exception():
+    response = server.execute_request("fail", echo_command)
+
+    assert response == {"ok": False, "error": "RuntimeError: asked to fail"}
+
+
+@maintain_log
+def test_execute_request_argparse_error():
+    response = server.execute_request("--not-a-flag", run_served_command)
+
+    assert not response["ok"]
+    assert "unrecognized arguments" in response["error"]
+
+
+@maintain_log
+def test_run_served_command_rejects_serve():
+    response = server.execute_request("serve", run_served_command)
+
+    assert not response["ok"]
+    assert "ValueError" in response["error"]
+
+
+@maintain_log
+def test_serve_stream_until_shutdown():
+    stream_in = io.StringIO("one\n\ntwo\nshutdown\nthree\n")
+    stream_out = io.StringIO()
+
+    handled = server.serve_stream(stream_in, stream_out, echo_command)
+
+    responses = [
+        json.loads(line) for line in stream_out.getvalue().splitlines()
+    ]
+    assert handled == 2
+    assert [r["output"] for r in responses] == ["printed one", "printed two"]
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Requires Unix sockets"
+)
+@maintain_log
+def test_serve_unix_socket_round_trip(tmp_path):
+    socket_path = str(tmp_path / "pfts.sock")
+    thread = threading.Thread(
+        target=server.serve_unix_socket, args=(socket_path, echo_command)
+    )
+    thread.start()
+
+    deadline = time.monotonic() + 5
+    while not (tmp_path / "pfts.sock").exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    with server.PftsClient(socket_path) as client:
+        assert client.run(["x", "y"]) == {"ok": True, "output": "printed x y"}
+        assert not client.run(["fail"])["ok"]
+
+    # A second connection is served after the first one closes.
+    server.PftsClient(socket_path).shutdown()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not (tmp_path / "pfts.sock").exists()
+
+
+def start_socket_server(tmp_path) -> tuple[str, threading.Thread]:
+    """Serve echo_command on a Unix socket from a background thread."""
+    socket_path = str(tmp_path / "pfts.sock")
+    thread = threading.Thread(
+        target=server.serve_unix_socket, args=(socket_path, echo_command)
+    )
+    thread.start()
+
+    deadline = time.monotonic() + 5
+    while not (tmp_path / "pfts.sock").exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return socket_path, thread
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Requires Unix sockets"
+)
+@maintain_log
+def test_serve_unix_socket_survives_client_disconnect(tmp_path):
+    socket_path, thread = start_socket_server(tmp_path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(b"slow\n")
+
+    with server.PftsClient(socket_path) as client:
+        assert client.run(["x"]) == {"ok": True, "output": "printed x"}
+        client.shutdown()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Requires Unix sockets"
+)
+@maintain_log
+def test_serve_unix_socket_rejects_invalid_utf8(tmp_path):
+    socket_path, thread = start_socket_server(tmp_path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(b"\xff\xfe\nx y\n")
+        with client.makefile("r", encoding="utf8") as stream:
+            responses = [json.loads(stream.readline()) for _ in range(2)]
+
+    server.PftsClient(socket_path).shutdown()
+    thread.join(timeout=5)
+
+    assert responses == [
+        {"ok": False, "error": "Request is not valid UTF-8."},
+        {"ok": True, "output": "printed x y"},
+    ]
+    assert not thread.is_alive()
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Requires Unix sockets"
+)
+@maintain_log
+def test_serve_unix_socket_only_replaces_sockets(tmp_path):
+    ledger_file = tmp_path / "meta.json"
+    ledger_file.write_text("{}", encoding="utf8")
+
+    with pytest.raises(FileExistsError):
+        server.serve_unix_socket(str(ledger_file), echo_command)
+    assert ledger_file.read_text(encoding="utf8") == "{}"
+
+    # A socket left by a server that did not clean up is replaced.
+    socket_path = str(tmp_path / "pfts.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(socket_path)
+    thread = threading.Thread(
+        target=server.serve_unix_socket,
+        args=(socket_path, echo_command),
+        daemon=True,
+    )
+    thread.start()
+
+    # The stale socket refuses connections until the server replaced it.
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            server.PftsClient(socket_path).shutdown()
+            break
+        except OSError:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
@@ -0,0 +1,140 @@
+"""Tests written for test sharding and impact selection of pfts."""
+
+import pytest
+
+from pfts.util import testrun
+
+NODE_IDS = [
+    "tests/test_a.py::test_one",
+    "tests/test_a.py::test_two[case1]",
+    "tests/test_a.py::test_two[case2]",
+    "tests/test_b.py::test_three",
+    "tests/test_c.py::test_four",
+]
+
+HASHES = {
+    "pfts/module_a.py": "a",
+    "pfts/module_b.py": "b",
+    "tests/test_a.py": "ta",
+    "tests/test_b.py": "tb",
+    "tests/test_c.py": "tc",
+    "tests/util.py": "u",
+    "pyproject.toml": "p",
+}
+
+
+def make_map() -> testrun.ImpactMap:
+    return testrun.ImpactMap(
+        {
+            "pfts/module_a.py": {"tests/test_a.py::test_two"},
+            "pfts/module_b.py": {
+                "tests/test_b.py::test_three",
+                "tests/test_a.py::test_one",
+            },
+        },
+        dict(HASHES),
+    )
+
+
+def test_shard_tests_keeps_files_together():
+    shards = testrun.shard_tests(NODE_IDS, 2)
+
+    assert sorted(sum(shards, [])) == sorted(NODE_IDS)
+    assert len(shards) == 2
+    for shard in shards:
+        files = {node_id.split("::")[0] for node_id in shard}
+        for other in shards:
+            if other is not shard:
+                assert not files & {n.split("::")[0] for n in other}
+
+
+def test_shard_tests_more_shards_than_files():
+    assert len(testrun.shard_tests(NODE_IDS, 10)) == 3
+
+
+def test_context_to_node_id():
+    context = "tests.test_util_testrun.test_context_to_node_id"
+
+    assert testrun.context_to_node_id(context) == (
+        "tests/test_util_testrun.py::test_context_to_node_id"
+    )
+    assert testrun.context_to_node_id("not.a.real.module") is None
+
+
+def test_select_nothing_changed():
+    assert make_map().select(NODE_IDS, dict(HASHES)) == []
+
+
+def test_select_changed_source_file():
+    hashes = dict(HASHES, **{"pfts/module_a.py": "changed"})
+
+    assert make_map().select(NODE_IDS, hashes) == [
+        "tests/test_a.py::test_two[case1]",
+        "tests/test_a.py::test_two[case2]",
+    ]
+
+
+def test_select_changed_test_file():
+    hashes = dict(HASHES, **{"tests/test_c.py": "changed"})
+
+    assert make_map().select(NODE_IDS, hashes) == [
+        "tests/test_c.py::test_four"
+    ]
+
+
+def test_select_global_changes_run_everything():
+    assert (
+        make_map().select(NODE_IDS, dict(HASHES, **{"pyproject.toml": "x"}))
+        is None
+    )
+    assert (
+        make_map().select(NODE_IDS, dict(HASHES, **{"tests/util.py": "x"}))
+        is None
+    )
+
+
+def test_update_replaces_tests_that_ran(tmp_path):
+    impact_map = make_map()
+    ran = testrun.ImpactMap(
+        {"pfts/module_a.py": {"tests/test_b.py::test_three"}}, {}
+    )
+    hashes = dict(HASHES, **{"pfts/module_b.py": "changed"})
+
+    impact_map.update(ran, ["tests/test_b.py::test_three"], hashes)
+
+    assert impact_map.tests_by_file["pfts/module_b.py"] == {
+        "tests/test_a.py::test_one"
+    }
+    assert (
+        "tests/test_b.py::test_three"
+        in (impact_map.tests_by_file["pfts/module_a.py"])
+    )
+    assert impact_map.hashes == hashes
+
+    impact_map.save(tmp_path / "impact.json")
+    loaded = testrun.ImpactMap.load(tmp_path / "impact.json")
+
+    assert loaded is not None
+    assert loaded.tests_by_file == impact_map.tests_by_file
+    assert testrun.ImpactMap.load(tmp_path / "missing.json") is None
+
+
+@pytest.mark.parametrize("returncode, recorded", [(0, True), (1, False)])
+def test_run_tests_only_records_passing_runs(
+    monkeypatch, returncode: int, recorded: bool
+):
+    saved = []
+    monkeypatch.setattr(testrun, "hash_inputs", lambda: dict(HASHES))
+    monkeypatch.setattr(testrun.ImpactMap, "load", classmethod(lambda c: None))
+    monkeypatch.setattr(
+        testrun.ImpactMap,
+        "from_coverage",
+        classmethod(lambda cls, hashes: make_map()),
+    )
+    monkeypatch.setattr(
+        testrun.ImpactMap, "save", lambda self: saved.append(1)
+    )
+    monkeypatch.setattr(testrun.subprocess, "call", lambda args: returncode)
+
+    assert testrun.run_tests(impact=True) is recorded
+    assert bool(saved) is recorded
@@ -0,0 +1,162 @@
+"""Tests written for the version synchronization engine of pfts."""
+
+import datetime
+
+import pytest
+
+from pfts.util import versioning
+from pfts.util.versioning import Version
+from tests.util import maintain_log
+
+CHANGELOG = """# Changelog
+
+## [Unreleased]
+
+### Added
+
+- Something new.
+
+## [0.1.0] - 2025-04-06
+
+[//] [unreleased]:
+[//] [0.1.0]: """
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("__version__ = '1.2.3'", Version(1, 2, 3)),
+        ('__version__ = "1.2.3-rc.1"', Version(1, 2, 3, "rc.1")),
+        ("1.2.3-rc.1+build.5", Version(1, 2, 3, "rc.1", "build.5")),
+        ("1.2.3+5", Version(1, 2, 3, build="5")),
+    ],
+)
+def test_version_parse(text: str, expected: Version):
+    assert Version.parse(text) == expected
+
+
+@maintain_log
+def test_version_parse_rejects_missing_version():
+    with pytest.raises(ValueError):
+        Version.parse("__version__ = 'unknown'")
+
+
+@maintain_log
+@pytest.mark.parametrize(
+    "version, part, pre, build, expected",
+    [
+        ("1.2.3", "major", None, None, "2.2.3"),
+        ("1.2.3", "minor", None, None, "1.3.3"),
+        ("1.2.3-rc.1+5", "patch", None, None, "1.2.4"),
+        ("1.2.3", "pre", None, None, "1.2.4-rc.1"),
+        ("1.2.4-rc.1", "pre", None, None, "1.2.4-rc.2"),
+        ("1.2.4-beta", "pre", None, None, "1.2.4-beta.1"),
+        ("1.2.3", "minor", "alpha.1", "7", "1.3.3-alpha.1+7"),
+    ],
+)
+def test_version_bump(version, part, pre, build, expected):
+    assert str(Version.parse(version).bump(part, pre, build)) == expected
+
+
+@maintain_log
+def test_version_bump_unknown_part():
+    with pytest.raises(ValueError):
+        Version(1, 2, 3).bump("mjr")
+
+
+@maintain_log
+def test_toml_locator_only_matches_its_table(tmp_path):
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        '[tool.other]\nversion = "9.9.9"\n\n[project]\nversion = "1.0.0"\n',
+        encoding="utf8",
+    )
+    target = versioning.VersionTarget(pyproject, versioning.TomlLocator())
+
+    old, new = versioning.VersionSync([target]).bump("minor")
+
+    assert (old, new) == (Version(1, 0, 0), Version(1, 1, 0))
+    assert pyproject.read_text(encoding="utf8") == (
+        '[tool.other]\nversion = "9.9.9"\n\n[project]\nversion = "1.1.0"\n'
+    )
+
+
+@maintain_log
+def test_locators_implement_find():
+    changelog = versioning.ChangelogLocator()
+
+    with pytest.raises(TypeError):
+        versioning.VersionLocator()  # type: ignore[abstract]
+    assert changelog.find("## [0.1.0] - 2025-04-06") == (4, 9)
+    assert changelog.find("## [Unreleased]") is None
+    assert versioning.TomlLocator().find('version = "1.0.0"') == (11, 16)
+
+
+@maintain_log
+def test_sync_updates_every_target(tmp_path):
+    init = tmp_path / "__init__.py"
+    init.write_text('"""Docs."""\n__version__ = "0.1.0"\n', encoding="utf8")
+    changelog = tmp_path / "Changelog.MD"
+    changelog.write_text(CHANGELOG, encoding="utf8")
+
+    targets = [
+        versioning.VersionTarget(init, versioning.PythonLocator()),
+        versioning.VersionTarget(
+            changelog, versioning.ChangelogLocator("https://x/v{version}")
+        ),
+    ]
+    versioning.VersionSync(targets).bump("minor")
+
+    today = datetime.date.today().isoformat()
+    assert init.read_text(encoding="utf8") == (
+        '"""Docs."""\n__version__ = "0.2.0"\n'
+    )
+    assert changelog.read_text(encoding="utf8") == CHANGELOG.replace(
+        "## [Unreleased]\n", f"## [Unreleased]\n\n## [0.2.0] - {today}\n"
+    ).replace(
+        "[//] [unreleased]:\n",
+        "[//] [unreleased]:\n[//] [0.2.0]: https://x/v0.2.0\n",
+    )
+
+
+@maintain_log
+def test_sync_rolls_back_when_a_target_fails(tmp_path):
+    init = tmp_path / "__init__.py"
+    init.write_text("__version__ = '0.1.0'\n", encoding="utf8")
+    changelog = tmp_path / "Changelog.MD"
+    changelog.write_text("# No unreleased section\n", encoding="utf8")
+
+    targets = [
+        versioning.VersionTarget(init, versioning.PythonLocator()),
+        versioning.VersionTarget(changelog, versioning.ChangelogLocator()),
+    ]
+
+    with pytest.raises(versioning.VersionSyncError):
+        versioning.VersionSync(targets).bump("patch")
+
+    assert init.read_text(encoding="utf8") == "__version__ = '0.1.0'\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "Changelog.MD",
+        "__init__.py",
+    ]
+
+
+@maintain_log
+def test_sync_stages_many_targets_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setattr(versioning, "CONCURRENT_THRESHOLD", 1)
+
+    paths = []
+    for idx in range(6):
+        path = tmp_path / f"module_{idx}.py"
+        path.write_text("__version__ = '1.0.0'\n", encoding="utf8")
+        paths.append(path)
+
+    targets = [
+        versioning.VersionTarget(path, versioning.PythonLocator())
+        for path in paths
+    ]
+    versioning.VersionSync(targets, workers=3).bump("major")
+
+    for path in paths:
+        assert path.read_text(encoding="utf8") == "__version__ = '2.0.0'\n"
@@ -1,15 +1,23 @@
 """Utility functions for testing"""
 
+import contextlib
 import functools
 import pathlib
 from typing import Callable
 
+from pfts.util.files import file_lock
 
-def create_maintainer(filepath: pathlib.Path) -> Callable:
+
+def create_maintainer(
+    filepath: pathlib.Path, exclusive: bool = False
+) -> Callable:
     """Decorator factory that creates a decorator based on the based in file
 
     :param filepath: Filepath of the file to maintain state for
     :type filepath: pathlib.Path
+    :param exclusive: Hold an interprocess lock on the file for the whole
+        test, defaults to False
+    :type exclusive: bool, optional
     :return: Decorator which maintains a defined file state
     :rtype: Callable
     """
@@ -25,6 +33,17 @@ def create_maintainer(filepath: pathlib.Path) -> Callable:
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            # Locks a name next to the file, since the code under test
+            # may lock the file itself, which would then wait on the test.
+            lock = (
+                file_lock(filepath.with_name(f"{filepath.name}.tests"))
+                if exclusive
+                else contextlib.nullcontext()
+            )
+            with lock:
+                return maintain(*args, **kwargs)
+
+        def maintain(*args, **kwargs):
             # If file doesn't exist then create it.
             # Rather create new files than crash
             if not filepath.exists():
@@ -53,6 +72,6 @@ MOCK_INIT_FILEPATH = pathlib.Path(__file__).parent / "data" / "mock_init.txt"
 REAL_INIT_FILEPATH = pathlib.Path(__file__).parents[1] / "pfts" / "__init__.py"
 LOG_FILEPATH = pathlib.Path(__file__).parents[1] / "logs" / "app.log"
 
-maintain_mock_init = create_maintainer(MOCK_INIT_FILEPATH)
-maintain_real_init = create_maintainer(REAL_INIT_FILEPATH)
+maintain_mock_init = create_maintainer(MOCK_INIT_FILEPATH, exclusive=True)
+maintain_real_init = create_maintainer(REAL_INIT_FILEPATH, exclusive=True)
 maintain_log = create_maintainer(LOG_FILEPATH)